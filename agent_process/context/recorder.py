@@ -1,7 +1,7 @@
 # 代碼功能說明: 上下文記錄器
 # 創建日期: 2025-01-27 14:00 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 14:00 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """上下文記錄器，提供消息記錄和檢索功能。"""
 
@@ -13,6 +13,7 @@ from typing import Any, Dict, List, Optional
 
 import redis  # type: ignore[import-untyped]
 
+from databases.redis import get_redis_client, rpush_with_ttl
 from agent_process.context.models import ContextConfig, ContextMessage
 
 logger = logging.getLogger(__name__)
@@ -53,7 +54,7 @@ class ContextRecorder:
 
         if self._config.redis_url:
             try:
-                self._redis = redis.Redis.from_url(
+                self._redis = get_redis_client(
                     self._config.redis_url, decode_responses=True
                 )
                 # 測試連接
@@ -104,11 +105,10 @@ class ContextRecorder:
             message_dict = message.model_dump()
 
             if self._redis is not None:
-                # 使用 Redis List 存儲消息
+                # 使用 Redis List 存儲消息（RPUSH + EXPIRE 合併為一次往返）
                 key = self._key(session_id, "messages")
                 message_json = json.dumps(message_dict, default=str)
-                self._redis.rpush(key, message_json)
-                self._redis.expire(key, self._ttl)
+                rpush_with_ttl(self._redis, key, message_json, ttl=self._ttl)
             else:
                 # 使用內存存儲
                 if session_id not in self._memory_store:
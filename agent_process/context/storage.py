@@ -1,13 +1,12 @@
 # 代碼功能說明: 存儲抽象層
 # 創建日期: 2025-01-27 14:00 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 14:00 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """存儲抽象層，提供統一的存儲接口。"""
 
 from __future__ import annotations
 
-import json
 import logging
 import re
 from abc import ABC, abstractmethod
@@ -15,6 +14,8 @@ from typing import Any, Dict, List, Optional
 
 import redis  # type: ignore[import-untyped]
 
+from databases.redis import get_redis_client, get_serializer, scan_keys
+
 logger = logging.getLogger(__name__)
 
 
@@ -92,16 +93,25 @@ class StorageBackend(ABC):
 class RedisStorageBackend(StorageBackend):
     """Redis 存儲後端實現。"""
 
-    def __init__(self, redis_url: str, decode_responses: bool = True) -> None:
+    def __init__(
+        self,
+        redis_url: str,
+        decode_responses: bool = True,
+        serializer: str = "json",
+    ) -> None:
         """
         初始化 Redis 存儲後端。
 
         Args:
             redis_url: Redis 連接 URL
-            decode_responses: 是否解碼響應
+            decode_responses: 是否解碼響應（二進位序列化器會強制關閉）
+            serializer: 值序列化格式（json、orjson、msgpack）
         """
+        self._serializer = get_serializer(serializer)
+        if self._serializer.binary:
+            decode_responses = False
         try:
-            self._redis: Optional[redis.Redis] = redis.Redis.from_url(
+            self._redis: Optional[redis.Redis] = get_redis_client(
                 redis_url, decode_responses=decode_responses
             )
             self._redis.ping()
@@ -115,11 +125,11 @@ class RedisStorageBackend(StorageBackend):
         if self._redis is None:
             return False
         try:
-            value_json = json.dumps(value, default=str)
+            payload = self._serializer.dumps(value)
             if ttl is not None:
-                self._redis.setex(key, ttl, value_json)
+                self._redis.setex(key, ttl, payload)
             else:
-                self._redis.set(key, value_json)
+                self._redis.set(key, payload)
             return True
         except Exception as exc:
             logger.error("Failed to save to Redis: %s", exc)
@@ -130,13 +140,11 @@ class RedisStorageBackend(StorageBackend):
         if self._redis is None:
             return None
         try:
-            value_json = self._redis.get(key)
-            if value_json is None:
+            raw = self._redis.get(key)
+            if raw is None:
                 return None
-            if isinstance(value_json, bytes):
-                value_json = value_json.decode("utf-8")
-            if isinstance(value_json, str):
-                return json.loads(value_json)
+            if isinstance(raw, (bytes, str)):
+                return self._serializer.loads(raw)
             return None
         except Exception as exc:
             logger.error("Failed to load from Redis: %s", exc)
@@ -163,16 +171,14 @@ class RedisStorageBackend(StorageBackend):
             return False
 
     def list_keys(self, pattern: str = "*") -> List[str]:
-        """列出 Redis 中匹配模式的鍵。"""
+        """列出 Redis 中匹配模式的鍵（使用 SCAN，不阻塞伺服器）。"""
         if self._redis is None:
             return []
         try:
-            keys = self._redis.keys(pattern)
-            if isinstance(keys, list):
-                return keys
-            if keys:
-                return list(keys)  # type: ignore[arg-type]
-            return []
+            return [
+                key.decode("utf-8") if isinstance(key, bytes) else key
+                for key in scan_keys(self._redis, pattern)
+            ]
         except Exception as exc:
             logger.error("Failed to list keys from Redis: %s", exc)
             return []
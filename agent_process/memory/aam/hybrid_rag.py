@@ -1,22 +1,26 @@
 # 代碼功能說明: AAM 混合 RAG 服務
 # 創建日期: 2025-11-28 21:54 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-28 21:54 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """AAM 混合 RAG 服務 - 實現向量檢索 + 圖檢索混合 RAG"""
 
 from __future__ import annotations
 
+import copy
 import time
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import structlog
 
+from core.cache import TTLCache, make_cache_key
 from agent_process.memory.aam.models import Memory
 from agent_process.memory.aam.aam_core import AAMManager
 from agent_process.memory.aam.realtime_retrieval import RealtimeRetrievalService
+from agent_process.memory.aam.scoring import cosine_rerank, fuse_results, top_k_indices
 
 logger = structlog.get_logger(__name__)
 
@@ -40,6 +44,9 @@ class HybridRAGService:
         vector_weight: float = 0.6,
         graph_weight: float = 0.4,
         max_workers: int = 4,
+        cache_enabled: bool = True,
+        cache_ttl: int = 300,
+        cache_max_size: int = 512,
     ):
         """
         初始化混合 RAG 服務
@@ -51,6 +58,9 @@ class HybridRAGService:
             vector_weight: 向量檢索權重
             graph_weight: 圖檢索權重
             max_workers: 並行檢索的最大工作線程數
+            cache_enabled: 是否啟用結果緩存
+            cache_ttl: 緩存過期時間（秒）
+            cache_max_size: 緩存最大項目數
         """
         self.aam_manager = aam_manager
         self.retrieval_service = retrieval_service or RealtimeRetrievalService(
@@ -62,8 +72,15 @@ class HybridRAGService:
         self.max_workers = max_workers
         self.logger = logger.bind(component="hybrid_rag")
 
-        # 結果緩存
-        self._cache: Dict[str, tuple[float, List[Dict[str, Any]]]] = {}
+        # 結果緩存（有界 LRU + TTL，緩存內容為不可變快照）
+        self.cache_enabled = cache_enabled
+        self._cache: TTLCache[Tuple[Dict[str, Any], ...]] = TTLCache(
+            "aam.hybrid_rag",
+            max_size=cache_max_size,
+            ttl=cache_ttl,
+            freeze=lambda results: tuple(copy.deepcopy(results)),
+            thaw=lambda results: copy.deepcopy(list(results)),
+        )
 
     def retrieve(
         self,
@@ -87,6 +104,20 @@ class HybridRAGService:
         start_time = time.time()
         strategy = strategy or self.strategy
 
+        cache_key = make_cache_key(
+            query,
+            top_k,
+            strategy.value,
+            min_relevance,
+            self.vector_weight,
+            self.graph_weight,
+        )
+        if self.cache_enabled:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug("Hybrid RAG cache hit", query=query[:50])
+                return cached
+
         try:
             # 根據策略執行檢索
             if strategy == RetrievalStrategy.VECTOR_FIRST:
@@ -98,6 +129,8 @@ class HybridRAGService:
 
             # 格式化結果供 LLM 使用
             formatted_results = self._format_for_llm(results)
+            if self.cache_enabled:
+                self._cache.set(cache_key, formatted_results)
 
             elapsed = (time.time() - start_time) * 1000
             self.logger.info(
@@ -186,36 +219,49 @@ class HybridRAGService:
     def _merge_results(
         self, vector_results: List[Memory], graph_results: List[Memory], top_k: int
     ) -> List[Memory]:
-        """合併向量和圖檢索結果"""
-        # 去重（基於 memory_id）
-        seen_ids: set[str] = set()
-        merged: List[Memory] = []
-
-        # 合併結果並應用權重
-        for memory in vector_results:
-            if memory.memory_id not in seen_ids:
-                # 應用向量權重
-                memory.relevance_score *= self.vector_weight
-                merged.append(memory)
-                seen_ids.add(memory.memory_id)
-
-        for memory in graph_results:
-            if memory.memory_id not in seen_ids:
-                # 應用圖權重
-                memory.relevance_score *= self.graph_weight
-                merged.append(memory)
-                seen_ids.add(memory.memory_id)
-            else:
-                # 如果已存在，增加相關度（融合）
-                for m in merged:
-                    if m.memory_id == memory.memory_id:
-                        m.relevance_score += memory.relevance_score * self.graph_weight
-                        break
-
-        # 按相關度排序
-        merged.sort(key=lambda m: m.relevance_score, reverse=True)
-
-        return merged[:top_k]
+        """合併向量和圖檢索結果（加權融合、基於 memory_id 去重、top-k 排序）"""
+        return fuse_results(
+            [
+                (vector_results, self.vector_weight),
+                (graph_results, self.graph_weight),
+            ],
+            top_k,
+        )
+
+    def rerank_by_embedding(
+        self,
+        memories: List[Memory],
+        query_embedding: List[float],
+        candidate_embeddings: List[List[float]],
+        weight: float = 0.5,
+    ) -> List[Memory]:
+        """
+        使用查詢向量與候選記憶向量的餘弦相似度重排序
+
+        Args:
+            memories: 候選記憶列表
+            query_embedding: 查詢向量
+            candidate_embeddings: 與 memories 對齊的記憶向量
+            weight: 餘弦相似度權重
+
+        Returns:
+            重排序後的記憶列表
+        """
+        if len(memories) != len(candidate_embeddings):
+            raise ValueError("memories and candidate_embeddings must be aligned")
+        if not memories:
+            return []
+
+        base = np.fromiter(
+            (m.relevance_score for m in memories), dtype=np.float64, count=len(memories)
+        )
+        scores = cosine_rerank(query_embedding, candidate_embeddings, base, weight)
+        ranked: List[Memory] = []
+        for idx in top_k_indices(scores, len(memories)):
+            memory = memories[idx]
+            memory.relevance_score = float(scores[idx])
+            ranked.append(memory)
+        return ranked
 
     def _format_for_llm(self, memories: List[Memory]) -> List[Dict[str, Any]]:
         """格式化結果供 LLM 使用"""
@@ -235,6 +281,14 @@ class HybridRAGService:
             )
         return formatted
 
+    def clear_cache(self) -> int:
+        """清空結果緩存"""
+        return self._cache.clear()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """獲取緩存統計"""
+        return self._cache.stats().to_dict()
+
     def update_strategy(self, strategy: RetrievalStrategy) -> None:
         """更新檢索策略"""
         self.strategy = strategy
@@ -1,20 +1,27 @@
 # 代碼功能說明: AAM 實時檢索服務
 # 創建日期: 2025-11-28 21:54 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-28 21:54 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """AAM 實時檢索服務 - 提供實時記憶檢索、相關度計算和排序功能"""
 
 from __future__ import annotations
 
+import dataclasses
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
 import structlog
 
-from agent_process.memory.aam.models import Memory, MemoryType, MemoryPriority
+from core.cache import TTLCache, make_cache_key
+from agent_process.memory.aam.models import Memory, MemoryType
 from agent_process.memory.aam.aam_core import AAMManager
+from agent_process.memory.aam.scoring import (
+    CandidateArrays,
+    compute_relevance,
+    rank_memories,
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -28,6 +35,7 @@ class RealtimeRetrievalService:
         cache_enabled: bool = True,
         cache_ttl: int = 300,  # 5分鐘
         max_workers: int = 4,
+        cache_max_size: int = 1024,
     ):
         """
         初始化實時檢索服務
@@ -37,6 +45,7 @@ class RealtimeRetrievalService:
             cache_enabled: 是否啟用緩存
             cache_ttl: 緩存過期時間（秒）
             max_workers: 並行檢索的最大工作線程數
+            cache_max_size: 緩存最大項目數（超出時按 LRU 淘汰）
         """
         self.aam_manager = aam_manager
         self.cache_enabled = cache_enabled
@@ -44,45 +53,56 @@ class RealtimeRetrievalService:
         self.max_workers = max_workers
         self.logger = logger.bind(component="realtime_retrieval")
 
-        # 簡單的內存緩存（生產環境應使用 Redis）
-        self._cache: Dict[str, tuple[float, List[Memory]]] = {}
+        # 有界 LRU + TTL 緩存；寫入時凍結為快照，讀取時返回副本，
+        # 避免後續重新評分修改已緩存的 Memory
+        self._cache: TTLCache[Tuple[Memory, ...]] = TTLCache(
+            "aam.realtime_retrieval",
+            max_size=cache_max_size,
+            ttl=cache_ttl,
+            freeze=_freeze_memories,
+            thaw=_thaw_memories,
+        )
 
     def _get_cache_key(
-        self, query: str, context: Optional[Dict[str, Any]] = None
+        self,
+        query: str,
+        context: Optional[Dict[str, Any]] = None,
+        memory_type: Optional[MemoryType] = None,
+        limit: int = 10,
+        min_relevance: float = 0.0,
     ) -> str:
-        """生成緩存鍵"""
-        context_str = str(sorted(context.items())) if context else ""
-        return f"{query}:{context_str}"
+        """生成緩存鍵（哈希後的緊湊鍵）"""
+        return make_cache_key(
+            query,
+            context or {},
+            memory_type.value if memory_type is not None else None,
+            limit,
+            min_relevance,
+        )
 
     def _get_cached_results(self, cache_key: str) -> Optional[List[Memory]]:
         """從緩存獲取結果"""
         if not self.cache_enabled:
             return None
 
-        if cache_key in self._cache:
-            timestamp, results = self._cache[cache_key]
-            if time.time() - timestamp < self.cache_ttl:
-                self.logger.debug("Cache hit", cache_key=cache_key[:50])
-                return results
-            else:
-                # 緩存過期，刪除
-                del self._cache[cache_key]
-
-        return None
+        results = self._cache.get(cache_key)
+        if results is not None:
+            self.logger.debug("Cache hit", cache_key=cache_key)
+        return results
 
     def _set_cached_results(self, cache_key: str, results: List[Memory]) -> None:
         """設置緩存結果"""
         if not self.cache_enabled:
             return
 
-        self._cache[cache_key] = (time.time(), results)
-        self.logger.debug("Cache set", cache_key=cache_key[:50])
+        self._cache.set(cache_key, results)
+        self.logger.debug("Cache set", cache_key=cache_key)
 
     def _calculate_relevance(
         self, memory: Memory, query: str, context: Optional[Dict[str, Any]] = None
     ) -> float:
         """
-        計算記憶相關度
+        計算單條記憶相關度
 
         Args:
             memory: 記憶對象
@@ -92,67 +112,30 @@ class RealtimeRetrievalService:
         Returns:
             相關度分數（0.0-1.0）
         """
-        # 基礎相關度（使用記憶的現有相關度分數）
-        relevance = memory.relevance_score
-
-        # 基於優先級的調整
-        priority_weights = {
-            MemoryPriority.CRITICAL: 0.3,
-            MemoryPriority.HIGH: 0.2,
-            MemoryPriority.MEDIUM: 0.1,
-            MemoryPriority.LOW: 0.0,
-        }
-        relevance += priority_weights.get(memory.priority, 0.0)
-
-        # 基於訪問頻率的調整
-        if memory.access_count > 0:
-            access_bonus = min(0.1, memory.access_count * 0.01)
-            relevance += access_bonus
-
-        # 基於時間的衰減（最近訪問的記憶相關度更高）
-        if memory.accessed_at is not None:
-            time_diff = time.time() - memory.accessed_at.timestamp()
-            time_bonus = max(0.0, 0.1 * (1.0 - time_diff / 86400))  # 24小時衰減
-            relevance += time_bonus
-
-        # 確保相關度在 0.0-1.0 範圍內
-        relevance = max(0.0, min(1.0, relevance))
-
-        return relevance
+        return float(compute_relevance(CandidateArrays([memory]))[0])
 
     def _sort_memories(
         self,
         memories: List[Memory],
         query: str,
         context: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        min_relevance: float = 0.0,
     ) -> List[Memory]:
         """
-        對記憶進行排序
+        對記憶進行向量化評分與排序
 
         Args:
             memories: 記憶列表
             query: 查詢文本
             context: 上下文信息
+            limit: 返回數量（None 表示全部）
+            min_relevance: 最小相關度閾值
 
         Returns:
-            排序後的記憶列表
+            按相關度、優先級、訪問時間排序後的記憶列表
         """
-        # 計算每個記憶的相關度
-        for memory in memories:
-            memory.relevance_score = self._calculate_relevance(memory, query, context)
-
-        # 按相關度、優先級、訪問時間排序
-        sorted_memories = sorted(
-            memories,
-            key=lambda m: (
-                m.relevance_score,
-                m.priority.value,
-                m.accessed_at.timestamp() if m.accessed_at else 0.0,
-            ),
-            reverse=True,
-        )
-
-        return sorted_memories
+        return rank_memories(memories, limit=limit, min_relevance=min_relevance)
 
     def retrieve(
         self,
@@ -179,9 +162,12 @@ class RealtimeRetrievalService:
         """
         start_time = time.time()
 
+        cache_key = self._get_cache_key(
+            query, context, memory_type, limit, min_relevance
+        )
+
         # 檢查緩存
         if use_cache:
-            cache_key = self._get_cache_key(query, context)
             cached_results = self._get_cached_results(cache_key)
             if cached_results is not None:
                 elapsed = (time.time() - start_time) * 1000
@@ -203,13 +189,10 @@ class RealtimeRetrievalService:
             # 並行檢索多種類型
             results = self._parallel_search(query, limit * 2, min_relevance)
 
-        # 計算相關度並排序
-        sorted_results = self._sort_memories(results, query, context)
-
-        # 過濾和限制結果
-        filtered_results = [
-            m for m in sorted_results if m.relevance_score >= min_relevance
-        ][:limit]
+        # 計算相關度、過濾並選取前 limit 個
+        filtered_results = self._sort_memories(
+            results, query, context, limit=limit, min_relevance=min_relevance
+        )
 
         # 更新訪問信息
         for memory in filtered_results:
@@ -217,7 +200,6 @@ class RealtimeRetrievalService:
 
         # 緩存結果
         if use_cache:
-            cache_key = self._get_cache_key(query, context)
             self._set_cached_results(cache_key, filtered_results)
 
         elapsed = (time.time() - start_time) * 1000
@@ -282,7 +264,20 @@ class RealtimeRetrievalService:
 
     def clear_cache(self) -> int:
         """清空緩存"""
-        count = len(self._cache)
-        self._cache.clear()
+        count = self._cache.clear()
         self.logger.info("Cache cleared", count=count)
         return count
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """獲取緩存統計"""
+        return self._cache.stats().to_dict()
+
+
+def _freeze_memories(memories: List[Memory]) -> Tuple[Memory, ...]:
+    """將檢索結果凍結為獨立於調用方的快照"""
+    return tuple(dataclasses.replace(m, metadata=dict(m.metadata)) for m in memories)
+
+
+def _thaw_memories(memories: Tuple[Memory, ...]) -> List[Memory]:
+    """返回快照的可修改副本"""
+    return [dataclasses.replace(m, metadata=dict(m.metadata)) for m in memories]
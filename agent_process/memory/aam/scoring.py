@@ -0,0 +1,269 @@
+# 代碼功能說明: AAM 向量化相關度評分與重排序
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""AAM 評分階段 - 以 NumPy 陣列批量計算相關度、融合去重與 top-k 選取"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agent_process.memory.aam.models import Memory, MemoryPriority
+
+# 優先級加分（與逐條計算時的權重一致）
+PRIORITY_BONUS: Dict[MemoryPriority, float] = {
+    MemoryPriority.CRITICAL: 0.3,
+    MemoryPriority.HIGH: 0.2,
+    MemoryPriority.MEDIUM: 0.1,
+    MemoryPriority.LOW: 0.0,
+}
+
+# 優先級排名（用於同分時的排序）
+PRIORITY_RANK: Dict[MemoryPriority, int] = {
+    MemoryPriority.LOW: 0,
+    MemoryPriority.MEDIUM: 1,
+    MemoryPriority.HIGH: 2,
+    MemoryPriority.CRITICAL: 3,
+}
+
+ACCESS_BONUS_PER_HIT = 0.01
+ACCESS_BONUS_MAX = 0.1
+RECENCY_BONUS_MAX = 0.1
+RECENCY_WINDOW_SECONDS = 86400.0
+
+
+class CandidateArrays:
+    """
+    候選記憶的列式表示
+
+    將 Memory 對象列表轉換為並列的 NumPy 陣列，供評分階段一次性計算。
+    """
+
+    __slots__ = (
+        "memories",
+        "base_scores",
+        "priority_bonus",
+        "priority_rank",
+        "access_counts",
+        "accessed_at",
+    )
+
+    def __init__(self, memories: Sequence[Memory]):
+        n = len(memories)
+        self.memories = list(memories)
+        self.base_scores = np.empty(n, dtype=np.float64)
+        self.priority_bonus = np.empty(n, dtype=np.float64)
+        self.priority_rank = np.empty(n, dtype=np.int8)
+        self.access_counts = np.empty(n, dtype=np.float64)
+        # 未訪問過的記憶以 NaN 表示，不獲得時間加分
+        self.accessed_at = np.full(n, np.nan, dtype=np.float64)
+
+        for i, memory in enumerate(self.memories):
+            self.base_scores[i] = memory.relevance_score
+            self.priority_bonus[i] = PRIORITY_BONUS.get(memory.priority, 0.0)
+            self.priority_rank[i] = PRIORITY_RANK.get(memory.priority, 0)
+            self.access_counts[i] = memory.access_count
+            if memory.accessed_at is not None:
+                self.accessed_at[i] = memory.accessed_at.timestamp()
+
+    def __len__(self) -> int:
+        return len(self.memories)
+
+
+def compute_relevance(
+    candidates: CandidateArrays, now: Optional[float] = None
+) -> np.ndarray:
+    """
+    批量計算相關度分數
+
+    分數 = 基礎分數 + 優先級加分 + 訪問頻率加分 + 24 小時線性衰減的時間加分，
+    並裁剪到 0.0-1.0。
+
+    Args:
+        candidates: 候選記憶陣列
+        now: 當前時間戳（默認為 time.time()）
+
+    Returns:
+        相關度分數陣列
+    """
+    if now is None:
+        now = time.time()
+
+    scores = candidates.base_scores + candidates.priority_bonus
+    scores += np.minimum(
+        ACCESS_BONUS_MAX, candidates.access_counts * ACCESS_BONUS_PER_HIT
+    )
+
+    visited = ~np.isnan(candidates.accessed_at)
+    if visited.any():
+        age = now - candidates.accessed_at[visited]
+        scores[visited] += np.maximum(
+            0.0, RECENCY_BONUS_MAX * (1.0 - age / RECENCY_WINDOW_SECONDS)
+        )
+
+    return np.clip(scores, 0.0, 1.0, out=scores)
+
+
+def top_k_indices(
+    scores: np.ndarray,
+    k: int,
+    priority_rank: Optional[np.ndarray] = None,
+    recency: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    選取分數最高的 k 個索引（降序）
+
+    先以 argpartition 在 O(n) 內篩出前 k 個候選，再僅對這 k 個排序；
+    同分時依優先級、最近訪問時間排序。
+
+    Args:
+        scores: 分數陣列
+        k: 選取數量
+        priority_rank: 優先級排名陣列（可選，用於同分排序）
+        recency: 最近訪問時間戳陣列（可選，NaN 視為最舊）
+
+    Returns:
+        索引陣列
+    """
+    n = scores.shape[0]
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        candidate_idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidate_idx = np.arange(n)
+
+    # np.lexsort 以最後一個鍵為主鍵；取負值實現降序
+    keys: List[np.ndarray] = []
+    if recency is not None:
+        keys.append(-np.nan_to_num(recency[candidate_idx], nan=0.0))
+    if priority_rank is not None:
+        keys.append(-priority_rank[candidate_idx].astype(np.int16))
+    keys.append(-scores[candidate_idx])
+    order = np.lexsort(tuple(keys))
+    return candidate_idx[order]
+
+
+def rank_memories(
+    memories: Sequence[Memory],
+    limit: Optional[int] = None,
+    min_relevance: float = 0.0,
+    now: Optional[float] = None,
+) -> List[Memory]:
+    """
+    對記憶重新評分並返回排序後的前 limit 個（分數寫回 relevance_score）
+
+    Args:
+        memories: 記憶列表
+        limit: 返回數量（None 表示全部）
+        min_relevance: 最小相關度閾值
+        now: 當前時間戳
+
+    Returns:
+        排序後的記憶列表
+    """
+    if not memories:
+        return []
+
+    candidates = CandidateArrays(memories)
+    scores = compute_relevance(candidates, now=now)
+
+    eligible = np.flatnonzero(scores >= min_relevance)
+    k = len(eligible) if limit is None else min(limit, len(eligible))
+    local = top_k_indices(
+        scores[eligible],
+        k,
+        priority_rank=candidates.priority_rank[eligible],
+        recency=candidates.accessed_at[eligible],
+    )
+
+    ranked: List[Memory] = []
+    for idx in eligible[local]:
+        memory = candidates.memories[idx]
+        memory.relevance_score = float(scores[idx])
+        ranked.append(memory)
+    return ranked
+
+
+def fuse_results(
+    weighted_sources: Iterable[Tuple[Sequence[Memory], float]],
+    top_k: int,
+) -> List[Memory]:
+    """
+    加權融合多路檢索結果
+
+    以 memory_id -> 位置 的字典在 O(n) 內完成去重；重複出現的記憶累加加權分數，
+    保留首次出現的對象。
+
+    Args:
+        weighted_sources: (記憶列表, 權重) 序列，按優先順序排列
+        top_k: 返回數量
+
+    Returns:
+        融合後按分數排序的記憶列表
+    """
+    positions: Dict[str, int] = {}
+    merged: List[Memory] = []
+    fused_scores: List[float] = []
+
+    for memories, weight in weighted_sources:
+        for memory in memories:
+            weighted = memory.relevance_score * weight
+            pos = positions.get(memory.memory_id)
+            if pos is None:
+                positions[memory.memory_id] = len(merged)
+                merged.append(memory)
+                fused_scores.append(weighted)
+            else:
+                fused_scores[pos] += weighted
+
+    if not merged:
+        return []
+
+    scores = np.asarray(fused_scores, dtype=np.float64)
+    order = top_k_indices(scores, min(top_k, len(merged)))
+    result: List[Memory] = []
+    for idx in order:
+        memory = merged[idx]
+        memory.relevance_score = float(scores[idx])
+        result.append(memory)
+    return result
+
+
+def cosine_rerank(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    base_scores: Optional[np.ndarray] = None,
+    weight: float = 0.5,
+) -> np.ndarray:
+    """
+    以查詢向量與候選向量的餘弦相似度重排序
+
+    Args:
+        query_embedding: 查詢向量
+        candidate_embeddings: 候選向量矩陣（n × d）
+        base_scores: 既有分數（可選），與餘弦相似度按 weight 線性混合
+        weight: 餘弦相似度所佔權重（0.0-1.0）
+
+    Returns:
+        混合後的分數陣列
+    """
+    matrix = np.asarray(candidate_embeddings, dtype=np.float32)
+    if matrix.size == 0:
+        return np.empty(0, dtype=np.float64)
+    query = np.asarray(query_embedding, dtype=np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    norms[norms == 0] = 1.0
+    similarity = (matrix @ query / norms).astype(np.float64)
+
+    if base_scores is None:
+        return similarity
+    return (1.0 - weight) * np.asarray(
+        base_scores, dtype=np.float64
+    ) + weight * similarity
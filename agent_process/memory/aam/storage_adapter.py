@@ -1,7 +1,7 @@
 # 代碼功能說明: AAM 存儲適配器
 # 創建日期: 2025-11-28 21:54 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-28 21:54 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """AAM 存儲適配器 - 提供 Redis、ChromaDB、ArangoDB 適配器"""
 
@@ -70,6 +70,15 @@ class RedisAdapter(BaseStorageAdapter):
         self.key_prefix = key_prefix
         self.logger = logger.bind(adapter="redis")
 
+    @classmethod
+    def from_url(
+        cls, redis_url: str, ttl: int = 3600, key_prefix: str = "aam:memory:"
+    ) -> RedisAdapter:
+        """使用共享連線池建立 Redis 適配器"""
+        from databases.redis import get_redis_client
+
+        return cls(get_redis_client(redis_url), ttl=ttl, key_prefix=key_prefix)
+
     def store(self, memory: Memory) -> bool:
         """存儲記憶到 Redis"""
         try:
@@ -1,7 +1,7 @@
 # 代碼功能說明: Memory Manager 實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """Memory Manager - 實現短期和長期記憶管理"""
 
@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 try:
     import redis  # type: ignore[import-untyped]  # noqa: F401
 
+    from databases.redis import delete_matching, get_redis_client
+
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
@@ -31,6 +33,7 @@ class MemoryManager:
         redis_client: Optional[Any] = None,
         chromadb_client: Optional[ChromaDBClient] = None,
         short_term_ttl: int = 3600,  # 1小時
+        redis_url: Optional[str] = None,
     ):
         """
         初始化記憶管理器
@@ -39,7 +42,10 @@ class MemoryManager:
             redis_client: Redis 客戶端（用於短期記憶）
             chromadb_client: ChromaDB 客戶端（用於長期記憶）
             short_term_ttl: 短期記憶過期時間（秒）
+            redis_url: Redis 連接 URL（未提供 redis_client 時使用共享連線池）
         """
+        if redis_client is None and redis_url and REDIS_AVAILABLE:
+            redis_client = get_redis_client(redis_url)
         self.redis_client = redis_client
         self.chromadb_client = chromadb_client
         self.short_term_ttl = short_term_ttl
@@ -239,9 +245,7 @@ class MemoryManager:
         try:
             if self.redis_client:
                 if pattern:
-                    keys = self.redis_client.keys(pattern)
-                    if keys:
-                        return self.redis_client.delete(*keys)
+                    return delete_matching(self.redis_client, pattern)
                 else:
                     # 清空所有鍵（謹慎使用）
                     return self.redis_client.flushdb()
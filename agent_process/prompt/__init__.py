@@ -1,10 +1,15 @@
 # 代碼功能說明: Prompt Manager 模組初始化文件
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """Prompt Manager 模組"""
 
-from agent_process.prompt.manager import PromptManager
+from agent_process.prompt.manager import (
+    CompiledTemplate,
+    PromptManager,
+    PromptTemplate,
+    get_prompt_manager,
+)
 
-__all__ = ["PromptManager"]
+__all__ = ["CompiledTemplate", "PromptManager", "PromptTemplate", "get_prompt_manager"]
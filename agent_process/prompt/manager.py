@@ -1,17 +1,120 @@
 # 代碼功能說明: Prompt Manager 實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-19
 
-"""Prompt Manager - 實現提示模板管理"""
+"""Prompt Manager - 實現提示模板管理（預編譯模板、版本化 ID 與靜態段緩存）"""
 
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import string
+import threading
+from typing import Callable, Dict, Any, List, Mapping, Optional, Tuple
 from datetime import datetime
 from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
+_FORMATTER = string.Formatter()
+_CONVERTERS: Dict[str, Callable[[Any], str]] = {"r": repr, "s": str, "a": ascii}
+
+
+class CompiledTemplate:
+    """預編譯提示模板
+
+    模板只在註冊/更新時解析一次，拆為「靜態片段 + 槽位」序列；渲染時按序拼接，
+    不再重新解析格式字符串。靜態段（如關係類型列表）在編譯時一次性渲染並併入
+    相鄰的靜態片段，之後每次渲染直接復用。第一個槽位之前的靜態前綴在所有渲染
+    結果中逐字相同，適合作為 LLM 服務端（如 Ollama）前綴 KV 緩存的穩定前綴。
+    """
+
+    __slots__ = (
+        "template",
+        "static",
+        "variables",
+        "static_prefix",
+        "fingerprint",
+        "_parts",
+    )
+
+    def __init__(self, template: str, static: Optional[Mapping[str, Any]] = None):
+        """
+        解析模板
+
+        Args:
+            template: str.format 風格的模板
+            static: 靜態段變量值（編譯時渲染，之後不再作為渲染參數）
+
+        Raises:
+            ValueError: 模板格式錯誤（如不成對的花括號）
+        """
+        self.template = template
+        self.static: Dict[str, Any] = dict(static or {})
+        variables: Dict[str, None] = {}
+        parts: List[Tuple[str, Optional[str], Optional[str], Optional[str]]] = []
+        compilable = True
+        # 轉義花括號與靜態段會把靜態文本拆成多段，合併到下一個槽位之前
+        pending = ""
+        for literal, field_name, spec, conversion in _FORMATTER.parse(template):
+            pending += literal
+            if field_name is None:
+                continue
+            root = field_name.split(".", 1)[0].split("[", 1)[0]
+            # 屬性/索引訪問、位置參數、嵌套格式規格交由 str.format 處理
+            simple = field_name == root and root.isidentifier()
+            simple = simple and "{" not in (spec or "")
+            if simple and root in self.static:
+                pending += self._format(self.static[root], conversion, spec)
+                continue
+            if root.isidentifier() and root not in self.static:
+                variables.setdefault(root, None)
+            if not simple:
+                compilable = False
+            parts.append((pending, field_name, conversion, spec))
+            pending = ""
+        if pending:
+            parts.append((pending, None, None, None))
+
+        self.variables = list(variables)
+        self.static_prefix = parts[0][0] if parts else ""
+        # 指紋覆蓋模板與靜態段內容，任一變化時模板 ID 隨之變化
+        digest = hashlib.blake2b(template.encode("utf-8"), digest_size=4)
+        for name in sorted(self.static):
+            digest.update(f"\0{name}={self.static[name]}".encode("utf-8"))
+        self.fingerprint = digest.hexdigest()
+        self._parts: Optional[
+            Tuple[Tuple[str, Optional[str], Optional[str], Optional[str]], ...]
+        ] = (tuple(parts) if compilable else None)
+
+    @staticmethod
+    def _format(value: Any, conversion: Optional[str], spec: Optional[str]) -> str:
+        """按 str.format 語義格式化單個槽位值"""
+        if conversion:
+            value = _CONVERTERS[conversion](value)
+        return value if type(value) is str and not spec else format(value, spec or "")
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """
+        渲染模板（語義與 template.format(**values) 相同）
+
+        Args:
+            values: 變量值
+
+        Returns:
+            渲染結果
+
+        Raises:
+            KeyError: 缺少變量
+        """
+        if self._parts is None:
+            return self.template.format(**{**values, **self.static})
+        out = []
+        for literal, field_name, conversion, spec in self._parts:
+            out.append(literal)
+            if field_name is not None:
+                out.append(self._format(values[field_name], conversion, spec))
+        return "".join(out)
+
 
 @dataclass
 class PromptTemplate:
@@ -24,6 +127,20 @@ class PromptTemplate:
     metadata: Dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
+    version: int = 1
+    compiled: Optional[CompiledTemplate] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if self.compiled is None:
+            self.compiled = CompiledTemplate(self.template)
+
+    @property
+    def template_id(self) -> str:
+        """版本化模板 ID：名稱@v版本.內容指紋（內容變化時指紋隨之變化）"""
+        assert self.compiled is not None
+        return f"{self.name}@v{self.version}.{self.compiled.fingerprint}"
 
 
 class PromptManager:
@@ -67,24 +184,43 @@ class PromptManager:
         description: str = "",
         variables: Optional[list[str]] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        version: Optional[int] = None,
+        static: Optional[Mapping[str, Any]] = None,
     ) -> bool:
         """
         註冊提示模板
 
+        同名模板內容（含靜態段）不變時沿用原版本與編譯結果；內容變化且未指定
+        版本時，版本號自動加 1。
+
         Args:
             name: 模板名稱
             template: 模板內容
             description: 模板描述
             variables: 模板變量列表
             metadata: 元數據
+            version: 模板版本（不提供時新模板為 1）
+            static: 靜態段變量值，編譯時渲染一次並緩存在編譯結果中
 
         Returns:
             是否成功註冊
         """
         try:
+            existing = self._templates.get(name)
+            compiled = CompiledTemplate(template, static)
+            if (
+                existing is not None
+                and existing.compiled is not None
+                and existing.compiled.fingerprint == compiled.fingerprint
+            ):
+                compiled = existing.compiled
+                version = version or existing.version
+            else:
+                if version is None:
+                    version = existing.version + 1 if existing else 1
             # 提取模板變量
             if variables is None:
-                variables = self._extract_variables(template)
+                variables = compiled.variables
 
             prompt_template = PromptTemplate(
                 name=name,
@@ -92,10 +228,12 @@ class PromptManager:
                 description=description,
                 variables=variables,
                 metadata=metadata or {},
+                version=version,
+                compiled=compiled,
             )
 
             self._templates[name] = prompt_template
-            logger.info(f"Registered prompt template: {name}")
+            logger.info(f"Registered prompt template: {prompt_template.template_id}")
             return True
         except Exception as e:
             logger.error(f"Failed to register prompt template '{name}': {e}")
@@ -109,14 +247,9 @@ class PromptManager:
             template: 模板內容
 
         Returns:
-            變量列表
+            變量列表（按首次出現順序）
         """
-        import re
-
-        # 匹配 {variable} 格式的變量
-        pattern = r"\{(\w+)\}"
-        variables = re.findall(pattern, template)
-        return list(set(variables))  # 去重
+        return CompiledTemplate(template).variables
 
     def get(self, name: str) -> Optional[PromptTemplate]:
         """
@@ -130,6 +263,35 @@ class PromptManager:
         """
         return self._templates.get(name)
 
+    def template_id(self, name: str) -> Optional[str]:
+        """
+        獲取版本化模板 ID（可用於緩存鍵，模板變化時隨之變化）
+
+        Args:
+            name: 模板名稱
+
+        Returns:
+            模板 ID，如果不存在則返回 None
+        """
+        template = self.get(name)
+        return template.template_id if template else None
+
+    def static_prefix(self, name: str) -> str:
+        """
+        獲取模板第一個變量之前的靜態前綴
+
+        Args:
+            name: 模板名稱
+
+        Returns:
+            靜態前綴
+        """
+        template = self.get(name)
+        if not template:
+            raise ValueError(f"Prompt template '{name}' not found")
+        assert template.compiled is not None
+        return template.compiled.static_prefix
+
     def render(
         self,
         name: str,
@@ -148,18 +310,18 @@ class PromptManager:
         template = self.get(name)
         if not template:
             raise ValueError(f"Prompt template '{name}' not found")
+        assert template.compiled is not None
 
         try:
-            # 使用 str.format 渲染模板
-            rendered = template.template.format(**kwargs)
+            rendered = template.compiled.render(kwargs)
             logger.debug(f"Rendered prompt template: {name}")
-            return rendered
         except KeyError as e:
             logger.error(f"Missing variable in template '{name}': {e}")
             raise ValueError(f"Missing required variable: {e}")
         except Exception as e:
             logger.error(f"Failed to render template '{name}': {e}")
             raise
+        return rendered
 
     def list_templates(self) -> list[PromptTemplate]:
         """
@@ -178,7 +340,7 @@ class PromptManager:
         metadata: Optional[Dict[str, Any]] = None,
     ) -> bool:
         """
-        更新提示模板
+        更新提示模板（模板內容變化時沿用靜態段重新編譯並遞增版本）
 
         Args:
             name: 模板名稱
@@ -195,16 +357,20 @@ class PromptManager:
             return False
 
         try:
-            if template is not None:
+            if template is not None and template != prompt_template.template:
+                assert prompt_template.compiled is not None
+                compiled = CompiledTemplate(template, prompt_template.compiled.static)
                 prompt_template.template = template
-                prompt_template.variables = self._extract_variables(template)
+                prompt_template.compiled = compiled
+                prompt_template.variables = compiled.variables
+                prompt_template.version += 1
             if description is not None:
                 prompt_template.description = description
             if metadata is not None:
                 prompt_template.metadata.update(metadata)
 
             prompt_template.updated_at = datetime.now()
-            logger.info(f"Updated prompt template: {name}")
+            logger.info(f"Updated prompt template: {prompt_template.template_id}")
             return True
         except Exception as e:
             logger.error(f"Failed to update prompt template '{name}': {e}")
@@ -227,3 +393,22 @@ class PromptManager:
         del self._templates[name]
         logger.info(f"Deleted prompt template: {name}")
         return True
+
+
+_default_manager: Optional[PromptManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_prompt_manager() -> PromptManager:
+    """
+    獲取進程級共享的提示管理器（服務內置提示模板在此註冊並版本化）
+
+    Returns:
+        PromptManager 實例
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = PromptManager()
+    return _default_manager
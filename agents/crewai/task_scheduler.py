@@ -1,20 +1,28 @@
 # 代碼功能說明: Task Scheduler 實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-10-26
+# 最後修改日期: 2026-10-18
 
 """實現任務排程功能。"""
 
+import heapq
+import itertools
 import logging
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Tuple
 from datetime import datetime
-from queue import PriorityQueue
 
 from agents.crewai.task_models import CrewTask, TaskStatus, TaskPriority
 from agents.crewai.task_registry import TaskRegistry
 
+if TYPE_CHECKING:
+    from agents.crewai.task_worker_pool import TaskWorkerPool
+
 logger = logging.getLogger(__name__)
 
+# 堆條目：(優先級數值, 創建時間戳, 序號, 任務 ID)
+_HeapEntry = Tuple[int, float, int, str]
+
 
 class TaskScheduler:
     """任務排程器。"""
@@ -27,8 +35,63 @@ class TaskScheduler:
             task_registry: 任務註冊表（可選）
         """
         self._task_registry = task_registry or TaskRegistry()
-        self._task_queue: PriorityQueue = PriorityQueue()
+        self._task_queue: List[_HeapEntry] = []
+        # 排隊中任務的有效條目序號；取消或調整優先級時使舊條目失效（惰性刪除）
+        self._queued: Dict[str, int] = {}
+        self._queued_tasks: Dict[str, CrewTask] = {}
+        self._queued_view: Mapping[str, CrewTask] = MappingProxyType(self._queued_tasks)
         self._scheduled_tasks: Dict[str, CrewTask] = {}
+        self._counter = itertools.count()
+        self._snapshot: Optional[List[CrewTask]] = None
+        self._worker_pool: Optional["TaskWorkerPool"] = None
+
+    @property
+    def task_registry(self) -> TaskRegistry:
+        """任務註冊表。"""
+        return self._task_registry
+
+    def attach_worker_pool(self, pool: Optional["TaskWorkerPool"]) -> None:
+        """
+        綁定工作池：新任務入隊時喚醒工作者，取消時中止執行中的任務。
+
+        Args:
+            pool: 工作池（None 表示解除綁定）
+        """
+        self._worker_pool = pool
+
+    def _enqueue(self, task: CrewTask) -> None:
+        """將任務加入堆（已在隊列中的任務以新條目覆蓋）。"""
+        seq = next(self._counter)
+        self._queued[task.task_id] = seq
+        self._queued_tasks[task.task_id] = task
+        heapq.heappush(
+            self._task_queue,
+            (
+                self._get_priority_value(task.priority),
+                task.created_at.timestamp(),
+                seq,
+                task.task_id,
+            ),
+        )
+        self._snapshot = None
+        if self._worker_pool is not None:
+            self._worker_pool.notify()
+
+    def _dequeue(self, task_id: str) -> bool:
+        """使任務的堆條目失效（O(1)），返回任務是否在隊列中。"""
+        if self._queued.pop(task_id, None) is None:
+            return False
+        self._queued_tasks.pop(task_id, None)
+        self._snapshot = None
+        # 失效條目過多時重建堆，避免內存隨取消次數增長
+        if len(self._task_queue) > 2 * len(self._queued) + 64:
+            self._task_queue = [
+                entry
+                for entry in self._task_queue
+                if self._queued.get(entry[3]) == entry[2]
+            ]
+            heapq.heapify(self._task_queue)
+        return True
 
     def _get_priority_value(self, priority: TaskPriority) -> int:
         """獲取優先級數值（數值越小優先級越高）。"""
@@ -59,11 +122,8 @@ class TaskScheduler:
                 return False
 
             # 添加到排程隊列
-            priority_value = self._get_priority_value(task.priority)
-            self._task_queue.put(
-                (priority_value, task.created_at.timestamp(), task.task_id)
-            )
             self._scheduled_tasks[task.task_id] = task
+            self._enqueue(task)
 
             logger.info(
                 f"Scheduled task: {task.task_id} (priority: {task.priority.value})"
@@ -96,9 +156,12 @@ class TaskScheduler:
                 message="Task cancelled by scheduler",
             )
 
-            # 從排程中移除
+            # 從排程中移除（堆條目惰性刪除），執行中的任務交由工作池中止
             if task_id in self._scheduled_tasks:
                 del self._scheduled_tasks[task_id]
+            self._dequeue(task_id)
+            if self._worker_pool is not None:
+                self._worker_pool.cancel_running(task_id)
 
             logger.info(f"Cancelled task: {task_id}")
             return True
@@ -113,26 +176,29 @@ class TaskScheduler:
         Returns:
             任務列表（按優先級排序）
         """
-        # 重新構建隊列（因為 PriorityQueue 不支持直接遍歷）
-        queue_items = []
-        temp_queue: PriorityQueue = PriorityQueue()
+        # 隊列未變化時直接返回緩存的排序快照
+        if self._snapshot is None:
+            entries = sorted(
+                entry
+                for entry in self._task_queue
+                if self._queued.get(entry[3]) == entry[2]
+            )
+            self._snapshot = [self._queued_tasks[entry[3]] for entry in entries]
 
-        while not self._task_queue.empty():
-            item = self._task_queue.get()
-            queue_items.append(item)
-            temp_queue.put(item)
+        return [task for task in self._snapshot if task.status == TaskStatus.PENDING]
 
-        # 恢復隊列
-        self._task_queue = temp_queue
+    def pending_view(self) -> Mapping[str, CrewTask]:
+        """
+        獲取排隊中任務的只讀視圖（O(1)，隨隊列實時變化，不保證順序）。
 
-        # 獲取任務列表
-        tasks = []
-        for _, _, task_id in queue_items:
-            task = self._scheduled_tasks.get(task_id)
-            if task and task.status == TaskStatus.PENDING:
-                tasks.append(task)
+        Returns:
+            任務 ID 到任務的只讀映射
+        """
+        return self._queued_view
 
-        return tasks
+    def queue_size(self) -> int:
+        """獲取排隊中的任務數量。"""
+        return len(self._queued)
 
     def prioritize_task(
         self,
@@ -159,12 +225,11 @@ class TaskScheduler:
             task.priority = new_priority
             task.updated_at = datetime.now()
 
-            # 更新排程隊列
+            # 更新排程隊列：推入新條目，舊條目因序號失效而在出隊時被跳過
             if task_id in self._scheduled_tasks:
-                # 重新排程
                 self._scheduled_tasks[task_id] = task
-                # 注意：PriorityQueue 不支持直接更新，需要重新排程
-                # 這裡簡化處理，實際使用時可能需要更複雜的邏輯
+                if task_id in self._queued:
+                    self._enqueue(task)
 
             logger.info(
                 f"Updated task '{task_id}' priority: {old_priority.value} -> {new_priority.value}"
@@ -181,10 +246,14 @@ class TaskScheduler:
         Returns:
             下一個任務，如果沒有則返回 None
         """
-        while not self._task_queue.empty():
-            _, _, task_id = self._task_queue.get()
-            task = self._scheduled_tasks.get(task_id)
-
+        while self._task_queue:
+            _, _, seq, task_id = heapq.heappop(self._task_queue)
+            if self._queued.get(task_id) != seq:
+                continue  # 已取消或已被新條目取代
+
+            del self._queued[task_id]
+            task = self._queued_tasks.pop(task_id, None)
+            self._snapshot = None
             if task and task.status == TaskStatus.PENDING:
                 return task
 
@@ -0,0 +1,292 @@
+# 代碼功能說明: Task Worker Pool 實現
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""實現綁定 TaskScheduler 的 asyncio 工作池，按優先級併發執行任務。"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from agents.crewai.task_models import CrewTask, TaskResult, TaskStatus
+from agents.crewai.task_scheduler import TaskScheduler
+from agents.crewai.token_budget import TokenBudgetGuard
+
+logger = logging.getLogger(__name__)
+
+TaskExecutor = Callable[[CrewTask], Awaitable[Any]]
+
+
+class TaskWorkerPool:
+    """任務工作池。"""
+
+    def __init__(
+        self,
+        scheduler: TaskScheduler,
+        executor: TaskExecutor,
+        num_workers: int = 4,
+        task_timeout: Optional[float] = None,
+        budget_guards: Optional[Dict[str, TokenBudgetGuard]] = None,
+        default_token_budget: Optional[int] = None,
+    ):
+        """
+        初始化任務工作池。
+
+        Args:
+            scheduler: 任務排程器
+            executor: 執行單個任務的協程函數；可返回 TaskResult 或任意輸出
+            num_workers: 工作者數量
+            task_timeout: 默認任務超時時間（秒），任務 metadata["timeout"] 可覆蓋
+            budget_guards: 按 crew_id 的 Token 預算守門員
+            default_token_budget: 未配置守門員的 crew 使用的預算（None 表示不限制）
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+
+        self._scheduler = scheduler
+        self._executor = executor
+        self._num_workers = num_workers
+        self._task_timeout = task_timeout
+        self._budget_guards: Dict[str, TokenBudgetGuard] = dict(budget_guards or {})
+        self._default_token_budget = default_token_budget
+
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancelled: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._counts: Dict[str, int] = {
+            TaskStatus.COMPLETED.value: 0,
+            TaskStatus.FAILED.value: 0,
+            TaskStatus.CANCELLED.value: 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        """工作池是否已啟動。"""
+        return bool(self._workers)
+
+    def get_budget_guard(self, crew_id: str) -> Optional[TokenBudgetGuard]:
+        """
+        獲取 crew 的 Token 預算守門員（按需以默認預算創建）。
+
+        Args:
+            crew_id: 隊伍 ID
+
+        Returns:
+            Token 預算守門員，未配置預算時返回 None
+        """
+        guard = self._budget_guards.get(crew_id)
+        if guard is None and self._default_token_budget is not None:
+            guard = TokenBudgetGuard(self._default_token_budget)
+            self._budget_guards[crew_id] = guard
+        return guard
+
+    async def start(self) -> None:
+        """在當前事件循環中啟動工作者。"""
+        if self._workers:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._stopping = False
+        self._scheduler.attach_worker_pool(self)
+        self._workers = [
+            asyncio.create_task(
+                self._worker_loop(index), name=f"crew-task-worker-{index}"
+            )
+            for index in range(self._num_workers)
+        ]
+        self._wakeup.set()
+        logger.info(f"Started task worker pool with {self._num_workers} workers")
+
+    async def stop(self, cancel_running: bool = False) -> None:
+        """
+        停止工作池。
+
+        Args:
+            cancel_running: 是否中止執行中的任務（否則等待其完成）
+        """
+        if not self._workers:
+            return
+
+        self._stopping = True
+        if cancel_running:
+            for task_id in list(self._running):
+                self.cancel_running(task_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._scheduler.attach_worker_pool(None)
+        logger.info("Stopped task worker pool")
+
+    async def join(self) -> None:
+        """等待隊列清空且沒有執行中的任務。"""
+        if self._idle is None:
+            return
+        while self._scheduler.queue_size() or self._running:
+            self._idle.clear()
+            await self._idle.wait()
+
+    def notify(self) -> None:
+        """通知工作者有新任務入隊（可從其他線程調用）。"""
+        if self._wakeup is not None:
+            self._call_in_loop(self._wakeup.set)
+
+    def cancel_running(self, task_id: str) -> bool:
+        """
+        中止執行中的任務。
+
+        Args:
+            task_id: 任務 ID
+
+        Returns:
+            任務是否正在執行
+        """
+        job = self._running.get(task_id)
+        if job is None or job.done():
+            return False
+        self._cancelled.add(task_id)
+        self._call_in_loop(job.cancel)
+        return True
+
+    def _call_in_loop(self, callback: Callable[[], Any]) -> None:
+        """在工作池的事件循環中調用回調（跨線程時使用 call_soon_threadsafe）。"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        running_loop: Optional[asyncio.AbstractEventLoop]
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            callback()
+        else:
+            self._loop.call_soon_threadsafe(callback)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        獲取工作池狀態快照。
+
+        Returns:
+            工作者數量、排隊與執行中任務數及完成統計
+        """
+        return {
+            "workers": len(self._workers),
+            "queued": self._scheduler.queue_size(),
+            "running": list(self._running),
+            "completed": self._counts[TaskStatus.COMPLETED.value],
+            "failed": self._counts[TaskStatus.FAILED.value],
+            "cancelled": self._counts[TaskStatus.CANCELLED.value],
+        }
+
+    async def _worker_loop(self, index: int) -> None:
+        """工作者循環：按優先級取任務執行，隊列為空時等待喚醒。"""
+        assert self._wakeup is not None and self._idle is not None
+        while not self._stopping:
+            task = self._scheduler.get_next_task()
+            if task is None:
+                if not self._running:
+                    self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._run_task(task)
+        logger.debug(f"Task worker {index} exited")
+
+    async def _run_task(self, task: CrewTask) -> None:
+        """執行單個任務並記錄狀態與結果。"""
+        registry = self._scheduler.task_registry
+        task_id = task.task_id
+
+        guard = self.get_budget_guard(task.crew_id)
+        estimated_tokens = task.metadata.get("estimated_tokens")
+        if guard is not None and not guard.check_budget(estimated_tokens):
+            self._finish(task, TaskStatus.FAILED, error="Token budget exceeded")
+            return
+
+        registry.update_task_status(task_id, TaskStatus.IN_PROGRESS)
+        timeout = task.metadata.get("timeout", self._task_timeout)
+        started = time.perf_counter()
+        job = asyncio.ensure_future(self._executor(task))
+        self._running[task_id] = job
+
+        try:
+            output = await asyncio.wait_for(job, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._finish(
+                task,
+                TaskStatus.FAILED,
+                error=f"Task timed out after {timeout}s",
+                execution_time=time.perf_counter() - started,
+            )
+        except asyncio.CancelledError:
+            if task_id not in self._cancelled:
+                raise  # 工作者本身被取消
+            self._finish(
+                task,
+                TaskStatus.CANCELLED,
+                execution_time=time.perf_counter() - started,
+            )
+        except Exception as e:
+            logger.error(f"Task '{task_id}' failed: {e}")
+            self._finish(
+                task,
+                TaskStatus.FAILED,
+                error=str(e),
+                execution_time=time.perf_counter() - started,
+            )
+        else:
+            result = self._finish(
+                task,
+                TaskStatus.COMPLETED,
+                output=output,
+                execution_time=time.perf_counter() - started,
+            )
+            if guard is not None and result.token_usage:
+                # 未提供輸入/輸出拆分時，將總量記為輸出 Token
+                guard.record_usage(
+                    int(result.metadata.get("input_tokens", 0)),
+                    int(result.metadata.get("output_tokens", result.token_usage)),
+                )
+        finally:
+            self._running.pop(task_id, None)
+            self._cancelled.discard(task_id)
+            if self._idle is not None and not self._running:
+                self._idle.set()
+
+    def _finish(
+        self,
+        task: CrewTask,
+        status: TaskStatus,
+        output: Any = None,
+        error: Optional[str] = None,
+        execution_time: float = 0.0,
+    ) -> TaskResult:
+        """保存任務結果並更新狀態（取消狀態已由排程器寫入）。"""
+        registry = self._scheduler.task_registry
+        if isinstance(output, TaskResult):
+            result = output.model_copy(
+                update={"status": status, "execution_time": execution_time}
+            )
+        else:
+            result = TaskResult(
+                task_id=task.task_id,
+                status=status,
+                output=output,
+                error=error,
+                execution_time=execution_time,
+            )
+
+        registry.save_task_result(result)
+        if status != TaskStatus.CANCELLED:
+            registry.update_task_status(task.task_id, status, message=error)
+        self._counts[status.value] += 1
+        return result
@@ -1,15 +1,15 @@
 # 代碼功能說明: Agent Orchestrator 核心實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-19
 
 """Agent Orchestrator - 實現 Agent 協調、調度、任務分發和結果聚合"""
 
+import time
 import uuid
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-from collections import deque
 
 from agents.orchestrator.models import (
     AgentInfo,
@@ -18,9 +18,23 @@ from agents.orchestrator.models import (
     TaskResult,
     TaskStatus,
 )
+from agents.orchestrator.scheduler import (
+    IdleAgentIndex,
+    LatencyStats,
+    QueuedTask,
+    TaskHeap,
+    pick_least_loaded,
+)
 
 logger = logging.getLogger(__name__)
 
+# 任務類型到偏好 Agent 類型的映射
+AGENT_TYPE_MAPPING: Dict[str, str] = {
+    "planning": "planning_agent",
+    "execution": "execution_agent",
+    "review": "review_agent",
+}
+
 
 class AgentOrchestrator:
     """Agent 協調器"""
@@ -30,8 +44,13 @@ class AgentOrchestrator:
         self._agents: Dict[str, AgentInfo] = {}
         self._tasks: Dict[str, TaskRequest] = {}
         self._task_results: Dict[str, TaskResult] = {}
-        self._task_queue: deque = deque()
+        self._task_queue = TaskHeap()  # 待分配任務（優先級堆，惰性刪除）
+        self._idle_index = IdleAgentIndex()  # 空閒 Agent 倒排索引
         self._agent_loads: Dict[str, int] = {}  # Agent 負載計數
+        self._enqueued_at: Dict[str, float] = {}  # 任務入隊時間（monotonic）
+        self._queue_wait = LatencyStats()  # 入隊到分配的等待時間
+        self._assignment_latency = LatencyStats()  # 單次選擇並分配的耗時
+        self._assigned_total = 0
 
     def register_agent(
         self,
@@ -62,10 +81,20 @@ class AgentOrchestrator:
                 metadata=metadata or {},
             )
 
+            previous = self._agents.get(agent_id)
+            if previous is not None:
+                self._idle_index.remove(
+                    agent_id, previous.agent_type, previous.capabilities
+                )
+
             self._agents[agent_id] = agent_info
             self._agent_loads[agent_id] = 0
+            self._sync_idle_index(agent_info)
 
             logger.info(f"Registered agent: {agent_id} (type: {agent_type})")
+
+            # 新 Agent 可用，嘗試分配排隊中的任務
+            self._try_assign_tasks()
             return True
         except Exception as e:
             logger.error(f"Failed to register agent '{agent_id}': {e}")
@@ -82,8 +111,9 @@ class AgentOrchestrator:
             是否成功取消註冊
         """
         try:
-            if agent_id in self._agents:
-                del self._agents[agent_id]
+            agent = self._agents.pop(agent_id, None)
+            if agent is not None:
+                self._idle_index.remove(agent_id, agent.agent_type, agent.capabilities)
             if agent_id in self._agent_loads:
                 del self._agent_loads[agent_id]
             logger.info(f"Unregistered agent: {agent_id}")
@@ -143,16 +173,21 @@ class AgentOrchestrator:
         Returns:
             匹配的 Agent 列表
         """
-        agents = self.list_agents(agent_type=agent_type, status=AgentStatus.IDLE)
-
-        if required_capabilities:
-            matched_agents = []
-            for agent in agents:
-                if all(cap in agent.capabilities for cap in required_capabilities):
-                    matched_agents.append(agent)
-            return matched_agents
+        return [
+            self._agents[agent_id]
+            for agent_id in self._idle_index.match(
+                agent_type=agent_type, capabilities=required_capabilities
+            )
+        ]
 
-        return agents
+    def _sync_idle_index(self, agent: AgentInfo) -> None:
+        """根據 Agent 狀態維護空閒索引"""
+        if agent.status == AgentStatus.IDLE:
+            self._idle_index.add(agent.agent_id, agent.agent_type, agent.capabilities)
+        else:
+            self._idle_index.remove(
+                agent.agent_id, agent.agent_type, agent.capabilities
+            )
 
     def submit_task(
         self,
@@ -190,7 +225,8 @@ class AgentOrchestrator:
         )
 
         self._tasks[task_id] = task_request
-        self._task_queue.append((priority, task_id))
+        self._task_queue.push(task_id, priority)
+        self._enqueued_at[task_id] = time.monotonic()
 
         logger.info(f"Submitted task: {task_id} (type: {task_type})")
 
@@ -199,31 +235,40 @@ class AgentOrchestrator:
 
         return task_id
 
-    def _try_assign_tasks(self):
-        """嘗試分配任務"""
-        # 按優先級排序任務隊列
-        self._task_queue = deque(
-            sorted(self._task_queue, key=lambda x: x[0], reverse=True)
-        )
+    def _try_assign_tasks(self) -> int:
+        """
+        嘗試分配任務
 
-        for priority, task_id in list(self._task_queue):
-            task_request = self._tasks.get(task_id)
+        在提交任務、Agent 變為空閒時觸發。按優先級從堆中取出任務，
+        無法分配的任務本輪結束後放回隊列；沒有空閒 Agent 時立即停止。
+
+        Returns:
+            本輪分配的任務數
+        """
+        assigned = 0
+        deferred: List[QueuedTask] = []
+
+        while len(self._idle_index) > 0:
+            item = self._task_queue.pop()
+            if item is None:
+                break
+
+            task_request = self._tasks.get(item.task_id)
             if not task_request:
+                self._enqueued_at.pop(item.task_id, None)
                 continue
 
-            # 檢查任務是否已經分配
-            if task_id in self._task_results:
-                result = self._task_results[task_id]
-                if result.status in [TaskStatus.ASSIGNED, TaskStatus.RUNNING]:
-                    continue
-
-            # 尋找合適的 Agent
+            started = time.perf_counter()
             agent = self._select_agent(task_request)
+            if agent and self._assign_task(item.task_id, agent.agent_id):
+                self._assignment_latency.observe((time.perf_counter() - started) * 1000)
+                assigned += 1
+            else:
+                deferred.append(item)
 
-            if agent:
-                # 分配任務
-                self._assign_task(task_id, agent.agent_id)
-                self._task_queue.remove((priority, task_id))
+        if deferred:
+            self._task_queue.requeue(deferred)
+        return assigned
 
     def _select_agent(self, task_request: TaskRequest) -> Optional[AgentInfo]:
         """
@@ -238,41 +283,20 @@ class AgentOrchestrator:
         # 如果指定了需要的 Agent
         if task_request.required_agents:
             for agent_id in task_request.required_agents:
-                agent = self._agents.get(agent_id)
-                if agent and agent.status == AgentStatus.IDLE:
-                    return agent
+                if agent_id in self._idle_index:
+                    return self._agents.get(agent_id)
             return None
 
-        # 根據任務類型選擇 Agent
-        agent_type_mapping = {
-            "planning": "planning_agent",
-            "execution": "execution_agent",
-            "review": "review_agent",
-        }
-
-        preferred_type = agent_type_mapping.get(task_request.task_type)
-
-        # 優先選擇空閒且負載最低的 Agent
-        idle_agents = [
-            agent for agent in self._agents.values() if agent.status == AgentStatus.IDLE
-        ]
-
-        if preferred_type:
-            preferred_agents = [
-                agent for agent in idle_agents if agent.agent_type == preferred_type
-            ]
-            if preferred_agents:
-                idle_agents = preferred_agents
-
-        if not idle_agents:
-            return None
+        # 根據任務類型優先選擇對應類型的空閒 Agent，否則從所有空閒 Agent 中選擇
+        preferred_type = AGENT_TYPE_MAPPING.get(task_request.task_type)
+        if preferred_type and self._idle_index.has_type(preferred_type):
+            candidates = self._idle_index.match(agent_type=preferred_type)
+        else:
+            candidates = self._idle_index.match()
 
         # 選擇負載最低的 Agent
-        selected_agent = min(
-            idle_agents, key=lambda a: self._agent_loads.get(a.agent_id, 0)
-        )
-
-        return selected_agent
+        selected_id = pick_least_loaded(candidates, self._agent_loads)
+        return self._agents.get(selected_id) if selected_id else None
 
     def _assign_task(self, task_id: str, agent_id: str) -> bool:
         """
@@ -292,6 +316,13 @@ class AgentOrchestrator:
             if not task_request or not agent:
                 return False
 
+            metadata: Dict[str, Any] = {}
+            enqueued_at = self._enqueued_at.pop(task_id, None)
+            if enqueued_at is not None:
+                queue_wait_ms = (time.monotonic() - enqueued_at) * 1000
+                self._queue_wait.observe(queue_wait_ms)
+                metadata["queue_wait_ms"] = round(queue_wait_ms, 3)
+
             # 更新任務狀態
             task_result = TaskResult(
                 task_id=task_id,
@@ -301,12 +332,15 @@ class AgentOrchestrator:
                 result=None,
                 error=None,
                 completed_at=None,
+                metadata=metadata,
             )
             self._task_results[task_id] = task_result
 
             # 更新 Agent 狀態
             agent.status = AgentStatus.BUSY
+            self._sync_idle_index(agent)
             self._agent_loads[agent_id] = self._agent_loads.get(agent_id, 0) + 1
+            self._assigned_total += 1
 
             logger.info(f"Assigned task {task_id} to agent {agent_id}")
             return True
@@ -339,6 +373,9 @@ class AgentOrchestrator:
                 logger.warning(f"Task result not found: {task_id}")
                 return False
 
+            # 只有仍在執行中的任務才佔用 Agent，重複完成時不得重複釋放
+            was_active = task_result.status in (TaskStatus.ASSIGNED, TaskStatus.RUNNING)
+
             # 更新任務狀態
             if error:
                 task_result.status = TaskStatus.FAILED
@@ -349,21 +386,87 @@ class AgentOrchestrator:
 
             task_result.completed_at = datetime.now()
 
-            # 更新 Agent 狀態
-            if task_result.agent_id:
-                agent = self._agents.get(task_result.agent_id)
-                if agent:
-                    agent.status = AgentStatus.IDLE
-                    self._agent_loads[task_result.agent_id] = max(
-                        0, self._agent_loads.get(task_result.agent_id, 0) - 1
-                    )
-
             logger.info(f"Completed task: {task_id}")
+
+            if was_active:
+                self._release_agent(task_result.agent_id)
+                # Agent 已空閒，嘗試分配排隊中的任務
+                self._try_assign_tasks()
             return True
         except Exception as e:
             logger.error(f"Failed to complete task '{task_id}': {e}")
             return False
 
+    def cancel_task(self, task_id: str) -> bool:
+        """
+        取消任務
+
+        排隊中的任務直接從隊列移除；已分配的任務標記為取消並釋放 Agent。
+
+        Args:
+            task_id: 任務ID
+
+        Returns:
+            是否成功取消
+        """
+        if task_id not in self._tasks:
+            return False
+
+        if self._task_queue.discard(task_id):
+            self._enqueued_at.pop(task_id, None)
+            self._task_results[task_id] = TaskResult(
+                task_id=task_id,
+                status=TaskStatus.CANCELLED,
+                agent_id=None,
+                started_at=None,
+                result=None,
+                error=None,
+                completed_at=datetime.now(),
+            )
+            logger.info(f"Cancelled queued task: {task_id}")
+            return True
+
+        task_result = self._task_results.get(task_id)
+        if not task_result or task_result.status not in (
+            TaskStatus.ASSIGNED,
+            TaskStatus.RUNNING,
+        ):
+            return False
+
+        task_result.status = TaskStatus.CANCELLED
+        task_result.completed_at = datetime.now()
+        self._release_agent(task_result.agent_id)
+        logger.info(f"Cancelled task: {task_id}")
+
+        self._try_assign_tasks()
+        return True
+
+    def _release_agent(self, agent_id: Optional[str]) -> None:
+        """任務結束後將 Agent 恢復為空閒並減少負載計數"""
+        if not agent_id:
+            return
+        agent = self._agents.get(agent_id)
+        if agent:
+            agent.status = AgentStatus.IDLE
+            self._sync_idle_index(agent)
+            self._agent_loads[agent_id] = max(0, self._agent_loads.get(agent_id, 0) - 1)
+
+    def get_scheduler_metrics(self) -> Dict[str, Any]:
+        """
+        獲取調度指標
+
+        Returns:
+            隊列深度、空閒 Agent 數、任務排隊等待時間與分配耗時統計
+        """
+        return {
+            "queue_depth": len(self._task_queue),
+            "registered_agents": len(self._agents),
+            "idle_agents": len(self._idle_index),
+            "assigned_total": self._assigned_total,
+            "queue_wait": self._queue_wait.to_dict(),
+            "assignment_latency": self._assignment_latency.to_dict(),
+        }
+
     def get_task_result(self, task_id: str) -> Optional[TaskResult]:
         """
         獲取任務結果
@@ -431,6 +534,9 @@ class AgentOrchestrator:
         if agent:
             agent.status = status
             agent.last_heartbeat = datetime.now()
+            self._sync_idle_index(agent)
             logger.debug(f"Updated agent {agent_id} status to {status.value}")
+            if status == AgentStatus.IDLE:
+                self._try_assign_tasks()
             return True
         return False
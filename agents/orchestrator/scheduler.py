@@ -0,0 +1,209 @@
+# 代碼功能說明: Agent Orchestrator 調度數據結構
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""任務優先級堆（惰性刪除）、空閒 Agent 倒排索引與調度延遲統計"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class QueuedTask(NamedTuple):
+    """出隊的任務條目"""
+
+    priority: int
+    seq: int
+    task_id: str
+
+
+class TaskHeap:
+    """
+    任務優先級堆
+
+    priority 越大越先出隊，同優先級按提交順序（FIFO）。
+    取消或重新入隊時不在堆中查找刪除，而是由 ``_entries`` 記錄每個任務的
+    有效序號，出隊時跳過失效條目（惰性刪除）。
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[int, int, str]] = []
+        self._entries: Dict[str, int] = {}  # task_id -> 有效條目序號
+        self._counter = itertools.count()
+
+    def push(self, task_id: str, priority: int, seq: Optional[int] = None) -> None:
+        """入隊（已在隊列中的任務會以新優先級覆蓋）"""
+        if seq is None:
+            seq = next(self._counter)
+        self._entries[task_id] = seq
+        heapq.heappush(self._heap, (-priority, seq, task_id))
+
+    def discard(self, task_id: str) -> bool:
+        """移除任務（O(1)，堆中條目延後清理），返回任務是否在隊列中"""
+        return self._entries.pop(task_id, None) is not None
+
+    def pop(self) -> Optional[QueuedTask]:
+        """彈出優先級最高的有效任務"""
+        while self._heap:
+            neg_priority, seq, task_id = heapq.heappop(self._heap)
+            if self._entries.get(task_id) == seq:
+                del self._entries[task_id]
+                return QueuedTask(-neg_priority, seq, task_id)
+        return None
+
+    def requeue(self, items: Iterable[QueuedTask]) -> None:
+        """將本輪無法分配的任務放回隊列（沿用原序號，保持 FIFO 順序）"""
+        for item in items:
+            self.push(item.task_id, item.priority, seq=item.seq)
+        self._compact()
+
+    def _compact(self) -> None:
+        """失效條目過多時重建堆，避免內存隨取消次數增長"""
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                entry for entry in self._heap if self._entries.get(entry[2]) == entry[1]
+            ]
+            heapq.heapify(self._heap)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class IdleAgentIndex:
+    """
+    空閒 Agent 倒排索引
+
+    以 agent_type / capability 為鍵，值為按變為空閒的先後排序的 Agent ID 集合
+    （以 dict 作有序集合），使查找、加入、移除都為 O(1)。
+    """
+
+    def __init__(self) -> None:
+        self._all: Dict[str, None] = {}
+        self._by_type: Dict[str, Dict[str, None]] = {}
+        self._by_capability: Dict[str, Dict[str, None]] = {}
+
+    def add(self, agent_id: str, agent_type: str, capabilities: Iterable[str]) -> None:
+        """將 Agent 標記為空閒"""
+        self._all[agent_id] = None
+        self._by_type.setdefault(agent_type, {})[agent_id] = None
+        for capability in capabilities:
+            self._by_capability.setdefault(capability, {})[agent_id] = None
+
+    def remove(
+        self, agent_id: str, agent_type: str, capabilities: Iterable[str]
+    ) -> None:
+        """將 Agent 移出空閒索引"""
+        if agent_id not in self._all:
+            return
+        del self._all[agent_id]
+        self._discard(self._by_type, agent_type, agent_id)
+        for capability in capabilities:
+            self._discard(self._by_capability, capability, agent_id)
+
+    @staticmethod
+    def _discard(index: Dict[str, Dict[str, None]], key: str, agent_id: str) -> None:
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(agent_id, None)
+        if not bucket:
+            del index[key]
+
+    def __contains__(self, agent_id: object) -> bool:
+        return agent_id in self._all
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def match(
+        self,
+        agent_type: Optional[str] = None,
+        capabilities: Optional[Iterable[str]] = None,
+    ) -> Iterator[str]:
+        """
+        按類型與能力篩選空閒 Agent
+
+        從最小的候選集合出發，逐一檢查是否屬於其餘集合，
+        代價與最小集合大小成正比，而非 Agent 總數。
+        返回惰性迭代器，迭代期間不可修改索引。
+        """
+        buckets: List[Dict[str, None]] = []
+        if agent_type is not None:
+            buckets.append(self._by_type.get(agent_type, {}))
+        for capability in set(capabilities or ()):
+            buckets.append(self._by_capability.get(capability, {}))
+        if not buckets:
+            return iter(self._all)
+
+        smallest = min(buckets, key=len)
+        others = [bucket for bucket in buckets if bucket is not smallest]
+        return (agent_id for agent_id in smallest if all(agent_id in b for b in others))
+
+    def has_type(self, agent_type: str) -> bool:
+        """是否存在指定類型的空閒 Agent"""
+        return bool(self._by_type.get(agent_type))
+
+
+class LatencyStats:
+    """
+    延遲統計
+
+    保留累計次數、總和與最大值，並以有界窗口保存最近樣本用於計算分位數。
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value_ms: float) -> None:
+        """記錄一個樣本（毫秒）"""
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+        self._samples.append(value_ms)
+
+    def _percentile(self, ordered: List[float], pct: float) -> float:
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, float]:
+        """轉換為字典格式"""
+        ordered = sorted(self._samples)
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "p50_ms": round(self._percentile(ordered, 0.5), 3),
+            "p95_ms": round(self._percentile(ordered, 0.95), 3),
+        }
+
+
+def pick_least_loaded(
+    candidates: Iterable[str], loads: Dict[str, int]
+) -> Optional[str]:
+    """
+    選擇負載最低的 Agent（同負載時取最早變為空閒者）
+
+    遇到負載為 0 的候選即返回，常見情況下為 O(1)。
+    """
+    best: Optional[str] = None
+    best_load = 0
+    for agent_id in candidates:
+        load = loads.get(agent_id, 0)
+        if load <= 0:
+            return agent_id
+        if best is None or load < best_load:
+            best, best_load = agent_id, load
+    return best
@@ -1,7 +1,7 @@
 # 代碼功能說明: Task Analyzer 核心邏輯實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """Task Analyzer 核心實現 - 整合任務分析、分類、路由和工作流選擇"""
 
@@ -16,6 +16,7 @@ from agents.task_analyzer.models import (
     WorkflowType,
 )
 from agents.task_analyzer.classifier import TaskClassifier
+from agents.task_analyzer.keyword_matcher import scan_task_text
 from agents.task_analyzer.workflow_selector import WorkflowSelector
 from agents.task_analyzer.llm_router import LLMRouter
 
@@ -164,22 +165,8 @@ class TaskAnalyzer:
 
         # 簡單查詢可能不需要 Agent
         if task_type == TaskType.QUERY:
-            # 檢查任務複雜度
-            complexity_keywords = [
-                "多步驟",
-                "多個",
-                "綜合",
-                "協作",
-                "複雜",
-                "multi-step",
-                "multiple",
-                "comprehensive",
-                "collaborate",
-                "complex",
-            ]
-            if any(keyword in task.lower() for keyword in complexity_keywords):
-                return True
-            return False
+            # 檢查任務複雜度（復用分類時的掃描結果）
+            return scan_task_text(task).any("agent_complexity")
 
         # 審查任務通常需要 Agent
         if task_type == TaskType.REVIEW:
@@ -1,14 +1,14 @@
 # 代碼功能說明: 任務分類器實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """任務分類器 - 實現任務類型分類邏輯"""
 
-import re
 import logging
 from typing import Dict, Any, Optional
 
+from agents.task_analyzer.keyword_matcher import scan_task_text
 from agents.task_analyzer.models import TaskType, TaskClassificationResult
 
 logger = logging.getLogger(__name__)
@@ -19,28 +19,13 @@ class TaskClassifier:
 
     def __init__(self):
         """初始化任務分類器"""
-        # 定義關鍵詞模式
+        # 任務類型 -> 關鍵詞分組（見 keyword_matcher.TASK_KEYWORD_GROUPS）
         self.patterns = {
-            TaskType.QUERY: [
-                r"查詢|查詢|搜索|查找|獲取|顯示|列出|告訴我|什麼是|如何|為什麼",
-                r"query|search|find|get|show|list|tell|what|how|why",
-            ],
-            TaskType.EXECUTION: [
-                r"執行|運行|操作|創建|刪除|更新|修改|發送|調用|執行",
-                r"execute|run|perform|create|delete|update|modify|send|call|do",
-            ],
-            TaskType.REVIEW: [
-                r"審查|檢查|驗證|評估|審核|校對|確認|審批",
-                r"review|check|verify|validate|audit|proofread|confirm|approve",
-            ],
-            TaskType.PLANNING: [
-                r"計劃|規劃|設計|安排|制定|準備|組織",
-                r"plan|design|arrange|schedule|prepare|organize",
-            ],
-            TaskType.COMPLEX: [
-                r"複雜|多步驟|綜合|整合|協作|多任務",
-                r"complex|multi-step|comprehensive|integrate|collaborate|multi-task",
-            ],
+            TaskType.QUERY: ["query.zh", "query.en"],
+            TaskType.EXECUTION: ["execution.zh", "execution.en"],
+            TaskType.REVIEW: ["review.zh", "review.en"],
+            TaskType.PLANNING: ["planning.zh", "planning.en"],
+            TaskType.COMPLEX: ["complex.zh", "complex.en"],
         }
 
     def classify(
@@ -58,16 +43,16 @@ class TaskClassifier:
         """
         logger.info(f"Classifying task: {task[:100]}...")
 
-        # 計算每個類型的匹配分數
+        # 計算每個類型的匹配分數（單次掃描，按文本緩存）
         scores: Dict[TaskType, float] = {}
-        task_lower = task.lower()
+        hits = scan_task_text(task)
 
-        for task_type, patterns in self.patterns.items():
+        for task_type, groups in self.patterns.items():
             score = 0.0
             matches = 0
 
-            for pattern in patterns:
-                if re.search(pattern, task_lower, re.IGNORECASE):
+            for group in groups:
+                if hits.any(group):
                     matches += 1
                     score += 0.3
 
@@ -80,17 +65,7 @@ class TaskClassifier:
             scores[task_type] = score
 
         # 檢查複雜任務標記
-        if any(
-            keyword in task_lower
-            for keyword in [
-                "多個",
-                "多個步驟",
-                "多步驟",
-                "綜合",
-                "multiple",
-                "multi-step",
-            ]
-        ):
+        if hits.any("complex_marker"):
             scores[TaskType.COMPLEX] = max(scores.get(TaskType.COMPLEX, 0.0), 0.8)
 
         # 選擇得分最高的類型
@@ -0,0 +1,183 @@
+# 代碼功能說明: 任務文本關鍵詞匹配引擎（預編譯合併正則、單次掃描、按文本緩存）
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""任務文本關鍵詞匹配引擎 - 任務分類、複雜度評估與 Agent 判斷共用一次掃描結果"""
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Pattern, Tuple
+
+# 關鍵詞分組（均為小寫，按子串匹配）
+# fmt: off
+TASK_KEYWORD_GROUPS: Dict[str, Tuple[str, ...]] = {
+    # 任務類型（分類器：每組命中計 0.3 分）
+    "query.zh": ("查詢", "搜索", "查找", "獲取", "顯示", "列出", "告訴我", "什麼是", "如何", "為什麼"),
+    "query.en": ("query", "search", "find", "get", "show", "list", "tell", "what", "how", "why"),
+    "execution.zh": ("執行", "運行", "操作", "創建", "刪除", "更新", "修改", "發送", "調用"),
+    "execution.en": (
+        "execute", "run", "perform", "create", "delete", "update", "modify", "send", "call", "do",
+    ),
+    "review.zh": ("審查", "檢查", "驗證", "評估", "審核", "校對", "確認", "審批"),
+    "review.en": (
+        "review", "check", "verify", "validate", "audit", "proofread", "confirm", "approve",
+    ),
+    "planning.zh": ("計劃", "規劃", "設計", "安排", "制定", "準備", "組織"),
+    "planning.en": ("plan", "design", "arrange", "schedule", "prepare", "organize"),
+    "complex.zh": ("複雜", "多步驟", "綜合", "整合", "協作", "多任務"),
+    "complex.en": (
+        "complex", "multi-step", "comprehensive", "integrate", "collaborate", "multi-task",
+    ),
+    # 複雜任務標記（分類器：命中時複雜類型至少 0.8 分）
+    "complex_marker": ("多個", "多個步驟", "多步驟", "綜合", "multiple", "multi-step"),
+    # 查詢任務是否仍需 Agent
+    "agent_complexity": (
+        "多步驟", "多個", "綜合", "協作", "複雜",
+        "multi-step", "multiple", "comprehensive", "collaborate", "complex",
+    ),
+    # 路由複雜度評估
+    "complexity.complex": (
+        "分析", "比較", "評估", "設計", "規劃", "優化", "解決", "實現", "開發", "創建",
+    ),
+    "complexity.simple": ("查詢", "查找", "獲取", "顯示", "列出", "說明", "解釋"),
+    "question_mark": ("?", "？"),
+}
+# fmt: on
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    將關鍵詞構建為前綴樹形式的正則（共享前綴只比較一次，貪婪可選組保證取最長命中）
+
+    Args:
+        keywords: 關鍵詞
+
+    Returns:
+        正則表達式片段
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            re.escape(char) + build(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordHits:
+    """一次掃描的命中結果（只讀，可安全緩存共享）"""
+
+    __slots__ = ("_groups", "counts")
+
+    def __init__(
+        self, groups: Mapping[str, FrozenSet[str]], counts: Dict[str, int]
+    ) -> None:
+        self._groups = groups
+        # 關鍵詞 -> 出現次數（含重疊出現）
+        self.counts: Mapping[str, int] = MappingProxyType(counts)
+
+    def matched(self, group: str) -> FrozenSet[str]:
+        """分組中命中的不同關鍵詞"""
+        return self._groups[group].intersection(self.counts)
+
+    def count(self, group: str) -> int:
+        """分組中命中的不同關鍵詞數"""
+        return len(self.matched(group))
+
+    def any(self, group: str) -> bool:
+        """分組是否有任一關鍵詞命中"""
+        return any(keyword in self.counts for keyword in self._groups[group])
+
+    def occurrences(self, group: str) -> int:
+        """分組關鍵詞的總出現次數"""
+        return sum(self.counts.get(keyword, 0) for keyword in self._groups[group])
+
+
+class KeywordMatcher:
+    """多關鍵詞匹配器
+
+    所有關鍵詞合併為一個前綴樹形式的預編譯正則，包在零寬先行斷言 ``(?=(...))``
+    中，在每個位置取最長命中，再補上作為其前綴的較短關鍵詞；一次掃描即可得到
+    所有（含重疊的）子串命中，語義與逐個 ``kw in text`` 相同。
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        """
+        初始化匹配器
+
+        Args:
+            groups: 分組名 -> 關鍵詞列表（關鍵詞應為小寫）
+        """
+        self.groups: Dict[str, FrozenSet[str]] = {
+            name: frozenset(keywords) for name, keywords in groups.items()
+        }
+        keywords = sorted(set().union(*self.groups.values()))
+        # 最長命中 -> 同一起點上命中的所有關鍵詞（自身及其前綴關鍵詞）
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(other for other in keywords if keyword.startswith(other))
+            for keyword in keywords
+        }
+        self._pattern: Optional[Pattern[str]] = None
+        if keywords:
+            # 首字符集前置斷言讓正則引擎快速跳過不可能命中的位置
+            first_chars = re.escape("".join(sorted({kw[0] for kw in keywords})))
+            self._pattern = re.compile(
+                f"(?=[{first_chars}])(?=({_trie_pattern(keywords)}))"
+            )
+
+    def scan(self, text: str) -> KeywordHits:
+        """
+        掃描文本（調用方負責標準化大小寫）
+
+        Args:
+            text: 待掃描文本
+
+        Returns:
+            命中結果
+        """
+        counts: Dict[str, int] = {}
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                for keyword in self._prefixes[match.group(1)]:
+                    counts[keyword] = counts.get(keyword, 0) + 1
+        return KeywordHits(self.groups, counts)
+
+
+TASK_MATCHER = KeywordMatcher(TASK_KEYWORD_GROUPS)
+
+
+def normalize_task_text(text: str) -> str:
+    """標準化任務文本（關鍵詞均為小寫，按小寫匹配）"""
+    return text.lower()
+
+
+@lru_cache(maxsize=1024)
+def _scan_normalized(normalized: str) -> KeywordHits:
+    return TASK_MATCHER.scan(normalized)
+
+
+def scan_task_text(text: str) -> KeywordHits:
+    """
+    掃描任務文本並返回全部關鍵詞命中（按標準化文本緩存）
+
+    同一請求中的分類、複雜度評估與 Agent 判斷共用一次掃描結果。
+
+    Args:
+        text: 任務描述
+
+    Returns:
+        命中結果
+    """
+    return _scan_normalized(normalize_task_text(text))
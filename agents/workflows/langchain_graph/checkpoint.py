@@ -1,32 +1,64 @@
 # 代碼功能說明: LangChain/Graph checkpoint 與狀態儲存
 # 創建日期: 2025-11-26 20:07 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-26 20:07 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """提供 LangGraph checkpoint builder 與 Redis 儲存實作。"""
 
 from __future__ import annotations
 
-import asyncio
-import json
 import logging
-from typing import Any, AsyncIterator, Iterator, Sequence
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-import redis  # type: ignore[import-untyped]
 from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
     BaseCheckpointSaver,
     ChannelVersions,
     Checkpoint,
     CheckpointMetadata,
     CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
 )
 from langgraph.checkpoint.memory import MemorySaver
 
 from agents.workflows.settings import LangChainGraphSettings
+from databases.redis import (
+    delete_matching,
+    get_async_redis_client,
+    get_redis_client,
+    scan_keys,
+)
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# 序列化封包格式：版本(1B) | 壓縮旗標(1B) | 類型長度(1B) | 類型 | 數據
+_PACK_VERSION = 1
+_FLAG_RAW = 0
+_FLAG_ZSTD = 1
+
+# 分頁讀取索引時的批量
+_INDEX_PAGE_SIZE = 50
+
 
 def _config_thread_id(config: RunnableConfig) -> str:
     configurable = config.get("configurable") or {}
@@ -38,17 +70,40 @@ def _config_thread_id(config: RunnableConfig) -> str:
     )
 
 
-def _config_checkpoint_id(config: RunnableConfig) -> str:
-    configurable = config.get("configurable") or {}
-    return (
-        configurable.get("checkpoint_id")
-        or configurable.get("langgraph_checkpoint_id")
-        or _config_thread_id(config)
-    )
+def _config_checkpoint_ns(config: RunnableConfig) -> str:
+    return (config.get("configurable") or {}).get("checkpoint_ns") or ""
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _tuple_config(
+    thread_id: str, checkpoint_ns: str, checkpoint_id: str
+) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
 
 
 class RedisCheckpointSaver(BaseCheckpointSaver[int]):
-    """最小可行的 Redis checkpoint saver。"""
+    """
+    Redis checkpoint saver（保存完整版本歷史）。
+
+    鍵佈局（prefix = ``{namespace}:{thread_id}:{checkpoint_ns}``）：
+
+    - ``{prefix}:index``：sorted set，成員為 checkpoint_id（uuid6，按字典序即時間序）
+    - ``{prefix}:checkpoint:{id}``：hash，保存不含 channel_values 的 checkpoint、metadata 與 parent
+    - ``{prefix}:blob:{channel}:{version}``：單個 channel 值；僅在 channel 版本變化時寫入（增量）
+    - ``{prefix}:writes:{id}``：hash，保存 pending writes
+
+    值使用 LangGraph serde（msgpack）編碼，超過閾值時可選 zstd 壓縮。
+    同步方法使用共享連線池，異步方法使用原生 ``redis.asyncio`` 客戶端。
+    """
 
     def __init__(
         self,
@@ -56,38 +111,300 @@ class RedisCheckpointSaver(BaseCheckpointSaver[int]):
         redis_url: str,
         namespace: str,
         ttl_seconds: int,
+        compression: Optional[str] = "zstd",
+        compression_threshold: int = 1024,
+        compression_level: int = 3,
     ) -> None:
         super().__init__()
-        self._redis = redis.Redis.from_url(redis_url)
+        self._redis_url = redis_url
+        self._redis = get_redis_client(redis_url)
         self._namespace = namespace
         self._ttl = ttl_seconds
+        self._compression_threshold = max(compression_threshold, 0)
+        self._compressor = None
+        self._decompressor = None
+        if compression and compression.lower() == "zstd":
+            if ZSTD_AVAILABLE:
+                self._compressor = zstandard.ZstdCompressor(level=compression_level)
+                self._decompressor = zstandard.ZstdDecompressor()
+            else:
+                logger.warning("zstandard 未安裝，checkpoint 將不壓縮")
+
+    # ------------------------------------------------------------------
+    # 鍵與封包
+    # ------------------------------------------------------------------
+
+    def _prefix(self, thread_id: str, checkpoint_ns: str) -> str:
+        return f"{self._namespace}:{thread_id}:{checkpoint_ns}"
+
+    def _index_key(self, thread_id: str, checkpoint_ns: str) -> str:
+        return f"{self._prefix(thread_id, checkpoint_ns)}:index"
 
-    def _key(self, config: RunnableConfig) -> str:
-        return f"{self._namespace}:{_config_thread_id(config)}:{_config_checkpoint_id(config)}"
+    def _checkpoint_key(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> str:
+        return f"{self._prefix(thread_id, checkpoint_ns)}:checkpoint:{checkpoint_id}"
 
-    def _serialize(self, payload: dict[str, Any]) -> str:
-        return json.dumps(
-            payload, default=lambda obj: getattr(obj, "__dict__", str(obj))
+    def _blob_key(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: Any
+    ) -> str:
+        return f"{self._prefix(thread_id, checkpoint_ns)}:blob:{channel}:{version}"
+
+    def _writes_key(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> str:
+        return f"{self._prefix(thread_id, checkpoint_ns)}:writes:{checkpoint_id}"
+
+    def _pack(self, value: Any) -> bytes:
+        type_, data = self.serde.dumps_typed(value)
+        flag = _FLAG_RAW
+        if self._compressor is not None and len(data) >= self._compression_threshold:
+            data = self._compressor.compress(data)
+            flag = _FLAG_ZSTD
+        type_bytes = type_.encode("utf-8")
+        return bytes((_PACK_VERSION, flag, len(type_bytes))) + type_bytes + data
+
+    def _unpack(self, raw: bytes) -> Any:
+        flag, type_len = raw[1], raw[2]
+        type_ = raw[3 : 3 + type_len].decode("utf-8")
+        data = raw[3 + type_len :]
+        if flag == _FLAG_ZSTD:
+            if self._decompressor is None:
+                if not ZSTD_AVAILABLE:
+                    raise RuntimeError("checkpoint 使用 zstd 壓縮，但未安裝 zstandard")
+                self._decompressor = zstandard.ZstdDecompressor()
+            data = self._decompressor.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    # ------------------------------------------------------------------
+    # 與 I/O 無關的構建/解析邏輯（同步與異步共用）
+    # ------------------------------------------------------------------
+
+    def _put_commands(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> Tuple[List[Tuple[str, tuple, dict]], RunnableConfig]:
+        thread_id = _config_thread_id(config)
+        checkpoint_ns = _config_checkpoint_ns(config)
+        checkpoint_id = checkpoint["id"]
+        parent_id = (config.get("configurable") or {}).get("checkpoint_id") or ""
+
+        stored: Dict[str, Any] = dict(checkpoint)
+        values: Dict[str, Any] = stored.pop("channel_values", {})
+
+        commands: List[Tuple[str, tuple, dict]] = []
+        # 增量：僅寫入本步驟版本有變化的 channel
+        for channel, version in new_versions.items():
+            if channel not in values:
+                continue
+            commands.append(
+                (
+                    "set",
+                    (
+                        self._blob_key(thread_id, checkpoint_ns, channel, version),
+                        self._pack(values[channel]),
+                    ),
+                    {"ex": self._ttl},
+                )
+            )
+        # 未變化但仍被引用的 blob 僅刷新 TTL
+        for channel, version in stored.get("channel_versions", {}).items():
+            if channel in new_versions:
+                continue
+            commands.append(
+                (
+                    "expire",
+                    (
+                        self._blob_key(thread_id, checkpoint_ns, channel, version),
+                        self._ttl,
+                    ),
+                    {},
+                )
+            )
+
+        checkpoint_key = self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)
+        commands.append(
+            (
+                "hset",
+                (checkpoint_key,),
+                {
+                    "mapping": {
+                        "checkpoint": self._pack(stored),
+                        "metadata": self._pack(
+                            get_checkpoint_metadata(config, metadata)
+                        ),
+                        "parent": parent_id,
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                    }
+                },
+            )
         )
+        commands.append(("expire", (checkpoint_key, self._ttl), {}))
+        index_key = self._index_key(thread_id, checkpoint_ns)
+        commands.append(("zadd", (index_key, {checkpoint_id: 0}), {}))
+        commands.append(("expire", (index_key, self._ttl), {}))
+        return commands, _tuple_config(thread_id, checkpoint_ns, checkpoint_id)
+
+    def _writes_commands(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str,
+    ) -> List[Tuple[str, tuple, dict]]:
+        thread_id = _config_thread_id(config)
+        checkpoint_ns = _config_checkpoint_ns(config)
+        checkpoint_id = (config.get("configurable") or {}).get("checkpoint_id") or ""
+        key = self._writes_key(thread_id, checkpoint_ns, checkpoint_id)
 
-    def _deserialize(self, raw: bytes) -> dict[str, Any]:
-        return json.loads(raw.decode("utf-8"))
+        commands: List[Tuple[str, tuple, dict]] = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            field = f"{task_id}:{write_idx}"
+            packed = self._pack(
+                [task_id, channel, task_path, write_idx, self._pack(value)]
+            )
+            # 一般寫入僅保留首次結果；特殊 channel（錯誤、中斷等）允許覆蓋
+            command = "hsetnx" if write_idx >= 0 else "hset"
+            commands.append((command, (key, field, packed), {}))
+        commands.append(("expire", (key, self._ttl), {}))
+        return commands
 
-    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
-        data = self._redis.get(self._key(config))
-        if not data:
+    def _decode_checkpoint_hash(self, raw: Dict[Any, Any]) -> Optional[Dict[str, Any]]:
+        if not raw:
             return None
-        if not isinstance(data, bytes):
-            return None  # type: ignore[unreachable]
-        payload = self._deserialize(data)
-        checkpoint = payload["checkpoint"]
-        metadata = payload["metadata"]
+        fields = {_text(k): v for k, v in raw.items()}
+        return {
+            "checkpoint": self._unpack(fields["checkpoint"]),
+            "metadata": self._unpack(fields["metadata"]),
+            "parent": _text(fields.get("parent", b"")),
+            "thread_id": _text(fields.get("thread_id", b"")),
+            "checkpoint_ns": _text(fields.get("checkpoint_ns", b"")),
+        }
+
+    def _decode_writes(self, raw: Dict[Any, Any]) -> List[Tuple[str, str, Any]]:
+        entries = [self._unpack(value) for value in (raw or {}).values()]
+        entries.sort(key=lambda e: writes_sort_key(e[2], e[0], e[3]))
+        return [
+            (task_id, channel, self._unpack(value))
+            for task_id, channel, _, _, value in entries
+        ]
+
+    def _blob_keys(
+        self, thread_id: str, checkpoint_ns: str, checkpoint: Dict[str, Any]
+    ) -> List[Tuple[str, str]]:
+        return [
+            (channel, self._blob_key(thread_id, checkpoint_ns, channel, version))
+            for channel, version in checkpoint.get("channel_versions", {}).items()
+        ]
+
+    def _build_tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        decoded: Dict[str, Any],
+        blob_keys: List[Tuple[str, str]],
+        blob_values: Sequence[Any],
+        writes_raw: Dict[Any, Any],
+    ) -> CheckpointTuple:
+        channel_values = {
+            channel: self._unpack(raw)
+            for (channel, _), raw in zip(blob_keys, blob_values)
+            if raw is not None
+        }
+        checkpoint: Checkpoint = decoded["checkpoint"]
+        checkpoint["channel_values"] = channel_values
+        parent = decoded["parent"]
         return CheckpointTuple(
-            config=config,
+            config=_tuple_config(thread_id, checkpoint_ns, checkpoint_id),
             checkpoint=checkpoint,
-            metadata=metadata,
+            metadata=decoded["metadata"],
+            parent_config=(
+                _tuple_config(thread_id, checkpoint_ns, parent) if parent else None
+            ),
+            pending_writes=self._decode_writes(writes_raw),
+        )
+
+    @staticmethod
+    def _match_filter(
+        metadata: Mapping[str, Any], filter: Optional[Dict[str, Any]]
+    ) -> bool:
+        return not filter or all(metadata.get(k) == v for k, v in filter.items())
+
+    @staticmethod
+    def _index_bounds(before: Optional[RunnableConfig]) -> str:
+        before_id = get_checkpoint_id(before) if before else None
+        return f"({before_id}" if before_id else "+"
+
+    def _index_pattern(self, thread_id: Optional[str]) -> str:
+        return f"{self._namespace}:{thread_id or '*'}:*:index"
+
+    @staticmethod
+    def _apply(pipe: Any, commands: List[Tuple[str, tuple, dict]]) -> None:
+        for name, args, kwargs in commands:
+            getattr(pipe, name)(*args, **kwargs)
+
+    # ------------------------------------------------------------------
+    # 同步 API
+    # ------------------------------------------------------------------
+
+    def _load(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> Optional[CheckpointTuple]:
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hgetall(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+        pipe.hgetall(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+        raw_checkpoint, raw_writes = pipe.execute()
+        decoded = self._decode_checkpoint_hash(raw_checkpoint)
+        if decoded is None:
+            return None
+        blob_keys = self._blob_keys(thread_id, checkpoint_ns, decoded["checkpoint"])
+        blob_values = self._redis.mget([k for _, k in blob_keys]) if blob_keys else []
+        return self._build_tuple(
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            decoded,
+            blob_keys,
+            blob_values,
+            raw_writes,
         )
 
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = _config_thread_id(config)
+        checkpoint_ns = _config_checkpoint_ns(config)
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            latest = self._redis.zrevrangebylex(
+                self._index_key(thread_id, checkpoint_ns), "+", "-", start=0, num=1
+            )
+            if not latest:
+                return None
+            checkpoint_id = _text(latest[0])
+        return self._load(thread_id, checkpoint_ns, checkpoint_id)
+
+    def _iter_index(
+        self, index_key: str, before: Optional[RunnableConfig]
+    ) -> Iterator[str]:
+        start = 0
+        upper = self._index_bounds(before)
+        while True:
+            page = self._redis.zrevrangebylex(
+                index_key, upper, "-", start=start, num=_INDEX_PAGE_SIZE
+            )
+            if not page:
+                return
+            for member in page:
+                yield _text(member)
+            if len(page) < _INDEX_PAGE_SIZE:
+                return
+            start += len(page)
+
     def list(
         self,
         config: RunnableConfig | None,
@@ -96,12 +413,43 @@ class RedisCheckpointSaver(BaseCheckpointSaver[int]):
         before: RunnableConfig | None = None,
         limit: int | None = None,
     ) -> Iterator[CheckpointTuple]:
-        if config:
-            value = self.get_tuple(config)
-            if value:
-                yield value
+        remaining = limit
+        if config is not None:
+            thread_id = _config_thread_id(config)
+            targets = [(thread_id, _config_checkpoint_ns(config))]
+            if get_checkpoint_id(config):
+                value = self.get_tuple(config)
+                if value and self._match_filter(value.metadata, filter):
+                    yield value
+                return
         else:
-            yield from ()
+            targets = []
+            for key in scan_keys(self._redis, self._index_pattern(None)):
+                members = self._redis.zrevrangebylex(
+                    _text(key), "+", "-", start=0, num=1
+                )
+                if not members:
+                    continue
+                decoded = self._redis.hmget(
+                    _text(key)[: -len("index")] + f"checkpoint:{_text(members[0])}",
+                    "thread_id",
+                    "checkpoint_ns",
+                )
+                if decoded[0] is not None:
+                    targets.append((_text(decoded[0]), _text(decoded[1] or b"")))
+
+        for thread_id, checkpoint_ns in targets:
+            for checkpoint_id in self._iter_index(
+                self._index_key(thread_id, checkpoint_ns), before
+            ):
+                if remaining is not None and remaining <= 0:
+                    return
+                value = self._load(thread_id, checkpoint_ns, checkpoint_id)
+                if value is None or not self._match_filter(value.metadata, filter):
+                    continue
+                if remaining is not None:
+                    remaining -= 1
+                yield value
 
     def put(
         self,
@@ -110,13 +458,13 @@ class RedisCheckpointSaver(BaseCheckpointSaver[int]):
         metadata: CheckpointMetadata,
         new_versions: ChannelVersions,
     ) -> RunnableConfig:
-        payload = {
-            "checkpoint": checkpoint,
-            "metadata": metadata,
-            "versions": new_versions,
-        }
-        self._redis.setex(self._key(config), self._ttl, self._serialize(payload))
-        return config
+        commands, next_config = self._put_commands(
+            config, checkpoint, metadata, new_versions
+        )
+        pipe = self._redis.pipeline(transaction=True)
+        self._apply(pipe, commands)
+        pipe.execute()
+        return next_config
 
     def put_writes(
         self,
@@ -127,23 +475,55 @@ class RedisCheckpointSaver(BaseCheckpointSaver[int]):
     ) -> None:
         if not writes:
             return
-        payload = {
-            "writes": list(writes),
-            "task_id": task_id,
-            "task_path": task_path,
-        }
-        self._redis.setex(
-            f"{self._key(config)}:writes", self._ttl, self._serialize(payload)
-        )
+        pipe = self._redis.pipeline(transaction=True)
+        self._apply(pipe, self._writes_commands(config, writes, task_id, task_path))
+        pipe.execute()
 
     def delete_thread(self, thread_id: str) -> None:
-        pattern = f"{self._namespace}:{thread_id}:*"
-        keys = list(self._redis.scan_iter(match=pattern))
-        if keys:
-            self._redis.delete(*keys)
+        delete_matching(self._redis, f"{self._namespace}:{thread_id}:*")
+
+    # ------------------------------------------------------------------
+    # 異步 API（原生 redis.asyncio）
+    # ------------------------------------------------------------------
+
+    def _aclient(self) -> Any:
+        return get_async_redis_client(self._redis_url)
+
+    async def _aload(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> Optional[CheckpointTuple]:
+        client = self._aclient()
+        pipe = client.pipeline(transaction=False)
+        pipe.hgetall(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+        pipe.hgetall(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+        raw_checkpoint, raw_writes = await pipe.execute()
+        decoded = self._decode_checkpoint_hash(raw_checkpoint)
+        if decoded is None:
+            return None
+        blob_keys = self._blob_keys(thread_id, checkpoint_ns, decoded["checkpoint"])
+        blob_values = await client.mget([k for _, k in blob_keys]) if blob_keys else []
+        return self._build_tuple(
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            decoded,
+            blob_keys,
+            blob_values,
+            raw_writes,
+        )
 
     async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
-        return await asyncio.to_thread(self.get_tuple, config)
+        thread_id = _config_thread_id(config)
+        checkpoint_ns = _config_checkpoint_ns(config)
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            latest = await self._aclient().zrevrangebylex(
+                self._index_key(thread_id, checkpoint_ns), "+", "-", start=0, num=1
+            )
+            if not latest:
+                return None
+            checkpoint_id = _text(latest[0])
+        return await self._aload(thread_id, checkpoint_ns, checkpoint_id)
 
     async def alist(
         self,
@@ -153,11 +533,53 @@ class RedisCheckpointSaver(BaseCheckpointSaver[int]):
         before: RunnableConfig | None = None,
         limit: int | None = None,
     ) -> AsyncIterator[CheckpointTuple]:
-        if config:
-            value = await self.aget_tuple(config)
-            if value:
-                yield value
-        return
+        client = self._aclient()
+        remaining = limit
+        if config is not None:
+            if get_checkpoint_id(config):
+                value = await self.aget_tuple(config)
+                if value and self._match_filter(value.metadata, filter):
+                    yield value
+                return
+            targets = [(_config_thread_id(config), _config_checkpoint_ns(config))]
+        else:
+            targets = []
+            async for key in client.scan_iter(
+                match=self._index_pattern(None), count=500
+            ):
+                members = await client.zrevrangebylex(
+                    _text(key), "+", "-", start=0, num=1
+                )
+                if not members:
+                    continue
+                decoded = await client.hmget(
+                    _text(key)[: -len("index")] + f"checkpoint:{_text(members[0])}",
+                    "thread_id",
+                    "checkpoint_ns",
+                )
+                if decoded[0] is not None:
+                    targets.append((_text(decoded[0]), _text(decoded[1] or b"")))
+
+        upper = self._index_bounds(before)
+        for thread_id, checkpoint_ns in targets:
+            index_key = self._index_key(thread_id, checkpoint_ns)
+            start = 0
+            while True:
+                page = await client.zrevrangebylex(
+                    index_key, upper, "-", start=start, num=_INDEX_PAGE_SIZE
+                )
+                for member in page:
+                    if remaining is not None and remaining <= 0:
+                        return
+                    value = await self._aload(thread_id, checkpoint_ns, _text(member))
+                    if value is None or not self._match_filter(value.metadata, filter):
+                        continue
+                    if remaining is not None:
+                        remaining -= 1
+                    yield value
+                if len(page) < _INDEX_PAGE_SIZE:
+                    break
+                start += len(page)
 
     async def aput(
         self,
@@ -166,9 +588,13 @@ class RedisCheckpointSaver(BaseCheckpointSaver[int]):
         metadata: CheckpointMetadata,
         new_versions: ChannelVersions,
     ) -> RunnableConfig:
-        return await asyncio.to_thread(
-            self.put, config, checkpoint, metadata, new_versions
+        commands, next_config = self._put_commands(
+            config, checkpoint, metadata, new_versions
         )
+        pipe = self._aclient().pipeline(transaction=True)
+        self._apply(pipe, commands)
+        await pipe.execute()
+        return next_config
 
     async def aput_writes(
         self,
@@ -177,10 +603,24 @@ class RedisCheckpointSaver(BaseCheckpointSaver[int]):
         task_id: str,
         task_path: str = "",
     ) -> None:
-        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+        if not writes:
+            return
+        pipe = self._aclient().pipeline(transaction=True)
+        self._apply(pipe, self._writes_commands(config, writes, task_id, task_path))
+        await pipe.execute()
 
     async def adelete_thread(self, thread_id: str) -> None:
-        await asyncio.to_thread(self.delete_thread, thread_id)
+        client = self._aclient()
+        batch: List[Any] = []
+        async for key in client.scan_iter(
+            match=f"{self._namespace}:{thread_id}:*", count=500
+        ):
+            batch.append(key)
+            if len(batch) >= 500:
+                await client.unlink(*batch)
+                batch = []
+        if batch:
+            await client.unlink(*batch)
 
 
 def build_checkpointer(settings: LangChainGraphSettings):
@@ -193,6 +633,8 @@ def build_checkpointer(settings: LangChainGraphSettings):
                 redis_url=settings.state_store.redis_url,
                 namespace=settings.state_store.namespace,
                 ttl_seconds=settings.state_store.ttl_seconds,
+                compression=settings.state_store.compression,
+                compression_threshold=settings.state_store.compression_threshold,
             )
         except Exception as exc:  # pragma: no cover - redis 啟動失敗時 fallback
             logger.warning("初始化 Redis checkpoint 失敗，改用 MemorySaver: %s", exc)
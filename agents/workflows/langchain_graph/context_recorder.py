@@ -1,7 +1,7 @@
 # 代碼功能說明: LangChain/Graph Context Recorder
 # 創建日期: 2025-11-26 20:07 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-26 20:07 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """提供簡易 Context Recorder，支援 Redis 或記憶體儲存。"""
 
@@ -11,9 +11,8 @@ import json
 import logging
 from typing import Any, Dict, Optional
 
-import redis  # type: ignore[import-untyped]
-
 from agents.workflows.settings import LangChainGraphSettings
+from databases.redis import get_redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +29,7 @@ class ContextRecorder:
         self._redis = None
         if redis_url:
             try:
-                self._redis = redis.Redis.from_url(redis_url)
+                self._redis = get_redis_client(redis_url)
             except Exception as exc:  # pragma: no cover - redis 啟動失敗時 fallback
                 logger.warning("Context Recorder 初始化 Redis 失敗，使用記憶體儲存: %s", exc)
 
@@ -0,0 +1,192 @@
+# 代碼功能說明: LangChain/Graph 計劃步驟 DAG 排程器
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""將計劃步驟解析為 DAG，並在並行上限內併發執行互不依賴的步驟。"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+class PlanGraphError(ValueError):
+    """計劃步驟依賴無效（未知依賴或存在環）。"""
+
+
+@dataclass
+class PlanNode:
+    """DAG 中的單個計劃步驟。"""
+
+    index: int
+    step_id: str
+    description: str
+    dependencies: List[str] = field(default_factory=list)
+    raw: Any = None
+
+
+@dataclass
+class StepRun:
+    """單個步驟的執行結果與耗時。"""
+
+    node: PlanNode
+    output: Any
+    started_at: float
+    finished_at: float
+    wave: int
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.finished_at - self.started_at) * 1000
+
+
+def build_plan_nodes(plan: Sequence[Any]) -> List[PlanNode]:
+    """
+    將計劃轉換為 DAG 節點。
+
+    支援三種步驟格式：
+    - ``str``：沒有顯式依賴，視為依賴前一步（保持原有的順序語義）
+    - ``dict``：``{"id"/"step_id", "description"/"step", "dependencies"}``
+    - 具有 ``step_id``、``description``、``dependencies`` 屬性的對象（如 AutoGen ``PlanStep``）
+    """
+    nodes: List[PlanNode] = []
+    for idx, step in enumerate(plan):
+        previous = [nodes[-1].step_id] if nodes else []
+        if isinstance(step, str):
+            nodes.append(PlanNode(idx, f"step_{idx + 1}", step, previous, step))
+        elif isinstance(step, dict):
+            step_id = str(step.get("id") or step.get("step_id") or f"step_{idx + 1}")
+            description = str(step.get("description") or step.get("step") or step_id)
+            deps = step.get("dependencies")
+            nodes.append(
+                PlanNode(
+                    idx,
+                    step_id,
+                    description,
+                    [str(d) for d in deps] if deps is not None else previous,
+                    step,
+                )
+            )
+        else:
+            step_id = str(getattr(step, "step_id", None) or f"step_{idx + 1}")
+            description = str(getattr(step, "description", step))
+            deps = getattr(step, "dependencies", None)
+            nodes.append(
+                PlanNode(
+                    idx,
+                    step_id,
+                    description,
+                    [str(d) for d in deps] if deps is not None else previous,
+                    step,
+                )
+            )
+    return nodes
+
+
+def topological_order(nodes: Sequence[PlanNode]) -> List[PlanNode]:
+    """
+    以 Kahn 算法做拓撲排序（同層按原計劃順序，保證結果確定）。
+
+    Raises:
+        PlanGraphError: 存在未知依賴或環
+    """
+    by_id = {node.step_id: node for node in nodes}
+    if len(by_id) != len(nodes):
+        raise PlanGraphError("plan contains duplicated step ids")
+
+    indegree: Dict[str, int] = {node.step_id: 0 for node in nodes}
+    dependents: Dict[str, List[PlanNode]] = {node.step_id: [] for node in nodes}
+    for node in nodes:
+        for dep in node.dependencies:
+            if dep not in by_id:
+                raise PlanGraphError(
+                    f"step {node.step_id} depends on unknown step {dep}"
+                )
+            indegree[node.step_id] += 1
+            dependents[dep].append(node)
+
+    ready = sorted(
+        (n for n in nodes if indegree[n.step_id] == 0), key=lambda n: n.index
+    )
+    ordered: List[PlanNode] = []
+    while ready:
+        node = ready.pop(0)
+        ordered.append(node)
+        released = []
+        for child in dependents[node.step_id]:
+            indegree[child.step_id] -= 1
+            if indegree[child.step_id] == 0:
+                released.append(child)
+        if released:
+            ready = sorted(ready + released, key=lambda n: n.index)
+
+    if len(ordered) != len(nodes):
+        raise PlanGraphError("plan dependencies contain a cycle")
+    return ordered
+
+
+def select_steps(nodes: Sequence[PlanNode], max_steps: int) -> List[PlanNode]:
+    """按拓撲順序選取前 max_steps 個步驟（依賴閉包必然包含在內）。"""
+    return topological_order(nodes)[: max(max_steps, 0)]
+
+
+async def run_dag(
+    nodes: Sequence[PlanNode],
+    run_step: Callable[[PlanNode, Dict[str, Any]], Awaitable[Any]],
+    *,
+    max_parallel: int = 4,
+    on_step_done: Optional[Callable[[StepRun], None]] = None,
+) -> List[StepRun]:
+    """
+    併發執行 DAG：依賴全部完成的步驟立即啟動，同時運行數不超過 max_parallel。
+
+    Args:
+        nodes: 要執行的節點（依賴必須在集合內）
+        run_step: 執行單步的協程函數，接收節點與其依賴的輸出
+        max_parallel: 並行上限
+        on_step_done: 每步完成時的回調（用於 telemetry）
+
+    Returns:
+        按原計劃順序排列的執行結果
+    """
+    ordered = topological_order(nodes)
+    if not ordered:
+        return []
+
+    semaphore = asyncio.Semaphore(max(max_parallel, 1))
+    outputs: Dict[str, Any] = {}
+    waves: Dict[str, int] = {}
+    runs: Dict[str, StepRun] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def _execute(node: PlanNode) -> None:
+        # 等待依賴完成（依賴任務必定已在 tasks 中，因為按拓撲順序創建）
+        if node.dependencies:
+            await asyncio.gather(*(tasks[dep] for dep in node.dependencies))
+        wave = max((waves[dep] + 1 for dep in node.dependencies), default=0)
+        dep_outputs = {dep: outputs[dep] for dep in node.dependencies}
+        async with semaphore:
+            started = time.perf_counter()
+            output = await run_step(node, dep_outputs)
+            finished = time.perf_counter()
+        outputs[node.step_id] = output
+        waves[node.step_id] = wave
+        run = StepRun(node, output, started, finished, wave)
+        runs[node.step_id] = run
+        if on_step_done is not None:
+            on_step_done(run)
+
+    for node in ordered:
+        tasks[node.step_id] = asyncio.ensure_future(_execute(node))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    return sorted(runs.values(), key=lambda run: run.node.index)
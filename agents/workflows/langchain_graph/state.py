@@ -1,7 +1,7 @@
 # 代碼功能說明: LangChain/Graph Workflow 狀態定義
 # 創建日期: 2025-11-26 20:07 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-26 20:07 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """定義 LangChain/Graph 工作流使用的狀態結構。"""
 
@@ -20,7 +20,7 @@ class LangGraphState(TypedDict, total=False):
 
     task: str
     context: Dict[str, Any]
-    plan: List[str]
+    plan: List[Any]  # str 或帶 id/dependencies 的步驟 dict
     current_step: int
     outputs: Annotated[List[str], operator.add]
     route: Literal["standard", "deep_dive"]
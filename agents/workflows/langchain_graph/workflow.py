@@ -1,13 +1,14 @@
 # 代碼功能說明: LangChain/Graph Workflow 執行核心
 # 創建日期: 2025-11-26 20:07 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-26 20:07 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """LangChain/Graph 工作流編排實作。"""
 
 from __future__ import annotations
 
 import textwrap
+import time
 from typing import Any, Dict, List, Literal
 
 from langchain_core.runnables import RunnableConfig, RunnableLambda
@@ -16,6 +17,14 @@ from langgraph.graph import END, StateGraph
 from agents.workflows.base import WorkflowExecutionResult, WorkflowRequestContext
 from agents.workflows.langchain_graph.checkpoint import build_checkpointer
 from agents.workflows.langchain_graph.context_recorder import build_context_recorder
+from agents.workflows.langchain_graph.dag import (
+    PlanGraphError,
+    PlanNode,
+    StepRun,
+    build_plan_nodes,
+    run_dag,
+    select_steps,
+)
 from agents.workflows.langchain_graph.state import LangGraphState, build_initial_state
 from agents.workflows.langchain_graph.telemetry import WorkflowTelemetryCollector
 from agents.workflows.settings import LangChainGraphSettings
@@ -219,28 +228,54 @@ class LangChainGraphWorkflow:
             self._telemetry.emit("executor.skip", reason="empty_plan")
             return LangGraphState(status="review")
 
-        outputs: List[str] = []
-        max_iterations = min(len(plan), self._settings.max_iterations)
-        for idx in range(max_iterations):
-            step = plan[idx]
+        try:
+            nodes = select_steps(build_plan_nodes(plan), self._settings.max_iterations)
+        except PlanGraphError as exc:
+            self._telemetry.emit("executor.invalid_plan", error=str(exc))
+            return LangGraphState(status="failed", error=str(exc))
+
+        async def _run_step(node: PlanNode, dep_outputs: Dict[str, Any]) -> str:
             payload = {
                 "task": self._ctx.task,
-                "step": step,
-                "step_index": idx,
+                "step": node.description,
+                "step_id": node.step_id,
+                "step_index": node.index,
+                "dependencies": dict(dep_outputs),
                 "context": self._ctx.context or {},
                 "config": self._ctx.workflow_config or {},
             }
-            output = await self._step_executor.ainvoke(payload, config=config)
-            outputs.append(output)
+            return await self._step_executor.ainvoke(payload, config=config)
+
+        def _on_step_done(run: StepRun) -> None:
             self._telemetry.emit(
                 "executor.step",
-                step_index=idx,
-                text=step,
+                step_index=run.node.index,
+                step_id=run.node.step_id,
+                text=run.node.description,
+                wave=run.wave,
+                duration_ms=round(run.duration_ms, 3),
             )
 
+        started = time.perf_counter()
+        runs = await run_dag(
+            nodes,
+            _run_step,
+            max_parallel=self._settings.max_parallel_steps,
+            on_step_done=_on_step_done,
+        )
+        self._telemetry.emit(
+            "executor.dag",
+            steps=len(runs),
+            waves=max((run.wave for run in runs), default=-1) + 1,
+            max_parallel=self._settings.max_parallel_steps,
+            wall_ms=round((time.perf_counter() - started) * 1000, 3),
+            busy_ms=round(sum(run.duration_ms for run in runs), 3),
+        )
+
+        # 輸出按原計劃順序合併，與完成順序無關
         return LangGraphState(
-            outputs=outputs,
-            current_step=max_iterations,
+            outputs=[run.output for run in runs],
+            current_step=len(runs),
             status="review",
         )
 
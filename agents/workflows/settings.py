@@ -1,7 +1,7 @@
 # 代碼功能說明: 工作流設定載入工具
 # 創建日期: 2025-11-26 20:07 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-26 20:07 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """載入 workflows.* 配置並提供 Pydantic 設定結構。"""
 
@@ -30,6 +30,10 @@ class LangGraphStateStoreSettings(BaseModel):
         default="ai-box:workflow:langgraph", description="Redis key 命名空間"
     )
     ttl_seconds: int = Field(default=3600, ge=60, description="checkpoint 保存時間")
+    compression: Optional[str] = Field(
+        default="zstd", description="checkpoint 壓縮算法: zstd/none"
+    )
+    compression_threshold: int = Field(default=1024, ge=0, description="超過此字節數的值才進行壓縮")
 
 
 class LangGraphTelemetrySettings(BaseModel):
@@ -49,6 +53,9 @@ class LangChainGraphSettings(BaseModel):
     enable_rag: bool = Field(default=True, description="是否啟用 RAG 擴充")
     enable_tools: bool = Field(default=True, description="是否允許工具/函式呼叫")
     max_iterations: int = Field(default=10, ge=1, le=50, description="執行節點最大迭代數")
+    max_parallel_steps: int = Field(
+        default=4, ge=1, le=32, description="互不依賴的計劃步驟最大並行數"
+    )
     default_llm: str = Field(default="gpt-oss:20b", description="預設 LLM 模型 ID")
     state_store: LangGraphStateStoreSettings = Field(
         default_factory=LangGraphStateStoreSettings
@@ -0,0 +1,237 @@
+# 代碼功能說明: 有界、線程安全的 LRU + TTL 緩存組件
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""提供跨模組共用的有界 TTL 緩存、緊湊緩存鍵與緩存統計註冊表。"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    將任意可 JSON 化的參數轉換為固定長度的緊湊緩存鍵。
+
+    字典會以排序後的鍵序列化，因此相同內容不同插入順序得到相同的鍵。
+
+    Args:
+        *parts: 組成緩存鍵的參數
+
+    Returns:
+        32 字元的十六進位摘要
+    """
+    payload = json.dumps(
+        parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """緩存統計快照"""
+
+    name: str
+    size: int
+    max_size: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為字典格式"""
+        data = asdict(self)
+        data["hit_ratio"] = round(self.hit_ratio, 4)
+        return data
+
+
+class TTLCache(Generic[V]):
+    """
+    有界、線程安全的 LRU + TTL 緩存。
+
+    - 超過 ``max_size`` 時淘汰最久未使用的項目
+    - 項目在 ``ttl`` 秒後過期（讀取時或寫入時清理）
+    - 可選 ``freeze``/``thaw`` 鉤子：寫入時凍結成不可變快照、讀取時返回副本，
+      避免調用方修改緩存中的對象
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = 1024,
+        ttl: float = 300.0,
+        freeze: Optional[Callable[[Any], V]] = None,
+        thaw: Optional[Callable[[V], Any]] = None,
+        register: bool = True,
+    ):
+        """
+        初始化緩存
+
+        Args:
+            name: 緩存名稱（用於統計與指標）
+            max_size: 最大項目數
+            ttl: 過期時間（秒），<= 0 表示不過期
+            freeze: 寫入時對值進行轉換（例如轉為 tuple 或深拷貝）
+            thaw: 讀取時對值進行轉換（例如返回可修改的副本）
+            register: 是否註冊到全局緩存註冊表
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._freeze = freeze
+        self._thaw = thaw
+        self._data: "OrderedDict[str, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        if register:
+            register_cache(self)
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - stored_at >= self.ttl
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """讀取緩存值，未命中或已過期時返回 ``default``"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            stored_at, value = entry
+            if self._is_expired(stored_at, time.monotonic()):
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+        return self._thaw(value) if self._thaw else value
+
+    def set(self, key: str, value: Any) -> None:
+        """寫入緩存值（必要時淘汰最久未使用的項目）"""
+        frozen = self._freeze(value) if self._freeze else value
+        with self._lock:
+            self._data[key] = (time.monotonic(), frozen)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """刪除指定鍵，返回是否存在"""
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def purge_expired(self) -> int:
+        """主動清理所有過期項目，返回清理數量"""
+        if self.ttl <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key
+                for key, (stored_at, _) in self._data.items()
+                if self._is_expired(stored_at, now)
+            ]
+            for key in expired:
+                del self._data[key]
+            self._expirations += len(expired)
+        return len(expired)
+
+    def clear(self) -> int:
+        """清空緩存，返回清除的項目數"""
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+        return count
+
+    def stats(self) -> CacheStats:
+        """取得統計快照"""
+        with self._lock:
+            return CacheStats(
+                name=self.name,
+                size=len(self._data),
+                max_size=self.max_size,
+                ttl=self.ttl,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            entry = self._data.get(key) if isinstance(key, str) else None
+            if entry is None:
+                return False
+            return not self._is_expired(entry[0], time.monotonic())
+
+
+_registry: "weakref.WeakSet[TTLCache[Any]]" = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+def register_cache(cache: TTLCache[Any]) -> None:
+    """將緩存加入全局註冊表（弱引用，不影響回收）"""
+    with _registry_lock:
+        _registry.add(cache)
+
+
+def get_cache_stats() -> List[Dict[str, Any]]:
+    """
+    匯總所有已註冊緩存的統計。
+
+    同名緩存（例如多個服務實例）會合併為一筆記錄。
+    """
+    with _registry_lock:
+        caches = list(_registry)
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for cache in caches:
+        stats = cache.stats().to_dict()
+        current = merged.get(stats["name"])
+        if current is None:
+            stats["instances"] = 1
+            merged[stats["name"]] = stats
+            continue
+        for field_name in (
+            "size",
+            "max_size",
+            "hits",
+            "misses",
+            "evictions",
+            "expirations",
+        ):
+            current[field_name] += stats[field_name]
+        current["instances"] += 1
+        total = current["hits"] + current["misses"]
+        current["hit_ratio"] = round(current["hits"] / total, 4) if total else 0.0
+
+    return [merged[name] for name in sorted(merged)]
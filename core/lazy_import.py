@@ -0,0 +1,121 @@
+# 代碼功能說明: 延遲導入與導入耗時分析工具
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""提供包級延遲導出（PEP 562）與帶耗時記錄的模組導入，用於縮短服務冷啟動時間。"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+def lazy_exports(
+    package: str, exports: Mapping[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    為包生成模組級 ``__getattr__`` / ``__dir__``，首次訪問導出名稱時才導入對應子模組。
+
+    用法（在包的 ``__init__.py`` 中）::
+
+        __getattr__, __dir__ = lazy_exports(__name__, {"Foo": ".foo"})
+
+    Args:
+        package: 包名（通常為 ``__name__``）
+        exports: 導出名稱 -> 子模組路徑（支持以 ``.`` 開頭的相對路徑）
+
+    Returns:
+        (__getattr__, __dir__)
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        # 寫回包命名空間，之後的訪問不再經過 __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
+
+
+@dataclass
+class ImportRecord:
+    """單次導入的耗時記錄。"""
+
+    module: str
+    seconds: float
+    modules_loaded: int
+    packages: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["seconds"] = round(self.seconds, 4)
+        return data
+
+
+_records: Dict[str, ImportRecord] = {}
+_records_lock = threading.Lock()
+
+
+def timed_import(module_name: str) -> Any:
+    """
+    導入模組並記錄耗時與連帶加載的模組數量。
+
+    已導入的模組直接返回，不覆蓋首次導入的記錄。
+
+    Args:
+        module_name: 模組完整路徑
+
+    Returns:
+        導入的模組
+
+    Raises:
+        ImportError: 導入失敗（失敗信息同樣會記錄到報告中）
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    before = set(sys.modules)
+    started = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        return importlib.import_module(module_name)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        loaded = set(sys.modules) - before
+        top_level = sorted({name.split(".", 1)[0] for name in loaded})
+        record = ImportRecord(
+            module=module_name,
+            seconds=elapsed,
+            modules_loaded=len(loaded),
+            packages=top_level,
+            error=error,
+        )
+        with _records_lock:
+            _records.setdefault(module_name, record)
+
+
+def get_import_profile() -> List[Dict[str, Any]]:
+    """
+    獲取導入耗時報告。
+
+    Returns:
+        按耗時降序排列的導入記錄
+    """
+    with _records_lock:
+        records = list(_records.values())
+    return [r.to_dict() for r in sorted(records, key=lambda r: r.seconds, reverse=True)]
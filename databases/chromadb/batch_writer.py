@@ -0,0 +1,433 @@
+# 代碼功能說明: ChromaDB 並發批量寫入器（自適應批次大小、批次級重試）
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""ChromaDB 並發批量寫入器 - 對齊校驗、自適應批次、連線池並發寫入與批次級重試"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .utils import EMBEDDING_DTYPE
+
+logger = logging.getLogger(__name__)
+
+# SQLite 後端單次寫入上限約 5461 條，保守取整
+MAX_BATCH_SIZE = 5000
+# 單批次負載上限（字節），避免 HTTP 請求體過大
+DEFAULT_MAX_BATCH_BYTES = 8 * 1024 * 1024
+# 單批次目標延遲（秒）
+DEFAULT_TARGET_LATENCY = 0.5
+
+
+class AdaptiveBatchSizer:
+    """根據觀測延遲與負載字節調整批次大小（線程安全）"""
+
+    def __init__(
+        self,
+        initial_size: int,
+        min_size: int = 1,
+        max_size: int = MAX_BATCH_SIZE,
+        target_latency: float = DEFAULT_TARGET_LATENCY,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        adaptive: bool = True,
+        smoothing: float = 0.3,
+    ):
+        """
+        初始化批次大小控制器
+
+        Args:
+            initial_size: 初始批次大小（非自適應模式下固定使用）
+            min_size: 最小批次大小
+            max_size: 最大批次大小
+            target_latency: 單批次目標延遲（秒）
+            max_batch_bytes: 單批次負載字節上限
+            adaptive: 是否根據觀測結果調整
+            smoothing: 每字節耗時的指數移動平均係數
+        """
+        self.min_size = max(min_size, 1)
+        self.max_size = max(max_size, self.min_size)
+        self.target_latency = target_latency
+        self.max_batch_bytes = max_batch_bytes
+        self.adaptive = adaptive
+        self.smoothing = smoothing
+        self._size = min(max(initial_size, self.min_size), self.max_size)
+        self._seconds_per_byte: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """當前批次大小"""
+        return self._size
+
+    def budget(self) -> Tuple[int, float]:
+        """
+        下一批次的預算
+
+        Returns:
+            (最大條數, 最大字節數)；非自適應模式下字節數不受限
+        """
+        with self._lock:
+            if not self.adaptive:
+                return self._size, float("inf")
+            byte_budget = float(self.max_batch_bytes)
+            if self._seconds_per_byte:
+                byte_budget = min(
+                    byte_budget, self.target_latency / self._seconds_per_byte
+                )
+            return self._size, byte_budget
+
+    def observe(self, size: int, nbytes: int, latency: float, ok: bool) -> None:
+        """
+        記錄一次批次寫入結果並調整批次大小
+
+        成功時按目標延遲 / 實際延遲縮放（每步最多放大 2 倍或縮小一半），
+        失敗時減半。
+
+        Args:
+            size: 批次條數
+            nbytes: 批次負載字節數
+            latency: 寫入耗時（秒）
+            ok: 是否成功
+        """
+        if not self.adaptive:
+            return
+        with self._lock:
+            if not ok:
+                self._size = max(self.min_size, self._size // 2)
+                return
+            rate = latency / max(nbytes, 1)
+            if self._seconds_per_byte is None:
+                self._seconds_per_byte = rate
+            else:
+                self._seconds_per_byte += self.smoothing * (
+                    rate - self._seconds_per_byte
+                )
+            factor = min(max(self.target_latency / max(latency, 1e-6), 0.5), 2.0)
+            self._size = min(max(int(size * factor), self.min_size), self.max_size)
+
+
+def estimate_item_bytes(item: Dict[str, Any], embedding_dim: int = 0) -> int:
+    """
+    估算單個項目的寫入負載字節數
+
+    Args:
+        item: 文檔項目
+        embedding_dim: 嵌入維度（float32 每維 4 字節）
+
+    Returns:
+        估算字節數
+    """
+    size = len(str(item.get("id", ""))) + embedding_dim * 4
+    document = item.get("document")
+    if document:
+        size += len(document.encode("utf-8"))
+    metadata = item.get("metadata")
+    if metadata:
+        size += len(str(metadata))
+    return size
+
+
+class PreparedItems:
+    """已通過對齊校驗的寫入計劃
+
+    帶嵌入的項目與僅帶文檔的項目分成兩組（ChromaDB 單次寫入不能混合兩者），
+    組內保持原順序；metadata/document 缺失的位置保留 None，與 ids 逐位對齊。
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], expected_dim: Optional[int]):
+        """
+        校驗並整理項目
+
+        Args:
+            items: 文檔項目列表
+            expected_dim: 預期嵌入維度（None 時以第一個嵌入的維度為準）
+        """
+        self.invalid: List[Dict[str, Any]] = []
+        seen: set = set()
+        embedded: List[int] = []
+        text_only: List[int] = []
+        lengths: Dict[int, int] = {}
+
+        for index, item in enumerate(items):
+            item_id = item.get("id")
+            error = None
+            if not isinstance(item_id, str) or not item_id:
+                error = "Item id must be a non-empty string"
+            elif item_id in seen:
+                error = f"Duplicate id '{item_id}'"
+            elif item.get("embedding") is not None:
+                try:
+                    length = len(item["embedding"])
+                except TypeError:
+                    length = -1
+                expected = expected_dim or next(iter(lengths.values()), length)
+                if length != expected:
+                    error = (
+                        f"Embedding dimension mismatch: expected {expected}, "
+                        f"got {length}"
+                    )
+                else:
+                    lengths[index] = length
+            elif item.get("document") is None:
+                error = "Item requires an embedding or a document"
+
+            if error:
+                self.invalid.append({"index": index, "id": item_id, "error": error})
+                continue
+            seen.add(item_id)
+            (embedded if index in lengths else text_only).append(index)
+
+        self.matrix: Optional[np.ndarray] = None
+        if embedded:
+            try:
+                matrix = np.asarray(
+                    [items[i]["embedding"] for i in embedded], dtype=EMBEDDING_DTYPE
+                )
+            except (TypeError, ValueError):
+                # 含無法轉換的元素時逐行轉換定位
+                matrix = None
+                rows, kept = [], []
+                for i in embedded:
+                    try:
+                        rows.append(
+                            np.asarray(items[i]["embedding"], dtype=EMBEDDING_DTYPE)
+                        )
+                        kept.append(i)
+                    except (TypeError, ValueError) as e:
+                        self._reject(items, i, f"Invalid embedding: {e}")
+                embedded = kept
+                if rows:
+                    matrix = np.stack(rows)
+            if matrix is not None:
+                finite = np.isfinite(matrix).all(axis=1)
+                if not finite.all():
+                    for i in np.asarray(embedded)[~finite]:
+                        self._reject(items, int(i), "Embedding contains NaN or Inf")
+                    embedded = [i for i, ok in zip(embedded, finite) if ok]
+                    matrix = matrix[finite]
+                self.matrix = matrix if embedded else None
+        self.invalid.sort(key=lambda entry: entry["index"])
+
+        self.items = items
+        self.order = embedded + text_only
+        # 組邊界：[0, 嵌入組結束) 帶嵌入，[嵌入組結束, 總數) 僅帶文檔
+        self.embedded_count = len(embedded)
+        dim = self.matrix.shape[1] if self.matrix is not None else 0
+        sizes = [
+            estimate_item_bytes(items[i], dim if pos < len(embedded) else 0)
+            for pos, i in enumerate(self.order)
+        ]
+        self.cumulative_bytes = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+
+    def _reject(self, items: List[Dict[str, Any]], index: int, error: str) -> None:
+        self.invalid.append(
+            {"index": index, "id": items[index].get("id"), "error": error}
+        )
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def next_end(self, start: int, max_items: int, max_bytes: float) -> int:
+        """
+        計算從 start 開始的批次結束位置（不跨組、不超過字節預算，至少一條）
+
+        Args:
+            start: 起始位置
+            max_items: 最大條數
+            max_bytes: 最大字節數
+
+        Returns:
+            結束位置（不含）
+        """
+        boundary = self.embedded_count if start < self.embedded_count else len(self)
+        end = min(start + max_items, boundary)
+        if max_bytes != float("inf"):
+            limit = self.cumulative_bytes[start] + max_bytes
+            by_bytes = int(np.searchsorted(self.cumulative_bytes, limit, "right")) - 1
+            end = min(end, by_bytes)
+        return max(end, start + 1)
+
+    def batch(self, start: int, end: int) -> Dict[str, Any]:
+        """
+        構建批次寫入參數（字段逐位對齊；全部為 None 的字段傳 None）
+
+        Args:
+            start: 起始位置
+            end: 結束位置（不含）
+
+        Returns:
+            {"ids", "embeddings", "metadatas", "documents"}
+        """
+        batch_items = [self.items[i] for i in self.order[start:end]]
+        metadatas = [item.get("metadata") for item in batch_items]
+        documents = [item.get("document") for item in batch_items]
+        embeddings = None
+        if self.matrix is not None and start < self.embedded_count:
+            embeddings = self.matrix[start:end]
+        return {
+            "ids": [item["id"] for item in batch_items],
+            "embeddings": embeddings,
+            "metadatas": None if all(m is None for m in metadatas) else metadatas,
+            "documents": None if all(d is None for d in documents) else documents,
+        }
+
+    def nbytes(self, start: int, end: int) -> int:
+        """批次負載字節數"""
+        return int(self.cumulative_bytes[end] - self.cumulative_bytes[start])
+
+
+@dataclass
+class _WriteState:
+    """一次 run 的共享寫入狀態（由調用方的鎖保護）"""
+
+    cursor: int = 0
+    batches: int = 0
+    success: int = 0
+    retries: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class ConcurrentBatchWriter:
+    """並發批量寫入器
+
+    多個工作線程從共享游標領取批次，批次大小由 AdaptiveBatchSizer 決定；
+    每個批次失敗後單獨按指數退避重試，不影響其他批次。
+    """
+
+    def __init__(
+        self,
+        write: Callable[[Any, Dict[str, Any]], None],
+        sizer: AdaptiveBatchSizer,
+        max_workers: int = 1,
+        max_retries: int = 2,
+        retry_backoff: float = 0.2,
+        connection: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        初始化寫入器
+
+        Args:
+            write: 寫入函數 (目標集合或 None, 批次參數) -> None
+            sizer: 批次大小控制器
+            max_workers: 並發線程數
+            max_retries: 每個批次失敗後的最大重試次數
+            retry_backoff: 重試退避基準秒數（第 n 次重試等待 base * 2^(n-1)）
+            connection: 工作線程專屬連線的上下文管理器工廠（None 時共享默認集合）
+        """
+        self.write = write
+        self.sizer = sizer
+        self.max_workers = max(max_workers, 1)
+        self.max_retries = max(max_retries, 0)
+        self.retry_backoff = retry_backoff
+        self.connection = connection
+
+    def run(self, prepared: PreparedItems) -> Dict[str, Any]:
+        """
+        寫入全部批次
+
+        Args:
+            prepared: 已校驗的寫入計劃
+
+        Returns:
+            {"success", "failed", "failed_ids", "errors", "batches", "retries"}
+        """
+        state = _WriteState()
+        lock = threading.Lock()
+
+        def claim() -> Optional[Tuple[int, int, int]]:
+            with lock:
+                start = state.cursor
+                if start >= len(prepared):
+                    return None
+                max_items, max_bytes = self.sizer.budget()
+                end = prepared.next_end(start, max_items, max_bytes)
+                state.cursor = end
+                state.batches += 1
+                return state.batches, start, end
+
+        def worker() -> None:
+            context = self.connection() if self.connection else nullcontext(None)
+            with context as target:
+                while (claimed := claim()) is not None:
+                    batch_no, start, end = claimed
+                    self._write_with_retry(
+                        prepared, target, batch_no, start, end, state, lock
+                    )
+
+        workers = min(self.max_workers, len(prepared))
+        if workers == 1:
+            worker()
+        elif workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(worker) for _ in range(workers)]:
+                    future.result()
+
+        state.errors.sort(key=lambda entry: entry["batch"])
+        return {
+            "success": state.success,
+            "failed": len(state.failed_ids),
+            "failed_ids": state.failed_ids,
+            "errors": state.errors,
+            "batches": state.batches,
+            "retries": state.retries,
+            "workers": workers,
+            "final_batch_size": self.sizer.size,
+        }
+
+    def _write_with_retry(
+        self,
+        prepared: PreparedItems,
+        target: Any,
+        batch_no: int,
+        start: int,
+        end: int,
+        state: _WriteState,
+        lock: threading.Lock,
+    ) -> None:
+        payload = prepared.batch(start, end)
+        nbytes = prepared.nbytes(start, end)
+        attempt = 0
+        while True:
+            began = time.perf_counter()
+            try:
+                self.write(target, payload)
+            except Exception as e:
+                latency = time.perf_counter() - began
+                self.sizer.observe(end - start, nbytes, latency, ok=False)
+                # 參數錯誤重試無意義
+                if isinstance(e, ValueError) or attempt >= self.max_retries:
+                    logger.error(
+                        f"Batch {batch_no} failed after {attempt + 1} attempt(s): {e}"
+                    )
+                    with lock:
+                        state.failed_ids.extend(payload["ids"])
+                        state.errors.append(
+                            {"batch": batch_no, "size": end - start, "error": str(e)}
+                        )
+                    return
+                attempt += 1
+                with lock:
+                    state.retries += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                logger.warning(
+                    f"Batch {batch_no} failed (attempt {attempt}), retrying in {delay:.2f}s: {e}"
+                )
+                time.sleep(delay)
+                continue
+            latency = time.perf_counter() - began
+            self.sizer.observe(end - start, nbytes, latency, ok=True)
+            with lock:
+                state.success += end - start
+            logger.debug(
+                f"Batch {batch_no} completed: {end - start} documents in {latency:.3f}s"
+            )
+            return
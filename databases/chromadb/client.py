@@ -1,14 +1,15 @@
 # 代碼功能說明: ChromaDB 客戶端封裝
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25 21:25 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """ChromaDB 客戶端封裝，提供連接管理和基礎操作"""
 
 import os
 import time
 import threading
-from typing import Optional, List, Dict, Any, Callable
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Callable, Iterator
 from queue import LifoQueue, Empty
 from chromadb import Client, PersistentClient, HttpClient
 from chromadb.config import Settings
@@ -134,6 +135,22 @@ class ChromaDBClient:
         self._current_clients = max(self._current_clients - 1, 0)
         # HttpClient/PersistentClient 不需要顯式關閉，直接放掉
 
+    @contextmanager
+    def connection(self) -> Iterator[Any]:  # type: ignore[valid-type]
+        """
+        借出一條連線池連線（正常結束時歸還，發生異常時丟棄）
+
+        Yields:
+            底層 ChromaDB 客戶端
+        """
+        client = self._acquire_client()
+        try:
+            yield client
+        except BaseException:
+            self._discard_client(client)
+            raise
+        self._release_client(client)
+
     def _execute(self, operation: str, func: Callable[[Any], Any]):  # type: ignore[valid-type]
         """統一的連線池執行與重試邏輯"""
         attempt = 0
@@ -1,11 +1,12 @@
 # 代碼功能說明: ChromaDB 集合操作封裝
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25 21:35 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """ChromaDB 集合操作封裝，提供 CRUD 和檢索功能"""
 
-from typing import List, Dict, Any, Optional, Union
+from contextlib import ExitStack, contextmanager
+from typing import List, Dict, Any, Iterator, Optional, TYPE_CHECKING, Union
 from chromadb.api.types import (
     Where,
     WhereDocument,
@@ -13,13 +14,23 @@ from chromadb.api.types import (
 import logging
 import os
 
+from .batch_writer import (
+    AdaptiveBatchSizer,
+    ConcurrentBatchWriter,
+    DEFAULT_MAX_BATCH_BYTES,
+    DEFAULT_TARGET_LATENCY,
+    PreparedItems,
+)
 from .utils import (
+    EmbeddingInput,
     validate_embedding_dimension,
     normalize_embeddings,
-    batch_items,
 )
 from .exceptions import ChromaDBOperationError
 
+if TYPE_CHECKING:
+    from .client import ChromaDBClient
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +43,13 @@ class ChromaCollection:
         namespace: Optional[str] = None,
         expected_embedding_dim: Optional[int] = None,
         batch_size: int = 100,
+        client: Optional["ChromaDBClient"] = None,
+        max_workers: Optional[int] = None,
+        adaptive_batching: bool = True,
+        target_batch_latency: float = DEFAULT_TARGET_LATENCY,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        max_batch_retries: int = 2,
+        retry_backoff: float = 0.2,
     ):
         """
         初始化集合封裝
@@ -40,13 +58,27 @@ class ChromaCollection:
             collection: ChromaDB Collection 對象
             namespace: 命名空間（用於隔離數據）
             expected_embedding_dim: 預期的嵌入向量維度
-            batch_size: 批量操作時的批次大小
+            batch_size: 批量操作時的批次大小（自適應模式下為初始大小）
+            client: 所屬 ChromaDBClient；提供時 batch_add 的各工作線程使用獨立的池連線
+            max_workers: batch_add 並發線程數（默認為連線池大小，無 client 時為 1）
+            adaptive_batching: 是否根據觀測延遲與負載字節調整批次大小
+            target_batch_latency: 自適應模式下單批次目標延遲（秒）
+            max_batch_bytes: 自適應模式下單批次負載字節上限
+            max_batch_retries: 單個批次失敗後的最大重試次數
+            retry_backoff: 批次重試退避基準秒數
         """
         self.collection = collection
         self.name = collection.name
         self.namespace = namespace or os.getenv("CHROMADB_NAMESPACE")
         self.expected_embedding_dim = expected_embedding_dim
         self.batch_size = batch_size
+        self.client = client
+        self.max_workers = max_workers or (client.pool_size if client else 1)
+        self.adaptive_batching = adaptive_batching
+        self.target_batch_latency = target_batch_latency
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_retries = max_batch_retries
+        self.retry_backoff = retry_backoff
 
     def _add_namespace_to_metadata(
         self, metadatas: Optional[List[Dict[str, Any]]], count: int
@@ -71,7 +103,7 @@ class ChromaCollection:
     def add(
         self,
         ids: Union[str, List[str]],
-        embeddings: Optional[Union[List[List[float]], List[float]]] = None,
+        embeddings: Optional[EmbeddingInput] = None,
         metadatas: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None,
         documents: Optional[Union[str, List[str]]] = None,
     ) -> None:
@@ -80,7 +112,7 @@ class ChromaCollection:
 
         Args:
             ids: 文檔 ID 或 ID 列表
-            embeddings: 嵌入向量或向量列表
+            embeddings: 嵌入向量、向量列表或 (n, dim) 矩陣（統一轉為 float32 矩陣寫入）
             metadatas: 元數據字典或字典列表
             documents: 文檔文本或文本列表
         """
@@ -93,11 +125,11 @@ class ChromaCollection:
             if metadatas is not None and isinstance(metadatas, dict):
                 metadatas = [metadatas]
 
-            # 驗證嵌入維度
+            # 驗證嵌入維度（float32 矩陣直接傳給 ChromaDB，不再轉回列表）
             if embeddings is not None:
-                embeddings_list = normalize_embeddings(embeddings)
+                embeddings = normalize_embeddings(embeddings)
                 validate_embedding_dimension(
-                    embeddings_list, expected_dim=self.expected_embedding_dim
+                    embeddings, expected_dim=self.expected_embedding_dim
                 )
 
             # 驗證並添加命名空間到 metadata
@@ -122,16 +154,25 @@ class ChromaCollection:
         self,
         items: List[Dict[str, Any]],
         batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        adaptive: Optional[bool] = None,
     ) -> Dict[str, Any]:
         """
-        批量添加文檔到集合（優化性能）
+        批量添加文檔到集合（並發寫入、自適應批次大小、批次級重試）
+
+        寫入前先逐項校驗：缺少 id、重複 id、嵌入維度不符或含 NaN/Inf、既無嵌入
+        也無文檔的項目直接計為失敗；其餘項目按是否帶嵌入分組，各字段逐位對齊
+        （缺失的 metadata/document 以 None 佔位，不會錯位）。
 
         Args:
             items: 文檔項目列表，每個項目包含 id, embedding, metadata, document
-            batch_size: 批次大小（如果不提供，使用實例的 batch_size）
+            batch_size: 批次大小（如果不提供，使用實例的 batch_size；自適應模式下為初始大小）
+            max_workers: 並發線程數（如果不提供，使用實例的 max_workers）
+            adaptive: 是否自適應調整批次大小（如果不提供，使用實例的 adaptive_batching）
 
         Returns:
-            包含成功和失敗統計的字典
+            包含成功和失敗統計的字典（total, success, failed, failed_ids, errors,
+            batches, retries, workers, final_batch_size）
 
         Example:
             items = [
@@ -145,72 +186,86 @@ class ChromaCollection:
             ]
         """
         batch_size = batch_size or self.batch_size
-        total = len(items)
-        success_count = 0
-        failed_count = 0
-        errors = []
-
-        # 分批處理
-        batches = batch_items(items, batch_size)
+        if batch_size <= 0:
+            raise ValueError("Batch size must be greater than 0")
+        adaptive = self.adaptive_batching if adaptive is None else adaptive
+
+        prepared = PreparedItems(items, self.expected_embedding_dim)
+        for entry in prepared.invalid:
+            logger.warning(
+                f"Item {entry['index']} ({entry['id']}) rejected: {entry['error']}"
+            )
 
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 提取各字段，確保長度一致
-                ids = [item.get("id") for item in batch]
-                embeddings_list: list[list[float] | None] = [
-                    item.get("embedding") for item in batch
-                ]
-                metadatas_list: list[dict[str, Any] | None] = [
-                    item.get("metadata") for item in batch
-                ]
-                documents_list: list[str | None] = [
-                    item.get("document") for item in batch
-                ]
-
-                # 過濾 None 值，但保持列表長度一致
-                # 如果所有 embeddings 都是 None，則傳遞 None
-                embeddings: Optional[list[list[float]]] = None
-                if not all(emb is None for emb in embeddings_list):
-                    embeddings = [emb for emb in embeddings_list if emb is not None]
-
-                # 如果所有 metadatas 都是 None，則傳遞 None
-                metadatas: Optional[list[dict[str, Any]]] = None
-                if not all(meta is None for meta in metadatas_list):
-                    metadatas = [meta for meta in metadatas_list if meta is not None]
-
-                # 如果所有 documents 都是 None，則傳遞 None
-                documents: Optional[list[str]] = None
-                if not all(doc is None for doc in documents_list):
-                    documents = [doc for doc in documents_list if doc is not None]
-
-                # 使用標準 add 方法
-                self.add(
-                    ids=ids,
-                    embeddings=embeddings,
-                    metadatas=metadatas,
-                    documents=documents,
-                )
-                success_count += len(batch)
-                logger.debug(
-                    f"Batch {batch_idx + 1}/{len(batches)} completed: "
-                    f"{len(batch)} documents added"
-                )
-            except Exception as e:
-                failed_count += len(batch)
-                errors.append({"batch": batch_idx + 1, "error": str(e)})
-                logger.error(f"Batch {batch_idx + 1} failed: {e}")
+        sizer = AdaptiveBatchSizer(
+            batch_size,
+            target_latency=self.target_batch_latency,
+            max_batch_bytes=self.max_batch_bytes,
+            adaptive=adaptive,
+        )
+        writer = ConcurrentBatchWriter(
+            self._write_batch,
+            sizer,
+            max_workers=max_workers or self.max_workers,
+            max_retries=self.max_batch_retries,
+            retry_backoff=self.retry_backoff,
+            connection=self._pooled_collection if self.client else None,
+        )
+        outcome = writer.run(prepared)
 
+        invalid_ids = [entry["id"] for entry in prepared.invalid]
         result = {
-            "total": total,
-            "success": success_count,
-            "failed": failed_count,
-            "errors": errors,
+            "total": len(items),
+            "success": outcome["success"],
+            "failed": outcome["failed"] + len(invalid_ids),
+            "failed_ids": invalid_ids + outcome["failed_ids"],
+            "errors": prepared.invalid + outcome["errors"],
+            "batches": outcome["batches"],
+            "retries": outcome["retries"],
+            "workers": outcome["workers"],
+            "final_batch_size": outcome["final_batch_size"],
         }
         logger.info(
-            f"Batch add completed: {success_count}/{total} documents added successfully"
+            f"Batch add completed: {result['success']}/{result['total']} documents "
+            f"added successfully ({result['batches']} batches, "
+            f"{result['workers']} workers, {result['retries']} retries)"
         )
         return result
 
+    @contextmanager
+    def _pooled_collection(self) -> Iterator[Optional[Any]]:
+        """為工作線程借出一條池連線並取得本集合（連線池耗盡時返回 None，退回共享集合）"""
+        assert self.client is not None
+        with ExitStack() as stack:
+            collection = None
+            try:
+                pooled = stack.enter_context(self.client.connection())
+                collection = pooled.get_collection(name=self.name)
+            except Exception as e:
+                logger.warning(f"No pooled connection for batch writer, sharing: {e}")
+            yield collection
+
+    def _write_batch(self, pooled: Optional[Any], payload: Dict[str, Any]) -> None:
+        """
+        寫入一個已對齊的批次
+
+        Args:
+            pooled: 工作線程的池連線集合（僅用於帶嵌入的批次；None 時使用共享集合）
+            payload: {"ids", "embeddings", "metadatas", "documents"}
+        """
+        # 僅帶文檔的批次需要集合的嵌入函數，始終走共享集合
+        target = pooled
+        if target is None or payload["embeddings"] is None:
+            target = self.collection
+        metadatas = payload["metadatas"]
+        if self.namespace:
+            metadatas = self._add_namespace_to_metadata(metadatas, len(payload["ids"]))
+        target.add(
+            ids=payload["ids"],
+            embeddings=payload["embeddings"],
+            metadatas=metadatas,
+            documents=payload["documents"],
+        )
+
     def get(
         self,
         ids: Optional[Union[str, List[str]]] = None,
@@ -0,0 +1,126 @@
+# 代碼功能說明: ChromaDB 並發批量寫入器測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""ChromaDB 並發批量寫入器單元測試"""
+
+from typing import List
+
+import numpy as np
+import pytest
+
+from databases.chromadb import ChromaDBClient, ChromaCollection
+from databases.chromadb.batch_writer import AdaptiveBatchSizer, PreparedItems
+
+
+class FlakyCollection:
+    """前 N 次寫入失敗的假集合"""
+
+    name = "flaky"
+
+    def __init__(self, failures: int, error: Exception):
+        self.failures = failures
+        self.error = error
+        self.calls: List[List[str]] = []
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        self.calls.append(list(ids))
+        if self.failures > 0:
+            self.failures -= 1
+            raise self.error
+
+
+@pytest.fixture
+def pooled_client(tmp_path):
+    """創建帶連線池的持久化客戶端"""
+    client = ChromaDBClient(
+        mode="persistent", persist_directory=str(tmp_path / "chroma"), pool_size=4
+    )
+    yield client
+    client.close()
+
+
+def _items(count: int, dim: int = 8):
+    rng = np.random.default_rng(0)
+    return [
+        {
+            "id": f"doc{i}",
+            "embedding": rng.random(dim).tolist(),
+            "metadata": {"index": i} if i % 3 else None,
+            "document": f"Document {i}" if i % 2 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def test_parallel_batch_add_keeps_fields_aligned(pooled_client):
+    """測試並發寫入時缺失字段不錯位，無效項目預先拒絕"""
+    collection = ChromaCollection(
+        pooled_client.get_or_create_collection("aligned"),
+        client=pooled_client,
+        expected_embedding_dim=8,
+        batch_size=16,
+    )
+    items = _items(200)
+    items.append({"id": "doc1", "embedding": [0.0] * 8})
+    items.append({"id": "short", "embedding": [0.1, 0.2]})
+    items.append({"id": "nan", "embedding": [float("nan")] * 8})
+
+    result = collection.batch_add(items)
+
+    assert result["success"] == 200
+    assert result["failed_ids"] == ["doc1", "short", "nan"]
+    assert result["workers"] == 4
+    assert collection.count() == 200
+    stored = collection.get(ids=["doc1", "doc2", "doc3"])
+    by_id = dict(zip(stored["ids"], zip(stored["metadatas"], stored["documents"])))
+    assert by_id["doc1"] == ({"index": 1}, "Document 1")
+    assert by_id["doc2"] == ({"index": 2}, None)
+    assert by_id["doc3"] == (None, "Document 3")
+
+
+def test_failed_batch_retried_individually():
+    """測試失敗批次單獨重試，參數錯誤不重試"""
+    collection = ChromaCollection(
+        FlakyCollection(failures=1, error=RuntimeError("timeout")),
+        batch_size=2,
+        adaptive_batching=False,
+        retry_backoff=0.0,
+    )
+    result = collection.batch_add(_items(4, dim=3))
+    assert result["success"] == 4
+    assert result["retries"] == 1
+    assert collection.collection.calls == [
+        ["doc0", "doc1"],
+        ["doc0", "doc1"],
+        ["doc2", "doc3"],
+    ]
+
+    collection = ChromaCollection(
+        FlakyCollection(failures=1, error=ValueError("bad metadata")),
+        batch_size=2,
+        adaptive_batching=False,
+        retry_backoff=0.0,
+    )
+    result = collection.batch_add(_items(4, dim=3))
+    assert result["failed_ids"] == ["doc0", "doc1"]
+    assert result["retries"] == 0
+    assert result["errors"][0]["batch"] == 1
+
+
+def test_adaptive_batch_sizer():
+    """測試批次大小隨延遲伸縮、失敗減半，負載字節限制批次範圍"""
+    sizer = AdaptiveBatchSizer(100, target_latency=0.5, max_batch_bytes=10_000)
+    sizer.observe(100, 1_000, latency=0.1, ok=True)
+    assert sizer.size == 200
+    sizer.observe(200, 2_000, latency=2.0, ok=True)
+    assert sizer.size == 100
+    sizer.observe(100, 1_000, latency=0.1, ok=False)
+    assert sizer.size == 50
+
+    prepared = PreparedItems(_items(50, dim=256), expected_dim=256)
+    # 每項至少 1KB 嵌入，4KB 預算最多容納 3 項
+    assert prepared.next_end(0, 50, 4_000) <= 3
+    assert prepared.next_end(0, 50, 10) == 1
+    assert prepared.next_end(0, 10, float("inf")) == 10
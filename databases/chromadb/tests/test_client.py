@@ -1,10 +1,11 @@
 # 代碼功能說明: ChromaDB 客戶端測試
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """ChromaDB 客戶端單元測試"""
 
+import numpy as np
 import pytest
 import os
 import shutil
@@ -15,6 +16,7 @@ from databases.chromadb.exceptions import (
     ChromaDBOperationError,
 )
 from databases.chromadb.utils import (
+    convert_embedding_dimension,
     validate_embedding_dimension,
     normalize_embeddings,
     validate_metadata,
@@ -370,6 +372,38 @@ def test_normalize_embeddings():
     assert len(result) == 2
 
 
+def test_embeddings_as_float32_matrix():
+    """測試嵌入向量統一為 float32 矩陣，ndarray 輸入零拷貝"""
+    matrix = np.random.rand(4, 8).astype(np.float32)
+    assert normalize_embeddings(matrix) is matrix
+    assert validate_embedding_dimension(matrix[1], expected_dim=8) == 8
+
+    result = normalize_embeddings([[0.1, 0.2], np.array([0.3, 0.4])])
+    assert result.dtype == np.float32
+    assert result.shape == (2, 2)
+
+    with pytest.raises(ValueError, match="got 1 at index 2"):
+        validate_embedding_dimension([[0.1, 0.2], [0.3, 0.4], [0.5]])
+    with pytest.raises(ValueError, match="NaN or Inf"):
+        validate_embedding_dimension([[0.1, 0.2], [np.nan, 0.4]])
+
+
+def test_convert_embedding_dimension():
+    """測試向量化的填充與截斷"""
+    embeddings = [[1.0, 2.0], [3.0, 4.0]]
+
+    padded = convert_embedding_dimension(embeddings, 4, pad_value=-1.0)
+    assert padded.tolist() == [[1.0, 2.0, -1.0, -1.0], [3.0, 4.0, -1.0, -1.0]]
+
+    matrix = normalize_embeddings(embeddings)
+    truncated = convert_embedding_dimension(matrix, 1, method="truncate")
+    assert truncated.tolist() == [[1.0], [3.0]]
+    assert np.shares_memory(truncated, matrix)
+
+    with pytest.raises(ValueError):
+        convert_embedding_dimension(embeddings, 1, method="pad")
+
+
 def test_validate_metadata():
     """測試 metadata 驗證"""
     # 正常情況
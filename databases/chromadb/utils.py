@@ -1,134 +1,176 @@
 # 代碼功能說明: ChromaDB 工具模組
 # 創建日期: 2025-11-25 21:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25 21:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
-"""ChromaDB 工具模組 - 提供嵌入維度轉換、metadata 驗證等工具函數"""
+"""ChromaDB 工具模組 - 提供 float32 嵌入矩陣轉換、維度轉換、metadata 驗證等工具函數"""
 
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Sequence, Union
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+EmbeddingInput = Union[List[List[float]], List[float], np.ndarray, Sequence[np.ndarray]]
+
+# 嵌入向量的存儲與傳輸類型（768 維向量約 3KB，Python float 列表約 25KB）
+EMBEDDING_DTYPE = np.float32
+
+
+def as_embedding_matrix(
+    embeddings: EmbeddingInput,
+    dtype: Any = EMBEDDING_DTYPE,
+) -> np.ndarray:
+    """
+    將嵌入向量轉換為 (n, dim) 的連續矩陣
+
+    已是相同 dtype 的連續 ndarray 時直接返回（零拷貝）；單個向量視為一行。
+
+    Args:
+        embeddings: 嵌入向量、向量列表或 ndarray
+        dtype: 目標數據類型（默認 float32）
+
+    Returns:
+        (n, dim) 矩陣
+
+    Raises:
+        ValueError: 如果嵌入向量為空或維度不一致
+    """
+    if isinstance(embeddings, np.ndarray):
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        if embeddings.ndim != 2:
+            raise ValueError(
+                f"Embeddings must be 1-D or 2-D, got {embeddings.ndim}-D array"
+            )
+        return np.ascontiguousarray(embeddings, dtype=dtype)
+
+    if len(embeddings) == 0:
+        raise ValueError("Embeddings cannot be empty")
+    if isinstance(embeddings[0], (int, float, np.number)):
+        # 單個向量
+        return np.asarray(embeddings, dtype=dtype).reshape(1, -1)
+
+    # 向量列表：先比對長度，給出與逐條檢查一致的錯誤信息（非向量元素記為 -1）
+    lengths = np.fromiter(
+        (
+            len(emb) if isinstance(emb, (Sequence, np.ndarray)) else -1
+            for emb in embeddings
+        ),
+        dtype=np.int64,
+        count=len(embeddings),
+    )
+    not_vectors = np.flatnonzero(lengths < 0)
+    if not_vectors.size:
+        index = int(not_vectors[0])
+        raise ValueError(f"Embedding at index {index} is not a list")
+    mismatched = np.flatnonzero(lengths != lengths[0])
+    if mismatched.size:
+        index = int(mismatched[0])
+        raise ValueError(
+            f"Embedding dimension mismatch: expected {lengths[0]}, "
+            f"got {lengths[index]} at index {index}"
+        )
+    try:
+        return np.array(embeddings, dtype=dtype)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid embedding values: {exc}") from exc
+
+
 def validate_embedding_dimension(
-    embeddings: Union[List[List[float]], List[float]],
+    embeddings: EmbeddingInput,
     expected_dim: Optional[int] = None,
 ) -> int:
     """
     驗證並獲取嵌入向量的維度
 
     Args:
-        embeddings: 嵌入向量或向量列表
+        embeddings: 嵌入向量、向量列表或 ndarray
         expected_dim: 預期的維度（如果提供，將進行驗證）
 
     Returns:
         嵌入向量的維度
 
     Raises:
-        ValueError: 如果嵌入向量格式無效或維度不一致
+        ValueError: 如果嵌入向量格式無效、維度不一致或包含 NaN/Inf
     """
-    if not embeddings:
-        raise ValueError("Embeddings cannot be empty")
-
-    # 標準化為列表格式
-    if isinstance(embeddings[0], (int, float)):
-        # 單個向量
-        embeddings_list: List[List[float]] = [embeddings]  # type: ignore[list-item]
-    else:
-        # 向量列表
-        embeddings_list = embeddings  # type: ignore[assignment]
-
-    # 獲取第一個向量的維度
-    first_dim = len(embeddings_list[0])
+    matrix = as_embedding_matrix(embeddings)
+    first_dim = int(matrix.shape[1])
     if first_dim == 0:
         raise ValueError("Embedding vector cannot be empty")
 
-    # 驗證所有向量的維度一致
-    for i, emb in enumerate(embeddings_list):
-        if not isinstance(emb, list):
-            raise ValueError(f"Embedding at index {i} is not a list")
-        if len(emb) != first_dim:
-            raise ValueError(
-                f"Embedding dimension mismatch: expected {first_dim}, "
-                f"got {len(emb)} at index {i}"
-            )
-
     # 如果提供了預期維度，進行驗證
     if expected_dim is not None and first_dim != expected_dim:
         raise ValueError(
             f"Embedding dimension mismatch: expected {expected_dim}, got {first_dim}"
         )
 
+    if not np.isfinite(matrix).all():
+        index = int(np.flatnonzero(~np.isfinite(matrix).all(axis=1))[0])
+        raise ValueError(f"Embedding at index {index} contains NaN or Inf")
+
     return first_dim
 
 
-def normalize_embeddings(
-    embeddings: Union[List[List[float]], List[float]],
-) -> List[List[float]]:
+def normalize_embeddings(embeddings: EmbeddingInput) -> np.ndarray:
     """
-    將嵌入向量標準化為列表格式
+    將嵌入向量標準化為 (n, dim) float32 矩陣
 
     Args:
-        embeddings: 嵌入向量或向量列表
+        embeddings: 嵌入向量、向量列表或 ndarray
 
     Returns:
-        標準化後的向量列表
+        標準化後的矩陣（輸入為空時返回 (0, 0) 矩陣）
     """
-    if not embeddings:
-        return []
-
-    if isinstance(embeddings[0], (int, float)):
-        # 單個向量
-        return [list(embeddings)]  # type: ignore[arg-type]
-    # 向量列表
-    return [list(emb) for emb in embeddings]  # type: ignore[arg-type]
+    if embeddings is None or len(embeddings) == 0:
+        return np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+    return as_embedding_matrix(embeddings)
 
 
 def convert_embedding_dimension(
-    embeddings: List[List[float]],
+    embeddings: EmbeddingInput,
     target_dim: int,
     method: str = "pad",
     pad_value: float = 0.0,
-) -> List[List[float]]:
+) -> np.ndarray:
     """
     轉換嵌入向量的維度
 
     Args:
-        embeddings: 嵌入向量列表
+        embeddings: 嵌入向量列表或矩陣（各向量維度需一致）
         target_dim: 目標維度
         method: 轉換方法 ('pad' 或 'truncate')
         pad_value: 填充值（當使用 pad 方法時）
 
     Returns:
-        轉換後的嵌入向量列表
-    """
-    result = []
-    for emb in embeddings:
-        current_dim = len(emb)
-        if current_dim == target_dim:
-            result.append(emb[:])
-        elif current_dim < target_dim:
-            if method == "pad":
-                # 填充
-                padded = emb[:] + [pad_value] * (target_dim - current_dim)
-                result.append(padded)
-            else:
-                raise ValueError(
-                    f"Cannot pad when method is {method}. "
-                    f"Use method='pad' for dimension expansion."
-                )
-        else:
-            # current_dim > target_dim
-            if method == "truncate":
-                # 截斷
-                result.append(emb[:target_dim])
-            else:
-                raise ValueError(
-                    f"Cannot truncate when method is {method}. "
-                    f"Use method='truncate' for dimension reduction."
-                )
-    return result
+        轉換後的 (n, target_dim) 矩陣（截斷時為輸入矩陣的視圖）
+    """
+    matrix = as_embedding_matrix(embeddings)
+    current_dim = matrix.shape[1]
+    if current_dim == target_dim:
+        return matrix
+    if current_dim < target_dim:
+        if method != "pad":
+            raise ValueError(
+                f"Cannot pad when method is {method}. "
+                f"Use method='pad' for dimension expansion."
+            )
+        # 填充
+        return np.pad(
+            matrix,
+            ((0, 0), (0, target_dim - current_dim)),
+            constant_values=pad_value,
+        )
+    # current_dim > target_dim
+    if method != "truncate":
+        raise ValueError(
+            f"Cannot truncate when method is {method}. "
+            f"Use method='truncate' for dimension reduction."
+        )
+    # 截斷
+    return matrix[:, :target_dim]
 
 
 def validate_metadata(
@@ -0,0 +1,29 @@
+# 代碼功能說明: Redis 共享存取層模組
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""Redis 共享存取層 - 提供連線池化客戶端、管線化寫入、SCAN 列舉與序列化"""
+
+from .client import (
+    close_redis_clients,
+    get_async_redis_client,
+    get_redis_client,
+    rpush_with_ttl,
+    scan_keys,
+    set_many,
+    delete_matching,
+)
+from .serialization import Serializer, get_serializer
+
+__all__ = [
+    "get_redis_client",
+    "get_async_redis_client",
+    "close_redis_clients",
+    "rpush_with_ttl",
+    "set_many",
+    "scan_keys",
+    "delete_matching",
+    "Serializer",
+    "get_serializer",
+]
@@ -0,0 +1,217 @@
+# 代碼功能說明: Redis 連線池化客戶端與管線化輔助函數
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""Redis 客戶端工廠：每個 URL 共用一個連線池，並提供管線化寫入與 SCAN 列舉"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import redis  # type: ignore[import-untyped]
+import redis.asyncio as aioredis  # type: ignore[import-untyped]
+
+logger = logging.getLogger(__name__)
+
+_ClientKey = Tuple[str, bool]
+_AsyncClients = Dict[_ClientKey, aioredis.Redis]
+_LoopClients = weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncClients]
+
+_sync_clients: Dict[_ClientKey, redis.Redis] = {}
+_sync_lock = threading.Lock()
+
+# redis.asyncio 連線綁定事件循環，因此按事件循環分別緩存
+_async_clients: _LoopClients = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+
+def get_redis_client(
+    redis_url: str,
+    *,
+    decode_responses: bool = False,
+    max_connections: Optional[int] = None,
+) -> redis.Redis:
+    """
+    取得指定 URL 的共享同步 Redis 客戶端。
+
+    相同 (URL, decode_responses) 返回同一個客戶端實例，底層共用一個連線池。
+
+    Args:
+        redis_url: Redis 連接 URL
+        decode_responses: 是否將響應解碼為 str
+        max_connections: 連線池最大連線數（僅首次建立時生效）
+
+    Returns:
+        redis.Redis 客戶端
+    """
+    key = (redis_url, decode_responses)
+    client = _sync_clients.get(key)
+    if client is not None:
+        return client
+    with _sync_lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            pool = redis.ConnectionPool.from_url(
+                redis_url,
+                decode_responses=decode_responses,
+                max_connections=max_connections,
+            )
+            client = redis.Redis(connection_pool=pool)
+            _sync_clients[key] = client
+            logger.info(
+                "Created shared Redis connection pool for %s", _safe_url(redis_url)
+            )
+    return client
+
+
+def get_async_redis_client(
+    redis_url: str,
+    *,
+    decode_responses: bool = False,
+    max_connections: Optional[int] = None,
+) -> aioredis.Redis:
+    """
+    取得指定 URL 的共享 redis.asyncio 客戶端（每個事件循環一個連線池）。
+
+    Args:
+        redis_url: Redis 連接 URL
+        decode_responses: 是否將響應解碼為 str
+        max_connections: 連線池最大連線數（僅首次建立時生效）
+
+    Returns:
+        redis.asyncio.Redis 客戶端
+    """
+    loop = asyncio.get_running_loop()
+    key = (redis_url, decode_responses)
+    with _async_lock:
+        per_loop = _async_clients.setdefault(loop, {})
+        client = per_loop.get(key)
+        if client is None:
+            pool = aioredis.ConnectionPool.from_url(
+                redis_url,
+                decode_responses=decode_responses,
+                max_connections=max_connections,
+            )
+            client = aioredis.Redis(connection_pool=pool)
+            per_loop[key] = client
+    return client
+
+
+def close_redis_clients() -> None:
+    """關閉並移除所有共享的同步客戶端（主要用於測試與進程關閉）。"""
+    with _sync_lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for client in clients:
+        try:
+            client.connection_pool.disconnect()
+        except Exception as exc:  # pragma: no cover - 關閉失敗不影響流程
+            logger.debug("Failed to close Redis pool: %s", exc)
+
+
+def rpush_with_ttl(
+    client: redis.Redis, key: str, *values: Any, ttl: Optional[int] = None
+) -> None:
+    """
+    以單次往返（MULTI/EXEC）追加列表元素並刷新過期時間。
+
+    Args:
+        client: Redis 客戶端
+        key: 列表鍵
+        *values: 要追加的元素
+        ttl: 過期秒數（None 表示不設置）
+    """
+    pipe = client.pipeline(transaction=True)
+    pipe.rpush(key, *values)
+    if ttl is not None:
+        pipe.expire(key, ttl)
+    pipe.execute()
+
+
+def set_many(
+    client: redis.Redis,
+    mapping: Mapping[str, Any],
+    ttl: Optional[int] = None,
+    *,
+    transaction: bool = False,
+) -> None:
+    """
+    以單次往返寫入多個鍵（可選統一 TTL）。
+
+    Args:
+        client: Redis 客戶端
+        mapping: 鍵值映射
+        ttl: 過期秒數（None 表示不設置）
+        transaction: 是否以 MULTI/EXEC 原子執行
+    """
+    if not mapping:
+        return
+    pipe = client.pipeline(transaction=transaction)
+    for key, value in mapping.items():
+        if ttl is not None:
+            pipe.setex(key, ttl, value)
+        else:
+            pipe.set(key, value)
+    pipe.execute()
+
+
+def scan_keys(client: redis.Redis, pattern: str = "*", count: int = 500) -> List[Any]:
+    """
+    使用增量 SCAN 列出匹配的鍵（不阻塞伺服器，取代 KEYS）。
+
+    Args:
+        client: Redis 客戶端
+        pattern: 鍵模式
+        count: 每次 SCAN 的提示批量
+
+    Returns:
+        鍵列表（去重）
+    """
+    seen: Dict[Any, None] = {}
+    for key in client.scan_iter(match=pattern, count=count):
+        seen.setdefault(key, None)
+    return list(seen)
+
+
+def delete_matching(
+    client: redis.Redis, pattern: str, count: int = 500, batch_size: int = 500
+) -> int:
+    """
+    以 SCAN + 管線化 UNLINK 刪除匹配的鍵。
+
+    Args:
+        client: Redis 客戶端
+        pattern: 鍵模式
+        count: 每次 SCAN 的提示批量
+        batch_size: 每個管線批量刪除的鍵數
+
+    Returns:
+        刪除的鍵數量
+    """
+    deleted = 0
+    batch: List[Any] = []
+    for key in client.scan_iter(match=pattern, count=count):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += _unlink(client, batch)
+            batch = []
+    if batch:
+        deleted += _unlink(client, batch)
+    return deleted
+
+
+def _unlink(client: redis.Redis, keys: Iterable[Any]) -> int:
+    return int(client.unlink(*keys) or 0)
+
+
+def _safe_url(redis_url: str) -> str:
+    """移除 URL 中的密碼部分，供日誌使用。"""
+    if "@" not in redis_url:
+        return redis_url
+    scheme, _, rest = redis_url.partition("://")
+    return f"{scheme}://***@{rest.split('@', 1)[1]}"
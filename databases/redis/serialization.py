@@ -0,0 +1,116 @@
+# 代碼功能說明: Redis 值序列化器
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""提供 json / orjson / msgpack 序列化器，可選依賴缺失時自動回退到 json"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson  # type: ignore[import-not-found]
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ormsgpack as msgpack_impl  # type: ignore[import-not-found]
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    try:
+        import msgpack as msgpack_impl  # type: ignore[import-not-found,no-redef]
+
+        MSGPACK_AVAILABLE = True
+    except ImportError:
+        MSGPACK_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """無法直接序列化的對象：優先使用 __dict__，否則轉為字串。"""
+    return getattr(obj, "__dict__", str(obj))
+
+
+@dataclass(frozen=True)
+class Serializer:
+    """序列化器描述"""
+
+    name: str
+    dumps: Callable[[Any], Union[str, bytes]]
+    loads: Callable[[Union[str, bytes]], Any]
+    binary: bool  # 輸出是否為二進位（需要 decode_responses=False 的客戶端）
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, default=_default, ensure_ascii=False)
+
+
+def _json_loads(raw: Union[str, bytes]) -> Any:
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    return json.loads(raw)
+
+
+def _build_serializers() -> Dict[str, Serializer]:
+    serializers = {"json": Serializer("json", _json_dumps, _json_loads, binary=False)}
+
+    if ORJSON_AVAILABLE:
+        serializers["orjson"] = Serializer(
+            "orjson",
+            lambda value: orjson.dumps(
+                value, default=_default, option=orjson.OPT_NON_STR_KEYS
+            ),
+            orjson.loads,
+            binary=True,
+        )
+
+    if MSGPACK_AVAILABLE:
+        # ormsgpack 與 msgpack 的參數不同，按實際模組分別調用
+        impl: Any = msgpack_impl
+        if impl.__name__ == "ormsgpack":
+
+            def dumps(value: Any) -> bytes:
+                return impl.packb(value, default=_default, option=impl.OPT_NON_STR_KEYS)
+
+            def loads(raw: Union[str, bytes]) -> Any:
+                return impl.unpackb(raw, option=impl.OPT_NON_STR_KEYS)
+
+        else:
+
+            def dumps(value: Any) -> bytes:
+                return impl.packb(value, default=_default, use_bin_type=True)
+
+            def loads(raw: Union[str, bytes]) -> Any:
+                return impl.unpackb(raw, raw=False)
+
+        serializers["msgpack"] = Serializer("msgpack", dumps, loads, binary=True)
+
+    return serializers
+
+
+_SERIALIZERS = _build_serializers()
+
+
+def get_serializer(name: str = "json") -> Serializer:
+    """
+    按名稱取得序列化器。
+
+    Args:
+        name: "json"、"orjson" 或 "msgpack"
+
+    Returns:
+        Serializer；若對應的可選依賴未安裝則回退到 json
+    """
+    serializer = _SERIALIZERS.get(name.lower())
+    if serializer is None:
+        logger.warning("Serializer %s not available, falling back to json", name)
+        return _SERIALIZERS["json"]
+    return serializer
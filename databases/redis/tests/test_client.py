@@ -0,0 +1,148 @@
+# 代碼功能說明: Redis 共享存取層單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""Redis 客戶端工廠、管線化輔助函數與序列化器單元測試（使用內存假件）。"""
+
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from databases.redis import (
+    close_redis_clients,
+    delete_matching,
+    get_async_redis_client,
+    get_redis_client,
+    get_serializer,
+    rpush_with_ttl,
+    scan_keys,
+    set_many,
+)
+
+
+class FakePipeline:
+    def __init__(self, owner: "FakeRedis", transaction: bool):
+        self._owner = owner
+        self.transaction = transaction
+        self._commands: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    def __getattr__(self, name: str):
+        def _queue(*args: Any) -> "FakePipeline":
+            self._commands.append((name, args))
+            return self
+
+        return _queue
+
+    def execute(self) -> List[Any]:
+        self._owner.round_trips += 1
+        return [getattr(self._owner, name)(*args) for name, args in self._commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: Dict[str, Any] = {}
+        self.ttls: Dict[str, int] = {}
+        self.round_trips = 0
+        self.keys_called = False
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self, transaction)
+
+    def rpush(self, key: str, *values: Any) -> int:
+        self.store.setdefault(key, []).extend(values)
+        return len(self.store[key])
+
+    def expire(self, key: str, ttl: int) -> bool:
+        self.ttls[key] = ttl
+        return True
+
+    def set(self, key: str, value: Any) -> bool:
+        self.store[key] = value
+        return True
+
+    def setex(self, key: str, ttl: int, value: Any) -> bool:
+        self.store[key] = value
+        self.ttls[key] = ttl
+        return True
+
+    def keys(self, pattern: str) -> List[str]:  # pragma: no cover - 不應被調用
+        self.keys_called = True
+        raise AssertionError("KEYS must not be used")
+
+    def scan_iter(self, match: Optional[str] = None, count: int = 10):
+        for key in list(self.store):
+            if match is None or fnmatch.fnmatchcase(key, match):
+                yield key
+
+    def unlink(self, *keys: str) -> int:
+        self.round_trips += 1
+        removed = 0
+        for key in keys:
+            if self.store.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+
+def test_rpush_with_ttl_single_round_trip():
+    client = FakeRedis()
+    rpush_with_ttl(client, "session:messages", "a", "b", ttl=60)  # type: ignore[arg-type]
+    assert client.store["session:messages"] == ["a", "b"]
+    assert client.ttls["session:messages"] == 60
+    assert client.round_trips == 1
+
+
+def test_set_many_with_ttl():
+    client = FakeRedis()
+    set_many(client, {"k1": "v1", "k2": "v2"}, ttl=30)  # type: ignore[arg-type]
+    assert client.store == {"k1": "v1", "k2": "v2"}
+    assert client.ttls == {"k1": 30, "k2": 30}
+    assert client.round_trips == 1
+
+
+def test_scan_and_delete_matching():
+    client = FakeRedis()
+    for i in range(5):
+        client.set(f"ns:t1:{i}", i)
+    client.set("ns:t2:0", 0)
+    assert sorted(scan_keys(client, "ns:t1:*")) == [f"ns:t1:{i}" for i in range(5)]  # type: ignore[arg-type]
+    assert delete_matching(client, "ns:t1:*", batch_size=2) == 5  # type: ignore[arg-type]
+    assert list(client.store) == ["ns:t2:0"]
+    assert not client.keys_called
+
+
+def test_sync_client_shared_per_url():
+    try:
+        first = get_redis_client("redis://localhost:6399/0")
+        second = get_redis_client("redis://localhost:6399/0")
+        decoded = get_redis_client("redis://localhost:6399/0", decode_responses=True)
+        assert first is second
+        assert first is not decoded
+    finally:
+        close_redis_clients()
+
+
+def test_async_client_shared_per_loop():
+    async def _get() -> Tuple[Any, Any]:
+        return (
+            get_async_redis_client("redis://localhost:6399/0"),
+            get_async_redis_client("redis://localhost:6399/0"),
+        )
+
+    first, second = asyncio.run(_get())
+    assert first is second
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+def test_serializer_round_trip(name: str):
+    serializer = get_serializer(name)
+    payload = {"messages": [{"role": "user", "content": "你好"}], "count": 2}
+    assert serializer.loads(serializer.dumps(payload)) == payload
+
+
+def test_unknown_serializer_falls_back_to_json():
+    assert get_serializer("unknown").name == "json"
@@ -1,33 +1,76 @@
 # 代碼功能說明: LLM 共享模組初始化
 # 創建日期: 2025-11-25 23:57 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
-
-"""LLM 模組：封裝本地/遠端 LLM 的共用元件。"""
-
-from .router import LLMNodeConfig, LLMNode, LLMNodeRouter  # noqa: F401
-from .routing import (  # noqa: F401
-    BaseRoutingStrategy,
-    RoutingStrategyRegistry,
-    TaskTypeBasedStrategy,
-    ComplexityBasedStrategy,
-    CostBasedStrategy,
-    LatencyBasedStrategy,
-    HybridRoutingStrategy,
-    RoutingEvaluator,
-    DynamicRouter,
-    ABTestManager,
-)
-from .clients import (  # noqa: F401
-    BaseLLMClient,
-    ChatGPTClient,
-    GeminiClient,
-    GrokClient,
-    QwenClient,
-    OllamaClient,
-    LLMClientFactory,
-    get_client,
-)
-from .moe_manager import LLMMoEManager  # noqa: F401
-from .load_balancer import MultiLLMLoadBalancer  # noqa: F401
-from .failover import LLMFailoverManager, RetryConfig  # noqa: F401
+# 最後修改日期: 2026-10-18
+
+"""LLM 模組：封裝本地/遠端 LLM 的共用元件。
+
+導出名稱在首次訪問時才導入對應子模組，``import llm.router`` 等輕量用法
+不會連帶加載路由策略、各提供商 SDK 與 MoE 管理器。
+"""
+
+from typing import TYPE_CHECKING
+
+from core.lazy_import import lazy_exports
+
+_EXPORTS = {
+    "LLMNodeConfig": ".router",
+    "LLMNode": ".router",
+    "LLMNodeRouter": ".router",
+    "BaseRoutingStrategy": ".routing",
+    "RoutingStrategyRegistry": ".routing",
+    "TaskTypeBasedStrategy": ".routing",
+    "ComplexityBasedStrategy": ".routing",
+    "CostBasedStrategy": ".routing",
+    "LatencyBasedStrategy": ".routing",
+    "HybridRoutingStrategy": ".routing",
+    "AdaptiveRoutingStrategy": ".routing",
+    "RoutingEvaluator": ".routing",
+    "DynamicRouter": ".routing",
+    "ABTestManager": ".routing",
+    "BaseLLMClient": ".clients",
+    "ChatGPTClient": ".clients",
+    "GeminiClient": ".clients",
+    "GrokClient": ".clients",
+    "QwenClient": ".clients",
+    "OllamaClient": ".clients",
+    "LLMClientFactory": ".clients",
+    "get_client": ".clients",
+    "LLMMoEManager": ".moe_manager",
+    "MultiLLMLoadBalancer": ".load_balancer",
+    "LLMFailoverManager": ".failover",
+    "RetryConfig": ".failover",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:  # pragma: no cover - 僅供靜態分析
+    from .router import LLMNodeConfig, LLMNode, LLMNodeRouter  # noqa: F401
+    from .routing import (  # noqa: F401
+        BaseRoutingStrategy,
+        RoutingStrategyRegistry,
+        TaskTypeBasedStrategy,
+        ComplexityBasedStrategy,
+        CostBasedStrategy,
+        LatencyBasedStrategy,
+        HybridRoutingStrategy,
+        AdaptiveRoutingStrategy,
+        RoutingEvaluator,
+        DynamicRouter,
+        ABTestManager,
+    )
+    from .clients import (  # noqa: F401
+        BaseLLMClient,
+        ChatGPTClient,
+        GeminiClient,
+        GrokClient,
+        QwenClient,
+        OllamaClient,
+        LLMClientFactory,
+        get_client,
+    )
+    from .moe_manager import LLMMoEManager  # noqa: F401
+    from .load_balancer import MultiLLMLoadBalancer  # noqa: F401
+    from .failover import LLMFailoverManager, RetryConfig  # noqa: F401
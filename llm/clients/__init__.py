@@ -1,26 +1,38 @@
 # 代碼功能說明: LLM 客戶端接口模組初始化
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
-
-"""LLM 客戶端接口模組：定義統一的 LLM 客戶端接口。"""
-
-from .base import BaseLLMClient  # noqa: F401
-from .chatgpt import ChatGPTClient  # noqa: F401
-from .gemini import GeminiClient  # noqa: F401
-from .grok import GrokClient  # noqa: F401
-from .qwen import QwenClient  # noqa: F401
-from .ollama import OllamaClient, get_ollama_client  # noqa: F401
-from .factory import LLMClientFactory, get_client  # noqa: F401
-
-__all__ = [
-    "BaseLLMClient",
-    "ChatGPTClient",
-    "GeminiClient",
-    "GrokClient",
-    "QwenClient",
-    "OllamaClient",
-    "get_ollama_client",
-    "LLMClientFactory",
-    "get_client",
-]
+# 最後修改日期: 2026-10-18
+
+"""LLM 客戶端接口模組：定義統一的 LLM 客戶端接口。
+
+各提供商客戶端（及其 SDK）在首次訪問時才導入。
+"""
+
+from typing import TYPE_CHECKING
+
+from core.lazy_import import lazy_exports
+
+_EXPORTS = {
+    "BaseLLMClient": ".base",
+    "ChatGPTClient": ".chatgpt",
+    "GeminiClient": ".gemini",
+    "GrokClient": ".grok",
+    "QwenClient": ".qwen",
+    "OllamaClient": ".ollama",
+    "get_ollama_client": ".ollama",
+    "LLMClientFactory": ".factory",
+    "get_client": ".factory",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:  # pragma: no cover - 僅供靜態分析
+    from .base import BaseLLMClient  # noqa: F401
+    from .chatgpt import ChatGPTClient  # noqa: F401
+    from .gemini import GeminiClient  # noqa: F401
+    from .grok import GrokClient  # noqa: F401
+    from .qwen import QwenClient  # noqa: F401
+    from .ollama import OllamaClient, get_ollama_client  # noqa: F401
+    from .factory import LLMClientFactory, get_client  # noqa: F401
@@ -1,27 +1,46 @@
 # 代碼功能說明: LLM 客戶端工廠實現
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
-"""LLM 客戶端工廠，根據 LLMProvider 創建對應客戶端，支持單例模式。"""
+"""LLM 客戶端工廠，根據 LLMProvider 創建對應客戶端，支持單例模式。
+
+提供商客戶端模組（及其 SDK）在首次創建該提供商的客戶端時才導入。
+"""
 
 from __future__ import annotations
 
+import importlib
 import logging
 from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Type
 
 from agents.task_analyzer.models import LLMProvider
 
 from .base import BaseLLMClient
-from .chatgpt import ChatGPTClient
-from .gemini import GeminiClient
-from .grok import GrokClient
-from .ollama import OllamaClient
-from .qwen import QwenClient
 
 logger = logging.getLogger(__name__)
 
+# 提供商 -> (客戶端模組, 客戶端類名)
+_CLIENT_CLASSES: Dict[LLMProvider, tuple] = {
+    LLMProvider.CHATGPT: (".chatgpt", "ChatGPTClient"),
+    LLMProvider.GEMINI: (".gemini", "GeminiClient"),
+    LLMProvider.GROK: (".grok", "GrokClient"),
+    LLMProvider.QWEN: (".qwen", "QwenClient"),
+    LLMProvider.OLLAMA: (".ollama", "OllamaClient"),
+}
+
+
+def _load_client_class(provider: LLMProvider) -> Type[BaseLLMClient]:
+    """按需導入提供商客戶端類。"""
+    try:
+        module_name, class_name = _CLIENT_CLASSES[provider]
+    except KeyError:
+        raise ValueError(f"Unsupported LLM provider: {provider}") from None
+    module = importlib.import_module(module_name, __package__)
+    return getattr(module, class_name)
+
+
 # 客戶端實例緩存（單例模式）
 _client_cache: Dict[LLMProvider, BaseLLMClient] = {}
 
@@ -54,20 +73,7 @@ class LLMClientFactory:
             return _client_cache[provider]
 
         # 根據提供商創建對應的客戶端
-        client: BaseLLMClient
-
-        if provider == LLMProvider.CHATGPT:
-            client = ChatGPTClient(**kwargs)
-        elif provider == LLMProvider.GEMINI:
-            client = GeminiClient(**kwargs)
-        elif provider == LLMProvider.GROK:
-            client = GrokClient(**kwargs)
-        elif provider == LLMProvider.QWEN:
-            client = QwenClient(**kwargs)
-        elif provider == LLMProvider.OLLAMA:
-            client = OllamaClient(**kwargs)
-        else:
-            raise ValueError(f"Unsupported LLM provider: {provider}")
+        client: BaseLLMClient = _load_client_class(provider)(**kwargs)
 
         # 緩存實例（如果啟用緩存）
         if use_cache:
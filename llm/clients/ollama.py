@@ -1,18 +1,21 @@
 # 代碼功能說明: Ollama 客戶端實現（實現 BaseLLMClient 接口）
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-19
 
 """Ollama 客戶端實現，整合 Ollama API，實現 BaseLLMClient 接口。"""
 
 from __future__ import annotations
 
 import logging
+import time
 from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 import httpx
+import numpy as np
 
+from llm.metrics import NODE_INFLIGHT, NODE_REQUEST_LATENCY, observe_ollama_response
 from llm.router import LLMNodeRouter
 from services.api.core.settings import get_ollama_settings
 
@@ -106,6 +109,10 @@ class OllamaClient(BaseLLMClient):
         if idempotency_key:
             headers["Idempotency-Key"] = idempotency_key
 
+        inflight = NODE_INFLIGHT.labels(node=node.name)
+        inflight.inc()
+        started = time.perf_counter()
+        status = "error"
         try:
             async with httpx.AsyncClient(
                 base_url=f"http://{node.host}:{node.port}",
@@ -118,6 +125,7 @@ class OllamaClient(BaseLLMClient):
                 )
                 response.raise_for_status()
                 self._router.mark_success(node.name)
+                status = "success"
                 return response.json()
         except httpx.TimeoutException as exc:
             self._router.mark_failure(node.name)
@@ -134,6 +142,11 @@ class OllamaClient(BaseLLMClient):
             raise OllamaClientError(
                 f"Ollama request error on node {node.name}: {exc}"
             ) from exc
+        finally:
+            inflight.dec()
+            NODE_REQUEST_LATENCY.labels(
+                node=node.name, operation=path, status=status
+            ).observe(time.perf_counter() - started)
 
     async def generate(
         self,
@@ -184,6 +197,7 @@ class OllamaClient(BaseLLMClient):
 
         try:
             response = await self._post("/api/generate", payload)
+            observe_ollama_response(model, response)
 
             # 提取文本內容
             text = response.get("response", "")
@@ -264,6 +278,7 @@ class OllamaClient(BaseLLMClient):
 
         try:
             response = await self._post("/api/chat", payload)
+            observe_ollama_response(model, response)
 
             # 提取消息內容
             content = ""
@@ -320,15 +335,35 @@ class OllamaClient(BaseLLMClient):
             response = await self._post("/api/embeddings", payload)
 
             # 提取嵌入向量
-            if "embedding" in response:
-                return response["embedding"]
-
-            return []
+            return response.get("embedding") or []
 
         except Exception as exc:
             logger.error(f"Ollama embeddings error: {exc}")
             raise OllamaClientError(f"Failed to generate embeddings: {exc}") from exc
 
+    async def embeddings_array(
+        self,
+        text: str,
+        *,
+        model: Optional[str] = None,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """
+        生成文本嵌入向量，以一維 float32 ndarray 返回。
+
+        批量攝取與二進制傳輸使用，內存約為 List[float] 的 1/8。
+
+        Args:
+            text: 輸入文本
+            model: 嵌入模型名稱（可選）
+            **kwargs: 其他參數
+
+        Returns:
+            一維 float32 嵌入向量（服務未返回向量時為空數組）
+        """
+        embedding = await self.embeddings(text, model=model, **kwargs)
+        return np.asarray(embedding, dtype=np.float32)
+
     def is_available(self) -> bool:
         """
         檢查客戶端是否可用。
@@ -1,7 +1,7 @@
 # 代碼功能說明: LLM 故障轉移機制實現
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
 """LLM 故障轉移機制，實現健康檢查、自動故障檢測和轉移、重試機制。"""
 
@@ -17,6 +17,7 @@ from agents.task_analyzer.models import LLMProvider
 
 from .clients.base import BaseLLMClient
 from .clients.factory import LLMClientFactory
+from .metrics import LLM_FAILOVERS, LLM_RETRIES
 
 logger = logging.getLogger(__name__)
 
@@ -360,6 +361,7 @@ class LLMFailoverManager:
                         f"Attempt {attempt + 1} failed for {provider.value}, "
                         f"retrying in {delay:.2f}s: {exc}"
                     )
+                    LLM_RETRIES.labels(provider=provider.value).inc()
                     await asyncio.sleep(delay)
                 else:
                     logger.error(f"All retries exhausted for {provider.value}: {exc}")
@@ -379,9 +381,20 @@ class LLMFailoverManager:
                 try:
                     logger.info(f"Failing over to {fallback.value}")
                     # 使用 fallback provider 重新執行函數
-                    return await func(fallback)
+                    result = await func(fallback)
+                    LLM_FAILOVERS.labels(
+                        from_provider=provider.value,
+                        to_provider=fallback.value,
+                        status="success",
+                    ).inc()
+                    return result
                 except Exception as exc:
                     logger.warning(f"Fallback to {fallback.value} also failed: {exc}")
+                    LLM_FAILOVERS.labels(
+                        from_provider=provider.value,
+                        to_provider=fallback.value,
+                        status="failure",
+                    ).inc()
                     last_exception = exc
                     continue
 
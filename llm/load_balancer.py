@@ -1,7 +1,7 @@
 # 代碼功能說明: 多 LLM 負載均衡器實現
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
 """多 LLM 負載均衡器，擴展現有 LLMNodeRouter，支持多 LLM 提供商負載均衡。"""
 
@@ -16,6 +16,7 @@ from typing import Any, Callable, Deque, Dict, List, Optional
 
 from agents.task_analyzer.models import LLMProvider
 
+from .metrics import LB_INFLIGHT, LB_PROVIDER_HEALTHY, LB_SELECTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -175,6 +176,12 @@ class MultiLLMLoadBalancer:
                 self._request_count.get(selected_node.provider, 0) + 1
             )
 
+            provider_label = selected_node.provider.value
+            LB_SELECTIONS.labels(provider=provider_label, strategy=self.strategy).inc()
+            LB_INFLIGHT.labels(provider=provider_label).set(
+                selected_node.active_connections
+            )
+
             return selected_node.provider
 
     def mark_success(
@@ -193,6 +200,8 @@ class MultiLLMLoadBalancer:
                 node.healthy = True
                 node.next_retry_ts = 0.0
                 node.active_connections = max(0, node.active_connections - 1)
+                LB_INFLIGHT.labels(provider=provider.value).set(node.active_connections)
+                LB_PROVIDER_HEALTHY.labels(provider=provider.value).set(1)
 
                 # 更新統計信息
                 self._success_count[provider] = self._success_count.get(provider, 0) + 1
@@ -222,6 +231,8 @@ class MultiLLMLoadBalancer:
                 node.healthy = False
                 node.next_retry_ts = time.time() + self.cooldown_seconds
                 node.active_connections = max(0, node.active_connections - 1)
+                LB_INFLIGHT.labels(provider=provider.value).set(node.active_connections)
+                LB_PROVIDER_HEALTHY.labels(provider=provider.value).set(0)
 
                 # 更新統計信息
                 self._failure_count[provider] = self._failure_count.get(provider, 0) + 1
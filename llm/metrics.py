@@ -0,0 +1,229 @@
+# 代碼功能說明: LLM 調用路徑 Prometheus 指標
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""提供 LLM MoE、負載均衡、故障轉移、Ollama 客戶端與節點路由的 Prometheus 指標。"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterator, Mapping, Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# LLM 延遲分佈涵蓋本地小模型（數十毫秒）到長文本生成（數分鐘）
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+LLM_REQUESTS = Counter(
+    "llm_requests_total",
+    "LLM 請求次數",
+    ["provider", "strategy", "operation", "status"],
+)
+
+LLM_REQUEST_LATENCY = Histogram(
+    "llm_request_latency_seconds",
+    "LLM 請求延遲分佈",
+    ["provider", "model", "strategy", "operation"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM Token 使用量",
+    ["provider", "model", "kind"],
+)
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "首 Token 延遲分佈（非流式調用以模型載入與提示詞評估時間估算）",
+    ["provider", "model"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+LLM_FAILOVERS = Counter(
+    "llm_failovers_total",
+    "LLM 故障轉移次數",
+    ["from_provider", "to_provider", "status"],
+)
+
+LLM_RETRIES = Counter(
+    "llm_retries_total",
+    "LLM 主提供商重試次數",
+    ["provider"],
+)
+
+LB_SELECTIONS = Counter(
+    "llm_load_balancer_selections_total",
+    "負載均衡器選擇提供商次數",
+    ["provider", "strategy"],
+)
+
+LB_INFLIGHT = Gauge(
+    "llm_load_balancer_inflight_requests",
+    "負載均衡器各提供商進行中的請求數",
+    ["provider"],
+)
+
+LB_PROVIDER_HEALTHY = Gauge(
+    "llm_load_balancer_provider_healthy",
+    "負載均衡器提供商健康狀態（1 健康 / 0 冷卻中）",
+    ["provider"],
+)
+
+NODE_SELECTIONS = Counter(
+    "llm_node_selections_total",
+    "本地 LLM 節點選擇次數",
+    ["node", "strategy"],
+)
+
+NODE_INFLIGHT = Gauge(
+    "llm_node_inflight_requests",
+    "本地 LLM 節點進行中的請求數",
+    ["node"],
+)
+
+NODE_HEALTHY = Gauge(
+    "llm_node_healthy",
+    "本地 LLM 節點健康狀態（1 健康 / 0 冷卻中）",
+    ["node"],
+)
+
+NODE_REQUEST_LATENCY = Histogram(
+    "llm_node_request_latency_seconds",
+    "本地 LLM 節點 HTTP 請求延遲分佈",
+    ["node", "operation", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+NODE_FAILURES = Counter(
+    "llm_node_failures_total",
+    "本地 LLM 節點失敗次數",
+    ["node"],
+)
+
+
+def _label(value: Any) -> str:
+    """將枚舉或 None 轉換為標籤值。"""
+    if value is None:
+        return "unknown"
+    return str(getattr(value, "value", value))
+
+
+def observe_request(
+    *,
+    provider: Any,
+    operation: str,
+    status: str,
+    latency: Optional[float] = None,
+    model: Optional[str] = None,
+    strategy: Optional[str] = None,
+) -> None:
+    """記錄一次 LLM 請求的結果與延遲。"""
+    provider_label = _label(provider)
+    strategy_label = strategy or "manual"
+    LLM_REQUESTS.labels(
+        provider=provider_label,
+        strategy=strategy_label,
+        operation=operation,
+        status=status,
+    ).inc()
+    if latency is not None:
+        LLM_REQUEST_LATENCY.labels(
+            provider=provider_label,
+            model=_label(model),
+            strategy=strategy_label,
+            operation=operation,
+        ).observe(latency)
+
+
+def observe_usage(provider: Any, model: Optional[str], result: Any) -> None:
+    """
+    從客戶端返回結果的 usage 欄位記錄 prompt/completion Token 數。
+
+    Ollama 客戶端在響應層已自行記錄（包含不經過 MoE 的直接調用），此處跳過以免重複計數。
+    """
+    if _label(provider) == "ollama" or not isinstance(result, Mapping):
+        return
+    usage = result.get("usage")
+    if not isinstance(usage, Mapping):
+        return
+    provider_label = _label(provider)
+    model_label = _label(result.get("model") or model)
+    for kind, key in (("prompt", "prompt_tokens"), ("completion", "completion_tokens")):
+        count = usage.get(key)
+        if count:
+            LLM_TOKENS.labels(
+                provider=provider_label, model=model_label, kind=kind
+            ).inc(count)
+
+
+def observe_ollama_response(model: str, response: Mapping[str, Any]) -> None:
+    """
+    記錄 Ollama 響應中的 Token 數與首 Token 延遲。
+
+    Ollama 非流式響應提供納秒級的 load_duration / prompt_eval_duration，
+    兩者之和即為開始輸出第一個 Token 前的耗時。
+    """
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    completion_tokens = response.get("eval_count") or 0
+    if prompt_tokens:
+        LLM_TOKENS.labels(provider="ollama", model=model, kind="prompt").inc(
+            prompt_tokens
+        )
+    if completion_tokens:
+        LLM_TOKENS.labels(provider="ollama", model=model, kind="completion").inc(
+            completion_tokens
+        )
+
+    if "prompt_eval_duration" in response or "load_duration" in response:
+        ttft_ns = (response.get("load_duration") or 0) + (
+            response.get("prompt_eval_duration") or 0
+        )
+        LLM_TIME_TO_FIRST_TOKEN.labels(provider="ollama", model=model).observe(
+            ttft_ns / 1e9
+        )
+
+
+class CacheStatsCollector:
+    """將 core.cache 註冊表中的緩存統計導出為 Prometheus 指標（抓取時計算）。"""
+
+    def collect(self) -> Iterator[Any]:
+        from core.cache import get_cache_stats
+
+        hits = CounterMetricFamily("cache_hits", "緩存命中次數", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "緩存未命中次數", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "緩存命中率", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "緩存項目數", labels=["cache"])
+        for stats in get_cache_stats():
+            name = stats["name"]
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            ratio.add_metric([name], stats["hit_ratio"])
+            size.add_metric([name], stats["size"])
+        yield from (hits, misses, ratio, size)
+
+    def describe(self) -> Iterator[Any]:
+        return iter(())
+
+
+_cache_collector: Optional[CacheStatsCollector] = None
+
+
+def register_cache_collector(registry: Any = REGISTRY) -> None:
+    """註冊緩存統計收集器（重複調用無副作用）。"""
+    global _cache_collector
+    if _cache_collector is not None:
+        return
+    collector = CacheStatsCollector()
+    try:
+        registry.register(collector)
+    except ValueError as exc:  # pragma: no cover - 已被其他模組註冊
+        logger.debug("Cache stats collector already registered: %s", exc)
+    _cache_collector = collector
+
+
+register_cache_collector()
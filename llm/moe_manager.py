@@ -1,7 +1,7 @@
 # 代碼功能說明: LLM MoE 管理器實現
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
 """LLM MoE（Mixture of Experts）管理器，整合所有 LLM 客戶端和路由策略系統。"""
 
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from agents.task_analyzer.models import LLMProvider, TaskClassificationResult
 
@@ -19,6 +19,7 @@ from .routing.dynamic import DynamicRouter
 from .routing.evaluator import RoutingEvaluator
 from .load_balancer import MultiLLMLoadBalancer
 from .failover import LLMFailoverManager
+from .metrics import LLM_FAILOVERS, observe_request, observe_usage
 from .config import (
     get_load_balancer_strategy,
     get_load_balancer_weights,
@@ -126,6 +127,40 @@ class LLMMoEManager:
             )
         return self._client_cache[provider]
 
+    def _route(
+        self,
+        task_classification: Optional[TaskClassificationResult],
+        task: str,
+        provider: Optional[LLMProvider],
+        model: Optional[str],
+        context: Optional[Dict[str, Any]],
+    ) -> Tuple[LLMProvider, str, Optional[str]]:
+        """
+        選擇 LLM 提供商。
+
+        Returns:
+            (提供商, 路由策略名稱, 用於實時統計的模型名稱)
+        """
+        if provider is not None or task_classification is None:
+            return provider or LLMProvider.CHATGPT, "manual", model
+
+        # 優先使用負載均衡器選擇提供商（如果啟用）
+        if self.load_balancer is not None:
+            provider = self.load_balancer.select_provider()
+            return provider, f"load_balancer_{self.load_balancer.strategy}", model
+
+        # 使用路由策略選擇提供商（自適應策略從評估器讀取實時測量）
+        strategy = self.dynamic_router.get_strategy()
+        strategy.bind_evaluator(self.evaluator)
+        if model is not None:
+            context = {**(context or {}), "model": model}
+        routing_result = strategy.select_provider(task_classification, task, context)
+        return (
+            routing_result.provider,
+            routing_result.metadata.get("strategy", "unknown"),
+            model or routing_result.metadata.get("model"),
+        )
+
     async def generate(
         self,
         prompt: str,
@@ -157,22 +192,9 @@ class LLMMoEManager:
         start_time = time.time()
 
         # 選擇 LLM 提供商
-        if provider is None and task_classification is not None:
-            # 優先使用負載均衡器選擇提供商（如果啟用）
-            if self.load_balancer is not None:
-                # 先從負載均衡器獲取候選提供商
-                provider = self.load_balancer.select_provider()
-                strategy_name = f"load_balancer_{self.load_balancer.strategy}"
-            else:
-                # 使用路由策略選擇提供商
-                routing_result = self.dynamic_router.get_strategy().select_provider(
-                    task_classification, prompt, context
-                )
-                provider = routing_result.provider
-                strategy_name = routing_result.metadata.get("strategy", "unknown")
-        else:
-            provider = provider or LLMProvider.CHATGPT
-            strategy_name = "manual"
+        provider, strategy_name, model_key = self._route(
+            task_classification, prompt, provider, model, context
+        )
 
         # 獲取客戶端
         client = self.get_client(provider)
@@ -180,6 +202,7 @@ class LLMMoEManager:
         # 嘗試調用
         latency: Optional[float] = None
 
+        self.evaluator.begin_request(provider, model_key)
         try:
             result = await client.generate(
                 prompt,
@@ -190,6 +213,21 @@ class LLMMoEManager:
             )
 
             latency = time.time() - start_time
+            self.evaluator.end_request(provider, model_key)
+
+            # 標記負載均衡器成功（釋放進行中的連接計數）
+            if self.load_balancer is not None:
+                self.load_balancer.mark_success(provider, latency=latency)
+
+            observe_request(
+                provider=provider,
+                operation="generate",
+                status="success",
+                latency=latency,
+                model=model,
+                strategy=strategy_name,
+            )
+            observe_usage(provider, model, result)
 
             # 記錄路由結果
             if task_classification is not None:
@@ -199,13 +237,23 @@ class LLMMoEManager:
                     task_type=task_classification.task_type.value,
                     success=True,
                     latency=latency,
+                    model=model_key,
                 )
 
             return result
 
         except Exception as exc:
             latency = time.time() - start_time
+            self.evaluator.end_request(provider, model_key)
             logger.error(f"LLM generate error with {provider.value}: {exc}")
+            observe_request(
+                provider=provider,
+                operation="generate",
+                status="error",
+                latency=latency,
+                model=model,
+                strategy=strategy_name,
+            )
 
             # 標記負載均衡器失敗
             if self.load_balancer is not None:
@@ -219,6 +267,7 @@ class LLMMoEManager:
                     task_type=task_classification.task_type.value,
                     success=False,
                     latency=latency,
+                    model=model_key,
                 )
 
             # 故障轉移
@@ -266,25 +315,11 @@ class LLMMoEManager:
         """
         start_time = time.time()
 
-        # 選擇 LLM 提供商
-        if provider is None and task_classification is not None:
-            # 優先使用負載均衡器選擇提供商（如果啟用）
-            if self.load_balancer is not None:
-                # 先從負載均衡器獲取候選提供商
-                provider = self.load_balancer.select_provider()
-                strategy_name = f"load_balancer_{self.load_balancer.strategy}"
-            else:
-                # 使用路由策略選擇提供商
-                # 從最後一條消息提取任務描述
-                task_description = messages[-1].get("content", "") if messages else ""
-                routing_result = self.dynamic_router.get_strategy().select_provider(
-                    task_classification, task_description, context
-                )
-                provider = routing_result.provider
-                strategy_name = routing_result.metadata.get("strategy", "unknown")
-        else:
-            provider = provider or LLMProvider.CHATGPT
-            strategy_name = "manual"
+        # 選擇 LLM 提供商（從最後一條消息提取任務描述）
+        task_description = messages[-1].get("content", "") if messages else ""
+        provider, strategy_name, model_key = self._route(
+            task_classification, task_description, provider, model, context
+        )
 
         # 獲取客戶端
         client = self.get_client(provider)
@@ -292,6 +327,7 @@ class LLMMoEManager:
         # 嘗試調用
         latency: Optional[float] = None
 
+        self.evaluator.begin_request(provider, model_key)
         try:
             result = await client.chat(
                 messages,
@@ -302,11 +338,22 @@ class LLMMoEManager:
             )
 
             latency = time.time() - start_time
+            self.evaluator.end_request(provider, model_key)
 
             # 標記負載均衡器成功
             if self.load_balancer is not None:
                 self.load_balancer.mark_success(provider, latency=latency)
 
+            observe_request(
+                provider=provider,
+                operation="chat",
+                status="success",
+                latency=latency,
+                model=model,
+                strategy=strategy_name,
+            )
+            observe_usage(provider, model, result)
+
             # 記錄路由結果
             if task_classification is not None:
                 self.evaluator.record_decision(
@@ -315,13 +362,23 @@ class LLMMoEManager:
                     task_type=task_classification.task_type.value,
                     success=True,
                     latency=latency,
+                    model=model_key,
                 )
 
             return result
 
         except Exception as exc:
             latency = time.time() - start_time
+            self.evaluator.end_request(provider, model_key)
             logger.error(f"LLM chat error with {provider.value}: {exc}")
+            observe_request(
+                provider=provider,
+                operation="chat",
+                status="error",
+                latency=latency,
+                model=model,
+                strategy=strategy_name,
+            )
 
             # 標記負載均衡器失敗
             if self.load_balancer is not None:
@@ -335,6 +392,7 @@ class LLMMoEManager:
                     task_type=task_classification.task_type.value,
                     success=False,
                     latency=latency,
+                    model=model_key,
                 )
 
             # 故障轉移
@@ -374,11 +432,27 @@ class LLMMoEManager:
         """
         provider = provider or LLMProvider.CHATGPT
         client = self.get_client(provider)
+        start_time = time.time()
 
         try:
-            return await client.embeddings(text, model=model, **kwargs)
+            embedding = await client.embeddings(text, model=model, **kwargs)
+            observe_request(
+                provider=provider,
+                operation="embeddings",
+                status="success",
+                latency=time.time() - start_time,
+                model=model,
+            )
+            return embedding
         except Exception as exc:
             logger.error(f"LLM embeddings error with {provider.value}: {exc}")
+            observe_request(
+                provider=provider,
+                operation="embeddings",
+                status="error",
+                latency=time.time() - start_time,
+                model=model,
+            )
 
             # 故障轉移到其他支持 embeddings 的提供商
             if self.enable_failover:
@@ -393,10 +467,21 @@ class LLMMoEManager:
                     try:
                         fallback_client = self.get_client(fallback)
                         if fallback_client.is_available():
-                            return await fallback_client.embeddings(
+                            embedding = await fallback_client.embeddings(
                                 text, model=model, **kwargs
                             )
+                            LLM_FAILOVERS.labels(
+                                from_provider=provider.value,
+                                to_provider=fallback.value,
+                                status="success",
+                            ).inc()
+                            return embedding
                     except Exception:
+                        LLM_FAILOVERS.labels(
+                            from_provider=provider.value,
+                            to_provider=fallback.value,
+                            status="failure",
+                        ).inc()
                         continue
 
             raise
@@ -488,6 +573,12 @@ class LLMMoEManager:
                     f"Successfully failed over from {failed_provider.value} "
                     f"to {fallback.value}"
                 )
+                LLM_FAILOVERS.labels(
+                    from_provider=failed_provider.value,
+                    to_provider=fallback.value,
+                    status="success",
+                ).inc()
+                observe_usage(fallback, model, result)
 
                 # 標記負載均衡器成功（如果啟用）
                 if self.load_balancer is not None:
@@ -501,6 +592,11 @@ class LLMMoEManager:
                     f"Fallback to {fallback.value} failed: {exc}",
                     exc_info=True,
                 )
+                LLM_FAILOVERS.labels(
+                    from_provider=failed_provider.value,
+                    to_provider=fallback.value,
+                    status="failure",
+                ).inc()
 
                 # 標記負載均衡器失敗（如果啟用）
                 if self.load_balancer is not None:
@@ -603,6 +699,12 @@ class LLMMoEManager:
                     f"Successfully failed over from {failed_provider.value} "
                     f"to {fallback.value}"
                 )
+                LLM_FAILOVERS.labels(
+                    from_provider=failed_provider.value,
+                    to_provider=fallback.value,
+                    status="success",
+                ).inc()
+                observe_usage(fallback, model, result)
 
                 # 標記負載均衡器成功（如果啟用）
                 if self.load_balancer is not None:
@@ -616,6 +718,11 @@ class LLMMoEManager:
                     f"Fallback to {fallback.value} failed: {exc}",
                     exc_info=True,
                 )
+                LLM_FAILOVERS.labels(
+                    from_provider=failed_provider.value,
+                    to_provider=fallback.value,
+                    status="failure",
+                ).inc()
 
                 # 標記負載均衡器失敗（如果啟用）
                 if self.load_balancer is not None:
@@ -1,7 +1,7 @@
 # 代碼功能說明: LLM 節點負載均衡器（輪詢/加權/健康檢查）
 # 創建日期: 2025-11-25 23:57 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25 23:57 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """支援本地 LLM 節點的負載均衡策略。"""
 
@@ -12,6 +12,8 @@ import time
 from dataclasses import dataclass, field
 from typing import List
 
+from .metrics import NODE_FAILURES, NODE_HEALTHY, NODE_SELECTIONS
+
 
 @dataclass(frozen=True)
 class LLMNodeConfig:
@@ -85,6 +87,7 @@ class LLMNodeRouter:
             else:
                 node = candidates[self._rr_index % len(candidates)]
             self._rr_index = (self._rr_index + 1) % len(candidates)
+            NODE_SELECTIONS.labels(node=node.name, strategy=self.strategy).inc()
             return node
 
     def mark_failure(self, node_name: str) -> None:
@@ -94,6 +97,8 @@ class LLMNodeRouter:
                 if node.name == node_name:
                     node.healthy = False
                     node.next_retry_ts = time.time() + self.cooldown_seconds
+                    NODE_HEALTHY.labels(node=node_name).set(0)
+                    NODE_FAILURES.labels(node=node_name).inc()
                     break
 
     def mark_success(self, node_name: str) -> None:
@@ -103,6 +108,7 @@ class LLMNodeRouter:
                 if node.name == node_name:
                     node.healthy = True
                     node.next_retry_ts = 0.0
+                    NODE_HEALTHY.labels(node=node_name).set(1)
                     break
 
     def get_nodes(self) -> List[LLMNode]:
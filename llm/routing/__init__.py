@@ -1,12 +1,13 @@
 # 代碼功能說明: LLM 路由策略模組初始化
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
 """LLM 路由策略模組：實現多種路由策略和動態路由切換。"""
 
 from .base import BaseRoutingStrategy, RoutingStrategyRegistry  # noqa: F401
 from .strategies import (  # noqa: F401
+    AdaptiveRoutingStrategy,
     ComplexityBasedStrategy,
     CostBasedStrategy,
     HybridRoutingStrategy,
@@ -29,6 +30,7 @@ __all__ = [
     "CostBasedStrategy",
     "LatencyBasedStrategy",
     "HybridRoutingStrategy",
+    "AdaptiveRoutingStrategy",
     "RoutingEvaluator",
     "DynamicRouter",
     "ABTestManager",
@@ -1,21 +1,23 @@
 # 代碼功能說明: LLM 路由 A/B 測試框架
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
 """實現 A/B 測試框架，支持流量分配、結果收集和統計分析。"""
 
 from __future__ import annotations
 
+import bisect
 import hashlib
 import logging
-import statistics
+import random
 import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
 from agents.task_analyzer.models import LLMProvider
+from llm.routing.streaming_stats import QuantileSketch, RunningStats
 
 logger = logging.getLogger(__name__)
 
@@ -63,7 +65,11 @@ class ABTestMetrics:
     failed_requests: int = 0
     total_latency: float = 0.0
     total_cost: float = 0.0
-    quality_scores: List[float] = field(default_factory=list)
+    # 流式聚合：常數內存，不保存逐條樣本
+    latency_stats: RunningStats = field(default_factory=RunningStats)
+    cost_stats: RunningStats = field(default_factory=RunningStats)
+    quality_stats: RunningStats = field(default_factory=RunningStats)
+    latency_sketch: QuantileSketch = field(default_factory=QuantileSketch)
 
     @property
     def success_rate(self) -> float:
@@ -89,9 +95,7 @@ class ABTestMetrics:
     @property
     def average_quality(self) -> float:
         """計算平均質量。"""
-        if not self.quality_scores:
-            return 0.0
-        return statistics.mean(self.quality_scores)
+        return self.quality_stats.mean if self.quality_stats.count else 0.0
 
 
 class ABTestManager:
@@ -127,8 +131,13 @@ class ABTestManager:
             group.name: ABTestMetrics(group_name=group.name) for group in groups
         }
 
-        # 分配記錄（用於一致性分配）
-        self.allocations: Dict[str, str] = {}
+        # 累積流量閾值。分配由鍵的哈希值決定，同一鍵總是落在同一組，
+        # 因此無需保存每個用戶/會話的分配記錄
+        self._thresholds: List[float] = []
+        cumulative = 0.0
+        for group in groups:
+            cumulative += group.traffic_percentage
+            self._thresholds.append(cumulative)
 
     def assign_group(
         self,
@@ -164,16 +173,7 @@ class ABTestManager:
             key_str = f"{user_id}:{session_id}:{task_type}"
             allocation_key = hashlib.md5(key_str.encode()).hexdigest()
 
-        # 檢查是否已分配
-        if allocation_key and allocation_key in self.allocations:
-            group_name = self.allocations[allocation_key]
-            for group in self.groups:
-                if group.name == group_name:
-                    return group
-
-        # 根據流量百分比分配
-        import random
-
+        # 根據流量百分比分配（有鍵時按哈希確定性分配）
         rand = (
             random.random()
             if allocation_key is None
@@ -182,17 +182,9 @@ class ABTestManager:
             )
         )
 
-        cumulative = 0.0
-        for group in self.groups:
-            cumulative += group.traffic_percentage
-            if rand <= cumulative:
-                # 記錄分配
-                if allocation_key:
-                    self.allocations[allocation_key] = group.name
-                return group
-
-        # 默認返回最後一個組
-        return self.groups[-1]
+        index = bisect.bisect_left(self._thresholds, rand)
+        # 浮點累加誤差導致超出範圍時返回最後一個組
+        return self.groups[min(index, len(self.groups) - 1)]
 
     def record_result(
         self,
@@ -225,10 +217,13 @@ class ABTestManager:
             metrics.successful_requests += 1
             if latency is not None:
                 metrics.total_latency += latency
+                metrics.latency_stats.add(latency)
+                metrics.latency_sketch.add(latency)
             if cost is not None:
                 metrics.total_cost += cost
+                metrics.cost_stats.add(cost)
             if quality_score is not None:
-                metrics.quality_scores.append(quality_score)
+                metrics.quality_stats.add(quality_score)
         else:
             metrics.failed_requests += 1
 
@@ -255,6 +250,7 @@ class ABTestManager:
                 "total_requests": metrics.total_requests,
                 "successful_requests": metrics.successful_requests,
                 "failed_requests": metrics.failed_requests,
+                "latency_percentiles": metrics.latency_sketch.percentiles(),
             }
 
         return {
@@ -289,6 +285,8 @@ class ABTestManager:
             return {"error": "組不存在"}
 
         # 獲取指標值
+        stats1: Optional[RunningStats] = None
+        stats2: Optional[RunningStats] = None
         if metric == "success_rate":
             value1 = metrics1.success_rate
             value2 = metrics2.success_rate
@@ -299,30 +297,38 @@ class ABTestManager:
             value2 = metrics2.average_latency
             n1 = metrics1.successful_requests
             n2 = metrics2.successful_requests
+            stats1, stats2 = metrics1.latency_stats, metrics2.latency_stats
         elif metric == "average_cost":
             value1 = metrics1.average_cost
             value2 = metrics2.average_cost
             n1 = metrics1.successful_requests
             n2 = metrics2.successful_requests
+            stats1, stats2 = metrics1.cost_stats, metrics2.cost_stats
         elif metric == "average_quality":
             value1 = metrics1.average_quality
             value2 = metrics2.average_quality
-            n1 = len(metrics1.quality_scores)
-            n2 = len(metrics2.quality_scores)
+            n1 = metrics1.quality_stats.count
+            n2 = metrics2.quality_stats.count
+            stats1, stats2 = metrics1.quality_stats, metrics2.quality_stats
         else:
             return {"error": f"不支持的指標: {metric}"}
 
         if n1 == 0 or n2 == 0:
             return {"error": "樣本數量不足"}
 
-        # 簡化的統計顯著性計算（t-test）
-        # 這裡使用簡化版本，實際應用中可以使用 scipy.stats
+        # 簡化的統計顯著性計算（z-test）
+        # 連續指標使用流式方差計算標準誤；樣本不足以估計方差時沿用 0.1 的假設
         diff = abs(value1 - value2)
-        pooled_std = (
-            (value1 * (1 - value1) / n1 + value2 * (1 - value2) / n2) ** 0.5
-            if metric == "success_rate"
-            else 0.1  # 簡化假設
-        )
+        if metric == "success_rate":
+            pooled_std = (
+                value1 * (1 - value1) / n1 + value2 * (1 - value2) / n2
+            ) ** 0.5
+        elif stats1 and stats2 and stats1.count > 1 and stats2.count > 1:
+            pooled_std = (
+                stats1.variance / stats1.count + stats2.variance / stats2.count
+            ) ** 0.5
+        else:
+            pooled_std = 0.1  # 簡化假設
 
         if pooled_std == 0:
             z_score = 0.0
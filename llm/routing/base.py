@@ -1,7 +1,7 @@
 # 代碼功能說明: LLM 路由策略基類定義
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
 """定義路由策略基類和策略註冊機制。"""
 
@@ -85,6 +85,14 @@ class BaseRoutingStrategy(ABC):
         """
         raise NotImplementedError
 
+    def bind_evaluator(self, evaluator: Any) -> None:
+        """
+        綁定路由評估器，供依賴實時測量的策略使用（默認忽略）。
+
+        Args:
+            evaluator: 路由評估器
+        """
+
     def update_metrics(
         self,
         provider: LLMProvider,
@@ -1,22 +1,26 @@
 # 代碼功能說明: LLM 路由評估器
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-18
 
 """實現路由性能評估、優化和 A/B 測試數據收集。"""
 
 from __future__ import annotations
 
 import logging
+import threading
 import time
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, Optional, Tuple
 
 from agents.task_analyzer.models import LLMProvider
+from llm.routing.streaming_stats import EwmaStats, QuantileSketch, RunningStats
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_KEY = "default"
+
 
 @dataclass
 class RoutingMetrics:
@@ -28,7 +32,35 @@ class RoutingMetrics:
     total_latency: float = 0.0
     total_cost: float = 0.0
     total_tokens: int = 0
-    quality_scores: List[float] = field(default_factory=list)
+    # 流式聚合：常數內存，不保存逐條樣本
+    latency_stats: RunningStats = field(default_factory=RunningStats)
+    cost_stats: RunningStats = field(default_factory=RunningStats)
+    quality_stats: RunningStats = field(default_factory=RunningStats)
+    latency_sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def record(
+        self,
+        success: bool,
+        latency: Optional[float] = None,
+        cost: Optional[float] = None,
+        quality_score: Optional[float] = None,
+    ) -> None:
+        """記錄一次請求結果。"""
+        self.total_requests += 1
+        if not success:
+            self.failed_requests += 1
+            return
+
+        self.successful_requests += 1
+        if latency is not None:
+            self.total_latency += latency
+            self.latency_stats.add(latency)
+            self.latency_sketch.add(latency)
+        if cost is not None:
+            self.total_cost += cost
+            self.cost_stats.add(cost)
+        if quality_score is not None:
+            self.quality_stats.add(quality_score)
 
     @property
     def success_rate(self) -> float:
@@ -54,9 +86,33 @@ class RoutingMetrics:
     @property
     def average_quality(self) -> float:
         """計算平均質量評分。"""
-        if not self.quality_scores:
-            return 0.0
-        return sum(self.quality_scores) / len(self.quality_scores)
+        return self.quality_stats.mean if self.quality_stats.count else 0.0
+
+    def summary(self, detailed: bool = False) -> Dict[str, Any]:
+        """
+        轉換為指標字典。
+
+        Args:
+            detailed: 是否包含成功/失敗計數與延遲分佈詳情
+        """
+        data: Dict[str, Any] = {
+            "success_rate": self.success_rate,
+            "average_latency": self.average_latency,
+            "average_cost": self.average_cost,
+            "average_quality": self.average_quality,
+            "total_requests": self.total_requests,
+            "latency_p95": self.latency_sketch.quantile(0.95),
+        }
+        if detailed:
+            data.update(
+                {
+                    "successful_requests": self.successful_requests,
+                    "failed_requests": self.failed_requests,
+                    "latency_stddev": self.latency_stats.stddev,
+                    "latency_percentiles": self.latency_sketch.percentiles(),
+                }
+            )
+        return data
 
 
 @dataclass
@@ -77,19 +133,27 @@ class RoutingDecision:
 class RoutingEvaluator:
     """路由性能評估器。"""
 
-    def __init__(self, max_history_size: int = 10000):
+    def __init__(self, max_history_size: int = 10000, ewma_half_life: float = 60.0):
         """
         初始化評估器。
 
         Args:
-            max_history_size: 最大歷史記錄數量
+            max_history_size: 最大歷史記錄數量（環形緩衝區容量）
+            ewma_half_life: 實時延遲/錯誤率 EWMA 的半衰期（秒）
         """
         self.max_history_size = max_history_size
-        self.decision_history: List[RoutingDecision] = []
+        self.decision_history: Deque[RoutingDecision] = deque(maxlen=max_history_size)
+        # 歷史窗口內各任務類型的決策數，隨環形緩衝區淘汰同步遞減
+        self._task_type_counts: Counter = Counter()
         self.provider_metrics: Dict[LLMProvider, RoutingMetrics] = defaultdict(
             RoutingMetrics
         )
         self.strategy_metrics: Dict[str, RoutingMetrics] = defaultdict(RoutingMetrics)
+        # 實時測量：按 (provider, model, task_type) 的 EWMA 與按 (provider, model) 的進行中請求數
+        self.ewma_half_life = ewma_half_life
+        self._live_stats: Dict[Tuple[str, str, str], EwmaStats] = {}
+        self._inflight: Dict[Tuple[str, str], int] = {}
+        self._inflight_lock = threading.Lock()
 
     def record_decision(
         self,
@@ -101,6 +165,7 @@ class RoutingEvaluator:
         cost: Optional[float] = None,
         quality_score: Optional[float] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
     ) -> None:
         """
         記錄路由決策。
@@ -114,6 +179,7 @@ class RoutingEvaluator:
             cost: 成本
             quality_score: 質量評分（0.0-1.0）
             metadata: 其他元數據
+            model: 模型名稱（可選，默認取 metadata["model"]）
         """
         decision = RoutingDecision(
             timestamp=time.time(),
@@ -127,39 +193,66 @@ class RoutingEvaluator:
             metadata=metadata or {},
         )
 
+        # 環形緩衝區已滿時，最舊的記錄將被淘汰（O(1)）
+        if (
+            self.decision_history
+            and len(self.decision_history) == self.decision_history.maxlen
+        ):
+            evicted = self.decision_history[0]
+            self._task_type_counts[evicted.task_type] -= 1
+            if self._task_type_counts[evicted.task_type] <= 0:
+                del self._task_type_counts[evicted.task_type]
         self.decision_history.append(decision)
+        self._task_type_counts[task_type] += 1
+
+        # 更新提供商與策略指標
+        self.provider_metrics[provider].record(success, latency, cost, quality_score)
+        self.strategy_metrics[strategy].record(success, latency, cost, quality_score)
+
+        model_key = model or decision.metadata.get("model") or DEFAULT_MODEL_KEY
+        key = (provider.value, model_key, task_type)
+        live = self._live_stats.get(key)
+        if live is None:
+            live = self._live_stats[key] = EwmaStats(half_life=self.ewma_half_life)
+        live.add(success, latency)
+
+    def get_live_stats(
+        self, provider: LLMProvider, model: Optional[str], task_type: str
+    ) -> Optional[EwmaStats]:
+        """
+        獲取實時 EWMA 統計。
+
+        Args:
+            provider: LLM 提供商
+            model: 模型名稱（None 表示默認模型）
+            task_type: 任務類型
+
+        Returns:
+            EWMA 統計，尚無樣本時返回 None
+        """
+        return self._live_stats.get(
+            (provider.value, model or DEFAULT_MODEL_KEY, task_type)
+        )
 
-        # 限制歷史記錄大小
-        if len(self.decision_history) > self.max_history_size:
-            self.decision_history = self.decision_history[-self.max_history_size :]
-
-        # 更新提供商指標
-        provider_metric = self.provider_metrics[provider]
-        provider_metric.total_requests += 1
-        if success:
-            provider_metric.successful_requests += 1
-            if latency is not None:
-                provider_metric.total_latency += latency
-            if cost is not None:
-                provider_metric.total_cost += cost
-            if quality_score is not None:
-                provider_metric.quality_scores.append(quality_score)
-        else:
-            provider_metric.failed_requests += 1
-
-        # 更新策略指標
-        strategy_metric = self.strategy_metrics[strategy]
-        strategy_metric.total_requests += 1
-        if success:
-            strategy_metric.successful_requests += 1
-            if latency is not None:
-                strategy_metric.total_latency += latency
-            if cost is not None:
-                strategy_metric.total_cost += cost
-            if quality_score is not None:
-                strategy_metric.quality_scores.append(quality_score)
-        else:
-            strategy_metric.failed_requests += 1
+    def begin_request(self, provider: LLMProvider, model: Optional[str] = None) -> None:
+        """記錄一個開始執行的請求（用於負載感知路由）。"""
+        key = (provider.value, model or DEFAULT_MODEL_KEY)
+        with self._inflight_lock:
+            self._inflight[key] = self._inflight.get(key, 0) + 1
+
+    def end_request(self, provider: LLMProvider, model: Optional[str] = None) -> None:
+        """記錄一個結束的請求。"""
+        key = (provider.value, model or DEFAULT_MODEL_KEY)
+        with self._inflight_lock:
+            remaining = self._inflight.get(key, 0) - 1
+            if remaining > 0:
+                self._inflight[key] = remaining
+            else:
+                self._inflight.pop(key, None)
+
+    def get_inflight(self, provider: LLMProvider, model: Optional[str] = None) -> int:
+        """獲取提供商/模型進行中的請求數。"""
+        return self._inflight.get((provider.value, model or DEFAULT_MODEL_KEY), 0)
 
     def get_provider_metrics(
         self, provider: Optional[LLMProvider] = None
@@ -174,30 +267,13 @@ class RoutingEvaluator:
             指標字典
         """
         if provider is None:
-            return {
-                p.value: {
-                    "success_rate": m.success_rate,
-                    "average_latency": m.average_latency,
-                    "average_cost": m.average_cost,
-                    "average_quality": m.average_quality,
-                    "total_requests": m.total_requests,
-                }
-                for p, m in self.provider_metrics.items()
-            }
+            return {p.value: m.summary() for p, m in self.provider_metrics.items()}
 
         metrics = self.provider_metrics.get(provider)
         if metrics is None:
             return {}
 
-        return {
-            "success_rate": metrics.success_rate,
-            "average_latency": metrics.average_latency,
-            "average_cost": metrics.average_cost,
-            "average_quality": metrics.average_quality,
-            "total_requests": metrics.total_requests,
-            "successful_requests": metrics.successful_requests,
-            "failed_requests": metrics.failed_requests,
-        }
+        return metrics.summary(detailed=True)
 
     def get_strategy_metrics(self, strategy: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -210,30 +286,13 @@ class RoutingEvaluator:
             指標字典
         """
         if strategy is None:
-            return {
-                s: {
-                    "success_rate": m.success_rate,
-                    "average_latency": m.average_latency,
-                    "average_cost": m.average_cost,
-                    "average_quality": m.average_quality,
-                    "total_requests": m.total_requests,
-                }
-                for s, m in self.strategy_metrics.items()
-            }
+            return {s: m.summary() for s, m in self.strategy_metrics.items()}
 
         metrics = self.strategy_metrics.get(strategy)
         if metrics is None:
             return {}
 
-        return {
-            "success_rate": metrics.success_rate,
-            "average_latency": metrics.average_latency,
-            "average_cost": metrics.average_cost,
-            "average_quality": metrics.average_quality,
-            "total_requests": metrics.total_requests,
-            "successful_requests": metrics.successful_requests,
-            "failed_requests": metrics.failed_requests,
-        }
+        return metrics.summary(detailed=True)
 
     def calculate_quality_score(
         self,
@@ -309,15 +368,13 @@ class RoutingEvaluator:
             "strategy_rankings": [],
         }
 
-        # 過濾歷史記錄（如果指定了任務類型）
-        if task_type:
-            filtered_decisions = [
-                d for d in self.decision_history if d.task_type == task_type
-            ]
-        else:
-            filtered_decisions = self.decision_history
-
-        if not filtered_decisions:
+        # 檢查歷史窗口內是否有相關決策（如果指定了任務類型）
+        has_decisions = (
+            self._task_type_counts.get(task_type, 0) > 0
+            if task_type
+            else bool(self.decision_history)
+        )
+        if not has_decisions:
             return recommendations
 
         # 計算各提供商的平均表現
@@ -364,6 +421,8 @@ class RoutingEvaluator:
     def clear_history(self) -> None:
         """清空歷史記錄。"""
         self.decision_history.clear()
+        self._task_type_counts.clear()
         self.provider_metrics.clear()
         self.strategy_metrics.clear()
+        self._live_stats.clear()
         logger.info("已清空路由評估歷史記錄")
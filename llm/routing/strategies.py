@@ -1,20 +1,25 @@
 # 代碼功能說明: LLM 路由策略實現
 # 創建日期: 2025-11-29
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-29
+# 最後修改日期: 2026-10-19
 
-"""實現多種路由策略：任務類型、複雜度、成本、延遲等。"""
+"""實現多種路由策略：任務類型、複雜度、成本、延遲、實時自適應等。"""
 
 from __future__ import annotations
 
 import logging
-import re
-from typing import Any, Dict, Optional
+import random
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
+from agents.task_analyzer.keyword_matcher import TASK_KEYWORD_GROUPS, scan_task_text
 from agents.task_analyzer.models import LLMProvider, TaskClassificationResult, TaskType
 
 from .base import BaseRoutingStrategy, RoutingResult, RoutingStrategyRegistry
 
+if TYPE_CHECKING:
+    from .evaluator import RoutingEvaluator
+
 logger = logging.getLogger(__name__)
 
 
@@ -139,30 +144,9 @@ class TaskTypeBasedStrategy(BaseRoutingStrategy):
 class TaskComplexityEvaluator:
     """任務複雜度評估器。"""
 
-    # 複雜任務關鍵詞
-    COMPLEX_KEYWORDS = [
-        "分析",
-        "比較",
-        "評估",
-        "設計",
-        "規劃",
-        "優化",
-        "解決",
-        "實現",
-        "開發",
-        "創建",
-    ]
-
-    # 簡單任務關鍵詞
-    SIMPLE_KEYWORDS = [
-        "查詢",
-        "查找",
-        "獲取",
-        "顯示",
-        "列出",
-        "說明",
-        "解釋",
-    ]
+    # 複雜/簡單任務關鍵詞（與任務分類共用同一次關鍵詞掃描）
+    COMPLEX_KEYWORDS = TASK_KEYWORD_GROUPS["complexity.complex"]
+    SIMPLE_KEYWORDS = TASK_KEYWORD_GROUPS["complexity.simple"]
 
     @classmethod
     def evaluate(cls, task: str, context: Optional[Dict[str, Any]] = None) -> float:
@@ -188,9 +172,9 @@ class TaskComplexityEvaluator:
             complexity += 0.1
 
         # 基於關鍵詞
-        task_lower = task.lower()
-        complex_count = sum(1 for kw in cls.COMPLEX_KEYWORDS if kw in task_lower)
-        simple_count = sum(1 for kw in cls.SIMPLE_KEYWORDS if kw in task_lower)
+        hits = scan_task_text(task)
+        complex_count = hits.count("complexity.complex")
+        simple_count = hits.count("complexity.simple")
 
         if complex_count > 0:
             complexity += min(0.4, complex_count * 0.1)
@@ -205,7 +189,7 @@ class TaskComplexityEvaluator:
                 complexity += 0.1
 
         # 正則表達式：檢查是否包含多個問題或步驟
-        question_marks = len(re.findall(r"[？?]", task))
+        question_marks = hits.occurrences("question_mark")
         if question_marks > 1:
             complexity += min(0.2, question_marks * 0.05)
 
@@ -537,9 +521,184 @@ class HybridRoutingStrategy(BaseRoutingStrategy):
         return "hybrid"
 
 
+def _available_providers() -> List[LLMProvider]:
+    """返回客戶端工廠判定為可用的提供商。"""
+    # 延遲導入：客戶端工廠按需加載提供商 SDK
+    from llm.clients.factory import LLMClientFactory
+
+    return [p for p in LLMProvider if LLMClientFactory.is_client_available(p)]
+
+
+class AdaptiveRoutingStrategy(BaseRoutingStrategy):
+    """
+    基於實時測量的自適應路由策略。
+
+    延遲與錯誤率來自 RoutingEvaluator 按 (provider, model, task_type) 維護的
+    時間衰減 EWMA；估計隨新鮮度回歸到先驗延遲，長時間未被選中的提供商會重新獲得試探機會。
+    選擇流程：
+    1. 樣本不足 ``min_samples`` 的提供商優先試探（取進行中請求最少者）
+    2. 以 ``epsilon`` 概率隨機探索
+    3. 否則隨機抽取兩個候選（power-of-two-choices），選擇
+       ``延遲 × (進行中請求數 + 1) / (1 - 錯誤率)`` 較低者
+
+    配置項：
+        providers: 參與路由的提供商名稱列表（如 ``["ollama", "qwen"]``）；
+            未配置時使用客戶端工廠判定為可用（已配置憑證/節點）的提供商，
+            避免試探階段向沒有憑證的提供商發送請求
+        models: 提供商 -> 默認模型，用於查找 EWMA（context["model"] 優先）
+        epsilon: 隨機探索概率
+        min_samples: 試探階段每個提供商需要的樣本數
+        prior_latency: 沒有測量數據時的先驗延遲（秒）
+        max_error_rate: 代價計算中錯誤率的上限
+        seed: 隨機數種子
+        evaluator: 提供實時測量的 RoutingEvaluator
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        super().__init__(config)
+        config = self.config
+
+        self.providers: List[LLMProvider] = []
+        for provider_str in config.get("providers") or []:
+            try:
+                self.providers.append(LLMProvider(provider_str))
+            except ValueError:
+                logger.warning(f"自適應路由忽略未知提供商: {provider_str}")
+        if not self.providers:
+            self.providers = _available_providers()
+        if not self.providers:
+            logger.warning("自適應路由沒有可用的提供商，退回到全部提供商")
+            self.providers = list(LLMProvider)
+
+        # 提供商默認模型（用於查找 EWMA，context["model"] 優先）
+        self.models: Dict[str, str] = dict(config.get("models") or {})
+        self.epsilon = float(config.get("epsilon", 0.05))
+        self.min_samples = int(config.get("min_samples", 3))
+        self.prior_latency = float(config.get("prior_latency", 2.0))
+        self.max_error_rate = float(config.get("max_error_rate", 0.95))
+        self._rng = random.Random(config.get("seed"))
+        self.evaluator: Optional["RoutingEvaluator"] = config.get("evaluator")
+
+    def bind_evaluator(self, evaluator: "RoutingEvaluator") -> None:
+        """綁定提供實時測量的路由評估器（已綁定時保持不變）。"""
+        if self.evaluator is None:
+            self.evaluator = evaluator
+
+    def _model_for(
+        self, provider: LLMProvider, context: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        if context and context.get("model"):
+            return str(context["model"])
+        return self.models.get(provider.value)
+
+    def _estimate(
+        self,
+        provider: LLMProvider,
+        task_type: str,
+        context: Optional[Dict[str, Any]],
+        now: float,
+    ) -> Tuple[float, float, int, int]:
+        """返回 (延遲估計, 錯誤率估計, 樣本數, 進行中請求數)。"""
+        if self.evaluator is None:
+            return self.prior_latency, 0.0, 0, 0
+
+        model = self._model_for(provider, context)
+        inflight = self.evaluator.get_inflight(provider, model)
+        stats = self.evaluator.get_live_stats(provider, model, task_type)
+        if stats is None:
+            return self.prior_latency, 0.0, 0, inflight
+
+        freshness = stats.freshness(now)
+        measured = stats.latency if stats.latency is not None else self.prior_latency
+        latency = self.prior_latency + (measured - self.prior_latency) * freshness
+        error_rate = stats.error_rate * freshness
+        return latency, error_rate, stats.count, inflight
+
+    def _cost(self, latency: float, error_rate: float, inflight: int) -> float:
+        success = max(1.0 - min(error_rate, self.max_error_rate), 1e-6)
+        return latency * (inflight + 1) / success
+
+    def select_provider(
+        self,
+        task_classification: TaskClassificationResult,
+        task: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> RoutingResult:
+        """基於實時延遲、錯誤率與進行中請求數選擇提供商。"""
+        task_type = task_classification.task_type.value
+        candidates = list(self.providers)
+        excluded = set((context or {}).get("exclude_providers") or [])
+        if excluded:
+            candidates = [
+                p for p in candidates if p.value not in excluded
+            ] or candidates
+
+        now = time.monotonic()
+        estimates = {p: self._estimate(p, task_type, context, now) for p in candidates}
+
+        under_sampled = [p for p in candidates if estimates[p][2] < self.min_samples]
+        if under_sampled:
+            provider = min(under_sampled, key=lambda p: estimates[p][3])
+            mode = "warmup"
+        elif len(candidates) == 1:
+            provider = candidates[0]
+            mode = "exploit"
+        elif self._rng.random() < self.epsilon:
+            provider = self._rng.choice(candidates)
+            mode = "explore"
+        else:
+            first, second = self._rng.sample(candidates, 2)
+            provider = min(
+                (first, second),
+                key=lambda p: self._cost(
+                    estimates[p][0], estimates[p][1], estimates[p][3]
+                ),
+            )
+            mode = "exploit"
+
+        latency, error_rate, samples, inflight = estimates[provider]
+        model = self._model_for(provider, context)
+
+        return RoutingResult(
+            provider=provider,
+            confidence=0.5 if mode != "exploit" else max(0.5, 1.0 - error_rate),
+            reasoning=(
+                f"自適應路由（{mode}）選擇 {provider.value}："
+                f"延遲估計 {latency:.3f}s，錯誤率 {error_rate:.2f}，進行中 {inflight}"
+            ),
+            metadata={
+                "strategy": self.strategy_name,
+                "mode": mode,
+                "model": model,
+                "estimated_latency": latency,
+                "estimated_error_rate": error_rate,
+                "samples": samples,
+                "inflight": inflight,
+            },
+        )
+
+    def evaluate(
+        self,
+        provider: LLMProvider,
+        task_type: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> float:
+        """以實時延遲相對先驗值的比例評估適合度。"""
+        latency, error_rate, _, inflight = self._estimate(
+            provider, task_type, context, time.monotonic()
+        )
+        cost = self._cost(latency, error_rate, inflight)
+        return self.prior_latency / (self.prior_latency + cost)
+
+    @property
+    def strategy_name(self) -> str:
+        return "adaptive"
+
+
 # 註冊所有策略
 RoutingStrategyRegistry.register("task_type", TaskTypeBasedStrategy)
 RoutingStrategyRegistry.register("complexity", ComplexityBasedStrategy)
 RoutingStrategyRegistry.register("cost", CostBasedStrategy)
 RoutingStrategyRegistry.register("latency", LatencyBasedStrategy)
 RoutingStrategyRegistry.register("hybrid", HybridRoutingStrategy)
+RoutingStrategyRegistry.register("adaptive", AdaptiveRoutingStrategy)
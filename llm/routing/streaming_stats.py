@@ -0,0 +1,199 @@
+# 代碼功能說明: LLM 路由流式統計工具
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""提供常數內存的流式統計：Welford 均值/方差、對數分桶分位數草圖與時間衰減 EWMA。"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+
+@dataclass
+class RunningStats:
+    """
+    Welford 在線均值與方差。
+
+    每次更新 O(1)，不保存樣本，數值上比累加平方和更穩定。
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+
+    def add(self, value: float) -> None:
+        """加入一個樣本。"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def total(self) -> float:
+        """樣本總和。"""
+        return self.mean * self.count
+
+    @property
+    def variance(self) -> float:
+        """樣本方差（n-1）。"""
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    @property
+    def stddev(self) -> float:
+        """樣本標準差。"""
+        return math.sqrt(self.variance)
+
+    def merge(self, other: "RunningStats") -> None:
+        """合併另一組統計（Chan 並行合併公式）。"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+@dataclass
+class QuantileSketch:
+    """
+    對數分桶分位數草圖（DDSketch 風格）。
+
+    樣本按 ``gamma = (1 + a) / (1 - a)`` 的對數分桶，分位數相對誤差不超過
+    ``relative_accuracy``；桶數超過 ``max_buckets`` 時合併最低的桶，
+    因此內存有上限，且高分位數（p95/p99）保持準確。
+    """
+
+    relative_accuracy: float = 0.01
+    max_buckets: int = 2048
+    min_value: float = 1e-9
+    count: int = 0
+    zero_count: int = 0
+    _buckets: Dict[int, int] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        if not 0.0 < self.relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self._gamma = (1.0 + self.relative_accuracy) / (1.0 - self.relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def add(self, value: float) -> None:
+        """加入一個非負樣本（負值視為 0）。"""
+        self.count += 1
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if len(self._buckets) > self.max_buckets:
+            self._collapse_lowest()
+
+    def _collapse_lowest(self) -> None:
+        lowest, second = sorted(self._buckets)[:2]
+        self._buckets[second] += self._buckets.pop(lowest)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估算分位數。
+
+        Args:
+            q: 分位（0.0-1.0）
+
+        Returns:
+            分位數估計值，無樣本時返回 None
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                # 取桶的幾何中點，使相對誤差對稱
+                return 2.0 * self._gamma**index / (self._gamma + 1.0)
+        return 2.0 * self._gamma ** max(self._buckets) / (self._gamma + 1.0)
+
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        """返回 p50/p95/p99。"""
+        return {
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+@dataclass
+class EwmaStats:
+    """
+    按時間衰減的指數加權移動平均（延遲與錯誤率）。
+
+    平滑係數 ``alpha = 1 - 2^(-dt / half_life)`` 隨距上次樣本的時間增大，
+    並以 ``min_alpha`` 為下限，使同一時刻的突發樣本仍能推動估計。
+    ``freshness`` 表示估計的可信程度，長時間沒有新樣本時趨近 0，
+    調用方據此將舊估計回歸到先驗值，避免一小時前的慢節點一直被懲罰。
+    """
+
+    half_life: float = 60.0
+    min_alpha: float = 0.1
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    count: int = 0
+    last_update: float = 0.0
+
+    def _alpha(self, now: float) -> float:
+        if self.count == 0:
+            return 1.0
+        elapsed = max(now - self.last_update, 0.0)
+        return max(self.min_alpha, 1.0 - 2.0 ** (-elapsed / self.half_life))
+
+    def add(
+        self,
+        success: bool,
+        latency: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        加入一次請求結果。
+
+        Args:
+            success: 是否成功
+            latency: 延遲（秒），僅成功請求計入延遲估計
+            now: 當前時間（單調時鐘秒數，默認 time.monotonic()）
+        """
+        now = time.monotonic() if now is None else now
+        alpha = self._alpha(now)
+        self.error_rate += alpha * ((0.0 if success else 1.0) - self.error_rate)
+        if success and latency is not None:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += alpha * (latency - self.latency)
+        self.count += 1
+        self.last_update = now
+
+    def freshness(self, now: Optional[float] = None) -> float:
+        """估計的新鮮度（0.0-1.0），每經過一個半衰期減半。"""
+        if self.count == 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return 2.0 ** (-max(now - self.last_update, 0.0) / self.half_life)
@@ -0,0 +1,143 @@
+# 代碼功能說明: MCP Client 工具結果緩存
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""MCP Client 工具結果緩存模組 - 按工具註解聲明的 TTL 緩存冪等工具的結果"""
+
+import copy
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from core.cache import TTLCache, make_cache_key
+from mcp_server.protocol.models import MCPTool
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultCache:
+    """
+    工具結果緩存
+
+    工具在註解中以 ``cacheTtl``（秒）聲明結果可緩存，可選 ``cacheableWhen``
+    限定參數取值（例如 ``{"operation": ["read", "list"]}``）。
+    緩存鍵為 (工具目錄版本, 工具名, 失效代數, 規範化參數)：
+    - 目錄版本變更時全部舊條目自動失效
+    - 同一工具的不可緩存調用（例如寫操作）使該工具的代數遞增，使其已緩存結果失效
+    舊條目不逐一刪除，由 LRU 與 TTL 淘汰，因此內存有上限。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        max_ttl: float = 3600.0,
+        name: str = "mcp_tool_results",
+    ):
+        """
+        初始化工具結果緩存
+
+        Args:
+            max_size: 最大緩存條目數
+            max_ttl: 單個條目的最長保留時間（秒），工具聲明的 TTL 不會超過此值
+            name: 緩存名稱（用於統計與指標）
+        """
+        self.max_ttl = max_ttl
+        self._cache: TTLCache[Tuple[float, Any]] = TTLCache(
+            name=name,
+            max_size=max_size,
+            ttl=max_ttl,
+            freeze=copy.deepcopy,
+            thaw=copy.deepcopy,
+        )
+        self._policies: Dict[str, Dict[str, Any]] = {}
+        self._generations: Dict[str, int] = {}
+        self._catalog_version: Optional[str] = None
+
+    def update_catalog(self, tools: list, version: Optional[str]) -> None:
+        """
+        根據工具目錄更新緩存策略
+
+        Args:
+            tools: MCPTool 列表
+            version: 工具目錄版本
+        """
+        policies: Dict[str, Dict[str, Any]] = {}
+        for tool in tools:
+            annotations = tool.annotations if isinstance(tool, MCPTool) else None
+            ttl = (annotations or {}).get("cacheTtl")
+            if ttl and float(ttl) > 0:
+                policies[tool.name] = {
+                    "ttl": min(float(ttl), self.max_ttl),
+                    "when": (annotations or {}).get("cacheableWhen") or {},
+                }
+        self._policies = policies
+        if version != self._catalog_version:
+            if self._catalog_version is not None:
+                logger.info(
+                    f"Tool catalog changed ({self._catalog_version} -> {version}), "
+                    "invalidating cached tool results"
+                )
+            self._catalog_version = version
+            self._cache.clear()
+
+    def invalidate(self) -> None:
+        """清空所有緩存結果"""
+        self._cache.clear()
+
+    def ttl_for(self, name: str, arguments: Dict[str, Any]) -> Optional[float]:
+        """
+        獲取工具調用的緩存 TTL
+
+        Returns:
+            TTL（秒），調用不可緩存時返回 None
+        """
+        policy = self._policies.get(name)
+        if policy is None:
+            return None
+        for field, allowed in policy["when"].items():
+            if arguments.get(field) not in allowed:
+                return None
+        return policy["ttl"]
+
+    def _key(self, name: str, arguments: Dict[str, Any]) -> str:
+        return make_cache_key(
+            self._catalog_version, name, self._generations.get(name, 0), arguments
+        )
+
+    def get(self, name: str, arguments: Dict[str, Any]) -> Tuple[bool, Any]:
+        """
+        查找緩存結果
+
+        Returns:
+            (是否命中, 結果)
+        """
+        if self.ttl_for(name, arguments) is None:
+            return False, None
+        entry = self._cache.get(self._key(name, arguments))
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            return False, None
+        return True, result
+
+    def record(self, name: str, arguments: Dict[str, Any], result: Any) -> None:
+        """
+        記錄一次成功的工具調用
+
+        可緩存的調用寫入緩存；同一工具的不可緩存調用使該工具的緩存失效。
+        """
+        ttl = self.ttl_for(name, arguments)
+        if ttl is None:
+            if name in self._policies:
+                self._generations[name] = self._generations.get(name, 0) + 1
+            return
+        self._cache.set(self._key(name, arguments), (time.monotonic() + ttl, result))
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取緩存統計"""
+        data = self._cache.stats().to_dict()
+        data["catalog_version"] = self._catalog_version
+        data["cacheable_tools"] = sorted(self._policies)
+        return data
@@ -1,14 +1,16 @@
 # 代碼功能說明: MCP Client 實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-19
 
 """MCP Client 核心實現"""
 
 import asyncio
+import itertools
 import json
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Sequence, Tuple, Union
 import httpx
 
 from mcp_server.protocol.models import (
@@ -18,10 +20,33 @@ from mcp_server.protocol.models import (
     MCPToolCallRequest,
     MCPListToolsRequest,
     MCPTool,
+    TOOLS_VERSION_HEADER,
 )
+from mcp_client.cache import ToolResultCache
 
 logger = logging.getLogger(__name__)
 
+# 工具調用描述：(name, arguments) 元組或 {"name": ..., "arguments": ...} 字典
+ToolCall = Union[Tuple[str, Dict[str, Any]], Dict[str, Any]]
+
+
+class MCPClientError(Exception):
+    """MCP Server 返回的 JSON-RPC 錯誤"""
+
+    def __init__(self, code: int, message: str, data: Optional[Dict[str, Any]] = None):
+        super().__init__(f"MCP error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def normalize_tool_call(call: ToolCall) -> Tuple[str, Dict[str, Any]]:
+    """將工具調用描述統一為 (name, arguments)"""
+    if isinstance(call, dict):
+        return call["name"], call.get("arguments") or {}
+    name, arguments = call
+    return name, arguments or {}
+
 
 class MCPClient:
     """MCP Client 實現類"""
@@ -35,6 +60,10 @@ class MCPClient:
         max_retries: int = 3,
         retry_delay: float = 1.0,
         auto_reconnect: bool = True,
+        max_connections: int = 10,
+        tools_ttl: float = 60.0,
+        result_cache_size: int = 1024,
+        result_cache: Optional[ToolResultCache] = None,
     ):
         """
         初始化 MCP Client
@@ -47,6 +76,12 @@ class MCPClient:
             max_retries: 最大重試次數
             retry_delay: 重試延遲（秒）
             auto_reconnect: 是否自動重連
+            max_connections: 持久 HTTP 會話的最大連接數（保持長連接複用）
+            tools_ttl: 工具目錄緩存時間（秒），服務器報告目錄版本變更時立即失效
+            result_cache_size: 工具結果緩存容量，0 表示停用結果緩存
+            result_cache: 共享的工具結果緩存（連線池中的多個客戶端共用同一實例，
+                任一連線上的寫操作都會使其他連線的緩存結果失效）；提供時忽略
+                result_cache_size
         """
         self.endpoint = endpoint
         self.client_name = client_name
@@ -55,12 +90,28 @@ class MCPClient:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.auto_reconnect = auto_reconnect
-        self.client = httpx.AsyncClient(timeout=timeout)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
         self.initialized = False
         self.protocol_version: Optional[str] = None
         self.server_info: Optional[Dict[str, Any]] = None
         self.tools: List[MCPTool] = []
+        self.tools_version: Optional[str] = None
+        self.tools_ttl = tools_ttl
+        self._tools_fetched_at: Optional[float] = None
+        self._tools_stale = False
+        if result_cache is None and result_cache_size > 0:
+            result_cache = ToolResultCache(max_size=result_cache_size)
+        self.result_cache: Optional[ToolResultCache] = result_cache
         self.request_id_counter = 0
+        self._request_ids = itertools.count(1)
+        # 請求 ID -> 方法名，記錄已發出但尚未收到響應的請求
+        self._pending: Dict[Union[str, int], str] = {}
 
     async def initialize(self) -> Dict[str, Any]:
         """
@@ -77,7 +128,6 @@ class MCPClient:
             }
 
         request = MCPInitializeRequest(
-            id=1,
             params={
                 "protocolVersion": "2024-11-05",
                 "capabilities": {},
@@ -102,38 +152,37 @@ class MCPClient:
 
     def _generate_request_id(self) -> int:
         """
-        生成請求 ID
+        生成單調遞增的請求 ID
 
         Returns:
             int: 請求 ID
         """
-        self.request_id_counter += 1
+        self.request_id_counter = next(self._request_ids)
         return self.request_id_counter
 
-    async def _send_request(
-        self, request: MCPRequest, retry_count: int = 0
-    ) -> MCPResponse:
+    @property
+    def pending_requests(self) -> Dict[Union[str, int], str]:
+        """已發出但尚未收到響應的請求（ID -> 方法名）"""
+        return dict(self._pending)
+
+    async def _post(self, payload: Any, retry_count: int = 0) -> Any:
         """
-        發送 MCP 請求（帶重試機制）
+        發送 JSON-RPC 消息（帶重試機制）
 
         Args:
-            request: MCP 請求對象
+            payload: 單個請求或批量請求列表
             retry_count: 當前重試次數
 
         Returns:
-            MCP 響應對象
+            解析後的響應 JSON（批量請求全部為通知時返回 None）
         """
         try:
-            # 確保請求有 ID
-            if request.id is None:
-                request.id = self._generate_request_id()
-
-            response = await self.client.post(
-                self.endpoint, json=request.model_dump(exclude_none=True)
-            )
+            response = await self.client.post(self.endpoint, json=payload)
+            self._observe_tools_version(response.headers.get(TOOLS_VERSION_HEADER))
             response.raise_for_status()
-            response_data = response.json()
-            return MCPResponse(**response_data)
+            if response.status_code == 204 or not response.content:
+                return None
+            return response.json()
         except (httpx.TimeoutException, httpx.ConnectError) as e:
             # 網絡錯誤，嘗試重連
             if self.auto_reconnect and retry_count < self.max_retries:
@@ -144,7 +193,7 @@ class MCPClient:
                 # 重新初始化連接
                 if not self.initialized:
                     await self.initialize()
-                return await self._send_request(request, retry_count + 1)
+                return await self._post(payload, retry_count + 1)
             logger.error(
                 f"Failed to send MCP request after {retry_count + 1} retries: {e}"
             )
@@ -157,27 +206,171 @@ class MCPClient:
             logger.error(f"Failed to send MCP request: {e}")
             raise
 
+    def _observe_tools_version(self, version: Optional[str]) -> None:
+        """服務器報告的工具目錄版本與本地不同時，使工具目錄與結果緩存失效"""
+        if version and self.tools_version and version != self.tools_version:
+            if not self._tools_stale:
+                logger.info(
+                    f"MCP tool catalog changed on {self.endpoint}: "
+                    f"{self.tools_version} -> {version}"
+                )
+            self._tools_stale = True
+            if self.result_cache is not None:
+                self.result_cache.invalidate()
+
+    async def _send_request(
+        self, request: MCPRequest, retry_count: int = 0
+    ) -> MCPResponse:
+        """
+        發送 MCP 請求（帶重試機制）
+
+        Args:
+            request: MCP 請求對象
+            retry_count: 當前重試次數
+
+        Returns:
+            MCP 響應對象
+        """
+        # 確保請求有 ID
+        request_id = self._ensure_request_id(request)
+
+        self._pending[request_id] = request.method
+        try:
+            response_data = await self._post(
+                request.model_dump(exclude_none=True), retry_count
+            )
+        finally:
+            self._pending.pop(request_id, None)
+        return MCPResponse(**response_data)
+
+    def _ensure_request_id(self, request: MCPRequest) -> Union[str, int]:
+        """為沒有 ID 的請求分配 ID 並返回"""
+        if request.id is None:
+            request.id = self._generate_request_id()
+        return request.id
+
+    @staticmethod
+    def _rejection_payload(response: httpx.Response) -> Optional[Dict[str, Any]]:
+        """解析服務器拒絕整個請求時返回的 JSON-RPC 錯誤體"""
+        try:
+            payload = response.json()
+        except ValueError:
+            return None
+        if isinstance(payload, dict) and isinstance(payload.get("error"), dict):
+            return payload
+        return None
+
+    async def _send_batch(
+        self, requests: Sequence[MCPRequest]
+    ) -> List[Union[MCPResponse, MCPClientError]]:
+        """
+        以單個 JSON-RPC 批量請求發送多條消息
+
+        服務器可按任意順序返回響應，此處按請求 ID 對應回原請求順序。
+        整個批量請求因超過服務器批量上限被拒絕（-32600）時，對半拆分後重新發送。
+
+        Args:
+            requests: MCP 請求列表
+
+        Returns:
+            與請求順序一致的響應；出錯的條目為 MCPClientError
+
+        Raises:
+            MCPClientError: 整個批量請求被服務器拒絕且無法再拆分
+        """
+        if not requests:
+            return []
+
+        request_ids = [self._ensure_request_id(request) for request in requests]
+        for request_id, request in zip(request_ids, requests):
+            self._pending[request_id] = request.method
+
+        try:
+            response_data = await self._post(
+                [request.model_dump(exclude_none=True) for request in requests]
+            )
+        except httpx.HTTPStatusError as e:
+            response_data = self._rejection_payload(e.response)
+            if response_data is None:
+                raise
+        finally:
+            for request_id in request_ids:
+                self._pending.pop(request_id, None)
+
+        if not isinstance(response_data, list):
+            # 整個批量請求被拒絕（例如超過服務器批量上限）
+            error = (response_data or {}).get("error") or {}
+            code = error.get("code", -32603)
+            if code == -32600 and len(requests) > 1:
+                middle = len(requests) // 2
+                logger.info(
+                    f"Batch of {len(requests)} rejected by {self.endpoint}, "
+                    f"splitting: {error.get('message')}"
+                )
+                return await self._send_batch(
+                    requests[:middle]
+                ) + await self._send_batch(requests[middle:])
+            raise MCPClientError(
+                code,
+                error.get("message", "Invalid batch response"),
+                error.get("data"),
+            )
+
+        by_id: Dict[Union[str, int], Dict[str, Any]] = {
+            item["id"]: item
+            for item in response_data
+            if isinstance(item, dict) and item.get("id") is not None
+        }
+        results: List[Union[MCPResponse, MCPClientError]] = []
+        for request_id in request_ids:
+            item = by_id.get(request_id)
+            if item is None:
+                results.append(
+                    MCPClientError(-32603, f"Missing response for request {request_id}")
+                )
+            elif "error" in item:
+                error = item["error"] or {}
+                results.append(
+                    MCPClientError(
+                        error.get("code", -32603),
+                        error.get("message", "Unknown error"),
+                        error.get("data"),
+                    )
+                )
+            else:
+                results.append(MCPResponse(**item))
+        return results
+
     async def refresh_tools(self) -> List[MCPTool]:
         """
         刷新工具列表
 
+        已有工具目錄時攜帶版本號（ifNoneMatch），目錄未變更則服務器不重傳列表。
+
         Returns:
             工具列表
         """
-        request = MCPListToolsRequest(id=2)
+        params = {"ifNoneMatch": self.tools_version} if self.tools_version else None
+        request = MCPListToolsRequest(params=params)
         response = await self._send_request(request)
-        if response.result:
-            tools_data = response.result.get("tools", [])
-            self.tools = [MCPTool(**tool) for tool in tools_data]
+        result = response.result or {}
+        if result.get("notModified"):
+            logger.debug("Tools list not modified")
         else:
-            self.tools = []
-        logger.info(f"Refreshed tools list, found {len(self.tools)} tools")
+            self.tools = [MCPTool(**tool) for tool in result.get("tools", [])]
+            self.tools_version = result.get("version")
+            if self.result_cache is not None:
+                self.result_cache.update_catalog(self.tools, self.tools_version)
+            logger.info(f"Refreshed tools list, found {len(self.tools)} tools")
+        self._tools_fetched_at = time.monotonic()
+        self._tools_stale = False
         return self.tools
 
     async def call_tool(
         self,
         name: str,
         arguments: Dict[str, Any],
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         調用工具
@@ -185,6 +378,7 @@ class MCPClient:
         Args:
             name: 工具名稱
             arguments: 工具參數
+            use_cache: 是否使用結果緩存（僅對聲明了 cacheTtl 的工具生效）
 
         Returns:
             工具執行結果
@@ -192,11 +386,78 @@ class MCPClient:
         if not self.initialized:
             await self.initialize()
 
-        request = MCPToolCallRequest(
-            id=3, params={"name": name, "arguments": arguments}
-        )
+        cache = self.result_cache if use_cache else None
+        if cache is not None:
+            hit, cached = cache.get(name, arguments)
+            if hit:
+                return cached
+
+        request = MCPToolCallRequest(params={"name": name, "arguments": arguments})
 
         response = await self._send_request(request)
+        result = self._parse_tool_result(response)
+        if self.result_cache is not None:
+            self.result_cache.record(name, arguments, result)
+        return result
+
+    async def call_tools_batch(
+        self,
+        calls: Sequence[ToolCall],
+        return_exceptions: bool = False,
+        use_cache: bool = True,
+    ) -> List[Any]:
+        """
+        以單次往返批量調用多個工具
+
+        Args:
+            calls: 工具調用列表，元素為 (name, arguments) 或 {"name", "arguments"}
+            return_exceptions: 為 True 時出錯的調用以 MCPClientError 形式返回，
+                否則拋出第一個錯誤
+            use_cache: 是否使用結果緩存（僅對聲明了 cacheTtl 的工具生效）
+
+        Returns:
+            與 calls 順序一致的工具執行結果
+        """
+        if not self.initialized:
+            await self.initialize()
+
+        normalized = [normalize_tool_call(call) for call in calls]
+        results: List[Any] = [None] * len(normalized)
+        pending: List[int] = []
+        cache = self.result_cache if use_cache else None
+        for index, (name, arguments) in enumerate(normalized):
+            if cache is not None:
+                hit, cached = cache.get(name, arguments)
+                if hit:
+                    results[index] = cached
+                    continue
+            pending.append(index)
+
+        requests = [
+            MCPToolCallRequest(
+                params={"name": normalized[i][0], "arguments": normalized[i][1]}
+            )
+            for i in pending
+        ]
+        responses = await self._send_batch(requests)
+        for index, response in zip(pending, responses):
+            if isinstance(response, MCPClientError):
+                results[index] = response
+                continue
+            name, arguments = normalized[index]
+            results[index] = self._parse_tool_result(response)
+            if self.result_cache is not None:
+                self.result_cache.record(name, arguments, results[index])
+
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, MCPClientError):
+                    raise result
+        return results
+
+    @staticmethod
+    def _parse_tool_result(response: MCPResponse) -> Dict[str, Any]:
+        """解析工具調用響應"""
         if not response.result:
             return {}
         result = response.result.get("content", [])
@@ -216,11 +477,19 @@ class MCPClient:
         """
         列出可用工具
 
+        工具目錄在 tools_ttl 內且服務器未報告版本變更時直接返回本地目錄。
+
         Returns:
             工具列表
         """
         if not self.initialized:
             await self.initialize()
+        elif (
+            self._tools_stale
+            or self._tools_fetched_at is None
+            or time.monotonic() - self._tools_fetched_at >= self.tools_ttl
+        ):
+            await self.refresh_tools()
         return self.tools
 
     async def close(self) -> None:
@@ -1,13 +1,14 @@
 # 代碼功能說明: MCP Client 連線管理器
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-19
 
 """MCP Client 連線管理器模組"""
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Sequence
 
+from mcp_client.client import ToolCall
 from mcp_client.connection.pool import (
     ConnectionPool,
     LoadBalanceStrategy,
@@ -26,6 +27,7 @@ class MCPConnectionManager:
         health_check_interval: int = 30,
         max_retries: int = 3,
         retry_delay: float = 1.0,
+        result_cache_size: int = 1024,
     ):
         """
         初始化連線管理器
@@ -36,6 +38,7 @@ class MCPConnectionManager:
             health_check_interval: 健康檢查間隔（秒）
             max_retries: 最大重試次數
             retry_delay: 重試延遲（秒）
+            result_cache_size: 連線共享的工具結果緩存容量，0 表示停用結果緩存
         """
         self.pool = ConnectionPool(
             endpoints=endpoints,
@@ -43,6 +46,7 @@ class MCPConnectionManager:
             health_check_interval=health_check_interval,
             max_retries=max_retries,
             retry_delay=retry_delay,
+            result_cache_size=result_cache_size,
         )
         self.request_id_counter = 0
 
@@ -81,6 +85,35 @@ class MCPConnectionManager:
             arguments,
         )
 
+    async def call_tools_parallel(
+        self,
+        calls: Sequence[ToolCall],
+        max_concurrency: int = 4,
+        batch_size: int = 10,
+        return_exceptions: bool = False,
+        use_cache: bool = True,
+    ) -> List[Any]:
+        """
+        並行調用多個工具（批量請求分散到連線池中的各連線）
+
+        Args:
+            calls: 工具調用列表，元素為 (name, arguments) 或 {"name", "arguments"}
+            max_concurrency: 最大並行批次數
+            batch_size: 每個批量請求包含的調用數
+            return_exceptions: 是否以 MCPClientError 返回出錯的調用
+            use_cache: 是否使用工具結果緩存
+
+        Returns:
+            List[Any]: 與 calls 順序一致的工具執行結果
+        """
+        return await self.pool.call_tools_parallel(
+            calls,
+            max_concurrency=max_concurrency,
+            batch_size=batch_size,
+            return_exceptions=return_exceptions,
+            use_cache=use_cache,
+        )
+
     async def list_tools(self) -> List:
         """
         列出可用工具
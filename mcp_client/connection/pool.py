@@ -1,17 +1,18 @@
 # 代碼功能說明: MCP Client 連線池實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-19
 
 """MCP Client 連線池實現模組"""
 
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Sequence
 from enum import Enum
 import time
 
-from mcp_client.client import MCPClient
+from mcp_client.cache import ToolResultCache
+from mcp_client.client import MCPClient, MCPClientError, ToolCall
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +58,7 @@ class ConnectionInfo:
         self.failure_count = 0
         self.success_count = 0
         self.last_error: Optional[str] = None
+        self.active_requests = 0
         self.lock = asyncio.Lock()
 
     async def health_check(self) -> bool:
@@ -97,16 +99,21 @@ class ConnectionPool:
         health_check_interval: int = 30,
         max_retries: int = 3,
         retry_delay: float = 1.0,
+        result_cache_size: int = 1024,
     ):
         """
         初始化連線池
 
+        各連線指向同一服務的不同副本，共用一個工具結果緩存：任一連線上的寫操作
+        都會使所有連線上該工具的緩存結果失效。
+
         Args:
             endpoints: 端點 URL 列表
             load_balance_strategy: 負載均衡策略
             health_check_interval: 健康檢查間隔（秒）
             max_retries: 最大重試次數
             retry_delay: 重試延遲（秒）
+            result_cache_size: 共享工具結果緩存容量，0 表示停用結果緩存
         """
         self.endpoints = endpoints
         self.load_balance_strategy = load_balance_strategy
@@ -118,10 +125,19 @@ class ConnectionPool:
         self.current_index = 0  # 用於輪詢
         self.health_check_task: Optional[asyncio.Task] = None
         self._initialized = False
+        self.result_cache: Optional[ToolResultCache] = (
+            ToolResultCache(max_size=result_cache_size)
+            if result_cache_size > 0
+            else None
+        )
 
         # 初始化連線
         for endpoint in endpoints:
-            client = MCPClient(endpoint)
+            client = MCPClient(
+                endpoint,
+                result_cache_size=result_cache_size,
+                result_cache=self.result_cache,
+            )
             conn_info = ConnectionInfo(endpoint, client)
             self.connections[endpoint] = conn_info
 
@@ -200,8 +216,10 @@ class ConnectionPool:
         ]
         if not healthy_connections:
             return None
-        # 簡單實現：選擇失敗次數最少的
-        return min(healthy_connections, key=lambda c: c.failure_count)
+        # 進行中請求最少者優先，相同時選擇失敗次數最少的
+        return min(
+            healthy_connections, key=lambda c: (c.active_requests, c.failure_count)
+        )
 
     def get_connection(self) -> Optional[ConnectionInfo]:
         """
@@ -223,6 +241,9 @@ class ConnectionPool:
         """
         帶重試的調用
 
+        連線或傳輸錯誤會換連線重試；服務器返回的 JSON-RPC 錯誤（MCPClientError，
+        例如批量請求被拒絕）是確定性的，直接拋出且不標記連線不健康。
+
         Args:
             method: 要調用的方法
             *args: 位置參數
@@ -237,8 +258,11 @@ class ConnectionPool:
             if conn is None:
                 raise Exception("No healthy connections available")
 
+            conn.active_requests += 1
             try:
                 return await method(conn.client, *args, **kwargs)
+            except MCPClientError:
+                raise
             except Exception as e:
                 last_error = e
                 conn.status = ConnectionStatus.UNHEALTHY
@@ -249,9 +273,63 @@ class ConnectionPool:
                 )
                 if attempt < self.max_retries - 1:
                     await asyncio.sleep(self.retry_delay * (attempt + 1))
+            finally:
+                conn.active_requests -= 1
 
         raise Exception(f"All retry attempts failed. Last error: {last_error}")
 
+    async def call_tools_parallel(
+        self,
+        calls: Sequence[ToolCall],
+        max_concurrency: int = 4,
+        batch_size: int = 10,
+        return_exceptions: bool = False,
+        use_cache: bool = True,
+    ) -> List[Any]:
+        """
+        並行調用多個工具
+
+        將調用按 batch_size 分組，每組以一個 JSON-RPC 批量請求發送，
+        各組按負載均衡策略分散到不同連線，同時進行的批次不超過 max_concurrency。
+
+        Args:
+            calls: 工具調用列表，元素為 (name, arguments) 或 {"name", "arguments"}
+            max_concurrency: 最大並行批次數
+            batch_size: 每個批量請求包含的調用數
+            return_exceptions: 為 True 時出錯的調用以 MCPClientError 形式返回，
+                否則拋出第一個錯誤
+            use_cache: 是否使用工具結果緩存
+
+        Returns:
+            與 calls 順序一致的工具執行結果
+        """
+        if not calls:
+            return []
+
+        batch_size = max(batch_size, 1)
+        semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        chunks = [
+            list(calls[start : start + batch_size])
+            for start in range(0, len(calls), batch_size)
+        ]
+
+        async def _run_chunk(chunk: List[ToolCall]) -> List[Any]:
+            async with semaphore:
+                return await self.call_with_retry(
+                    lambda client, items: client.call_tools_batch(
+                        items, return_exceptions=True, use_cache=use_cache
+                    ),
+                    chunk,
+                )
+
+        chunk_results = await asyncio.gather(*(_run_chunk(chunk) for chunk in chunks))
+        results = [result for chunk in chunk_results for result in chunk]
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, MCPClientError):
+                    raise result
+        return results
+
     def get_stats(self) -> Dict:
         """
         獲取連線池統計信息
@@ -268,6 +346,9 @@ class ConnectionPool:
             "total_connections": len(self.connections),
             "healthy_connections": healthy_count,
             "unhealthy_connections": len(self.connections) - healthy_count,
+            "result_cache": (
+                self.result_cache.stats() if self.result_cache is not None else None
+            ),
             "connections": {
                 endpoint: {
                     "status": conn.status.value,
@@ -275,6 +356,7 @@ class ConnectionPool:
                     "success_count": conn.success_count,
                     "last_health_check": conn.last_health_check,
                     "last_error": conn.last_error,
+                    "tools_version": conn.client.tools_version,
                 }
                 for endpoint, conn in self.connections.items()
             },
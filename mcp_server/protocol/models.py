@@ -1,13 +1,16 @@
 # 代碼功能說明: MCP Protocol 數據模型
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """MCP Protocol 消息和請求/響應模型"""
 
 from typing import Any, Dict, Optional, Union
 from pydantic import BaseModel, Field
 
+# HTTP 響應頭：工具目錄版本（ETag），客戶端據此發現工具目錄變更
+TOOLS_VERSION_HEADER = "X-MCP-Tools-Version"
+
 
 class MCPMessage(BaseModel):
     """MCP 消息基類"""
@@ -68,6 +71,13 @@ class MCPTool(BaseModel):
     name: str = Field(..., description="工具名稱")
     description: str = Field(..., description="工具描述")
     inputSchema: Dict[str, Any] = Field(..., description="輸入 Schema")
+    annotations: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description=(
+            "工具註解，例如 readOnlyHint/idempotentHint；"
+            "cacheTtl（秒）聲明結果可緩存，cacheableWhen 限定可緩存的參數取值"
+        ),
+    )
 
 
 class MCPToolCallRequest(MCPRequest):
@@ -1,16 +1,19 @@
 # 代碼功能說明: MCP Server 實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """MCP Server 核心實現"""
 
+import asyncio
 import json
 import logging
 import time
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+
+from core.cache import make_cache_key
 
 from mcp_server.protocol.models import (
     MCPRequest,
@@ -21,6 +24,7 @@ from mcp_server.protocol.models import (
     MCPToolCallResponse,
     MCPListToolsResponse,
     MCPTool,
+    TOOLS_VERSION_HEADER,
 )
 
 logger = logging.getLogger(__name__)
@@ -36,6 +40,7 @@ class MCPServer:
         protocol_version: str = "2024-11-05",
         enable_monitoring: bool = True,
         metrics_callback: Optional[Callable] = None,
+        max_batch_size: int = 100,
     ):
         """
         初始化 MCP Server
@@ -46,6 +51,7 @@ class MCPServer:
             protocol_version: MCP Protocol 版本
             enable_monitoring: 是否啟用監控
             metrics_callback: 指標回調函數
+            max_batch_size: 單個 JSON-RPC 批量請求允許的最大消息數
         """
         self.name = name
         self.version = version
@@ -54,6 +60,8 @@ class MCPServer:
         self.tool_handlers: Dict[str, Callable] = {}
         self.enable_monitoring = enable_monitoring
         self.metrics_callback = metrics_callback
+        self.max_batch_size = max_batch_size
+        self._tools_version = make_cache_key([])
         self.app = FastAPI(title=f"{name} MCP Server")
         self._setup_routes()
         self._setup_health_routes()
@@ -63,45 +71,29 @@ class MCPServer:
 
         @self.app.post("/mcp")
         async def handle_mcp_request(request: Request):
-            """處理 MCP 請求"""
+            """處理 MCP 請求（單個請求或 JSON-RPC 批量請求）"""
             start_time = time.time()
-            body = None
-            is_error = False
-
             try:
                 body = await request.json()
-                mcp_request = MCPRequest(**body)
-                response = await self._handle_request(mcp_request)
-
-                # 記錄指標
-                if self.enable_monitoring and self.metrics_callback:
-                    latency = time.time() - start_time
-                    method = mcp_request.method
-                    self.metrics_callback(method, latency, is_error)
-
-                return JSONResponse(content=response.model_dump(exclude_none=True))
             except Exception as e:
-                is_error = True
-                logger.error(f"Error handling MCP request: {e}")
-
-                # 記錄錯誤指標
+                logger.error(f"Invalid MCP request body: {e}")
                 if self.enable_monitoring and self.metrics_callback:
-                    latency = time.time() - start_time
-                    method = body.get("method", "unknown") if body else "unknown"
-                    self.metrics_callback(method, latency, is_error)
-
-                error_response = MCPErrorResponse(
-                    id=body.get("id") if body else None,
-                    error=MCPError(
-                        code=-32603,
-                        message="Internal error",
-                        data={"error": str(e)},
-                    ),
-                )
-                return JSONResponse(
-                    content=error_response.model_dump(exclude_none=True),
+                    self.metrics_callback("unknown", time.time() - start_time, True)
+                response: Response = JSONResponse(
+                    content=self._error_payload(None, -32700, "Parse error", e),
                     status_code=500,
                 )
+            else:
+                if isinstance(body, list):
+                    response = await self._handle_batch(body)
+                else:
+                    payload, is_error = await self._process_message(body)
+                    response = JSONResponse(
+                        content=payload, status_code=500 if is_error else 200
+                    )
+
+            response.headers[TOOLS_VERSION_HEADER] = self._tools_version
+            return response
 
     def _setup_health_routes(self):
         """設置健康檢查路由"""
@@ -126,6 +118,86 @@ class MCPServer:
                 "tools_count": len(self.tools),
             }
 
+    @staticmethod
+    def _error_payload(
+        request_id: Any, code: int, message: str, error: Optional[Exception] = None
+    ) -> Dict[str, Any]:
+        """構建 JSON-RPC 錯誤響應"""
+        error_response = MCPErrorResponse(
+            id=request_id,
+            error=MCPError(
+                code=code,
+                message=message,
+                data={"error": str(error)} if error is not None else None,
+            ),
+        )
+        return error_response.model_dump(exclude_none=True)
+
+    async def _process_message(self, body: Any) -> Tuple[Dict[str, Any], bool]:
+        """
+        處理單條 JSON-RPC 消息並記錄指標
+
+        Args:
+            body: 已解析的消息
+
+        Returns:
+            (響應內容, 是否出錯)
+        """
+        start_time = time.time()
+        is_error = False
+        method = body.get("method", "unknown") if isinstance(body, dict) else "unknown"
+        request_id = body.get("id") if isinstance(body, dict) else None
+
+        try:
+            mcp_request = MCPRequest(**body)
+            response = await self._handle_request(mcp_request)
+            payload = response.model_dump(exclude_none=True)
+        except Exception as e:
+            is_error = True
+            logger.error(f"Error handling MCP request: {e}")
+            payload = self._error_payload(request_id, -32603, "Internal error", e)
+
+        # 記錄指標
+        if self.enable_monitoring and self.metrics_callback:
+            latency = time.time() - start_time
+            self.metrics_callback(method, latency, is_error)
+
+        return payload, is_error
+
+    async def _handle_batch(self, messages: List[Any]) -> Response:
+        """
+        處理 JSON-RPC 批量請求
+
+        批內消息併發處理，響應按請求順序返回；沒有 id 的通知不產生響應。
+        單條消息出錯只影響自身的響應，HTTP 狀態碼保持 200。
+        """
+        if not messages:
+            return JSONResponse(
+                content=self._error_payload(None, -32600, "Invalid Request"),
+                status_code=400,
+            )
+        if len(messages) > self.max_batch_size:
+            return JSONResponse(
+                content=self._error_payload(
+                    None,
+                    -32600,
+                    f"Batch too large (max {self.max_batch_size} messages)",
+                ),
+                status_code=400,
+            )
+
+        results = await asyncio.gather(
+            *(self._process_message(message) for message in messages)
+        )
+        payloads: List[Dict[str, Any]] = [
+            payload
+            for message, (payload, _) in zip(messages, results)
+            if not (isinstance(message, dict) and "id" not in message)
+        ]
+        if not payloads:
+            return Response(status_code=204)
+        return JSONResponse(content=payloads)
+
     async def _handle_request(self, request: MCPRequest) -> MCPResponse:
         """
         處理 MCP 請求
@@ -153,15 +225,30 @@ class MCPServer:
             id=request.id,
             result={
                 "protocolVersion": self.protocol_version,
-                "capabilities": {},
+                "capabilities": {"tools": {"listChanged": True}},
                 "serverInfo": {"name": self.name, "version": self.version},
+                "toolsVersion": self._tools_version,
             },
         )
 
     async def _handle_list_tools(self, request: MCPRequest) -> MCPListToolsResponse:
-        """處理列出工具請求"""
-        tools_list = [tool.model_dump() for tool in self.tools.values()]
-        return MCPListToolsResponse(id=request.id, result={"tools": tools_list})
+        """
+        處理列出工具請求
+
+        請求參數 ifNoneMatch 與當前目錄版本相同時只返回 notModified，不重傳工具列表。
+        """
+        params = request.params or {}
+        if params.get("ifNoneMatch") == self._tools_version:
+            return MCPListToolsResponse(
+                id=request.id,
+                result={"notModified": True, "version": self._tools_version},
+            )
+        tools_list = [
+            tool.model_dump(exclude_none=True) for tool in self.tools.values()
+        ]
+        return MCPListToolsResponse(
+            id=request.id, result={"tools": tools_list, "version": self._tools_version}
+        )
 
     async def _handle_tool_call(self, request: MCPRequest) -> MCPToolCallResponse:
         """處理工具調用請求"""
@@ -197,6 +284,7 @@ class MCPServer:
         description: str,
         input_schema: Dict[str, Any],
         handler: Callable,
+        annotations: Optional[Dict[str, Any]] = None,
     ) -> None:
         """
         註冊工具
@@ -206,12 +294,26 @@ class MCPServer:
             description: 工具描述
             input_schema: 輸入 Schema
             handler: 工具處理函數
+            annotations: 工具註解（可選，cacheTtl 聲明結果可被客戶端緩存）
         """
-        tool = MCPTool(name=name, description=description, inputSchema=input_schema)
+        tool = MCPTool(
+            name=name,
+            description=description,
+            inputSchema=input_schema,
+            annotations=annotations,
+        )
         self.tools[name] = tool
         self.tool_handlers[name] = handler
+        self._tools_version = make_cache_key(
+            [t.model_dump(exclude_none=True) for t in self.tools.values()]
+        )
         logger.info(f"Registered tool: {name}")
 
+    @property
+    def tools_version(self) -> str:
+        """工具目錄版本（按目錄內容計算的 ETag）"""
+        return self._tools_version
+
     def get_fastapi_app(self) -> FastAPI:
         """
         獲取 FastAPI 應用實例
@@ -0,0 +1,917 @@
+# 代碼功能說明: ChromaDB / RAG 基準測試套件（延遲、吞吐量、召回率與基線比對）
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+#!/usr/bin/env python3
+
+"""
+ChromaDB / RAG 基準測試套件
+
+在本地持久化 ChromaDB 上運行（嵌入模型以確定性的哈希嵌入替代，無需 Ollama），
+覆蓋以下基準：
+
+- batch_add：內置並發寫入在不同批次大小（含自適應）× 連線池大小下的吞吐量
+- query：經異步路徑（asyncio.to_thread）的併發查詢 p50/p95/p99 延遲
+- retrieval：RetrievalManager / HybridRAGService 在合成標註語料上的 recall@k 與 MRR
+- chunking / parsing：分塊策略與解析器吞吐量
+
+每次運行輸出 JSON 報告；提供 --baseline 時與基線比對，指標退化超過容差時以
+退出碼 1 結束，可用於 CI 回歸檢測。
+
+用法:
+    python scripts/performance/rag_benchmark.py --profile default \\
+        --output rag_benchmark_report.json \\
+        --baseline scripts/performance/baselines/rag_benchmark.json
+
+    # 以本次結果更新基線
+    python scripts/performance/rag_benchmark.py --save-baseline \\
+        scripts/performance/baselines/rag_benchmark.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, cast
+
+import numpy as np
+
+# 添加項目根目錄到路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import chromadb  # noqa: E402
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings  # noqa: E402
+
+from databases.chromadb import ChromaCollection, ChromaDBClient  # noqa: E402
+
+REPORT_VERSION = 1
+COSINE_SPACE = {"hnsw:space": "cosine"}
+# 短耗時基準重複運行至少此時長，取中位數
+MIN_REPEAT_SECONDS = 0.5
+# 延遲變化小於此值（毫秒）時視為噪聲
+LATENCY_NOISE_FLOOR_MS = 1.0
+
+
+# ---------- 配置 ----------
+
+
+@dataclass
+class BenchmarkProfile:
+    """基準測試規模配置"""
+
+    num_docs: int = 2000
+    num_queries: int = 200
+    num_topics: int = 20
+    embedding_dim: int = 384
+    batch_sizes: List[int] = field(default_factory=lambda: [50, 200, 500])
+    pool_sizes: List[int] = field(default_factory=lambda: [1, 4])
+    query_concurrency: List[int] = field(default_factory=lambda: [1, 8, 32])
+    n_results: int = 10
+    recall_ks: List[int] = field(default_factory=lambda: [1, 5, 10])
+    chunk_text_chars: int = 1_000_000
+    chunk_size: int = 512
+    chunk_overlap: float = 0.2
+    parse_file_chars: int = 500_000
+    seed: int = 42
+
+
+PROFILES: Dict[str, BenchmarkProfile] = {
+    "smoke": BenchmarkProfile(
+        num_docs=200,
+        num_queries=40,
+        num_topics=8,
+        batch_sizes=[50],
+        pool_sizes=[1, 2],
+        query_concurrency=[1, 4],
+        chunk_text_chars=50_000,
+        parse_file_chars=20_000,
+    ),
+    "default": BenchmarkProfile(),
+    "large": BenchmarkProfile(
+        num_docs=20000,
+        num_queries=1000,
+        num_topics=50,
+        batch_sizes=[100, 500, 1000],
+        pool_sizes=[1, 4, 8],
+        query_concurrency=[1, 16, 64],
+        chunk_text_chars=10_000_000,
+        parse_file_chars=5_000_000,
+    ),
+}
+
+
+# ---------- 嵌入模型替身與合成語料 ----------
+
+
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    確定性的哈希嵌入（特徵哈希詞袋 + L2 歸一化）
+
+    替代真實嵌入模型：相同文本總是得到相同向量，共享詞彙越多的文本餘弦相似度越高，
+    因此召回率可在不同機器、不同運行之間直接比較。
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return list(self.embed(list(input)))
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """批量嵌入，返回 (n, dim) float32 矩陣"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                h = zlib.crc32(token.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @staticmethod
+    def name() -> str:
+        return "ai_box_hashing"
+
+    def default_space(self) -> str:  # type: ignore[override]
+        return "cosine"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "HashingEmbeddingFunction":
+        return HashingEmbeddingFunction(dim=int(config.get("dim", 384)))
+
+
+@dataclass
+class SyntheticCorpus:
+    """合成標註語料：每條查詢對應唯一的目標文檔"""
+
+    ids: List[str]
+    texts: List[str]
+    topics: List[int]
+    queries: List[str]
+    targets: List[str]
+
+
+_SYLLABLES = [
+    "ka",
+    "lo",
+    "mi",
+    "ren",
+    "tu",
+    "shi",
+    "van",
+    "qe",
+    "dor",
+    "pli",
+    "zu",
+    "hab",
+]
+
+
+def _make_vocabulary(rng: random.Random, size: int) -> List[str]:
+    words: Set[str] = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def build_corpus(profile: BenchmarkProfile) -> SyntheticCorpus:
+    """
+    生成合成語料
+
+    文檔由所屬主題的詞彙（同主題文檔互相干擾）、文檔專屬詞和公共填充詞組成；
+    查詢從目標文檔的主題詞與專屬詞中抽取，並混入填充詞。
+    """
+    rng = random.Random(profile.seed)
+    vocabulary = _make_vocabulary(rng, profile.num_topics * 40 + 400)
+    filler = vocabulary[:200]
+    topic_words = [
+        vocabulary[200 + t * 40 : 200 + (t + 1) * 40] for t in range(profile.num_topics)
+    ]
+    unique_pool = vocabulary[200 + profile.num_topics * 40 :]
+
+    ids, texts, topics, signatures = [], [], [], []
+    for i in range(profile.num_docs):
+        topic = i % profile.num_topics
+        signature = rng.sample(topic_words[topic], 8) + [
+            f"{rng.choice(unique_pool)}{i}" for _ in range(2)
+        ]
+        words = signature + rng.sample(filler, 20)
+        rng.shuffle(words)
+        ids.append(f"doc_{i:06d}")
+        texts.append(" ".join(words))
+        topics.append(topic)
+        signatures.append(signature)
+
+    queries, targets = [], []
+    for _ in range(profile.num_queries):
+        doc = rng.randrange(profile.num_docs)
+        words = rng.sample(signatures[doc], 5) + rng.sample(filler, 2)
+        rng.shuffle(words)
+        queries.append(" ".join(words))
+        targets.append(ids[doc])
+
+    return SyntheticCorpus(ids, texts, topics, queries, targets)
+
+
+# ---------- 統計 ----------
+
+
+def latency_stats(latencies_ms: Sequence[float], elapsed: float) -> Dict[str, float]:
+    """延遲分位數與 QPS"""
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0, 0, 0)
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 3) if len(values) else 0.0,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "qps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def timed_median(
+    fn: Callable[[], Any], min_seconds: float = MIN_REPEAT_SECONDS
+) -> Tuple[float, Any]:
+    """重複運行直到累計耗時達到 min_seconds，返回 (單次耗時中位數, 最後一次結果)"""
+    durations: List[float] = []
+    result: Any = None
+    while sum(durations) < min_seconds or len(durations) < 3:
+        began = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - began)
+    return statistics.median(durations), result
+
+
+def recall_stats(
+    ranked: Sequence[Sequence[str]], targets: Sequence[str], ks: Sequence[int]
+) -> Dict[str, float]:
+    """recall@k 與 MRR（每條查詢只有一個相關文檔）"""
+    result: Dict[str, float] = {}
+    for k in ks:
+        hits = sum(1 for ids, target in zip(ranked, targets) if target in ids[:k])
+        result[f"recall@{k}"] = round(hits / len(targets), 4) if targets else 0.0
+    reciprocal = [
+        1.0 / (list(ids).index(target) + 1) if target in ids else 0.0
+        for ids, target in zip(ranked, targets)
+    ]
+    result["mrr"] = round(statistics.fmean(reciprocal), 4) if reciprocal else 0.0
+    return result
+
+
+# ---------- 基準測試 ----------
+
+
+class BenchmarkContext:
+    """基準測試運行上下文：持久化目錄、語料與預計算的向量"""
+
+    def __init__(self, profile: BenchmarkProfile, persist_dir: str):
+        self.profile = profile
+        self.persist_dir = persist_dir
+        self.embedding_fn = HashingEmbeddingFunction(profile.embedding_dim)
+        self.corpus = build_corpus(profile)
+        self.doc_embeddings = self.embedding_fn.embed(self.corpus.texts)
+        self.query_embeddings = self.embedding_fn.embed(self.corpus.queries)
+        self.client = ChromaDBClient(mode="persistent", persist_directory=persist_dir)
+
+    def items(self) -> List[Dict[str, Any]]:
+        """batch_add 輸入（元數據採用 AAM 長期記憶格式，供 HybridRAGService 讀取）"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+        return [
+            {
+                "id": doc_id,
+                "embedding": embedding,
+                "metadata": {
+                    "memory_type": "long_term",
+                    "priority": "medium",
+                    "created_at": now,
+                    "updated_at": now,
+                    "access_count": 0,
+                    "topic": topic,
+                },
+                "document": text,
+            }
+            for doc_id, text, topic, embedding in zip(
+                self.corpus.ids,
+                self.corpus.texts,
+                self.corpus.topics,
+                self.doc_embeddings,
+            )
+        ]
+
+    def collection(self, name: str, client: Optional[ChromaDBClient] = None) -> Any:
+        return (client or self.client).get_or_create_collection(
+            name, metadata=COSINE_SPACE, embedding_function=self.embedding_fn
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def bench_batch_add(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """batch_add 寫入吞吐量：固定批次大小 × 連線池大小，以及每個池大小下的自適應批次"""
+    items = ctx.items()
+    results: Dict[str, Any] = {}
+    for pool_size in ctx.profile.pool_sizes:
+        client = ChromaDBClient(
+            mode="persistent", persist_directory=ctx.persist_dir, pool_size=pool_size
+        )
+        # 自適應模式以最小批次起步，觀察其收斂到的批次大小
+        variants = [(f"batch{b}", b, False) for b in ctx.profile.batch_sizes]
+        variants.append(("adaptive", min(ctx.profile.batch_sizes), True))
+        for label, batch_size, adaptive in variants:
+            name = f"bench_add_p{pool_size}_{label}"
+            collection = ChromaCollection(
+                ctx.collection(name, client),
+                expected_embedding_dim=ctx.profile.embedding_dim,
+                client=client,
+            )
+
+            started = time.perf_counter()
+            outcome = collection.batch_add(
+                items, batch_size=batch_size, adaptive=adaptive
+            )
+            elapsed = time.perf_counter() - started
+
+            results[f"pool{pool_size}.{label}"] = {
+                "documents": len(items),
+                "failed": outcome["failed"],
+                "batches": outcome["batches"],
+                "seconds": round(elapsed, 4),
+                "docs_per_second": round(len(items) / elapsed, 2) if elapsed else 0.0,
+            }
+            client.delete_collection(name)
+        client.close()
+    return results
+
+
+def _index_corpus(ctx: BenchmarkContext, name: str) -> ChromaCollection:
+    collection = ChromaCollection(
+        ctx.collection(name), expected_embedding_dim=ctx.profile.embedding_dim
+    )
+    if collection.count() != len(ctx.corpus.ids):
+        result = collection.batch_add(
+            ctx.items(), batch_size=max(ctx.profile.batch_sizes)
+        )
+        if result["failed"]:
+            raise RuntimeError(f"語料寫入失敗: {result['errors']}")
+    return collection
+
+
+async def _concurrent_queries(
+    collection: ChromaCollection,
+    embeddings: np.ndarray,
+    n_results: int,
+    concurrency: int,
+) -> Tuple[List[float], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(embedding: np.ndarray) -> None:
+        async with semaphore:
+            began = time.perf_counter()
+            await asyncio.to_thread(
+                collection.query,
+                query_embeddings=[embedding.tolist()],
+                n_results=n_results,
+            )
+            latencies.append((time.perf_counter() - began) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(e) for e in embeddings))
+    return latencies, time.perf_counter() - started
+
+
+def bench_query(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """經異步路徑（asyncio.to_thread）的併發查詢延遲"""
+    collection = _index_corpus(ctx, "bench_retrieval")
+    # 預熱（加載 HNSW 索引）
+    collection.query(query_embeddings=[ctx.query_embeddings[0].tolist()], n_results=1)
+
+    results: Dict[str, Any] = {}
+    for concurrency in ctx.profile.query_concurrency:
+        latencies, elapsed = asyncio.run(
+            _concurrent_queries(
+                collection, ctx.query_embeddings, ctx.profile.n_results, concurrency
+            )
+        )
+        results[f"concurrency{concurrency}"] = latency_stats(latencies, elapsed)
+    return results
+
+
+class _ChromaQueryClient:
+    """為 RetrievalManager 提供 query(collection_name, query_text, ...) 接口的適配器"""
+
+    def __init__(self, ctx: BenchmarkContext):
+        self.ctx = ctx
+
+    def query(
+        self,
+        collection_name: str,
+        query_text: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        result = self.ctx.collection(collection_name).query(
+            query_texts=[query_text], n_results=n_results, where=where or None
+        )
+        return [
+            {"id": doc_id, "content": document, "distance": distance}
+            for doc_id, document, distance in zip(
+                result["ids"][0], result["documents"][0], result["distances"][0]
+            )
+        ]
+
+
+class _AAMChromaClient:
+    """讓 AAM ChromaDBAdapter 取得的集合使用替身嵌入模型"""
+
+    def __init__(self, ctx: BenchmarkContext):
+        self.ctx = ctx
+
+    def get_or_create_collection(self, name: str, **_: Any) -> Any:
+        return self.ctx.collection(name)
+
+
+def _timed_retrieval(
+    queries: Sequence[str], retrieve: Callable[[str], List[str]]
+) -> Tuple[List[List[str]], List[float], float]:
+    ranked, latencies = [], []
+    started = time.perf_counter()
+    for query in queries:
+        began = time.perf_counter()
+        ranked.append(retrieve(query))
+        latencies.append((time.perf_counter() - began) * 1000)
+    return ranked, latencies, time.perf_counter() - started
+
+
+def bench_retrieval(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """RetrievalManager / HybridRAGService 端到端召回率與延遲"""
+    from agent_process.memory.aam.aam_core import AAMManager
+    from agent_process.memory.aam.hybrid_rag import HybridRAGService
+    from agent_process.memory.aam.realtime_retrieval import RealtimeRetrievalService
+    from agent_process.memory.aam.storage_adapter import ChromaDBAdapter
+    from agent_process.retrieval.manager import RetrievalManager, RetrievalStrategy
+
+    name = "bench_retrieval"
+    _index_corpus(ctx, name)
+    k = max(ctx.profile.recall_ks)
+    queries, targets = ctx.corpus.queries, ctx.corpus.targets
+
+    aam = AAMManager(
+        chromadb_adapter=ChromaDBAdapter(_AAMChromaClient(ctx), collection_name=name),
+        enable_short_term=False,
+    )
+    # 關閉結果緩存，測量真實檢索成本
+    hybrid = HybridRAGService(
+        aam,
+        retrieval_service=RealtimeRetrievalService(aam, cache_enabled=False),
+        cache_enabled=False,
+    )
+    # RetrievalManager 只調用客戶端的 query()，適配器按鴨子類型傳入
+    manager = RetrievalManager(cast(Any, _ChromaQueryClient(ctx)))
+    systems: Dict[str, Callable[[str], List[str]]] = {
+        "retrieval_manager.vector_only": lambda q: [
+            r["id"]
+            for r in manager.retrieve(
+                q,
+                collection_name=name,
+                n_results=k,
+                strategy=RetrievalStrategy.VECTOR_ONLY,
+            )
+        ],
+        "retrieval_manager.hybrid": lambda q: [
+            r["id"]
+            for r in manager.retrieve(
+                q, collection_name=name, n_results=k, strategy=RetrievalStrategy.HYBRID
+            )
+        ],
+        "hybrid_rag_service": lambda q: [
+            r["metadata"]["memory_id"] for r in hybrid.retrieve(q, top_k=k)
+        ],
+    }
+
+    results: Dict[str, Any] = {}
+    for system, retrieve in systems.items():
+        ranked, latencies, elapsed = _timed_retrieval(queries, retrieve)
+        results[system] = {
+            **recall_stats(ranked, targets, ctx.profile.recall_ks),
+            **latency_stats(latencies, elapsed),
+        }
+    return results
+
+
+def bench_chunking(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """分塊策略吞吐量"""
+    from services.api.processors.chunk_processor import ChunkProcessor, ChunkStrategy
+
+    text = _document_text(ctx, ctx.profile.chunk_text_chars)
+    results: Dict[str, Any] = {}
+    for strategy in ChunkStrategy:
+        processor = ChunkProcessor(
+            chunk_size=ctx.profile.chunk_size,
+            overlap=ctx.profile.chunk_overlap,
+            strategy=strategy,
+        )
+        elapsed, chunks = timed_median(
+            functools.partial(processor.process, text, file_id="bench")
+        )
+        results[strategy.value] = {
+            "chars": len(text),
+            "chunks": len(chunks),
+            "seconds": round(elapsed, 6),
+            "chars_per_second": round(len(text) / elapsed, 2) if elapsed else 0.0,
+        }
+    return results
+
+
+def bench_parsing(ctx: BenchmarkContext) -> Dict[str, Any]:
+    """解析器吞吐量（無法導入的解析器記為 skipped）"""
+    from services.api.processors.parsers.csv_parser import CsvParser
+    from services.api.processors.parsers.json_parser import JsonParser
+    from services.api.processors.parsers.md_parser import MdParser
+    from services.api.processors.parsers.txt_parser import TxtParser
+
+    text = _document_text(ctx, ctx.profile.parse_file_chars)
+    paragraphs = text.split("\n\n")
+    samples: Dict[str, Tuple[Callable[[], Any], str]] = {
+        "txt": (TxtParser, text),
+        "md": (
+            MdParser,
+            "\n\n".join(f"## 段落 {i}\n\n{p}" for i, p in enumerate(paragraphs)),
+        ),
+        "json": (
+            JsonParser,
+            json.dumps([{"id": i, "text": p} for i, p in enumerate(paragraphs)]),
+        ),
+        "csv": (
+            CsvParser,
+            "id,text\n" + "\n".join(f"{i},{p}" for i, p in enumerate(paragraphs)),
+        ),
+    }
+    try:
+        from services.api.processors.parsers.html_parser import HtmlParser
+
+        samples["html"] = (
+            HtmlParser,
+            "<html><body>"
+            + "".join(f"<p>{p}</p>" for p in paragraphs)
+            + "</body></html>",
+        )
+    except ImportError:
+        pass
+
+    results: Dict[str, Any] = {}
+    directory = os.path.join(ctx.persist_dir, "parse_samples")
+    os.makedirs(directory, exist_ok=True)
+    for extension, (parser_cls, content) in samples.items():
+        path = os.path.join(directory, f"sample.{extension}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        size = os.path.getsize(path)
+        try:
+            parser = parser_cls()
+        except ImportError as e:
+            results[extension] = {"skipped": str(e)}
+            continue
+        elapsed, _ = timed_median(functools.partial(parser.parse, path))
+        results[extension] = {
+            "bytes": size,
+            "seconds": round(elapsed, 6),
+            "bytes_per_second": round(size / elapsed, 2) if elapsed else 0.0,
+        }
+    return results
+
+
+def _document_text(ctx: BenchmarkContext, chars: int) -> str:
+    paragraphs: List[str] = []
+    total = 0
+    while total < chars:
+        for text in ctx.corpus.texts:
+            paragraphs.append(text + "。")
+            total += len(text) + 3
+            if total >= chars:
+                break
+    return "\n\n".join(paragraphs)
+
+
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext], Dict[str, Any]]] = {
+    "batch_add": bench_batch_add,
+    "query": bench_query,
+    "retrieval": bench_retrieval,
+    "chunking": bench_chunking,
+    "parsing": bench_parsing,
+}
+
+
+# ---------- 報告與基線比對 ----------
+
+
+def run_benchmarks(
+    profile_name: str,
+    selected: Optional[Sequence[str]] = None,
+    persist_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    運行基準測試並生成報告
+
+    Args:
+        profile_name: 規模配置名稱（smoke / default / large）
+        selected: 要運行的基準（默認全部）
+        persist_dir: ChromaDB 持久化目錄（默認使用臨時目錄並在結束後刪除）
+
+    Returns:
+        報告字典
+    """
+    profile = PROFILES[profile_name]
+    owned = persist_dir is None
+    persist_dir = persist_dir or tempfile.mkdtemp(prefix="rag_benchmark_")
+    ctx = BenchmarkContext(profile, persist_dir)
+    results: Dict[str, Any] = {}
+    try:
+        for name in selected or BENCHMARKS:
+            print(f"\n=== {name} ===")
+            started = time.perf_counter()
+            results[name] = BENCHMARKS[name](ctx)
+            print(json.dumps(results[name], indent=2, ensure_ascii=False))
+            print(f"（耗時 {time.perf_counter() - started:.2f} 秒）")
+    finally:
+        ctx.close()
+        if owned:
+            shutil.rmtree(persist_dir, ignore_errors=True)
+
+    return {
+        "version": REPORT_VERSION,
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "profile": profile_name,
+            "config": asdict(profile),
+            "benchmarks": list(selected or BENCHMARKS),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "chromadb": chromadb.__version__,
+            "git_commit": _git_commit(),
+        },
+        "results": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return None
+
+
+def flatten_metrics(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """將嵌套結果展開為 "benchmark.case.metric" → 數值"""
+    flat: Dict[str, float] = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def metric_direction(metric: str) -> Optional[str]:
+    """
+    指標方向：higher（越高越好）/ lower（越低越好）/ None（計數類，不比對）
+    """
+    leaf = metric.rsplit(".", 1)[-1]
+    if (
+        leaf.startswith("recall@")
+        or leaf in ("mrr", "qps")
+        or leaf.endswith("_per_second")
+    ):
+        return "higher"
+    if leaf.endswith("_ms") or leaf == "seconds":
+        return "lower"
+    return None
+
+
+def compare_reports(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    perf_tolerance: float = 0.25,
+    quality_tolerance: float = 0.02,
+) -> Dict[str, Any]:
+    """
+    與基線比對
+
+    延遲與吞吐量按相對變化判斷（機器噪聲較大，默認容差 25%，延遲變化小於
+    LATENCY_NOISE_FLOOR_MS 時忽略）；召回率與 MRR 按絕對差判斷（替身嵌入確定，
+    默認容差 0.02）。
+
+    profile 或規模配置與基線不同時指標不可比，不做比對，只返回不一致項；
+    本次運行的基準中缺少的基線指標記入 missing。兩者都應視為比對失敗。
+
+    Args:
+        current: 本次報告
+        baseline: 基線報告
+        perf_tolerance: 性能指標允許的相對退化比例
+        quality_tolerance: 質量指標允許的絕對下降值
+
+    Returns:
+        {"compared": int, "regressions": [...], "improvements": [...],
+         "missing": [...], "mismatches": [...]}
+    """
+    regressions: List[Dict[str, Any]] = []
+    improvements: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    compared = 0
+    mismatches = _meta_mismatches(current.get("meta", {}), baseline.get("meta", {}))
+    if mismatches:
+        return {
+            "compared": compared,
+            "regressions": regressions,
+            "improvements": improvements,
+            "missing": missing,
+            "mismatches": mismatches,
+        }
+
+    now = flatten_metrics(current.get("results", {}))
+    base = flatten_metrics(baseline.get("results", {}))
+    # 只比對本次運行的基準（--only），其中缺少的指標視為缺失
+    selected = current.get("meta", {}).get("benchmarks")
+
+    for metric, base_value in sorted(base.items()):
+        direction = metric_direction(metric)
+        if direction is None:
+            continue
+        if selected is not None and metric.split(".", 1)[0] not in selected:
+            continue
+        if metric not in now:
+            missing.append(metric)
+            continue
+        compared += 1
+        value = now[metric]
+        leaf = metric.rsplit(".", 1)[-1]
+        if leaf.startswith("recall@") or leaf == "mrr":
+            delta = value - base_value
+            worse, better = delta < -quality_tolerance, delta > quality_tolerance
+        else:
+            if base_value <= 0:
+                continue
+            if (
+                leaf.endswith("_ms")
+                and abs(value - base_value) < LATENCY_NOISE_FLOOR_MS
+            ):
+                continue
+            delta = (value - base_value) / base_value
+            if direction == "lower":
+                delta = -delta
+            worse, better = delta < -perf_tolerance, delta > perf_tolerance
+        entry = {
+            "metric": metric,
+            "baseline": base_value,
+            "current": value,
+            "change": round(delta, 4),
+        }
+        if worse:
+            regressions.append(entry)
+        elif better:
+            improvements.append(entry)
+
+    return {
+        "compared": compared,
+        "regressions": regressions,
+        "improvements": improvements,
+        "missing": missing,
+        "mismatches": mismatches,
+    }
+
+
+def _meta_mismatches(
+    current: Dict[str, Any], baseline: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """比較 profile 與規模配置，返回不一致的字段"""
+    fields = {"profile": (current.get("profile"), baseline.get("profile"))}
+    current_config = current.get("config") or {}
+    baseline_config = baseline.get("config") or {}
+    for key in sorted(set(current_config) | set(baseline_config)):
+        fields[f"config.{key}"] = (current_config.get(key), baseline_config.get(key))
+    return [
+        {"field": name, "current": value, "baseline": base_value}
+        for name, (value, base_value) in fields.items()
+        if value != base_value
+    ]
+
+
+def comparison_failed(comparison: Dict[str, Any]) -> bool:
+    """比對是否失敗：配置不一致、缺少指標或存在退化"""
+    return bool(
+        comparison["mismatches"] or comparison["missing"] or comparison["regressions"]
+    )
+
+
+def _print_comparison(comparison: Dict[str, Any]) -> None:
+    print("\n=== 基線比對 ===")
+    if comparison["mismatches"]:
+        print("❌ 基線與本次運行的 profile/配置不同，指標不可比：")
+        for entry in comparison["mismatches"]:
+            print(
+                f"   {entry['field']}: 基線 {entry['baseline']!r}，"
+                f"本次 {entry['current']!r}"
+            )
+        return
+    print(f"比對指標數: {comparison['compared']}")
+    for title, key in (("❌ 退化", "regressions"), ("✅ 改善", "improvements")):
+        for entry in comparison[key]:
+            print(
+                f"{title}: {entry['metric']} "
+                f"{entry['baseline']} → {entry['current']} ({entry['change']:+.2%})"
+            )
+    if comparison["missing"]:
+        print(f"❌ 本次缺少的基線指標: {len(comparison['missing'])}")
+        for metric in comparison["missing"]:
+            print(f"   {metric}")
+    if not comparison_failed(comparison):
+        print("✅ 未發現退化")
+
+
+def main() -> None:
+    """主函數"""
+    parser = argparse.ArgumentParser(description="ChromaDB / RAG 基準測試")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="default")
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        help="只運行指定基準",
+    )
+    parser.add_argument("--persist-dir", help="ChromaDB 持久化目錄（默認臨時目錄）")
+    parser.add_argument("--output", help="輸出 JSON 報告路徑")
+    parser.add_argument("--baseline", help="基線報告路徑（提供時進行比對）")
+    parser.add_argument("--save-baseline", help="將本次報告保存為基線")
+    parser.add_argument(
+        "--perf-tolerance",
+        type=float,
+        default=0.25,
+        help="延遲/吞吐量相對容差",
+    )
+    parser.add_argument(
+        "--quality-tolerance", type=float, default=0.02, help="召回率/MRR 絕對容差"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        import structlog
+
+        structlog.configure(
+            wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+        )
+    except ImportError:
+        pass
+
+    report = run_benchmarks(args.profile, args.only, args.persist_dir)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare_reports(
+            report, baseline, args.perf_tolerance, args.quality_tolerance
+        )
+        _print_comparison(report["comparison"])
+        exit_code = 1 if comparison_failed(report["comparison"]) else 0
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n報告已保存到: {path}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# 代碼功能說明: API 路由延遲加載註冊表
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""API 路由延遲加載 - 路由以導入路徑註冊，按功能集啟用，首次請求時才導入並掛載"""
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from fastapi import FastAPI
+
+from core.lazy_import import timed_import
+
+logger = logging.getLogger(__name__)
+
+# 訪問這些路徑時加載全部已啟用路由，保證 OpenAPI 文檔完整
+DOCS_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+
+@dataclass
+class RouterSpec:
+    """延遲路由定義"""
+
+    name: str
+    module: str
+    feature: str
+    path_prefixes: List[str]
+    prefix: str = ""
+    tags: List[str] = field(default_factory=list)
+    optional: bool = False
+
+    def matches(self, path: str) -> bool:
+        """請求路徑是否屬於此路由"""
+        return any(
+            path == p or path.startswith(p.rstrip("/") + "/")
+            for p in self.path_prefixes
+        )
+
+
+def parse_features(value: Optional[str]) -> Optional[Set[str]]:
+    """
+    解析功能集配置
+
+    Args:
+        value: 逗號分隔的功能名稱，空值或 "all" 表示啟用全部
+
+    Returns:
+        功能名稱集合，None 表示全部啟用
+    """
+    if not value or value.strip().lower() == "all":
+        return None
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+class LazyRouterRegistry:
+    """
+    延遲路由註冊表
+
+    - 只有屬於已啟用功能集的路由會被掛載
+    - 延遲模式下路由在首次匹配請求時導入（導入在線程中執行，不阻塞事件循環）
+    - 非延遲模式下由 load_all() 在啟動時一次性導入
+    - 每次導入的耗時記錄在 core.lazy_import 的導入報告中
+    - 只有可選路由的 ImportError（缺少可選依賴）會被永久標記為失敗；其他錯誤
+      不緩存，當前請求失敗，下一次匹配請求重新嘗試加載
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        features: Optional[Iterable[str]] = None,
+        lazy: bool = True,
+    ):
+        """
+        初始化註冊表
+
+        Args:
+            app: FastAPI 應用
+            features: 啟用的功能集（None 表示全部啟用）
+            lazy: 是否延遲到首次請求時加載
+        """
+        self.app = app
+        self.features = set(features) if features is not None else None
+        self.lazy = lazy
+        self._specs: Dict[str, RouterSpec] = {}
+        self._loaded: Set[str] = set()
+        self._failed: Dict[str, str] = {}
+        # 可重試錯誤：最近一次加載失敗的原因（路由仍為 pending）
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def register(
+        self,
+        name: str,
+        module: str,
+        feature: str,
+        path_prefixes: List[str],
+        prefix: str = "",
+        tags: Optional[List[str]] = None,
+        optional: bool = False,
+    ) -> None:
+        """
+        註冊延遲路由
+
+        Args:
+            name: 路由名稱
+            module: 路由模組導入路徑（模組需提供 ``router`` 屬性）
+            feature: 所屬功能集
+            path_prefixes: 觸發加載的請求路徑前綴
+            prefix: include_router 的前綴
+            tags: OpenAPI 標籤
+            optional: 可選路由導入失敗時只記錄警告
+        """
+        self._specs[name] = RouterSpec(
+            name=name,
+            module=module,
+            feature=feature,
+            path_prefixes=path_prefixes,
+            prefix=prefix,
+            tags=tags or [],
+            optional=optional,
+        )
+
+    def is_enabled(self, name: str) -> bool:
+        """路由是否屬於已啟用的功能集"""
+        spec = self._specs[name]
+        return self.features is None or spec.feature in self.features
+
+    def _pending(self, path: Optional[str] = None) -> List[RouterSpec]:
+        return [
+            spec
+            for spec in self._specs.values()
+            if spec.name not in self._loaded
+            and spec.name not in self._failed
+            and self.is_enabled(spec.name)
+            and (path is None or spec.matches(path))
+        ]
+
+    def _include(self, spec: RouterSpec, module: Any) -> None:
+        tags: List[Union[str, Enum]] = list(spec.tags)
+        self.app.include_router(module.router, prefix=spec.prefix, tags=tags)
+        # 路由變化後重新生成 OpenAPI 文檔
+        self.app.openapi_schema = None
+        self._loaded.add(spec.name)
+        self._errors.pop(spec.name, None)
+        logger.info(f"Router loaded: {spec.name} ({spec.module})")
+
+    def load(self, name: str) -> bool:
+        """
+        同步加載指定路由
+
+        Returns:
+            是否已掛載
+
+        Raises:
+            Exception: 必需路由加載失敗（不緩存，下次調用重試）
+        """
+        spec = self._specs[name]
+        with self._lock:
+            if name in self._loaded:
+                return True
+            if name in self._failed or not self.is_enabled(name):
+                return False
+            try:
+                self._include(spec, timed_import(spec.module))
+                return True
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                if spec.optional and isinstance(exc, ImportError):
+                    # 可選依賴缺失不會自行恢復，標記失敗後不再嘗試
+                    self._failed[name] = error
+                    logger.warning(f"Optional router {name} unavailable: {exc}")
+                    return False
+                self._errors[name] = error
+                if not spec.optional:
+                    raise
+                logger.warning(
+                    f"Optional router {name} failed to load, will retry: {exc}"
+                )
+                return False
+
+    def load_all(self) -> None:
+        """同步加載全部已啟用路由"""
+        for spec in self._pending():
+            self.load(spec.name)
+
+    def load_for_path(self, path: str) -> None:
+        """同步加載匹配請求路徑的路由（文檔路徑加載全部已啟用路由）"""
+        docs = path in DOCS_PATHS
+        for spec in self._pending(None if docs else path):
+            self.load(spec.name)
+
+    async def ensure_loaded_for_path(self, path: str) -> None:
+        """
+        確保匹配請求路徑的路由已掛載
+
+        導入在線程中執行，避免重型依賴的導入阻塞事件循環。
+
+        Args:
+            path: 請求路徑
+        """
+        if not self._pending(None if path in DOCS_PATHS else path):
+            return
+        await asyncio.to_thread(self.load_for_path, path)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """獲取各路由的加載狀態"""
+        result = []
+        for spec in self._specs.values():
+            if spec.name in self._loaded:
+                state = "loaded"
+            elif spec.name in self._failed:
+                state = "failed"
+            elif not self.is_enabled(spec.name):
+                state = "disabled"
+            else:
+                state = "pending"
+            result.append(
+                {
+                    "name": spec.name,
+                    "module": spec.module,
+                    "feature": spec.feature,
+                    "state": state,
+                    "error": self._failed.get(spec.name) or self._errors.get(spec.name),
+                }
+            )
+        return result
@@ -1,11 +1,16 @@
 # 代碼功能說明: FastAPI 應用主入口
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
-"""FastAPI 應用主入口文件"""
+"""FastAPI 應用主入口文件
+
+除健康檢查外的路由均以導入路徑註冊，由 API_FEATURES 選擇啟用的功能集，
+API_LAZY_ROUTERS=true（默認）時在首次請求對應路徑時才導入，縮短冷啟動時間。
+"""
 
 import os
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -14,32 +19,17 @@ import logging
 from services.api.middleware.request_id import RequestIDMiddleware
 from services.api.middleware.logging import LoggingMiddleware
 from services.api.middleware.error_handler import ErrorHandlerMiddleware
-from services.api.routers import (
-    health,
-    agents,
-    task_analyzer,
-    orchestrator,
-    planning,
-    execution,
-    review,
-    mcp,
-    chromadb,
-    llm,
-    file_upload,
-    chunk_processing,
-    file_metadata,
-    ner,
-    re,
-    rt,
-    triple_extraction,
-    kg_builder,
-    kg_query,
-)
+from services.api.middleware.lazy_router import LazyRouterMiddleware
+from services.api.routers import health
 
+from core.lazy_import import get_import_profile
+from services.api.core.lazy_routers import LazyRouterRegistry, parse_features
 from services.api.core.version import get_version_info, API_PREFIX
 from services.security.config import get_security_settings
 from services.security.middleware import SecurityMiddleware
 
+_startup_started = time.perf_counter()
+
 # 配置日誌
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO"),
@@ -47,17 +37,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# 可選導入 CrewAI 路由（如果模組未安裝則跳過）
-try:
-    from services.api.routers import crewai, crewai_tasks
-
-    CREWAI_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"CrewAI 路由不可用: {e}")
-    CREWAI_AVAILABLE = False
-    crewai = None  # type: ignore[assignment]
-    crewai_tasks = None  # type: ignore[assignment]
-
 # 獲取版本信息
 version_info = get_version_info()
 
@@ -151,6 +130,15 @@ if security_settings.enabled:
     logger.info("Security middleware enabled")
 
 app.add_middleware(LoggingMiddleware)
+
+# 延遲路由配置：API_FEATURES 為逗號分隔的功能集（默認 all），
+# API_LAZY_ROUTERS=false 時在啟動時一次性導入全部已啟用路由
+router_registry = LazyRouterRegistry(
+    app,
+    features=parse_features(os.getenv("API_FEATURES", "all")),
+    lazy=os.getenv("API_LAZY_ROUTERS", "true").lower() == "true",
+)
+app.add_middleware(LazyRouterMiddleware, registry=router_registry)
 app.add_middleware(ErrorHandlerMiddleware)
 
 # 配置 CORS（最後添加，確保在所有中間件之後）
@@ -178,44 +166,88 @@ async def get_version():
     return JSONResponse(content=get_version_info())
 
 
-# 註冊版本化路由
-app.include_router(agents.router, prefix=API_PREFIX, tags=["Agents"])
-app.include_router(task_analyzer.router, prefix=API_PREFIX, tags=["Task Analyzer"])
-app.include_router(orchestrator.router, prefix=API_PREFIX, tags=["Agent Orchestrator"])
-app.include_router(planning.router, prefix=API_PREFIX, tags=["Planning Agent"])
-app.include_router(execution.router, prefix=API_PREFIX, tags=["Execution Agent"])
-app.include_router(review.router, prefix=API_PREFIX, tags=["Review Agent"])
-app.include_router(mcp.router, prefix=API_PREFIX, tags=["MCP"])
-app.include_router(chromadb.router, prefix=API_PREFIX, tags=["ChromaDB"])
-app.include_router(llm.router, prefix=API_PREFIX, tags=["LLM"])
-# 條件性註冊 CrewAI 路由
-if CREWAI_AVAILABLE and crewai is not None and crewai_tasks is not None:
-    app.include_router(crewai.router, prefix=API_PREFIX, tags=["CrewAI"])
-    app.include_router(crewai_tasks.router, prefix=API_PREFIX, tags=["CrewAI"])
-    logger.info("CrewAI 路由已註冊")
-else:
-    logger.warning("CrewAI 路由未註冊（模組不可用）")
-app.include_router(file_upload.router, prefix=API_PREFIX, tags=["File Upload"])
-app.include_router(
-    chunk_processing.router, prefix=API_PREFIX, tags=["Chunk Processing"]
-)
-app.include_router(file_metadata.router, prefix=API_PREFIX, tags=["File Metadata"])
-app.include_router(ner.router, prefix=API_PREFIX, tags=["NER"])
-app.include_router(re.router, prefix=API_PREFIX, tags=["RE"])
-app.include_router(rt.router, prefix=API_PREFIX, tags=["RT"])
-app.include_router(
-    triple_extraction.router, prefix=API_PREFIX, tags=["Triple Extraction"]
-)
-app.include_router(
-    kg_builder.router, prefix=API_PREFIX, tags=["Knowledge Graph Builder"]
-)
-app.include_router(kg_query.router, prefix=API_PREFIX, tags=["Knowledge Graph Query"])
+@app.get("/startup-profile", tags=["Health"])
+async def get_startup_profile():
+    """
+    獲取啟動耗時分析
+
+    Returns:
+        路由加載狀態與各模組導入耗時（按耗時降序）
+    """
+    return JSONResponse(
+        content={
+            "startup_seconds": round(startup_seconds, 4),
+            "lazy_routers": router_registry.lazy,
+            "routers": router_registry.status(),
+            "imports": get_import_profile(),
+        }
+    )
+
+
+# 註冊版本化路由（功能集, 觸發加載的路徑前綴）
+_AGENTS = ("agents", [f"{API_PREFIX}/agents"])
+_FILES = ("files", [f"{API_PREFIX}/files"])
+_TEXT_ANALYSIS = ("text_analysis", [f"{API_PREFIX}/text-analysis"])
+_KG = ("kg", [f"{API_PREFIX}/kg"])
+_CREWAI = ("crewai", [f"{API_PREFIX}/api/v1/crews", f"{API_PREFIX}/api/v1/crewai"])
+
+_ROUTERS = [
+    ("agents", _AGENTS, ["Agents"]),
+    (
+        "task_analyzer",
+        ("task_analyzer", [f"{API_PREFIX}/task-analyzer"]),
+        ["Task Analyzer"],
+    ),
+    (
+        "orchestrator",
+        ("orchestrator", [f"{API_PREFIX}/orchestrator"]),
+        ["Agent Orchestrator"],
+    ),
+    ("planning", _AGENTS, ["Planning Agent"]),
+    ("execution", _AGENTS, ["Execution Agent"]),
+    ("review", _AGENTS, ["Review Agent"]),
+    ("mcp", ("mcp", [f"{API_PREFIX}/mcp"]), ["MCP"]),
+    ("chromadb", ("chromadb", [f"{API_PREFIX}/chromadb"]), ["ChromaDB"]),
+    ("llm", ("llm", [f"{API_PREFIX}/llm"]), ["LLM"]),
+    ("crewai", _CREWAI, ["CrewAI"]),
+    ("crewai_tasks", _CREWAI, ["CrewAI"]),
+    ("file_upload", _FILES, ["File Upload"]),
+    ("chunk_processing", _FILES, ["Chunk Processing"]),
+    ("file_metadata", _FILES, ["File Metadata"]),
+    ("ner", _TEXT_ANALYSIS, ["NER"]),
+    ("re", _TEXT_ANALYSIS, ["RE"]),
+    ("rt", _TEXT_ANALYSIS, ["RT"]),
+    ("triple_extraction", _TEXT_ANALYSIS, ["Triple Extraction"]),
+    ("kg_builder", _KG, ["Knowledge Graph Builder"]),
+    ("kg_query", _KG, ["Knowledge Graph Query"]),
+]
+
+for _name, (_feature, _paths), _tags in _ROUTERS:
+    router_registry.register(
+        _name,
+        f"services.api.routers.{_name}",
+        feature=_feature,
+        path_prefixes=_paths,
+        prefix=API_PREFIX,
+        tags=_tags,
+        # CrewAI 為可選模組，未安裝時跳過
+        optional=_feature == "crewai",
+    )
+
+if not router_registry.lazy:
+    router_registry.load_all()
+
+startup_seconds = time.perf_counter() - _startup_started
 
 
 @app.on_event("startup")
 async def startup_event():
     """應用啟動事件"""
     logger.info(f"AI Box API Gateway starting up... Version: {version_info['version']}")
+    logger.info(
+        f"App constructed in {startup_seconds:.3f}s "
+        f"(lazy_routers={router_registry.lazy})"
+    )
 
 
 @app.on_event("shutdown")
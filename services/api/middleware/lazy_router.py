@@ -0,0 +1,24 @@
+# 代碼功能說明: 延遲路由加載中間件
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""在請求路由匹配前按路徑加載延遲註冊的路由"""
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from services.api.core.lazy_routers import LazyRouterRegistry
+
+
+class LazyRouterMiddleware(BaseHTTPMiddleware):
+    """延遲路由加載中間件"""
+
+    def __init__(self, app, registry: LazyRouterRegistry):
+        super().__init__(app)
+        self.registry = registry
+
+    async def dispatch(self, request: Request, call_next):
+        """首次訪問某路由前綴時加載對應路由"""
+        await self.registry.ensure_loaded_for_path(request.url.path)
+        return await call_next(request)
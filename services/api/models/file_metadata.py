@@ -1,7 +1,7 @@
 # 代碼功能說明: 文件元數據模型
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """文件元數據模型 - 定義 Pydantic Model"""
 
@@ -16,6 +16,7 @@ class FileMetadataBase(BaseModel):
     filename: str = Field(..., description="文件名")
     file_type: str = Field(..., description="文件類型（MIME 類型）")
     file_size: int = Field(..., description="文件大小（字節）")
+    content_hash: Optional[str] = Field(None, description="內容 SHA-256")
     user_id: Optional[str] = Field(None, description="用戶 ID")
     tags: List[str] = Field(default_factory=list, description="標籤列表")
     description: Optional[str] = Field(None, description="文件描述")
@@ -1,7 +1,7 @@
 # 代碼功能說明: Ollama API 請求/響應模型
 # 創建日期: 2025-11-25 23:57 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25 23:57 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """定義 LLM 產生、對話與嵌入的 Pydantic 模型。"""
 
@@ -65,6 +65,13 @@ class OllamaEmbeddingRequest(BaseModel):
     model: Optional[str] = None
     text: Optional[str] = Field(None, description="單一文本")
     texts: Optional[List[str]] = Field(None, description="多個文本")
+    encoding_format: Literal["float", "base64", "binary"] = Field(
+        "float",
+        description=(
+            "向量編碼：float 為 JSON 數組；base64 為小端 float32 字節的 base64；"
+            "binary 直接返回 (n, dim) 小端 float32 字節"
+        ),
+    )
 
     @model_validator(mode="after")
     def ensure_inputs(self) -> Self:
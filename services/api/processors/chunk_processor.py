@@ -1,18 +1,43 @@
 # 代碼功能說明: 文件分塊處理器
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
-"""文件分塊處理器 - 實現多種分塊策略"""
+"""文件分塊處理器 - 實現多種分塊策略（按 token 預算打包，支持中日韓句子切分）"""
 
-import uuid
+import hashlib
+import math
 import re
-from typing import List, Dict, Any, Optional
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from enum import Enum
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+# 分塊 ID 命名空間：同一文件中相同內容的分塊得到相同 ID，重新分塊是冪等的
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c6a52-8f0e-4d55-9a53-6a2b0d7c9e41")
+
+# 中日韓字符（每個字符約為一個 token）
+_CJK = (
+    "\u3040-\u30ff"  # 日文假名
+    "\u3400-\u4dbf"  # 擴展 A
+    "\u4e00-\u9fff"  # 基本漢字
+    "\uac00-\ud7af"  # 韓文
+    "\uf900-\ufaff"  # 兼容漢字
+)
+_TOKEN_RE = re.compile(rf"(?P<cjk>[{_CJK}])|(?P<word>[^\W{_CJK}]+)|(?P<other>\S)")
+
+# 句末標點：中文句號/感嘆號/問號/分號/省略號，及後跟空白的英文標點；可帶右引號/右括號
+_SENTENCE_END_RE = re.compile(
+    r"(?:[。！？；…]+|[!?;]+|\.(?=\s|$))[」』”’\"')）\]]*\s*|\n+",
+)
+_PARAGRAPH_SEP_RE = re.compile(r"\n\s*\n")
+
+Span = Tuple[int, int]
+
 
 class ChunkStrategy(Enum):
     """分塊策略枚舉"""
@@ -22,30 +47,236 @@ class ChunkStrategy(Enum):
     SEMANTIC = "semantic"  # 語義分塊（基於段落、句子邊界）
 
 
+class Tokenizer(ABC):
+    """分詞器接口：分塊大小按 token 計算"""
+
+    @abstractmethod
+    def boundaries(self, text: str) -> Sequence[int]:
+        """
+        返回每個 token 結束位置的字符偏移（遞增）
+
+        Args:
+            text: 文本
+
+        Returns:
+            token 結束偏移序列，長度即 token 數
+        """
+        pass
+
+    def count(self, text: str) -> int:
+        """計算 token 數"""
+        return len(self.boundaries(text))
+
+    @property
+    def name(self) -> str:
+        """分詞器標識（與 create_tokenizer 的名稱一致）"""
+        return type(self).__name__
+
+
+class CharTokenizer(Tokenizer):
+    """按字符計數（每個字符一個 token，與舊版按字符分塊一致）"""
+
+    @property
+    def name(self) -> str:
+        return "char"
+
+    def boundaries(self, text: str) -> Sequence[int]:
+        return range(1, len(text) + 1)
+
+    def count(self, text: str) -> int:
+        return len(text)
+
+
+class HeuristicTokenizer(Tokenizer):
+    """
+    近似 BPE 分詞器（無需模型）
+
+    中日韓字符每字一個 token，拉丁單詞每 ``chars_per_token`` 個字符一個 token，
+    其他非空白符號各一個 token，空白不計。
+    """
+
+    def __init__(self, chars_per_token: int = 4):
+        self.chars_per_token = chars_per_token
+
+    @property
+    def name(self) -> str:
+        if self.chars_per_token == 4:
+            return "approx"
+        return f"approx:{self.chars_per_token}"
+
+    def boundaries(self, text: str) -> Sequence[int]:
+        ends: List[int] = []
+        step = self.chars_per_token
+        for match in _TOKEN_RE.finditer(text):
+            start, end = match.span()
+            if match.lastgroup == "word":
+                ends.extend(range(min(start + step, end), end, step))
+            ends.append(end)
+        return ends
+
+    def count(self, text: str) -> int:
+        total = 0
+        step = self.chars_per_token
+        for match in _TOKEN_RE.finditer(text):
+            if match.lastgroup == "word":
+                total += math.ceil((match.end() - match.start()) / step)
+            else:
+                total += 1
+        return total
+
+
+class HuggingFaceTokenizer(Tokenizer):
+    """使用 HuggingFace 快速分詞器（與嵌入模型的 token 計數一致）"""
+
+    def __init__(self, model_name: str):
+        try:
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "transformers 未安裝，請運行: pip install transformers",
+            ) from e
+        self.model_name = model_name
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+
+    @property
+    def name(self) -> str:
+        return f"hf:{self.model_name}"
+
+    def boundaries(self, text: str) -> Sequence[int]:
+        encoded = self._tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )
+        return [end for _, end in encoded["offset_mapping"] if end > 0]
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def create_tokenizer(name: str = "char") -> Tokenizer:
+    """
+    按名稱創建分詞器
+
+    Args:
+        name: "char"、"approx" 或 "hf:<模型名>"
+
+    Returns:
+        Tokenizer 實例
+    """
+    if name == "char":
+        return CharTokenizer()
+    if name == "approx":
+        return HeuristicTokenizer()
+    if name.startswith("hf:"):
+        return HuggingFaceTokenizer(name[3:])
+    raise ValueError(f"不支持的分詞器: {name}")
+
+
+def _strip_span(text: str, start: int, end: int) -> Span:
+    """收縮區間去掉首尾空白（不複製字符串）"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def split_paragraphs(
+    text: str, start: int = 0, end: Optional[int] = None
+) -> List[Span]:
+    """
+    按空行切分段落
+
+    Returns:
+        去除首尾空白後的段落區間（原文字符偏移）
+    """
+    end = len(text) if end is None else end
+    spans: List[Span] = []
+    position = start
+    for match in _PARAGRAPH_SEP_RE.finditer(text, start, end):
+        span = _strip_span(text, position, match.start())
+        if span[0] < span[1]:
+            spans.append(span)
+        position = match.end()
+    span = _strip_span(text, position, end)
+    if span[0] < span[1]:
+        spans.append(span)
+    return spans
+
+
+def split_sentences(text: str, start: int = 0, end: Optional[int] = None) -> List[Span]:
+    """
+    按句末標點切分句子（支持中日韓標點，如 。！？）
+
+    Returns:
+        去除首尾空白後的句子區間（原文字符偏移）
+    """
+    end = len(text) if end is None else end
+    spans: List[Span] = []
+    position = start
+    for match in _SENTENCE_END_RE.finditer(text, start, end):
+        span = _strip_span(text, position, match.end())
+        if span[0] < span[1]:
+            spans.append(span)
+        position = match.end()
+    span = _strip_span(text, position, end)
+    if span[0] < span[1]:
+        spans.append(span)
+    return spans
+
+
+@dataclass(slots=True)
+class _Piece:
+    """待打包的文本片段（原文區間與 token 數）"""
+
+    start: int
+    end: int
+    tokens: int
+
+
 class ChunkProcessor:
-    """文件分塊處理器"""
+    """
+    文件分塊處理器
+
+    - 分塊大小按 token 計算（分詞器可插拔，默認按字符）
+    - 分塊文本為原文切片，start_position/end_position 為精確字符偏移
+    - 分塊 ID 由文件 ID 與內容哈希確定，重新分塊結果不變
+    - 文件級元數據以引用方式共享（file_metadata），不逐塊複製
+    """
 
     def __init__(
         self,
         chunk_size: int = 512,
         overlap: float = 0.2,
         strategy: ChunkStrategy = ChunkStrategy.SEMANTIC,
+        tokenizer: Optional[Tokenizer] = None,
     ):
         """
         初始化分塊處理器
 
         Args:
-            chunk_size: 分塊大小（字符數，不是 tokens）
+            chunk_size: 分塊大小（token 數，按分詞器計算）
             overlap: 重疊比例（0-1之間）
             strategy: 分塊策略
+            tokenizer: 分詞器（默認按字符計數）
         """
         self.chunk_size = chunk_size
         self.overlap = overlap
         self.strategy = strategy
+        self.tokenizer = tokenizer or CharTokenizer()
         self.logger = logger.bind(
             chunk_size=chunk_size, overlap=overlap, strategy=strategy.value
         )
 
+    @property
+    def signature(self) -> Dict[str, Any]:
+        """分塊配置標識（配置變化時已保存的分塊及其下游進度不能復用）"""
+        return {
+            "chunk_size": self.chunk_size,
+            "overlap": self.overlap,
+            "strategy": self.strategy.value,
+            "tokenizer": self.tokenizer.name,
+        }
+
     def process(
         self,
         text: str,
@@ -58,256 +289,149 @@ class ChunkProcessor:
         Args:
             text: 文本內容
             file_id: 文件 ID
-            metadata: 文件元數據
+            metadata: 文件元數據（各分塊共享同一對象）
 
         Returns:
-            分塊列表，每個分塊包含 chunk_id、file_id、chunk_index、text、metadata
+            分塊列表，每個分塊包含 chunk_id、file_id、chunk_index、text、
+            metadata（分塊級）和 file_metadata（文件級，共享引用）
         """
         if self.strategy == ChunkStrategy.FIXED_SIZE:
-            return self._fixed_size_chunk(text, file_id, metadata)
+            spans = self._fixed_size_spans(text)
         elif self.strategy == ChunkStrategy.SLIDING_WINDOW:
-            return self._sliding_window_chunk(text, file_id, metadata)
+            spans = self._sliding_window_spans(text)
         elif self.strategy == ChunkStrategy.SEMANTIC:
-            return self._semantic_chunk(text, file_id, metadata)
+            spans = self._semantic_spans(text)
         else:
             raise ValueError(f"不支持的分塊策略: {self.strategy}")
 
-    def _fixed_size_chunk(
+        return self._build_chunks(text, file_id, spans, metadata)
+
+    def _build_chunks(
         self,
         text: str,
         file_id: str,
-        metadata: Optional[Dict[str, Any]] = None,
+        spans: List[_Piece],
+        metadata: Optional[Dict[str, Any]],
     ) -> List[Dict[str, Any]]:
-        """固定大小分塊"""
         chunks: List[Dict[str, Any]] = []
-        text_length = len(text)
-
-        for i in range(0, text_length, self.chunk_size):
-            chunk_text = text[i : i + self.chunk_size]
-            chunk_id = str(uuid.uuid4())
-
-            chunk_metadata = {
-                "start_position": i,
-                "end_position": min(i + self.chunk_size, text_length),
-                "chunk_size": len(chunk_text),
-            }
-
-            # 合併文件元數據
-            if metadata:
-                chunk_metadata.update(metadata)
-
-            chunks.append(
-                {
-                    "chunk_id": chunk_id,
-                    "file_id": file_id,
-                    "chunk_index": len(chunks),
-                    "text": chunk_text,
-                    "metadata": chunk_metadata,
-                }
+        seen: Dict[str, int] = {}
+        strategy = self.strategy.value
+
+        for index, span in enumerate(spans):
+            chunk_text = text[span.start : span.end]
+            content_hash = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+            # 同一文件中重複出現的相同內容按出現順序區分
+            occurrence = seen.get(content_hash, 0)
+            seen[content_hash] = occurrence + 1
+            chunk_id = str(
+                uuid.uuid5(CHUNK_ID_NAMESPACE, f"{file_id}:{content_hash}:{occurrence}")
             )
 
-        return chunks
-
-    def _sliding_window_chunk(
-        self,
-        text: str,
-        file_id: str,
-        metadata: Optional[Dict[str, Any]] = None,
-    ) -> List[Dict[str, Any]]:
-        """滑動窗口分塊（帶重疊）"""
-        chunks = []
-        text_length = len(text)
-        step_size = int(self.chunk_size * (1 - self.overlap))
-
-        i = 0
-        chunk_index = 0
-
-        while i < text_length:
-            chunk_text = text[i : i + self.chunk_size]
-            chunk_id = str(uuid.uuid4())
-
             chunk_metadata = {
-                "start_position": i,
-                "end_position": min(i + self.chunk_size, text_length),
-                "chunk_size": len(chunk_text),
-                "overlap": self.overlap,
+                "start_position": span.start,
+                "end_position": span.end,
+                "chunk_size": span.end - span.start,
+                "token_count": span.tokens,
+                "content_hash": content_hash,
+                "strategy": strategy,
             }
-
-            # 合併文件元數據
-            if metadata:
-                chunk_metadata.update(metadata)
+            if self.strategy == ChunkStrategy.SLIDING_WINDOW:
+                chunk_metadata["overlap"] = self.overlap
 
             chunks.append(
                 {
                     "chunk_id": chunk_id,
                     "file_id": file_id,
-                    "chunk_index": chunk_index,
+                    "chunk_index": index,
                     "text": chunk_text,
                     "metadata": chunk_metadata,
+                    "file_metadata": metadata,
                 }
             )
 
-            i += step_size
-            chunk_index += 1
-
         return chunks
 
-    def _semantic_chunk(
-        self,
-        text: str,
-        file_id: str,
-        metadata: Optional[Dict[str, Any]] = None,
-    ) -> List[Dict[str, Any]]:
-        """語義分塊（基於段落、句子邊界）"""
-        chunks = []
-
-        # 首先按段落分割
-        paragraphs = self._split_paragraphs(text)
-
-        current_chunk = ""
-        current_start = 0
-        chunk_index = 0
-
-        for para in paragraphs:
-            # 如果當前塊加上新段落超過大小限制，保存當前塊
-            if len(current_chunk) + len(para) > self.chunk_size and current_chunk:
-                chunk_id = str(uuid.uuid4())
-                chunk_metadata = {
-                    "start_position": current_start,
-                    "end_position": current_start + len(current_chunk),
-                    "chunk_size": len(current_chunk),
-                    "strategy": "semantic",
-                }
+    def _window_spans(self, text: str, step: int) -> List[_Piece]:
+        """按 token 邊界切出固定長度窗口，窗口起點間隔 step 個 token"""
+        boundaries = self.tokenizer.boundaries(text)
+        total = len(boundaries)
+        spans: List[_Piece] = []
+        first = 0
+        while first < total:
+            last = min(first + self.chunk_size, total)
+            start = boundaries[first - 1] if first else 0
+            end = boundaries[last - 1] if last < total else len(text)
+            spans.append(_Piece(start, end, last - first))
+            if last == total:
+                break
+            first += step
+        return spans
+
+    def _fixed_size_spans(self, text: str) -> List[_Piece]:
+        """固定大小分塊"""
+        return self._window_spans(text, self.chunk_size)
 
-                if metadata:
-                    chunk_metadata.update(metadata)
-
-                chunks.append(
-                    {
-                        "chunk_id": chunk_id,
-                        "file_id": file_id,
-                        "chunk_index": chunk_index,
-                        "text": current_chunk.strip(),
-                        "metadata": chunk_metadata,
-                    }
-                )
+    def _sliding_window_spans(self, text: str) -> List[_Piece]:
+        """滑動窗口分塊（帶重疊）"""
+        step = max(1, int(self.chunk_size * (1 - self.overlap)))
+        return self._window_spans(text, step)
+
+    def _split_oversized(self, text: str, piece: _Piece) -> List[_Piece]:
+        """按 token 邊界強制切分超過預算的單個句子"""
+        segment = text[piece.start : piece.end]
+        boundaries = self.tokenizer.boundaries(segment)
+        pieces: List[_Piece] = []
+        for first in range(0, len(boundaries), self.chunk_size):
+            last = min(first + self.chunk_size, len(boundaries))
+            start = piece.start + (boundaries[first - 1] if first else 0)
+            end = piece.start + boundaries[last - 1]
+            start, end = _strip_span(text, start, end)
+            if start < end:
+                pieces.append(_Piece(start, end, self.tokenizer.count(text[start:end])))
+        return pieces
+
+    def _semantic_spans(self, text: str) -> List[_Piece]:
+        """
+        語義分塊（基於段落、句子邊界）
 
-                # 開始新塊
-                current_chunk = para
-                current_start = current_start + len(current_chunk) - len(para)
-                chunk_index += 1
-            else:
-                # 如果段落本身超過大小限制，按句子分割
-                if len(para) > self.chunk_size:
-                    # 先保存當前塊
-                    if current_chunk:
-                        chunk_id = str(uuid.uuid4())
-                        chunk_metadata = {
-                            "start_position": current_start,
-                            "end_position": current_start + len(current_chunk),
-                            "chunk_size": len(current_chunk),
-                            "strategy": "semantic",
-                        }
-
-                        if metadata:
-                            chunk_metadata.update(metadata)
-
-                        chunks.append(
-                            {
-                                "chunk_id": chunk_id,
-                                "file_id": file_id,
-                                "chunk_index": chunk_index,
-                                "text": current_chunk.strip(),
-                                "metadata": chunk_metadata,
-                            }
-                        )
-
-                        current_start = current_start + len(current_chunk)
-                        chunk_index += 1
-                        current_chunk = ""
-
-                    # 按句子分割長段落
-                    sentences = self._split_sentences(para)
-                    for sentence in sentences:
-                        if (
-                            len(current_chunk) + len(sentence) > self.chunk_size
-                            and current_chunk
-                        ):
-                            chunk_id = str(uuid.uuid4())
-                            chunk_metadata = {
-                                "start_position": current_start,
-                                "end_position": current_start + len(current_chunk),
-                                "chunk_size": len(current_chunk),
-                                "strategy": "semantic",
-                            }
-
-                            if metadata:
-                                chunk_metadata.update(metadata)
-
-                            chunks.append(
-                                {
-                                    "chunk_id": chunk_id,
-                                    "file_id": file_id,
-                                    "chunk_index": chunk_index,
-                                    "text": current_chunk.strip(),
-                                    "metadata": chunk_metadata,
-                                }
-                            )
-
-                            current_start = current_start + len(current_chunk)
-                            chunk_index += 1
-                            current_chunk = sentence
-                        else:
-                            current_chunk += sentence
+        段落能放入當前塊時整段加入；超過預算的段落按句子打包；
+        超過預算的句子按 token 邊界切分。合併時按合併後的原文切片（含片段之間的
+        分隔符）重新計數，分塊的 token 數不會超過預算。
+        """
+        budget = self.chunk_size
+        count = self.tokenizer.count
+        spans: List[_Piece] = []
+        current: Optional[_Piece] = None
+
+        def add(piece: _Piece) -> None:
+            nonlocal current
+            if current is not None:
+                merged = count(text[current.start : piece.end])
+                if merged <= budget:
+                    current.end = piece.end
+                    current.tokens = merged
+                    return
+                spans.append(current)
+            current = _Piece(piece.start, piece.end, piece.tokens)
+
+        for para_start, para_end in split_paragraphs(text):
+            para = _Piece(para_start, para_end, count(text[para_start:para_end]))
+            if para.tokens <= budget:
+                add(para)
+                continue
+            for sent_start, sent_end in split_sentences(text, para_start, para_end):
+                sentence = _Piece(
+                    sent_start, sent_end, count(text[sent_start:sent_end])
+                )
+                if sentence.tokens <= budget:
+                    add(sentence)
                 else:
-                    current_chunk += para
+                    for piece in self._split_oversized(text, sentence):
+                        add(piece)
 
-        # 保存最後一個塊
-        if current_chunk.strip():
-            chunk_id = str(uuid.uuid4())
-            chunk_metadata = {
-                "start_position": current_start,
-                "end_position": current_start + len(current_chunk),
-                "chunk_size": len(current_chunk),
-                "strategy": "semantic",
-            }
-
-            if metadata:
-                chunk_metadata.update(metadata)
-
-            chunks.append(
-                {
-                    "chunk_id": chunk_id,
-                    "file_id": file_id,
-                    "chunk_index": chunk_index,
-                    "text": current_chunk.strip(),
-                    "metadata": chunk_metadata,
-                }
-            )
-
-        return chunks
-
-    def _split_paragraphs(self, text: str) -> List[str]:
-        """按段落分割文本"""
-        # 按雙換行符分割
-        paragraphs = re.split(r"\n\s*\n", text)
-        # 過濾空段落
-        paragraphs = [p.strip() for p in paragraphs if p.strip()]
-        return paragraphs
-
-    def _split_sentences(self, text: str) -> List[str]:
-        """按句子分割文本"""
-        # 簡單的句子分割（可以改進）
-        # 匹配句號、問號、感嘆號後跟空格或換行
-        sentences = re.split(r"([.!?]\s+)", text)
-        # 重新組合句子和標點
-        result = []
-        for i in range(0, len(sentences) - 1, 2):
-            if i + 1 < len(sentences):
-                result.append(sentences[i] + sentences[i + 1])
-            else:
-                result.append(sentences[i])
-        return [s.strip() for s in result if s.strip()]
+        if current is not None:
+            spans.append(current)
+        return spans
 
 
 def create_chunk_processor_from_config(config: dict) -> ChunkProcessor:
@@ -329,4 +453,9 @@ def create_chunk_processor_from_config(config: dict) -> ChunkProcessor:
     except ValueError:
         strategy = ChunkStrategy.SEMANTIC
 
-    return ChunkProcessor(chunk_size=chunk_size, overlap=overlap, strategy=strategy)
+    return ChunkProcessor(
+        chunk_size=chunk_size,
+        overlap=overlap,
+        strategy=strategy,
+        tokenizer=create_tokenizer(config.get("tokenizer", "char")),
+    )
@@ -1,11 +1,12 @@
 # 代碼功能說明: PDF 文件解析器
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """PDF 文件解析器 - 使用 PyPDF2"""
 
-from typing import Dict, Any, List
+from io import BytesIO
+from typing import Dict, Any, BinaryIO, List, Optional
 from .base_parser import BaseParser
 
 try:
@@ -34,58 +35,8 @@ class PdfParser(BaseParser):
         Returns:
             解析結果，包含文本內容和頁面元數據
         """
-        if not PDF_AVAILABLE:
-            raise ImportError("PyPDF2 未安裝")
-
-        try:
-            text_parts = []
-            pages_metadata: List[Dict[str, Any]] = []
-
-            with open(file_path, "rb") as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                num_pages = len(pdf_reader.pages)
-
-                for page_num, page in enumerate(pdf_reader.pages, start=1):
-                    try:
-                        page_text = page.extract_text()
-                        text_parts.append(page_text)
-
-                        pages_metadata.append(
-                            {
-                                "page_number": page_num,
-                                "char_count": len(page_text),
-                                "has_text": len(page_text.strip()) > 0,
-                            }
-                        )
-                    except Exception as e:
-                        self.logger.warning(
-                            "PDF 頁面解析失敗",
-                            file_path=file_path,
-                            page_num=page_num,
-                            error=str(e),
-                        )
-                        pages_metadata.append(
-                            {
-                                "page_number": page_num,
-                                "char_count": 0,
-                                "has_text": False,
-                                "error": str(e),
-                            }
-                        )
-
-            full_text = "\n\n".join(text_parts)
-
-            return {
-                "text": full_text,
-                "metadata": {
-                    "num_pages": num_pages,
-                    "pages": pages_metadata,
-                    "char_count": len(full_text),
-                },
-            }
-        except Exception as e:
-            self.logger.error("PDF 文件解析失敗", file_path=file_path, error=str(e))
-            raise
+        with open(file_path, "rb") as f:
+            return self.parse_stream(f)
 
     def parse_from_bytes(self, file_content: bytes, **kwargs) -> Dict[str, Any]:
         """
@@ -98,22 +49,42 @@ class PdfParser(BaseParser):
         Returns:
             解析結果
         """
+        return self.parse_stream(BytesIO(file_content))
+
+    def parse_stream(
+        self,
+        stream: BinaryIO,
+        start_page: int = 1,
+        end_page: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        從可定位的二進制流解析指定頁範圍
+
+        PyPDF2 按需定位讀取交叉引用表和頁面對象，配合對象存儲的範圍讀取流
+        （FileStorage.open_file）時只下載所需頁面涉及的字節。
+
+        Args:
+            stream: 可定位的二進制流
+            start_page: 起始頁（從 1 開始，含）
+            end_page: 結束頁（含），None 表示到最後一頁
+
+        Returns:
+            解析結果，metadata 中的 num_pages 為文檔總頁數
+        """
         if not PDF_AVAILABLE:
             raise ImportError("PyPDF2 未安裝")
 
         try:
-            from io import BytesIO
+            pdf_reader = PyPDF2.PdfReader(stream)
+            num_pages = len(pdf_reader.pages)
+            last_page = min(end_page or num_pages, num_pages)
 
             text_parts = []
             pages_metadata: List[Dict[str, Any]] = []
 
-            pdf_file = BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            num_pages = len(pdf_reader.pages)
-
-            for page_num, page in enumerate(pdf_reader.pages, start=1):
+            for page_num in range(max(start_page, 1), last_page + 1):
                 try:
-                    page_text = page.extract_text()
+                    page_text = pdf_reader.pages[page_num - 1].extract_text()
                     text_parts.append(page_text)
 
                     pages_metadata.append(
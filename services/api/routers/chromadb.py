@@ -1,7 +1,7 @@
 # 代碼功能說明: ChromaDB API 路由
 # 創建日期: 2025-11-25 21:45 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25 21:45 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """ChromaDB API 路由 - 提供向量資料庫操作接口"""
 
@@ -478,7 +478,7 @@ async def batch_add_documents(collection_name: str, request: BatchAddRequest):
         client = get_chroma_client()
         collection = client.get_or_create_collection(name=collection_name)
         chroma_collection = ChromaCollection(
-            collection, batch_size=request.batch_size or 100
+            collection, batch_size=request.batch_size or 100, client=client
         )
 
         items = await _prepare_batch_items(request)
@@ -1,36 +1,46 @@
 # 代碼功能說明: 文件分塊處理路由
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
-"""文件分塊處理路由 - 提供異步分塊處理和進度查詢功能"""
+"""文件分塊處理路由 - 提供異步分塊處理、文件攝取和進度查詢功能"""
 
 import os
-from typing import Optional, Dict, Any
+from typing import Optional
 from fastapi import APIRouter, HTTPException, status, BackgroundTasks
 from fastapi.responses import JSONResponse
 import structlog
 from enum import Enum
 
 from services.api.core.response import APIResponse
-from services.api.storage.file_storage import FileStorage, create_storage_from_config
+from services.api.storage.file_storage import FileStorage
+from services.api.storage.chunk_store import (
+    ChunkJobStore,
+    create_chunk_job_store_from_config,
+)
 from services.api.processors.chunk_processor import (
     ChunkProcessor,
     create_chunk_processor_from_config,
 )
+from services.api.services.ingestion_pipeline import (
+    IngestionConfig,
+    IngestionPipeline,
+    make_ollama_embed_fn,
+)
 from services.api.processors.parsers.txt_parser import TxtParser
 from services.api.processors.parsers.md_parser import MdParser
 from services.api.processors.parsers.pdf_parser import PdfParser
 from services.api.processors.parsers.docx_parser import DocxParser
 from core.config import get_config_section
 
+# 與文件上傳路由共用同一存儲實例：S3 客戶端、本地磁盤緩存（及其容量上限）
+# 與 SQLite 索引在進程內只創建一次
+from services.api.routers.file_upload import get_storage
+
 logger = structlog.get_logger(__name__)
 
 router = APIRouter(prefix="/files", tags=["Chunk Processing"])
 
-# 處理狀態存儲（內存，生產環境應使用 Redis）
-_processing_status: Dict[str, Dict[str, Any]] = {}
-
 
 class ProcessingStatus(Enum):
     """處理狀態枚舉"""
@@ -41,10 +51,10 @@ class ProcessingStatus(Enum):
     FAILED = "failed"
 
 
-def get_storage() -> FileStorage:
-    """獲取文件存儲實例"""
-    config = get_config_section("file_upload", default={}) or {}
-    return create_storage_from_config(config)
+def get_job_store() -> ChunkJobStore:
+    """獲取分塊任務存儲實例（多個 worker 共享處理狀態與分塊）"""
+    config = get_config_section("chunk_processing", default={}) or {}
+    return create_chunk_job_store_from_config(config.get("job_store", {}) or {})
 
 
 def get_chunk_processor() -> ChunkProcessor:
@@ -82,71 +92,57 @@ def get_parser(file_type: str):
         return TxtParser()
 
 
+def _infer_file_type(file_path: str) -> Optional[str]:
+    """從文件擴展名推斷文件類型"""
+    file_ext = os.path.splitext(file_path)[1].lower()
+    file_type_map = {
+        ".txt": "text/plain",
+        ".md": "text/markdown",
+        ".pdf": "application/pdf",
+        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    }
+    return file_type_map.get(file_ext)
+
+
+def _mark_failed(file_id: str, error: Exception) -> None:
+    """記錄處理失敗狀態"""
+    get_job_store().set_status(
+        file_id,
+        status=ProcessingStatus.FAILED.value,
+        progress=0,
+        message=f"處理失敗: {str(error)}",
+        error=str(error),
+    )
+
+
 async def process_file_chunking(
-    file_id: str, file_path: str, file_type: Optional[str] = None
+    file_id: str, file_path: Optional[str], file_type: Optional[str] = None
 ):
     """
-    異步處理文件分塊
+    異步處理文件分塊（只運行攝取管線的解析與分塊階段）
 
     Args:
         file_id: 文件 ID
-        file_path: 文件路徑
+        file_path: 本地文件路徑（None 表示通過文件存儲按文件 ID 解析）
         file_type: 文件類型（MIME 類型）
     """
     try:
-        # 更新狀態為處理中
-        _processing_status[file_id] = {
-            "status": ProcessingStatus.PROCESSING.value,
-            "progress": 0,
-            "message": "開始解析文件",
-        }
-
         # 獲取解析器
         if file_type is None:
             file_type = "text/plain"  # 默認使用文本類型
         parser = get_parser(file_type)
 
-        # 解析文件
-        if hasattr(parser, "parse"):
-            result = parser.parse(file_path)
-        else:
-            # 如果沒有 parse 方法，嘗試從字節讀取
-            storage = get_storage()
-            file_content = storage.read_file(file_id)
-            if file_content is None:
-                raise ValueError(f"無法讀取文件: {file_id}")
-
-            if hasattr(parser, "parse_from_bytes"):
-                result = parser.parse_from_bytes(file_content)
-            else:
-                raise ValueError(f"解析器不支持此文件類型: {file_type}")
-
-        _processing_status[file_id]["progress"] = 50
-        _processing_status[file_id]["message"] = "文件解析完成，開始分塊"
-
-        # 獲取分塊處理器
-        chunk_processor = get_chunk_processor()
-
-        # 生成分塊
-        chunks = chunk_processor.process(
-            text=result["text"],
-            file_id=file_id,
-            metadata=result.get("metadata", {}),
+        pipeline = IngestionPipeline(
+            get_job_store(), storage=get_storage() if file_path is None else None
+        )
+        summary = await pipeline.run(
+            file_id, file_path, parser, get_chunk_processor(), resume=False
         )
-
-        # 更新狀態為完成
-        _processing_status[file_id] = {
-            "status": ProcessingStatus.COMPLETED.value,
-            "progress": 100,
-            "message": "分塊處理完成",
-            "chunks": chunks,
-            "chunk_count": len(chunks),
-        }
 
         logger.info(
             "文件分塊處理完成",
             file_id=file_id,
-            chunk_count=len(chunks),
+            chunk_count=summary["chunk_count"],
         )
 
     except Exception as e:
@@ -155,12 +151,112 @@ async def process_file_chunking(
             file_id=file_id,
             error=str(e),
         )
-        _processing_status[file_id] = {
-            "status": ProcessingStatus.FAILED.value,
-            "progress": 0,
-            "message": f"處理失敗: {str(e)}",
-            "error": str(e),
-        }
+        _mark_failed(file_id, e)
+
+
+def build_ingestion_pipeline(
+    collection_name: Optional[str],
+    extract_kg: bool,
+    storage: Optional[FileStorage] = None,
+) -> IngestionPipeline:
+    """
+    按配置組裝攝取管線
+
+    Args:
+        collection_name: 寫入的 ChromaDB 集合（None 表示不嵌入與索引）
+        extract_kg: 是否提取三元組並構建知識圖譜
+        storage: 文件存儲（按文件 ID 解析文件時使用）
+
+    Returns:
+        IngestionPipeline 實例
+    """
+    config = get_config_section("chunk_processing", default={}) or {}
+    ingestion_config = config.get("ingestion", {}) or {}
+
+    embed_fn = None
+    collection = None
+    embedding_model = None
+    if collection_name:
+        from databases.chromadb import ChromaCollection
+        from services.api.core.settings import get_ollama_settings
+        from services.api.routers.chromadb import get_chroma_client
+
+        embedding_model = (
+            ingestion_config.get("embedding_model")
+            or get_ollama_settings().embedding_model
+        )
+        embed_fn = make_ollama_embed_fn(
+            model=embedding_model,
+            max_concurrency=int(ingestion_config.get("embedding_concurrency", 8)),
+        )
+        collection = ChromaCollection(
+            get_chroma_client().get_or_create_collection(name=collection_name)
+        )
+
+    triple_service = None
+    kg_service = None
+    if extract_kg:
+        from services.api.routers.triple_extraction import (
+            get_service as get_triple_service,
+        )
+        from services.api.services.kg_builder_service import KGBuilderService
+
+        triple_service = get_triple_service()
+        kg_service = KGBuilderService()
+
+    return IngestionPipeline(
+        get_job_store(),
+        embed_fn=embed_fn,
+        collection=collection,
+        triple_service=triple_service,
+        kg_service=kg_service,
+        config=IngestionConfig.from_dict(ingestion_config),
+        embedding_model=embedding_model,
+        storage=storage,
+    )
+
+
+async def process_file_ingestion(
+    file_id: str,
+    file_path: Optional[str],
+    file_type: Optional[str],
+    collection_name: Optional[str],
+    extract_kg: bool,
+    resume: bool,
+    incremental: bool = False,
+):
+    """
+    異步運行完整攝取管線（解析 → 分塊 → 嵌入 → 索引 → 三元組提取 → 圖譜構建）
+
+    Args:
+        file_id: 文件 ID
+        file_path: 本地文件路徑（None 表示通過文件存儲按文件 ID 解析）
+        file_type: 文件類型（MIME 類型）
+        collection_name: 寫入的 ChromaDB 集合
+        extract_kg: 是否提取三元組並構建知識圖譜
+        resume: 是否從上次進度續跑
+        incremental: 是否增量攝取（只處理內容變化的分塊）
+    """
+    try:
+        parser = get_parser(file_type or "text/plain")
+        pipeline = build_ingestion_pipeline(
+            collection_name,
+            extract_kg,
+            storage=get_storage() if file_path is None else None,
+        )
+        await pipeline.run(
+            file_id,
+            file_path,
+            parser,
+            get_chunk_processor(),
+            resume=resume,
+            incremental=incremental,
+        )
+    except Exception as e:
+        logger.error("文件攝取失敗", file_id=file_id, error=str(e))
+        status_info = get_job_store().get_status(file_id) or {}
+        if status_info.get("status") != ProcessingStatus.FAILED.value:
+            _mark_failed(file_id, e)
 
 
 @router.post("/{file_id}/chunk")
@@ -191,43 +287,32 @@ async def trigger_chunk_processing(
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
-    # 檢查是否已在處理中
-    if file_id in _processing_status:
-        status_info = _processing_status[file_id]
-        if status_info["status"] == ProcessingStatus.PROCESSING.value:
-            return APIResponse.error(
-                message="文件正在處理中",
-                details=status_info,
-                status_code=status.HTTP_409_CONFLICT,
-            )
-
-    # 獲取文件路徑和類型
-    file_path = storage.get_file_path(file_id)
-    if file_path is None:
+    # 按文件名推斷類型（對象存儲只讀元數據，解析時再按需讀取內容）
+    filename = storage.get_filename(file_id)
+    if filename is None:
         return APIResponse.error(
-            message="無法獲取文件路徑",
+            message="無法獲取文件信息",
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-    # 從文件擴展名推斷文件類型
-    file_ext = os.path.splitext(file_path)[1].lower()
-    file_type_map = {
-        ".txt": "text/plain",
-        ".md": "text/markdown",
-        ".pdf": "application/pdf",
-        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    }
-    file_type = file_type_map.get(file_ext)
+    file_type = _infer_file_type(filename)
 
-    # 初始化處理狀態
-    _processing_status[file_id] = {
-        "status": ProcessingStatus.PENDING.value,
-        "progress": 0,
-        "message": "等待處理",
-    }
+    # 初始化處理狀態（已在處理中則拒絕，多個 worker 之間同樣生效）
+    job_store = get_job_store()
+    if not job_store.claim(
+        file_id,
+        status=ProcessingStatus.PENDING.value,
+        progress=0,
+        message="等待處理",
+    ):
+        return APIResponse.error(
+            message="文件正在處理中",
+            details=job_store.get_status(file_id),
+            status_code=status.HTTP_409_CONFLICT,
+        )
 
     # 添加後台任務
-    background_tasks.add_task(process_file_chunking, file_id, file_path, file_type)
+    background_tasks.add_task(process_file_chunking, file_id, None, file_type)
 
     return APIResponse.success(
         data={
@@ -239,6 +324,87 @@ async def trigger_chunk_processing(
     )
 
 
+@router.post("/{file_id}/ingest")
+async def trigger_file_ingestion(
+    file_id: str,
+    background_tasks: BackgroundTasks,
+    collection_name: Optional[str] = None,
+    extract_kg: bool = False,
+    resume: bool = True,
+    incremental: bool = False,
+) -> JSONResponse:
+    """
+    觸發文件攝取（解析、分塊、嵌入、寫入向量庫，可選提取三元組並構建知識圖譜）
+
+    文件內容被替換後（PUT /files/{file_id}）使用 incremental=true，只嵌入和提取
+    新增分塊，刪除消失的分塊，未變分塊保持不動。
+
+    Args:
+        file_id: 文件 ID
+        background_tasks: FastAPI 後台任務
+        collection_name: 寫入的 ChromaDB 集合（不提供時使用配置中的默認集合）
+        extract_kg: 是否提取三元組並構建知識圖譜
+        resume: 是否從上次中斷的進度續跑
+        incremental: 是否增量攝取（忽略 resume）
+
+    Returns:
+        攝取任務已啟動
+    """
+    storage = get_storage()
+    filename = storage.get_filename(file_id)
+    if filename is None:
+        return APIResponse.error(
+            message="文件不存在",
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    config = get_config_section("chunk_processing", default={}) or {}
+    collection_name = collection_name or (config.get("ingestion", {}) or {}).get(
+        "collection_name", "documents"
+    )
+
+    # 續跑時保留各階段進度
+    job_store = get_job_store()
+    previous = job_store.get_status(file_id) or {}
+    fields = {}
+    if resume and not incremental and previous.get("stages"):
+        fields["stages"] = previous["stages"]
+    if not job_store.claim(
+        file_id,
+        status=ProcessingStatus.PENDING.value,
+        progress=0,
+        message="等待處理",
+        **fields,
+    ):
+        return APIResponse.error(
+            message="文件正在處理中",
+            details=job_store.get_status(file_id),
+            status_code=status.HTTP_409_CONFLICT,
+        )
+
+    background_tasks.add_task(
+        process_file_ingestion,
+        file_id,
+        None,
+        _infer_file_type(filename),
+        collection_name,
+        extract_kg,
+        resume,
+        incremental,
+    )
+
+    return APIResponse.success(
+        data={
+            "file_id": file_id,
+            "status": ProcessingStatus.PENDING.value,
+            "collection_name": collection_name,
+            "extract_kg": extract_kg,
+            "incremental": incremental,
+        },
+        message="文件攝取任務已啟動",
+    )
+
+
 @router.get("/{file_id}/chunk/status")
 async def get_chunk_status(file_id: str) -> JSONResponse:
     """
@@ -250,14 +416,13 @@ async def get_chunk_status(file_id: str) -> JSONResponse:
     Returns:
         處理狀態和結果
     """
-    if file_id not in _processing_status:
+    status_info = get_job_store().get_status(file_id)
+    if status_info is None:
         return APIResponse.error(
             message="未找到處理任務",
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
-    status_info = _processing_status[file_id].copy()
-
     # 如果處理完成，返回分塊信息（但不返回完整分塊內容，只返回統計信息）
     if status_info["status"] == ProcessingStatus.COMPLETED.value:
         chunk_count = status_info.get("chunk_count", 0)
@@ -268,6 +433,8 @@ async def get_chunk_status(file_id: str) -> JSONResponse:
                 "progress": status_info["progress"],
                 "message": status_info["message"],
                 "chunk_count": chunk_count,
+                "stages": status_info.get("stages"),
+                "throughput": status_info.get("throughput"),
             },
             message="處理完成",
         )
@@ -278,6 +445,7 @@ async def get_chunk_status(file_id: str) -> JSONResponse:
             "status": status_info["status"],
             "progress": status_info.get("progress", 0),
             "message": status_info.get("message", ""),
+            "stages": status_info.get("stages"),
         },
     )
 
@@ -297,14 +465,14 @@ async def get_file_chunks(
     Returns:
         分塊列表
     """
-    if file_id not in _processing_status:
+    job_store = get_job_store()
+    status_info = job_store.get_status(file_id)
+    if status_info is None:
         return APIResponse.error(
             message="未找到處理任務",
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
-    status_info = _processing_status[file_id]
-
     if status_info["status"] != ProcessingStatus.COMPLETED.value:
         return APIResponse.error(
             message="文件尚未完成分塊處理",
@@ -312,19 +480,14 @@ async def get_file_chunks(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    chunks = status_info.get("chunks", [])
-
-    # 應用分頁
-    if offset is not None:
-        chunks = chunks[offset:]
-    if limit is not None:
-        chunks = chunks[:limit]
+    # 按範圍從分塊存儲讀取，不載入全部分塊
+    chunks = job_store.get_chunks(file_id, offset=offset or 0, limit=limit)
 
     return APIResponse.success(
         data={
             "file_id": file_id,
             "chunks": chunks,
-            "total": len(status_info.get("chunks", [])),
+            "total": job_store.count_chunks(file_id),
             "returned": len(chunks),
         },
     )
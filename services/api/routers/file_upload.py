@@ -1,21 +1,24 @@
 # 代碼功能說明: 文件上傳路由
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """文件上傳路由 - 提供文件上傳、驗證和存儲功能"""
 
+import asyncio
 import os
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from fastapi import APIRouter, UploadFile, File, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse
 import structlog
 
 from services.api.core.response import APIResponse
 from services.api.utils.file_validator import (
+    FileValidationError,
     FileValidator,
     create_validator_from_config,
 )
+from services.api.utils.upload_stream import DEFAULT_CHUNK_SIZE, spool_upload
 from services.api.storage.file_storage import (
     FileStorage,
     create_storage_from_config,
@@ -28,6 +31,9 @@ logger = structlog.get_logger(__name__)
 
 router = APIRouter(prefix="/files", tags=["File Upload"])
 
+# 同一請求內並發處理的文件數
+DEFAULT_UPLOAD_CONCURRENCY = 4
+
 # 全局驗證器、存儲和元數據服務實例（懶加載）
 _validator: Optional[FileValidator] = None
 _storage: Optional[FileStorage] = None
@@ -60,6 +66,108 @@ def get_metadata_service() -> FileMetadataService:
     return _metadata_service
 
 
+async def _upload_one(
+    file: UploadFile,
+    user_id: Optional[str],
+    chunk_size: int,
+    file_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    處理單個上傳文件：流式寫入暫存文件、按內容哈希去重保存並創建元數據
+
+    Args:
+        file: 上傳文件
+        user_id: 用戶 ID
+        chunk_size: 每次讀取的字節數
+        file_id: 要替換內容的現有文件 ID（不提供時生成新 ID）
+
+    Returns:
+        {"result": ...} 或 {"error": ...}
+    """
+    validator = get_validator()
+    storage = get_storage()
+
+    try:
+        spooled = await spool_upload(
+            file, validator, temp_dir=storage.temp_dir, chunk_size=chunk_size
+        )
+    except FileValidationError as e:
+        return {"error": {"filename": file.filename, "error": str(e)}}
+    except Exception as e:
+        logger.error("文件上傳失敗", filename=file.filename, error=str(e))
+        return {"error": {"filename": file.filename, "error": f"上傳失敗: {str(e)}"}}
+
+    try:
+        # 保存文件（相同內容的文件共享存儲）；替換時新內容沿用原文件 ID
+        # （分塊 ID 因此可與舊版本比對），存儲在新內容就位後才釋放舊內容
+        stored = await asyncio.to_thread(
+            storage.save_file_from_path,
+            spooled.temp_path,
+            spooled.filename,
+            spooled.content_hash,
+            file_id,
+        )
+    except Exception as e:
+        if os.path.exists(spooled.temp_path):
+            os.remove(spooled.temp_path)
+        logger.error("文件上傳失敗", filename=file.filename, error=str(e))
+        return {"error": {"filename": file.filename, "error": f"上傳失敗: {str(e)}"}}
+
+    # 獲取文件類型
+    file_type = validator.get_file_type(spooled.filename)
+
+    # 創建元數據（替換時只更新內容相關字段，保留用戶、標籤等原有元數據）
+    try:
+        metadata_service = get_metadata_service()
+        updated = None
+        if file_id is not None:
+            updated = await asyncio.to_thread(
+                metadata_service.update_content,
+                file_id,
+                spooled.filename,
+                file_type or "application/octet-stream",
+                spooled.file_size,
+                spooled.content_hash,
+            )
+        if updated is None:
+            metadata_create = FileMetadataCreate(
+                file_id=stored.file_id,
+                filename=spooled.filename,
+                file_type=file_type or "application/octet-stream",
+                file_size=spooled.file_size,
+                content_hash=spooled.content_hash,
+                user_id=user_id,
+            )
+            await asyncio.to_thread(metadata_service.create, metadata_create)
+    except Exception as e:
+        logger.warning(
+            "元數據創建失敗（文件已上傳）",
+            file_id=stored.file_id,
+            error=str(e),
+        )
+
+    logger.info(
+        "文件上傳成功",
+        file_id=stored.file_id,
+        filename=spooled.filename,
+        file_size=spooled.file_size,
+        deduplicated=stored.deduplicated,
+    )
+
+    return {
+        "result": {
+            "file_id": stored.file_id,
+            "filename": spooled.filename,
+            "file_type": file_type,
+            "file_size": spooled.file_size,
+            "file_path": stored.file_path,
+            "content_hash": spooled.content_hash,
+            "deduplicated": stored.deduplicated,
+            "ref_count": stored.ref_count,
+        }
+    }
+
+
 @router.post("/upload")
 async def upload_files(
     files: List[UploadFile] = File(...),
@@ -81,85 +189,20 @@ async def upload_files(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    validator = get_validator()
-    storage = get_storage()
-
-    results = []
-    errors = []
-
-    for file in files:
-        try:
-            # 讀取文件內容
-            file_content = await file.read()
-
-            # 驗證文件
-            is_valid, error_msg = validator.validate_upload_file(
-                file_content, file.filename
-            )
-
-            if not is_valid:
-                errors.append(
-                    {
-                        "filename": file.filename,
-                        "error": error_msg,
-                    }
-                )
-                continue
-
-            # 保存文件
-            file_id, file_path = storage.save_file(file_content, file.filename)
-
-            # 獲取文件類型
-            file_type = validator.get_file_type(file.filename)
-
-            # 創建元數據
-            try:
-                metadata_service = get_metadata_service()
-                metadata_create = FileMetadataCreate(
-                    file_id=file_id,
-                    filename=file.filename,
-                    file_type=file_type or "application/octet-stream",
-                    file_size=len(file_content),
-                    user_id=user_id,
-                )
-                metadata_service.create(metadata_create)
-            except Exception as e:
-                logger.warning(
-                    "元數據創建失敗（文件已上傳）",
-                    file_id=file_id,
-                    error=str(e),
-                )
-
-            # 構建結果
-            result = {
-                "file_id": file_id,
-                "filename": file.filename,
-                "file_type": file_type,
-                "file_size": len(file_content),
-                "file_path": file_path,
-            }
+    config = get_config_section("file_upload", default={}) or {}
+    chunk_size = config.get("upload_chunk_size", DEFAULT_CHUNK_SIZE)
+    semaphore = asyncio.Semaphore(
+        config.get("upload_concurrency", DEFAULT_UPLOAD_CONCURRENCY)
+    )
 
-            results.append(result)
+    async def _bounded(file: UploadFile) -> Dict[str, Any]:
+        async with semaphore:
+            return await _upload_one(file, user_id, chunk_size)
 
-            logger.info(
-                "文件上傳成功",
-                file_id=file_id,
-                filename=file.filename,
-                file_size=len(file_content),
-            )
+    outcomes = await asyncio.gather(*(_bounded(file) for file in files))
 
-        except Exception as e:
-            logger.error(
-                "文件上傳失敗",
-                filename=file.filename,
-                error=str(e),
-            )
-            errors.append(
-                {
-                    "filename": file.filename,
-                    "error": f"上傳失敗: {str(e)}",
-                }
-            )
+    results = [outcome["result"] for outcome in outcomes if "result" in outcome]
+    errors = [outcome["error"] for outcome in outcomes if "error" in outcome]
 
     # 構建響應
     response_data = {
@@ -192,6 +235,49 @@ async def upload_files(
         )
 
 
+@router.put("/{file_id}")
+async def replace_file(
+    file_id: str,
+    file: UploadFile = File(...),
+    user_id: Optional[str] = None,
+) -> JSONResponse:
+    """
+    替換文件內容（保留文件 ID）
+
+    替換後可通過 POST /files/{file_id}/ingest?incremental=true
+    增量攝取，只處理內容變化的分塊。
+
+    Args:
+        file_id: 文件 ID
+        file: 新版本文件
+        user_id: 用戶 ID（可選）
+
+    Returns:
+        替換結果
+    """
+    storage = get_storage()
+    if not storage.file_exists(file_id):
+        return APIResponse.error(
+            message="文件不存在",
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    config = get_config_section("file_upload", default={}) or {}
+    outcome = await _upload_one(
+        file,
+        user_id,
+        config.get("upload_chunk_size", DEFAULT_CHUNK_SIZE),
+        file_id=file_id,
+    )
+    if "error" in outcome:
+        return APIResponse.error(
+            message="文件替換失敗",
+            details=outcome["error"],
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    return APIResponse.success(data=outcome["result"], message="文件替換成功")
+
+
 @router.get("/{file_id}")
 async def get_file_info(file_id: str) -> JSONResponse:
     """
@@ -228,6 +314,46 @@ async def get_file_info(file_id: str) -> JSONResponse:
     )
 
 
+@router.get("/{file_id}/download", response_model=None)
+async def download_file(file_id: str) -> Union[FileResponse, JSONResponse]:
+    """
+    下載文件
+
+    直接由磁盤流式返回（支持 Range 請求；服務器支持 ASGI pathsend 擴展時
+    由服務器以 sendfile 零拷貝發送），不將文件讀入內存。
+
+    Args:
+        file_id: 文件 ID
+
+    Returns:
+        文件內容
+    """
+    storage = get_storage()
+    file_path = storage.get_file_path(file_id)
+
+    if file_path is None:
+        return APIResponse.error(
+            message="文件不存在",
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    # 存儲路徑只有 <file_id>.<ext>，下載文件名取自元數據中的原始文件名
+    filename = os.path.basename(file_path)
+    try:
+        metadata = await asyncio.to_thread(get_metadata_service().get, file_id)
+        if metadata is not None:
+            filename = metadata.filename
+    except Exception as e:
+        logger.warning("元數據讀取失敗，使用存儲文件名", file_id=file_id, error=str(e))
+
+    return FileResponse(
+        file_path,
+        filename=filename,
+        media_type=get_validator().get_file_type(filename)
+        or "application/octet-stream",
+    )
+
+
 @router.delete("/{file_id}")
 async def delete_file(file_id: str) -> JSONResponse:
     """
@@ -247,7 +373,7 @@ async def delete_file(file_id: str) -> JSONResponse:
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
-    success = storage.delete_file(file_id)
+    success = await asyncio.to_thread(storage.delete_file, file_id)
 
     if success:
         return APIResponse.success(
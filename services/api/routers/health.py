@@ -1,7 +1,7 @@
 # 代碼功能說明: 健康檢查路由
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """健康檢查端點"""
 
@@ -9,6 +9,7 @@ from fastapi import APIRouter, status
 from fastapi.responses import Response
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from core.cache import get_cache_stats
 from services.api.core.response import APIResponse
 from services.api.core.version import get_version_info
 
@@ -61,3 +62,17 @@ async def metrics():
     """
     payload = generate_latest()
     return Response(content=payload, media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/metrics/cache", status_code=status.HTTP_200_OK)
+async def cache_metrics():
+    """
+    進程內緩存統計端點（大小、命中率、淘汰與過期次數）。
+
+    Returns:
+        各已註冊緩存的統計信息
+    """
+    return APIResponse.success(
+        data={"caches": get_cache_stats()},
+        message="Cache metrics retrieved",
+    )
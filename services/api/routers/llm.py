@@ -1,7 +1,7 @@
 # 代碼功能說明: LLM / Ollama API 路由
 # 創建日期: 2025-11-25 23:57 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25 23:57 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """提供生成、對話與嵌入端點，封裝 Ollama 服務。"""
 
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from typing import Annotated, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
 from llm.clients.ollama import (
     OllamaClient,
@@ -25,6 +25,7 @@ from services.api.models.ollama import (
     OllamaEmbeddingRequest,
     OllamaGenerateRequest,
 )
+from services.api.utils import embedding_codec
 
 # 嘗試導入 MoE 管理器（如果可用）
 try:
@@ -154,24 +155,60 @@ async def create_embeddings(
     request: OllamaEmbeddingRequest,
     client: OllamaClientDep,
 ):
-    """Embeddings 端點，可一次處理多筆文本。"""
+    """
+    Embeddings 端點，可一次處理多筆文本。
+
+    encoding_format 為 base64 / binary 時以 float32 傳輸，避免大量浮點數的 JSON 編碼：
+    base64 時每項的 embedding 為 base64 字符串；binary 時響應體為 (n, dim) 小端
+    float32 字節，維度與條數見 X-Embedding-Dim / X-Embedding-Count 響應頭。
+    """
 
     settings = get_ollama_settings()
     model = request.model or settings.embedding_model
+    texts = request.inputs
 
-    embeddings: List[dict] = []
     try:
-        for text in request.inputs:
-            # 新接口返回 List[float]，直接使用
-            embedding = await client.embeddings(text, model=model)
-            embeddings.append({"text": text, "embedding": embedding})
-        return APIResponse.success(
-            data={"model": model, "items": embeddings},
-            message="Embeddings generated",
-        )
+        if request.encoding_format == "float":
+            embeddings: List[dict] = []
+            for text in texts:
+                # 新接口返回 List[float]，直接使用
+                embedding = await client.embeddings(text, model=model)
+                embeddings.append({"text": text, "embedding": embedding})
+            return APIResponse.success(
+                data={"model": model, "items": embeddings},
+                message="Embeddings generated",
+            )
+
+        vectors = [await client.embeddings_array(t, model=model) for t in texts]
+        matrix = embedding_codec.to_wire_matrix(vectors)
     except Exception as exc:  # noqa: BLE001
         _handle_exception(exc)
 
+    if request.encoding_format == "binary":
+        return Response(
+            content=matrix.tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                embedding_codec.HEADER_COUNT: str(matrix.shape[0]),
+                embedding_codec.HEADER_DIM: str(matrix.shape[1]),
+                embedding_codec.HEADER_DTYPE: "float32-le",
+            },
+        )
+    encoded = embedding_codec.encode_base64(matrix)
+    return APIResponse.success(
+        data={
+            "model": model,
+            "encoding_format": "base64",
+            "dtype": "float32-le",
+            "dim": int(matrix.shape[1]),
+            "items": [
+                {"text": text, "embedding": value}
+                for text, value in zip(texts, encoded)
+            ],
+        },
+        message="Embeddings generated",
+    )
+
 
 @router.get("/health", status_code=status.HTTP_200_OK)
 async def llm_health_check():
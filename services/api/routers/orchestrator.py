@@ -1,7 +1,7 @@
 # 代碼功能說明: Agent Orchestrator API 路由
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """Agent Orchestrator API 路由"""
 
@@ -231,6 +231,20 @@ async def aggregate_results(request: AggregateResultsRequest) -> JSONResponse:
         )
 
 
+@router.get("/orchestrator/metrics", status_code=http_status.HTTP_200_OK)
+async def get_scheduler_metrics() -> JSONResponse:
+    """
+    獲取調度指標（隊列深度、排隊等待時間、分配耗時）
+
+    Returns:
+        調度指標
+    """
+    return APIResponse.success(
+        data=orchestrator.get_scheduler_metrics(),
+        message="Scheduler metrics retrieved successfully",
+    )
+
+
 @router.get("/orchestrator/health", status_code=http_status.HTTP_200_OK)
 async def health_check() -> JSONResponse:
     """
@@ -1,7 +1,7 @@
 # 代碼功能說明: 文件元數據服務
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """文件元數據服務 - 實現 ArangoDB CRUD 和全文搜索"""
 
@@ -48,6 +48,7 @@ class FileMetadataService:
             collection.add_index({"type": "persistent", "fields": ["file_type"]})
             collection.add_index({"type": "persistent", "fields": ["upload_time"]})
             collection.add_index({"type": "persistent", "fields": ["user_id"]})
+            collection.add_index({"type": "persistent", "fields": ["content_hash"]})
 
     def create(self, metadata: FileMetadataCreate) -> FileMetadata:
         """創建文件元數據"""
@@ -59,6 +60,7 @@ class FileMetadataService:
             "filename": metadata.filename,
             "file_type": metadata.file_type,
             "file_size": metadata.file_size,
+            "content_hash": metadata.content_hash,
             "user_id": metadata.user_id,
             "tags": metadata.tags,
             "description": metadata.description,
@@ -111,6 +113,34 @@ class FileMetadataService:
 
         return FileMetadata(**updated_doc)
 
+    def update_content(
+        self,
+        file_id: str,
+        filename: str,
+        file_type: str,
+        file_size: int,
+        content_hash: Optional[str],
+    ) -> Optional[FileMetadata]:
+        """替換文件內容後更新內容相關字段（保留用戶、標籤等其他元數據）"""
+        if self.client.db is None:
+            raise RuntimeError("ArangoDB client is not connected")
+        collection = self.client.db.collection(COLLECTION_NAME)
+        if collection.get(file_id) is None:
+            return None
+
+        collection.update(
+            {
+                "_key": file_id,
+                "filename": filename,
+                "file_type": file_type,
+                "file_size": file_size,
+                "content_hash": content_hash,
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+        )
+        updated_doc = collection.get(file_id)
+        return FileMetadata(**updated_doc) if isinstance(updated_doc, dict) else None
+
     def delete(self, file_id: str) -> bool:
         """刪除文件元數據"""
         if self.client.db is None:
@@ -0,0 +1,671 @@
+# 代碼功能說明: 文件攝取管線
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""文件攝取管線 - 解析 → 分塊 → 嵌入 → 索引 → 三元組提取 → 知識圖譜構建
+
+分塊結果先寫入分塊任務存儲，再按批次從存儲流入後續階段。
+階段之間以有界隊列連接（下游變慢時上游自動等待），每個階段可配置併發數，
+各階段的完成進度（連續完成的分塊數）寫入任務狀態，中斷後可從進度處續跑。
+進度與其目標（分塊配置、向量集合與嵌入模型）一起記錄，目標變化時對應的進度作廢。
+
+增量模式下分塊 ID 由文件 ID 與分塊內容哈希決定：重新分塊後與向量庫中該文件的
+分塊集合比對，只嵌入與提取新增分塊，刪除消失的分塊（含其產生的圖譜關係），
+未變的分塊保持不動。
+"""
+
+import asyncio
+import functools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from services.api.storage.chunk_store import ChunkJobStore
+from services.api.storage.file_storage import FileStorage
+from services.api.telemetry.ingestion import (
+    record_ingestion_run,
+    record_stage_batch,
+    set_queue_depth,
+)
+
+logger = structlog.get_logger(__name__)
+
+# 返回 (n, dim) float32 矩陣或向量列表
+EmbedFn = Callable[[List[str]], Awaitable[Any]]
+
+# 只為下一階段產生中間結果的階段：下一階段已完成的批次無需重跑
+_CONSUMERS = {"embed": "index", "extract": "kg"}
+
+
+@dataclass
+class IngestionConfig:
+    """攝取管線配置"""
+
+    batch_size: int = 32
+    queue_size: int = 4
+    concurrency: Dict[str, int] = field(
+        default_factory=lambda: {"embed": 2, "index": 1, "extract": 2, "kg": 1}
+    )
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "IngestionConfig":
+        """從配置字典創建（chunk_processing.ingestion 區塊）"""
+        default = cls()
+        return cls(
+            batch_size=int(config.get("batch_size", default.batch_size)),
+            queue_size=int(config.get("queue_size", default.queue_size)),
+            concurrency={**default.concurrency, **(config.get("concurrency") or {})},
+        )
+
+
+@dataclass
+class StageStats:
+    """階段吞吐量統計"""
+
+    items: int = 0
+    batches: int = 0
+    skipped: int = 0
+    busy_seconds: float = 0.0
+
+    def to_dict(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "skipped": self.skipped,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "throughput": round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+@dataclass
+class _Batch:
+    """在階段之間流動的分塊批次"""
+
+    start: int
+    end: int
+    chunks: List[Dict[str, Any]]
+    file_metadata: Optional[Dict[str, Any]] = None
+    embeddings: Optional[np.ndarray] = None
+    triples: Optional[List[Any]] = None
+
+
+# 階段處理函數：處理一個批次，結果寫回批次供下一階段使用
+StageHandler = Callable[[_Batch], Awaitable[None]]
+
+
+class _Watermark:
+    """階段進度：亂序完成的批次合併為連續完成的分塊數"""
+
+    def __init__(self, done: int):
+        self.done = done
+        self._completed: Dict[int, int] = {}
+
+    def complete(self, start: int, end: int) -> int:
+        self._completed[start] = end
+        while self.done in self._completed:
+            self.done = self._completed.pop(self.done)
+        return self.done
+
+
+class IngestionPipeline:
+    """文件攝取管線"""
+
+    def __init__(
+        self,
+        job_store: ChunkJobStore,
+        embed_fn: Optional[EmbedFn] = None,
+        collection: Optional[Any] = None,
+        triple_service: Optional[Any] = None,
+        kg_service: Optional[Any] = None,
+        config: Optional[IngestionConfig] = None,
+        embedding_model: Optional[str] = None,
+        storage: Optional[FileStorage] = None,
+    ):
+        """
+        初始化攝取管線
+
+        未提供的組件對應的階段會被跳過：沒有 collection 時不嵌入與索引，
+        沒有 triple_service 時不提取三元組，沒有 kg_service 時不構建圖譜。
+
+        Args:
+            job_store: 分塊任務存儲（保存分塊、狀態與進度）
+            embed_fn: 批量嵌入函數
+            collection: ChromaCollection 實例
+            triple_service: TripleExtractionService 實例
+            kg_service: KGBuilderService 實例
+            config: 管線配置
+            embedding_model: embed_fn 使用的嵌入模型（用於判斷嵌入進度能否復用）
+            storage: 文件存儲（run 未提供文件路徑時按文件 ID 從存儲解析）
+        """
+        self.job_store = job_store
+        self.embed_fn = embed_fn
+        self.collection = collection
+        self.triple_service = triple_service
+        self.kg_service = kg_service
+        self.config = config or IngestionConfig()
+        self.embedding_model = embedding_model
+        self.storage = storage
+
+    @property
+    def stages(self) -> List[str]:
+        """已啟用的階段"""
+        return list(self._stage_handlers())
+
+    def _stage_handlers(self) -> Dict[str, StageHandler]:
+        """已啟用階段的處理函數（按執行順序），依賴在此綁定為非 None 的參數"""
+        handlers: Dict[str, StageHandler] = {}
+        embed_fn, collection = self.embed_fn, self.collection
+        if embed_fn is not None and collection is not None:
+            handlers["embed"] = functools.partial(self._embed, embed_fn)
+            handlers["index"] = functools.partial(self._index, collection)
+        triple_service = self.triple_service
+        if triple_service is not None:
+            handlers["extract"] = functools.partial(self._extract, triple_service)
+            kg_service = self.kg_service
+            if kg_service is not None:
+                handlers["kg"] = functools.partial(self._kg, kg_service)
+        return handlers
+
+    def _targets(self, chunk_processor: Any) -> Dict[str, Any]:
+        """各組階段的目標：分塊配置，以及嵌入/索引寫入的集合與嵌入模型"""
+        targets: Dict[str, Any] = {"chunk": getattr(chunk_processor, "signature", None)}
+        if "embed" in self.stages:
+            targets["index"] = {
+                "collection": getattr(self.collection, "name", None),
+                "embedding_model": self.embedding_model,
+            }
+        return targets
+
+    async def run(
+        self,
+        file_id: str,
+        file_path: Optional[str],
+        parser: Any,
+        chunk_processor: Any,
+        resume: bool = True,
+        incremental: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        運行攝取管線
+
+        Args:
+            file_id: 文件 ID
+            file_path: 本地文件路徑（None 表示通過 storage 解析，對象存儲無需下載整個文件）
+            parser: 文件解析器
+            chunk_processor: 分塊處理器
+            resume: 是否從上次記錄的進度續跑
+            incremental: 是否增量攝取（只處理內容變化的分塊，忽略 resume）
+
+        Returns:
+            運行摘要（分塊數、各階段吞吐量；增量模式附帶 diff 統計）
+        """
+        started = time.perf_counter()
+        resume = resume and not incremental
+        previous = (self.job_store.get_status(file_id) or {}) if resume else {}
+        targets = self._targets(chunk_processor)
+        progress = _reusable_progress(previous, targets)
+        # 先記錄本次的目標與可復用的進度，中斷後續跑不會混用其他目標的進度
+        self.job_store.set_status(file_id, stages=progress, targets=targets)
+        stats = {stage: StageStats() for stage in ["chunk", *self.stages]}
+        current_stage = "chunk"
+        diff: Optional[Dict[str, int]] = None
+        heartbeat = asyncio.create_task(self._heartbeat(file_id))
+
+        try:
+            if incremental:
+                total, pending, diff = await self._diff_chunks(
+                    file_id,
+                    file_path,
+                    parser,
+                    chunk_processor,
+                    progress,
+                    stats["chunk"],
+                )
+            else:
+                total = await self._ensure_chunks(
+                    file_id,
+                    file_path,
+                    parser,
+                    chunk_processor,
+                    progress,
+                    stats["chunk"],
+                )
+                pending = None
+            if self.stages and (pending is None or pending):
+                current_stage = "pipeline"
+                await self._run_stages(file_id, total, progress, stats, pending)
+        except BaseException as exc:
+            error = _root_error(exc)
+            logger.error(
+                "文件攝取失敗", file_id=file_id, stage=current_stage, error=str(error)
+            )
+            self.job_store.set_status(
+                file_id,
+                status="failed",
+                message=f"處理失敗: {error}",
+                error=str(error),
+                stages=progress,
+            )
+            record_ingestion_run("failed")
+            raise error
+        finally:
+            heartbeat.cancel()
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "file_id": file_id,
+            "chunk_count": total,
+            "elapsed_seconds": round(elapsed, 4),
+            "stages": {name: s.to_dict(elapsed) for name, s in stats.items()},
+        }
+        fields: Dict[str, Any] = {}
+        if diff is not None:
+            summary["diff"] = fields["diff"] = diff
+        self.job_store.set_status(
+            file_id,
+            status="completed",
+            progress=100,
+            message="分塊處理完成" if not self.stages else "文件攝取完成",
+            chunk_count=total,
+            stages=progress,
+            throughput=summary["stages"],
+            **fields,
+        )
+        record_ingestion_run("completed")
+        logger.info("文件攝取完成", file_id=file_id, chunk_count=total, diff=diff)
+        return summary
+
+    async def _heartbeat(self, file_id: str) -> None:
+        """運行期間定期刷新任務狀態，避免耗時步驟（如解析大文件）被判為失效"""
+        interval = self.job_store.heartbeat_interval
+        if interval is None:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            self.job_store.heartbeat(file_id)
+
+    async def _parse_and_chunk(
+        self,
+        file_id: str,
+        file_path: Optional[str],
+        parser: Any,
+        chunk_processor: Any,
+        stats: StageStats,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """解析並分塊，返回 (分塊列表, 文件級元數據)"""
+        self.job_store.set_status(
+            file_id, status="processing", progress=0, message="開始解析文件"
+        )
+        began = time.perf_counter()
+        if file_path is None:
+            result = await asyncio.to_thread(self._parse_stored, file_id, parser)
+        else:
+            result = await asyncio.to_thread(parser.parse, file_path)
+        self.job_store.set_status(
+            file_id,
+            progress=50,
+            message="文件解析完成，開始分塊",
+        )
+        # 文件級元數據只在任務狀態中保存一份，不隨每個分塊重複存儲
+        chunks = await asyncio.to_thread(
+            chunk_processor.process, text=result["text"], file_id=file_id
+        )
+        total = self.job_store.save_chunks(file_id, chunks)
+        seconds = time.perf_counter() - began
+
+        stats.items, stats.batches, stats.busy_seconds = total, 1, seconds
+        record_stage_batch("chunk", total, seconds)
+        return chunks, _scalar_metadata(result.get("metadata"))
+
+    def _parse_stored(self, file_id: str, parser: Any) -> Dict[str, Any]:
+        """通過文件存儲解析文件"""
+        if self.storage is None:
+            raise ValueError("未提供文件路徑時攝取管線需要文件存儲")
+        result = self.storage.parse_file(file_id, parser)
+        if result is None:
+            raise FileNotFoundError(f"文件不存在: {file_id}")
+        return result
+
+    async def _ensure_chunks(
+        self,
+        file_id: str,
+        file_path: Optional[str],
+        parser: Any,
+        chunk_processor: Any,
+        progress: Dict[str, Dict[str, Any]],
+        stats: StageStats,
+    ) -> int:
+        """解析並分塊；已有完整分塊時直接復用"""
+        done = (progress.get("chunk") or {}).get("done")
+        if done is not None and self.job_store.count_chunks(file_id) == done:
+            stats.skipped = done
+            return done
+
+        chunks, file_metadata = await self._parse_and_chunk(
+            file_id, file_path, parser, chunk_processor, stats
+        )
+        total = len(chunks)
+        # 重新分塊後分塊 ID 改變，下游進度作廢
+        progress.clear()
+        progress["chunk"] = {"done": total}
+        self.job_store.set_status(
+            file_id,
+            chunk_count=total,
+            stages=progress,
+            file_metadata=file_metadata,
+            message="分塊完成",
+        )
+        return total
+
+    async def _diff_chunks(
+        self,
+        file_id: str,
+        file_path: Optional[str],
+        parser: Any,
+        chunk_processor: Any,
+        progress: Dict[str, Dict[str, Any]],
+        stats: StageStats,
+    ) -> Tuple[int, List[Dict[str, Any]], Dict[str, int]]:
+        """
+        重新分塊並與已索引的分塊比對
+
+        以向量庫中該文件的分塊 ID 為基準（沒有向量庫時以上次保存的分塊為基準）：
+        刪除消失的分塊及其圖譜關係，只更新位置變化的未變分塊的元數據。
+
+        Returns:
+            (分塊總數, 待處理的新增分塊列表, diff 統計)
+        """
+        baseline = await asyncio.to_thread(self._stored_chunks, file_id)
+        chunks, file_metadata = await self._parse_and_chunk(
+            file_id, file_path, parser, chunk_processor, stats
+        )
+        current = {chunk["chunk_id"] for chunk in chunks}
+        added = [chunk for chunk in chunks if chunk["chunk_id"] not in baseline]
+        removed = [chunk_id for chunk_id in baseline if chunk_id not in current]
+
+        # 未變分塊只在位置（chunk_index / 偏移）變化時更新元數據
+        moved_ids: List[str] = []
+        moved_metadatas: List[Dict[str, Any]] = []
+        for chunk in chunks:
+            stored = baseline.get(chunk["chunk_id"])
+            if stored is None:
+                continue
+            metadata = _chunk_metadata(chunk, file_metadata)
+            if any(stored.get(key) != value for key, value in metadata.items()):
+                moved_ids.append(chunk["chunk_id"])
+                moved_metadatas.append(metadata)
+
+        if self.collection is not None:
+            if removed:
+                await asyncio.to_thread(self.collection.delete, ids=removed)
+            if moved_ids:
+                await asyncio.to_thread(
+                    self.collection.update, ids=moved_ids, metadatas=moved_metadatas
+                )
+        if self.kg_service is not None and removed:
+            await asyncio.to_thread(self.kg_service.remove_chunk_sources, removed)
+
+        diff = {
+            "added": len(added),
+            "removed": len(removed),
+            "unchanged": len(chunks) - len(added),
+            "metadata_updated": len(moved_ids),
+        }
+        progress.clear()
+        progress["chunk"] = {"done": len(chunks)}
+        self.job_store.set_status(
+            file_id,
+            chunk_count=len(chunks),
+            stages=progress,
+            file_metadata=file_metadata,
+            diff=diff,
+            message="分塊比對完成",
+        )
+        logger.info("增量分塊比對完成", file_id=file_id, **diff)
+        return len(chunks), added, diff
+
+    def _stored_chunks(self, file_id: str) -> Dict[str, Dict[str, Any]]:
+        """已存儲的分塊：chunk_id → 向量庫元數據"""
+        if self.collection is not None:
+            result = self.collection.get(
+                where={"file_id": file_id}, include=["metadatas"]
+            )
+            ids = result.get("ids") or []
+            metadatas = result.get("metadatas") or [None] * len(ids)
+            return {i: m or {} for i, m in zip(ids, metadatas)}
+        return {chunk["chunk_id"]: {} for chunk in self.job_store.get_chunks(file_id)}
+
+    def _skip_thresholds(self, progress: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """各階段已完成的分塊數（只服務下一階段的階段以下一階段為準）"""
+        marks = {s: int((progress.get(s) or {}).get("done", 0)) for s in self.stages}
+        for stage, consumer in _CONSUMERS.items():
+            if stage in marks and consumer in marks:
+                marks[stage] = min(marks[stage], marks[consumer])
+        return marks
+
+    async def _run_stages(
+        self,
+        file_id: str,
+        total: int,
+        progress: Dict[str, Dict[str, Any]],
+        stats: Dict[str, StageStats],
+        pending: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        # 增量模式只處理新增分塊，進度按新增分塊計
+        if pending is not None:
+            total = len(pending)
+        handlers = self._stage_handlers()
+        stages = list(handlers)
+        skip = self._skip_thresholds(progress)
+        resume_from = min(skip.values())
+        watermarks = {s: _Watermark(resume_from) for s in stages}
+        queues: Dict[str, asyncio.Queue] = {
+            s: asyncio.Queue(maxsize=self.config.queue_size) for s in stages
+        }
+        concurrency = {
+            s: max(1, int(self.config.concurrency.get(s, 1))) for s in stages
+        }
+
+        self.job_store.set_status(file_id, status="processing", message="文件攝取中")
+        file_metadata = (self.job_store.get_status(file_id) or {}).get("file_metadata")
+
+        def commit(stage: str, batch: _Batch) -> None:
+            done = watermarks[stage].complete(batch.start, batch.end)
+            previous = int((progress.get(stage) or {}).get("done", 0))
+            progress[stage] = {"done": max(done, previous), "items": stats[stage].items}
+            overall = min(
+                int(progress[s]["done"]) if s in progress else 0 for s in stages
+            )
+            self.job_store.set_status(
+                file_id,
+                stages=progress,
+                progress=int(overall * 100 / total) if total else 100,
+            )
+
+        async def source() -> None:
+            queue = queues[stages[0]]
+            for offset in range(resume_from, total, self.config.batch_size):
+                if pending is not None:
+                    chunks = pending[offset : offset + self.config.batch_size]
+                else:
+                    chunks = await asyncio.to_thread(
+                        self.job_store.get_chunks,
+                        file_id,
+                        offset,
+                        self.config.batch_size,
+                    )
+                await queue.put(
+                    _Batch(offset, offset + len(chunks), chunks, file_metadata)
+                )
+                set_queue_depth(stages[0], queue.qsize())
+            for _ in range(concurrency[stages[0]]):
+                await queue.put(None)
+
+        async def worker(index: int) -> None:
+            stage = stages[index]
+            inbox = queues[stage]
+            handler = handlers[stage]
+            while True:
+                batch = await inbox.get()
+                set_queue_depth(stage, inbox.qsize())
+                if batch is None:
+                    return
+                if batch.end <= skip[stage]:
+                    stats[stage].skipped += len(batch.chunks)
+                else:
+                    began = time.perf_counter()
+                    await handler(batch)
+                    seconds = time.perf_counter() - began
+                    stats[stage].items += len(batch.chunks)
+                    stats[stage].batches += 1
+                    stats[stage].busy_seconds += seconds
+                    record_stage_batch(stage, len(batch.chunks), seconds)
+                commit(stage, batch)
+                if index + 1 < len(stages):
+                    outbox = queues[stages[index + 1]]
+                    await outbox.put(batch)
+                    set_queue_depth(stages[index + 1], outbox.qsize())
+
+        async def run_stage(index: int) -> None:
+            async with asyncio.TaskGroup() as group:
+                for _ in range(concurrency[stages[index]]):
+                    group.create_task(worker(index))
+            if index + 1 < len(stages):
+                for _ in range(concurrency[stages[index + 1]]):
+                    await queues[stages[index + 1]].put(None)
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(source())
+            for index in range(len(stages)):
+                group.create_task(run_stage(index))
+
+    # ---------- 階段處理函數 ----------
+
+    async def _embed(self, embed_fn: EmbedFn, batch: _Batch) -> None:
+        texts = [chunk["text"] for chunk in batch.chunks]
+        embeddings = await embed_fn(texts)
+        if len(embeddings) != len(texts) or any(len(e) == 0 for e in embeddings):
+            raise ValueError("嵌入服務未回傳有效向量")
+        batch.embeddings = np.asarray(embeddings, dtype=np.float32)
+
+    async def _index(self, collection: Any, batch: _Batch) -> None:
+        items = [
+            {
+                "id": chunk["chunk_id"],
+                "embedding": embedding,
+                "metadata": _chunk_metadata(chunk, batch.file_metadata),
+                "document": chunk["text"],
+            }
+            for chunk, embedding in zip(
+                batch.chunks, batch.embeddings if batch.embeddings is not None else []
+            )
+        ]
+        result = await asyncio.to_thread(
+            collection.batch_add, items, len(items) or None
+        )
+        if result.get("failed"):
+            raise RuntimeError(f"向量索引寫入失敗: {result.get('errors')}")
+
+    async def _extract(self, triple_service: Any, batch: _Batch) -> None:
+        batch.triples = await asyncio.gather(
+            *(triple_service.extract_triples(c["text"]) for c in batch.chunks)
+        )
+
+    async def _kg(self, kg_service: Any, batch: _Batch) -> None:
+        triples: List[Any] = []
+        sources: List[str] = []
+        for chunk, chunk_triples in zip(batch.chunks, batch.triples or []):
+            triples.extend(chunk_triples)
+            sources.extend([chunk["chunk_id"]] * len(chunk_triples))
+        if triples:
+            await kg_service.build_from_triples(triples, source_chunk_ids=sources)
+
+
+def _reusable_progress(
+    previous: Dict[str, Any], targets: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    取出上次運行中目標未變的階段進度
+
+    分塊配置變化時分塊 ID 改變，全部進度作廢；只有向量集合或嵌入模型變化時，
+    只作廢嵌入與索引進度（三元組提取與圖譜構建不依賴它們）。
+
+    Args:
+        previous: 上次的任務狀態
+        targets: 本次運行的目標
+
+    Returns:
+        可復用的階段進度
+    """
+    progress: Dict[str, Dict[str, Any]] = dict(previous.get("stages") or {})
+    recorded = previous.get("targets") or {}
+    if recorded.get("chunk") != targets.get("chunk"):
+        return {}
+    if recorded.get("index") != targets.get("index"):
+        progress.pop("embed", None)
+        progress.pop("index", None)
+    return progress
+
+
+def _root_error(exc: BaseException) -> BaseException:
+    """取出（嵌套）TaskGroup 異常組中的第一個原始異常"""
+    while isinstance(exc, BaseExceptionGroup):
+        exc = exc.exceptions[0]
+    return exc
+
+
+def _scalar_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """只保留標量值（ChromaDB 元數據只接受標量）"""
+    return {
+        key: value
+        for key, value in (metadata or {}).items()
+        if isinstance(value, (str, int, float, bool))
+    }
+
+
+def _chunk_metadata(
+    chunk: Dict[str, Any], file_metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """生成向量庫元數據：文件級元數據 + 分塊級元數據"""
+    metadata = _scalar_metadata(file_metadata)
+    metadata.update(_scalar_metadata(chunk.get("metadata")))
+    metadata["file_id"] = chunk.get("file_id")
+    metadata["chunk_index"] = chunk.get("chunk_index")
+    return metadata
+
+
+def make_ollama_embed_fn(
+    model: Optional[str] = None, max_concurrency: int = 8
+) -> EmbedFn:
+    """
+    創建基於 Ollama 的批量嵌入函數
+
+    Ollama 嵌入接口每次只接受一段文本，批內請求併發發送，結果堆疊為 float32 矩陣。
+
+    Args:
+        model: 嵌入模型（默認使用 Ollama 配置中的嵌入模型）
+        max_concurrency: 批內最大併發請求數
+
+    Returns:
+        批量嵌入函數
+    """
+    from llm.clients.ollama import get_ollama_client
+
+    client = get_ollama_client()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def embed_one(text: str) -> np.ndarray:
+        async with semaphore:
+            return await client.embeddings_array(text, model=model)
+
+    async def embed(texts: List[str]) -> np.ndarray:
+        vectors = await asyncio.gather(*(embed_one(t) for t in texts))
+        if any(v.size == 0 for v in vectors):
+            raise ValueError("嵌入服務未回傳有效向量")
+        return np.stack(vectors) if vectors else np.empty((0, 0), np.float32)
+
+    return embed
@@ -1,11 +1,11 @@
 # 代碼功能說明: 知識圖譜構建服務
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """知識圖譜構建服務 - 實現三元組到圖譜的轉換、實體和關係的創建/更新"""
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, cast
 from datetime import datetime
 import structlog
 import hashlib
@@ -49,6 +49,11 @@ class KGBuilderService:
             collection.add_index({"type": "persistent", "fields": ["type"]})
             collection.add_index({"type": "persistent", "fields": ["weight"]})
 
+        # 關係來源分塊索引（增量攝取時按分塊回收關係；已存在時為冪等操作）
+        self.client.db.collection(RELATIONS_COLLECTION).add_index(
+            {"type": "persistent", "fields": ["source_chunks[*]"]}
+        )
+
     def _generate_entity_key(self, text: str, entity_type: str) -> str:
         """生成實體鍵（用於去重）"""
         # 使用文本和類型的哈希作為鍵
@@ -101,6 +106,7 @@ class KGBuilderService:
         relation_type: str,
         confidence: float,
         context: str,
+        source_chunk_id: Optional[str] = None,
     ) -> Optional[str]:
         """查找或創建關係（關係去重）"""
         if self.client is None or self.client.db is None:
@@ -126,6 +132,9 @@ class KGBuilderService:
                     "confidence": max(existing.get("confidence", 0), confidence),
                     "updated_at": datetime.utcnow().isoformat(),
                 }
+                sources = list(existing.get("source_chunks") or [])
+                if source_chunk_id and source_chunk_id not in sources:
+                    update_data["source_chunks"] = sources + [source_chunk_id]
                 collection.update(update_data)
                 return f"{RELATIONS_COLLECTION}/{relation_key}"
         except Exception:
@@ -140,6 +149,7 @@ class KGBuilderService:
             "confidence": confidence,
             "context": context,
             "weight": confidence,  # 使用置信度作為權重
+            "source_chunks": [source_chunk_id] if source_chunk_id else [],
             "created_at": datetime.utcnow().isoformat(),
             "updated_at": datetime.utcnow().isoformat(),
         }
@@ -147,14 +157,30 @@ class KGBuilderService:
         collection.insert(relation_doc)
         return f"{RELATIONS_COLLECTION}/{relation_key}"
 
-    async def build_from_triples(self, triples: List[Triple]) -> Dict:
-        """從三元組構建知識圖譜"""
+    async def build_from_triples(
+        self,
+        triples: List[Triple],
+        source_chunk_ids: Optional[List[Optional[str]]] = None,
+    ) -> Dict:
+        """
+        從三元組構建知識圖譜
+
+        Args:
+            triples: 三元組列表
+            source_chunk_ids: 與 triples 一一對應的來源分塊 ID（記錄在關係上，
+                增量攝取時用於回收已刪除分塊產生的關係）
+
+        Returns:
+            構建統計
+        """
+        if source_chunk_ids is not None and len(source_chunk_ids) != len(triples):
+            raise ValueError("source_chunk_ids 與 triples 長度不一致")
         entities_created = 0
         entities_updated = 0
         relations_created = 0
         relations_updated = 0
 
-        for triple in triples:
+        for index, triple in enumerate(triples):
             try:
                 # 創建或更新主體實體
                 subject_id = self._find_or_create_entity(
@@ -181,6 +207,7 @@ class KGBuilderService:
                     triple.relation.type,
                     triple.confidence,
                     triple.context,
+                    source_chunk_ids[index] if source_chunk_ids else None,
                 )
                 if relation_id:
                     relations_created += 1
@@ -215,6 +242,62 @@ class KGBuilderService:
             "batches_processed": len(triples_list),
         }
 
+    def remove_chunk_sources(self, chunk_ids: List[str]) -> Dict[str, int]:
+        """
+        移除分塊來源：關係的來源分塊全部被移除時刪除該關係，否則只更新來源列表
+
+        Args:
+            chunk_ids: 已刪除的分塊 ID 列表
+
+        Returns:
+            {"relations_removed": int, "relations_updated": int}
+        """
+        if not chunk_ids:
+            return {"relations_removed": 0, "relations_updated": 0}
+        if self.client is None or self.client.db is None:
+            raise RuntimeError("數據庫連接未初始化")
+        if self.client.db.aql is None:
+            raise RuntimeError("ArangoDB AQL is not available")
+
+        # 以 ANY IN rel.source_chunks[*] 過濾，可使用 source_chunks[*] 數組索引，
+        # 不逐條計算集合交集掃描整個關係集合
+        bind_vars: Dict[str, Any] = {
+            "@relations": RELATIONS_COLLECTION,
+            "chunk_ids": list(chunk_ids),
+        }
+        remove_query = """
+            FOR rel IN @@relations
+                FILTER @chunk_ids ANY IN rel.source_chunks[*]
+                FILTER LENGTH(MINUS(rel.source_chunks, @chunk_ids)) == 0
+                REMOVE rel IN @@relations
+                RETURN 1
+            """
+        update_query = """
+            FOR rel IN @@relations
+                FILTER @chunk_ids ANY IN rel.source_chunks[*]
+                UPDATE rel WITH {
+                    source_chunks: MINUS(rel.source_chunks, @chunk_ids),
+                    updated_at: @now
+                } IN @@relations
+                RETURN 1
+            """
+        # 同步執行時 execute 返回游標（而非異步/批次作業）
+        aql = self.client.db.aql
+        removed = cast(Iterable[Any], aql.execute(remove_query, bind_vars=bind_vars))
+        updated = cast(
+            Iterable[Any],
+            aql.execute(
+                update_query,
+                bind_vars={**bind_vars, "now": datetime.utcnow().isoformat()},
+            ),
+        )
+        result = {
+            "relations_removed": len(list(removed or [])),
+            "relations_updated": len(list(updated or [])),
+        }
+        logger.info("kg_chunk_sources_removed", chunks=len(chunk_ids), **result)
+        return result
+
     def get_entity(self, entity_id: str) -> Optional[Dict]:
         """查詢實體"""
         if self.client.db is None:
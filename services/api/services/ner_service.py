@@ -1,15 +1,16 @@
 # 代碼功能說明: NER 命名實體識別服務
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """NER 命名實體識別服務 - 支持 spaCy 和 Ollama 模型"""
 
 import json
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 import structlog
 
+from agent_process.prompt import PromptManager, get_prompt_manager
 from core.config import get_config_section
 from services.api.models.ner_models import Entity
 from llm.clients.ollama import OllamaClient, get_ollama_client
@@ -44,6 +45,27 @@ SPACY_ENTITY_MAPPING = {
 }
 
 
+# Ollama NER 提示模板：靜態說明在前、待分析文本在後，所有請求共享同一前綴，
+# 便於 Ollama 在 keep_alive 期間復用前綴 KV 緩存
+NER_PROMPT_NAME = "text_analysis.ner"
+NER_PROMPT_TEMPLATE = """請從文本中識別命名實體，並以 JSON 格式返回結果。
+
+請返回 JSON 格式，包含以下字段：
+- text: 實體文本
+- label: 實體類型（PERSON, ORG, LOC, DATE, MONEY, PRODUCT, EVENT 等）
+- start: 實體在文本中的起始位置（字符索引）
+- end: 實體在文本中的結束位置（字符索引）
+- confidence: 置信度（0-1之間的浮點數）
+
+返回格式示例：
+[
+  {{"text": "張三", "label": "PERSON", "start": 0, "end": 2, "confidence": 0.95}},
+  {{"text": "北京", "label": "LOC", "start": 5, "end": 7, "confidence": 0.90}}
+]
+
+文本：{text}"""
+
+
 class BaseNERModel(ABC):
     """NER 模型抽象基類"""
 
@@ -116,25 +138,24 @@ class OllamaNERModel(BaseNERModel):
     """Ollama NER 模型實現"""
 
     def __init__(
-        self, model_name: str = "qwen3-coder:30b", client: Optional[OllamaClient] = None
+        self,
+        model_name: str = "qwen3-coder:30b",
+        client: Optional[OllamaClient] = None,
+        prompt_manager: Optional[PromptManager] = None,
+        keep_alive: Optional[str] = None,
     ):
         self.model_name = model_name
         self.client = client or get_ollama_client()
-        self._prompt_template = """請從以下文本中識別命名實體，並以 JSON 格式返回結果。
-文本：{text}
-
-請返回 JSON 格式，包含以下字段：
-- text: 實體文本
-- label: 實體類型（PERSON, ORG, LOC, DATE, MONEY, PRODUCT, EVENT 等）
-- start: 實體在文本中的起始位置（字符索引）
-- end: 實體在文本中的結束位置（字符索引）
-- confidence: 置信度（0-1之間的浮點數）
+        self.keep_alive = keep_alive
+        self.prompt_manager = prompt_manager or get_prompt_manager()
+        self.prompt_manager.register(
+            NER_PROMPT_NAME, NER_PROMPT_TEMPLATE, description="Ollama NER 實體識別提示"
+        )
 
-返回格式示例：
-[
-  {{"text": "張三", "label": "PERSON", "start": 0, "end": 2, "confidence": 0.95}},
-  {{"text": "北京", "label": "LOC", "start": 5, "end": 7, "confidence": 0.90}}
-]"""
+    @property
+    def prompt_id(self) -> Optional[str]:
+        """當前提示模板的版本化 ID"""
+        return self.prompt_manager.template_id(NER_PROMPT_NAME)
 
     def is_available(self) -> bool:
         """檢查 Ollama 模型是否可用"""
@@ -147,13 +168,17 @@ class OllamaNERModel(BaseNERModel):
                 f"Ollama client is not available for model {self.model_name}"
             )
 
-        prompt = self._prompt_template.format(text=text)
+        prompt = self.prompt_manager.render(NER_PROMPT_NAME, text=text)
+        options: Dict[str, Any] = (
+            {"keep_alive": self.keep_alive} if self.keep_alive else {}
+        )
 
         try:
             response = await self.client.generate(
                 prompt,
                 model=self.model_name,
                 format="json",
+                **options,
             )
 
             if response is None:
@@ -217,6 +242,7 @@ class NERService:
         )
         self.batch_size = self.config.get("batch_size", 32)
         self.enable_gpu = self.config.get("enable_gpu", False)
+        self.keep_alive = self.config.get("keep_alive", "30m")
 
         # 初始化模型
         self._primary_model: Optional[BaseNERModel] = None
@@ -238,7 +264,9 @@ class NERService:
             )
             if model_name.startswith("ollama:"):
                 model_name = model_name.split(":", 1)[1]
-            self._primary_model = OllamaNERModel(model_name=model_name)
+            self._primary_model = OllamaNERModel(
+                model_name=model_name, keep_alive=self.keep_alive
+            )
         else:
             logger.warning("unknown_ner_model_type", model_type=self.model_type)
             self._primary_model = None
@@ -247,10 +275,22 @@ class NERService:
         if self.fallback_model:
             if self.fallback_model.startswith("ollama:"):
                 fallback_name = self.fallback_model.split(":", 1)[1]
-                self._fallback_model = OllamaNERModel(model_name=fallback_name)
+                self._fallback_model = OllamaNERModel(
+                    model_name=fallback_name, keep_alive=self.keep_alive
+                )
             else:
                 self._fallback_model = None
 
+    @property
+    def prompt_version(self) -> Optional[str]:
+        """Ollama 模型使用的提示模板版本（無 Ollama 模型時為 None）"""
+        ids = [
+            model.prompt_id
+            for model in (self._primary_model, self._fallback_model)
+            if isinstance(model, OllamaNERModel)
+        ]
+        return "|".join(filter(None, ids)) or None
+
     def _get_model(self, model_type: Optional[str] = None) -> Optional[BaseNERModel]:
         """獲取可用的模型"""
         requested_type = model_type or self.model_type
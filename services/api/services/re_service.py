@@ -1,15 +1,16 @@
 # 代碼功能說明: RE 關係抽取服務
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """RE 關係抽取服務 - 支持 transformers 和 Ollama 模型"""
 
 import json
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 import structlog
 
+from agent_process.prompt import PromptManager, get_prompt_manager
 from core.config import get_config_section
 from services.api.models.re_models import Relation, RelationEntity
 from services.api.models.ner_models import Entity
@@ -33,6 +34,32 @@ STANDARD_RELATION_TYPES = {
 }
 
 
+# Ollama RE 提示模板：靜態說明在前、實體與文本在後，所有請求共享同一前綴，
+# 便於 Ollama 在 keep_alive 期間復用前綴 KV 緩存
+RE_PROMPT_NAME = "text_analysis.re"
+RE_PROMPT_TEMPLATE = """請從文本中抽取實體之間的關係，並以 JSON 格式返回結果。
+
+請返回 JSON 格式，包含以下字段：
+- subject: 主體實體（包含 text 和 label）
+- relation: 關係類型（LOCATED_IN, WORKS_FOR, PART_OF, RELATED_TO, OCCURS_AT 等）
+- object: 客體實體（包含 text 和 label）
+- confidence: 置信度（0-1之間的浮點數）
+- context: 關係出現的上下文
+
+返回格式示例：
+[
+  {{
+    "subject": {{"text": "張三", "label": "PERSON"}},
+    "relation": "WORKS_FOR",
+    "object": {{"text": "微軟", "label": "ORG"}},
+    "confidence": 0.88,
+    "context": "張三在微軟公司工作"
+  }}
+]
+
+{entities_section}文本：{text}"""
+
+
 class BaseREModel(ABC):
     """RE 模型抽象基類"""
 
@@ -133,33 +160,24 @@ class OllamaREModel(BaseREModel):
     """Ollama RE 模型實現"""
 
     def __init__(
-        self, model_name: str = "qwen3-coder:30b", client: Optional[OllamaClient] = None
+        self,
+        model_name: str = "qwen3-coder:30b",
+        client: Optional[OllamaClient] = None,
+        prompt_manager: Optional[PromptManager] = None,
+        keep_alive: Optional[str] = None,
     ):
         self.model_name = model_name
         self.client = client or get_ollama_client()
-        self._prompt_template = """請從以下文本中抽取實體之間的關係，並以 JSON 格式返回結果。
-
-文本：{text}
-
-{entities_section}
-
-請返回 JSON 格式，包含以下字段：
-- subject: 主體實體（包含 text 和 label）
-- relation: 關係類型（LOCATED_IN, WORKS_FOR, PART_OF, RELATED_TO, OCCURS_AT 等）
-- object: 客體實體（包含 text 和 label）
-- confidence: 置信度（0-1之間的浮點數）
-- context: 關係出現的上下文
+        self.keep_alive = keep_alive
+        self.prompt_manager = prompt_manager or get_prompt_manager()
+        self.prompt_manager.register(
+            RE_PROMPT_NAME, RE_PROMPT_TEMPLATE, description="Ollama RE 關係抽取提示"
+        )
 
-返回格式示例：
-[
-  {{
-    "subject": {{"text": "張三", "label": "PERSON"}},
-    "relation": "WORKS_FOR",
-    "object": {{"text": "微軟", "label": "ORG"}},
-    "confidence": 0.88,
-    "context": "張三在微軟公司工作"
-  }}
-]"""
+    @property
+    def prompt_id(self) -> Optional[str]:
+        """當前提示模板的版本化 ID"""
+        return self.prompt_manager.template_id(RE_PROMPT_NAME)
 
     def is_available(self) -> bool:
         """檢查 Ollama 模型是否可用"""
@@ -178,10 +196,13 @@ class OllamaREModel(BaseREModel):
         entities_section = ""
         if entities:
             entities_text = "\n".join([f"- {e.text} ({e.label})" for e in entities])
-            entities_section = f"已識別的實體：\n{entities_text}\n"
+            entities_section = f"已識別的實體：\n{entities_text}\n\n"
 
-        prompt = self._prompt_template.format(
-            text=text, entities_section=entities_section
+        prompt = self.prompt_manager.render(
+            RE_PROMPT_NAME, text=text, entities_section=entities_section
+        )
+        options: Dict[str, Any] = (
+            {"keep_alive": self.keep_alive} if self.keep_alive else {}
         )
 
         try:
@@ -189,6 +210,7 @@ class OllamaREModel(BaseREModel):
                 prompt,
                 model=self.model_name,
                 format="json",
+                **options,
             )
 
             if response is None:
@@ -267,6 +289,7 @@ class REService:
         )
         self.max_relation_length = self.config.get("max_relation_length", 128)
         self.enable_gpu = self.config.get("enable_gpu", False)
+        self.keep_alive = self.config.get("keep_alive", "30m")
 
         # NER 服務（用於自動實體識別）
         self.ner_service = ner_service or NERService()
@@ -291,7 +314,9 @@ class REService:
             )
             if model_name.startswith("ollama:"):
                 model_name = model_name.split(":", 1)[1]
-            self._primary_model = OllamaREModel(model_name=model_name)
+            self._primary_model = OllamaREModel(
+                model_name=model_name, keep_alive=self.keep_alive
+            )
         else:
             logger.warning("unknown_re_model_type", model_type=self.model_type)
             self._primary_model = None
@@ -300,10 +325,22 @@ class REService:
         if self.fallback_model:
             if self.fallback_model.startswith("ollama:"):
                 fallback_name = self.fallback_model.split(":", 1)[1]
-                self._fallback_model = OllamaREModel(model_name=fallback_name)
+                self._fallback_model = OllamaREModel(
+                    model_name=fallback_name, keep_alive=self.keep_alive
+                )
             else:
                 self._fallback_model = None
 
+    @property
+    def prompt_version(self) -> Optional[str]:
+        """Ollama 模型使用的提示模板版本（無 Ollama 模型時為 None）"""
+        ids = [
+            model.prompt_id
+            for model in (self._primary_model, self._fallback_model)
+            if isinstance(model, OllamaREModel)
+        ]
+        return "|".join(filter(None, ids)) or None
+
     def _get_model(self, model_type: Optional[str] = None) -> Optional[BaseREModel]:
         """獲取可用的模型"""
         requested_type = model_type or self.model_type
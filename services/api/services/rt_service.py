@@ -1,7 +1,7 @@
 # 代碼功能說明: RT 關係類型分類服務
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """RT 關係類型分類服務 - 支持 Ollama 和 transformers 模型"""
 
@@ -10,6 +10,7 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 import structlog
 
+from agent_process.prompt import PromptManager, get_prompt_manager
 from core.config import get_config_section
 from services.api.models.rt_models import RelationType
 from llm.clients.ollama import OllamaClient, get_ollama_client
@@ -49,6 +50,34 @@ RELATION_TYPE_HIERARCHY: Dict[str, List[str]] = {
 }
 
 
+# 關係類型列表在導入時拼接一次，作為提示模板的靜態段
+RELATION_TYPES_PROMPT_LIST = "\n".join(
+    f"- {k}: {v}" for k, v in STANDARD_RELATION_TYPES.items()
+)
+
+# Ollama RT 提示模板：說明與關係類型列表在前、待分類文本在後，所有請求共享同一前綴，
+# 便於 Ollama 在 keep_alive 期間復用前綴 KV 緩存
+RT_PROMPT_NAME = "text_analysis.rt"
+RT_PROMPT_TEMPLATE = """請對關係文本進行分類，識別其關係類型，並以 JSON 格式返回結果。
+
+可選的關係類型包括：
+{relation_types_list}
+
+請返回 JSON 格式，包含以下字段：
+- type: 關係類型名稱
+- confidence: 置信度（0-1之間的浮點數）
+
+注意：一個關係可能屬於多個類型（多標籤分類），請返回所有相關的類型。
+
+返回格式示例：
+[
+  {{"type": "WORKS_FOR", "confidence": 0.9}},
+  {{"type": "RELATED_TO", "confidence": 0.7}}
+]
+
+{context_section}關係文本：{relation_text}"""
+
+
 class BaseRTModel(ABC):
     """RT 模型抽象基類"""
 
@@ -72,29 +101,27 @@ class OllamaRTModel(BaseRTModel):
     """Ollama RT 模型實現"""
 
     def __init__(
-        self, model_name: str = "qwen3-coder:30b", client: Optional[OllamaClient] = None
+        self,
+        model_name: str = "qwen3-coder:30b",
+        client: Optional[OllamaClient] = None,
+        prompt_manager: Optional[PromptManager] = None,
+        keep_alive: Optional[str] = None,
     ):
         self.model_name = model_name
         self.client = client or get_ollama_client()
-        self._prompt_template = """請對以下關係文本進行分類，識別其關係類型，並以 JSON 格式返回結果。
-
-關係文本：{relation_text}
-{context_section}
-
-可選的關係類型包括：
-{relation_types_list}
-
-請返回 JSON 格式，包含以下字段：
-- type: 關係類型名稱
-- confidence: 置信度（0-1之間的浮點數）
-
-注意：一個關係可能屬於多個類型（多標籤分類），請返回所有相關的類型。
+        self.keep_alive = keep_alive
+        self.prompt_manager = prompt_manager or get_prompt_manager()
+        self.prompt_manager.register(
+            RT_PROMPT_NAME,
+            RT_PROMPT_TEMPLATE,
+            description="Ollama RT 關係類型分類提示",
+            static={"relation_types_list": RELATION_TYPES_PROMPT_LIST},
+        )
 
-返回格式示例：
-[
-  {{"type": "WORKS_FOR", "confidence": 0.9}},
-  {{"type": "RELATED_TO", "confidence": 0.7}}
-]"""
+    @property
+    def prompt_id(self) -> Optional[str]:
+        """當前提示模板的版本化 ID"""
+        return self.prompt_manager.template_id(RT_PROMPT_NAME)
 
     def is_available(self) -> bool:
         """檢查 Ollama 模型是否可用"""
@@ -117,15 +144,13 @@ class OllamaRTModel(BaseRTModel):
         if subject_text and object_text:
             context_section = f"主體：{subject_text}\n客體：{object_text}\n"
 
-        # 構建關係類型列表
-        relation_types_list = "\n".join(
-            [f"- {k}: {v}" for k, v in STANDARD_RELATION_TYPES.items()]
-        )
-
-        prompt = self._prompt_template.format(
+        prompt = self.prompt_manager.render(
+            RT_PROMPT_NAME,
             relation_text=relation_text,
             context_section=context_section,
-            relation_types_list=relation_types_list,
+        )
+        options: Dict[str, Any] = (
+            {"keep_alive": self.keep_alive} if self.keep_alive else {}
         )
 
         try:
@@ -133,6 +158,7 @@ class OllamaRTModel(BaseRTModel):
                 prompt,
                 model=self.model_name,
                 format="json",
+                **options,
             )
 
             if response is None:
@@ -268,6 +294,7 @@ class RTService:
         self.model_name = self.config.get("model_name", "qwen3-coder:30b")
         self.classification_threshold = self.config.get("classification_threshold", 0.7)
         self.enable_gpu = self.config.get("enable_gpu", False)
+        self.keep_alive = self.config.get("keep_alive", "30m")
 
         # 初始化模型
         self._primary_model: Optional[BaseRTModel] = None
@@ -285,7 +312,9 @@ class RTService:
             )
             if model_name.startswith("ollama:"):
                 model_name = model_name.split(":", 1)[1]
-            self._primary_model = OllamaRTModel(model_name=model_name)
+            self._primary_model = OllamaRTModel(
+                model_name=model_name, keep_alive=self.keep_alive
+            )
         elif self.model_type == "transformers":
             self._primary_model = TransformersRTModel(
                 model_name=self.model_name, enable_gpu=self.enable_gpu
@@ -302,6 +331,13 @@ class RTService:
         else:
             self._fallback_model = None
 
+    @property
+    def prompt_version(self) -> Optional[str]:
+        """Ollama 模型使用的提示模板版本（無 Ollama 模型時為 None）"""
+        if isinstance(self._primary_model, OllamaRTModel):
+            return self._primary_model.prompt_id
+        return None
+
     def _get_model(self, model_type: Optional[str] = None) -> Optional[BaseRTModel]:
         """獲取可用的模型"""
         requested_type = model_type or self.model_type
@@ -1,13 +1,14 @@
 # 代碼功能說明: 三元組提取服務
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """三元組提取服務 - 整合 NER、RE、RT 服務實現三元組提取"""
 
-from typing import List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 import structlog
 
+from core.cache import TTLCache, make_cache_key
 from services.api.models.triple_models import Triple, TripleEntity, TripleRelation
 from services.api.models.ner_models import Entity
 from services.api.models.re_models import Relation
@@ -27,13 +28,48 @@ class TripleExtractionService:
         ner_service: Optional[NERService] = None,
         re_service: Optional[REService] = None,
         rt_service: Optional[RTService] = None,
+        cache_enabled: bool = True,
+        cache_ttl: int = 3600,
+        cache_max_size: int = 1024,
     ):
         self.ner_service = ner_service or NERService()
         self.re_service = re_service or REService(ner_service=self.ner_service)
         self.rt_service = rt_service or RTService()
 
-        # 結果緩存（簡單實現，使用文本哈希）
-        self._cache: dict = {}
+        # 結果緩存（有界 LRU + TTL，鍵為文本與參數的哈希，值為不可變快照）
+        self.cache_enabled = cache_enabled
+        self._cache: TTLCache[Tuple[Triple, ...]] = TTLCache(
+            "text_analysis.triple_extraction",
+            max_size=cache_max_size,
+            ttl=cache_ttl,
+            freeze=lambda triples: tuple(t.model_copy(deep=True) for t in triples),
+            thaw=lambda triples: [t.model_copy(deep=True) for t in triples],
+        )
+
+    def _prompt_versions(self) -> Tuple[Optional[str], ...]:
+        """NER/RE/RT 提示模板版本（模板變化時使舊緩存失效）"""
+        versions = []
+        for service in (self.ner_service, self.re_service, self.rt_service):
+            version = getattr(service, "prompt_version", None)
+            versions.append(version if isinstance(version, str) else None)
+        return tuple(versions)
+
+    def _get_cache_key(
+        self, text: str, entities: Optional[List[Entity]], enable_ner: bool
+    ) -> str:
+        """生成緩存鍵（包含提示模板版本）"""
+        entity_key = (
+            [e.model_dump() for e in entities] if entities is not None else None
+        )
+        return make_cache_key(self._prompt_versions(), text, entity_key, enable_ner)
+
+    def clear_cache(self) -> int:
+        """清空結果緩存"""
+        return self._cache.clear()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """獲取緩存統計"""
+        return self._cache.stats().to_dict()
 
     def _calculate_triple_confidence(
         self, entity_confidence: float, relation_confidence: float, rt_confidence: float
@@ -110,6 +146,24 @@ class TripleExtractionService:
         enable_ner: bool = True,
     ) -> List[Triple]:
         """提取三元組"""
+        cache_key = self._get_cache_key(text, entities, enable_ner)
+        if self.cache_enabled:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        triples = await self._extract_triples_uncached(text, entities, enable_ner)
+        if self.cache_enabled:
+            self._cache.set(cache_key, triples)
+        return triples
+
+    async def _extract_triples_uncached(
+        self,
+        text: str,
+        entities: Optional[List[Entity]],
+        enable_ner: bool,
+    ) -> List[Triple]:
+        """執行 NER → RE → RT 三元組提取流程（不經過緩存）"""
         # 步驟 1: NER（實體識別）
         if entities is None and enable_ner:
             if self.ner_service is None:
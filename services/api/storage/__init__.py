@@ -1,10 +1,10 @@
 # 代碼功能說明: 文件存儲模組
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """文件存儲模組"""
 
-from .file_storage import FileStorage, LocalFileStorage
+from .file_storage import FileStorage, LocalFileStorage, StoredFile
 
-__all__ = ["FileStorage", "LocalFileStorage"]
+__all__ = ["FileStorage", "LocalFileStorage", "StoredFile"]
@@ -0,0 +1,550 @@
+# 代碼功能說明: 分塊任務狀態與分塊存儲
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""分塊任務存儲模組 - 持久化分塊處理狀態與分塊結果，支持多 worker 共享與按範圍分頁"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import structlog
+
+from databases.redis.serialization import Serializer, get_serializer
+
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows：退化為進程內鎖
+    FCNTL_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+# 無 fcntl 時本地存儲的狀態讀改寫只能在進程內互斥
+_PROCESS_LOCK = threading.Lock()
+# 本地存儲目錄 -> 上次清理過期文件的時間
+_LAST_PURGE: Dict[str, float] = {}
+
+# 任務進行中的狀態，處於這些狀態時不能重複提交
+ACTIVE_STATUSES = ("pending", "processing")
+
+
+class ChunkJobStore(ABC):
+    """
+    分塊任務存儲抽象基類
+
+    狀態寫入時自動記錄 updated_at；進行中的任務超過 stale_after 秒未更新
+    （例如處理它的 worker 已退出）時視為失效，允許重新提交。
+    處理任務的 worker 應以 heartbeat_interval 為間隔調用 heartbeat()，
+    避免耗時較長的單個步驟（如解析大文件）被誤判為失效。
+    """
+
+    stale_after: Optional[float] = 1800.0
+
+    @property
+    def heartbeat_interval(self) -> Optional[float]:
+        """心跳間隔（秒），不判斷失效時為 None"""
+        if self.stale_after is None:
+            return None
+        return max(self.stale_after / 3, 0.05)
+
+    def heartbeat(self, file_id: str) -> None:
+        """
+        刷新進行中任務的 updated_at
+
+        Args:
+            file_id: 文件 ID
+        """
+        self.set_status(file_id)
+
+    def is_active(self, status: Optional[Dict[str, Any]]) -> bool:
+        """
+        判斷任務是否仍在進行中
+
+        Args:
+            status: 狀態字典
+
+        Returns:
+            是否進行中
+        """
+        if not status or status.get("status") not in ACTIVE_STATUSES:
+            return False
+        if self.stale_after is None:
+            return True
+        return time.time() - float(status.get("updated_at", 0)) < self.stale_after
+
+    @abstractmethod
+    def get_status(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """
+        獲取處理狀態
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            狀態字典，不存在或已過期時返回 None
+        """
+        pass
+
+    @abstractmethod
+    def set_status(self, file_id: str, **fields: Any) -> None:
+        """
+        更新處理狀態（與已有字段合併）
+
+        Args:
+            file_id: 文件 ID
+            **fields: 狀態字段
+        """
+        pass
+
+    @abstractmethod
+    def claim(self, file_id: str, **fields: Any) -> bool:
+        """
+        原子地創建新的處理任務
+
+        Args:
+            file_id: 文件 ID
+            **fields: 初始狀態字段（覆蓋舊狀態）
+
+        Returns:
+            是否成功；文件已有進行中的任務時返回 False
+        """
+        pass
+
+    @abstractmethod
+    def save_chunks(self, file_id: str, chunks: List[Dict[str, Any]]) -> int:
+        """
+        保存分塊（整體替換舊分塊）
+
+        Args:
+            file_id: 文件 ID
+            chunks: 分塊列表
+
+        Returns:
+            保存的分塊數量
+        """
+        pass
+
+    @abstractmethod
+    def get_chunks(
+        self, file_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        按範圍讀取分塊
+
+        Args:
+            file_id: 文件 ID
+            offset: 起始位置
+            limit: 最大數量（None 表示讀到末尾）
+
+        Returns:
+            分塊列表
+        """
+        pass
+
+    @abstractmethod
+    def count_chunks(self, file_id: str) -> int:
+        """
+        獲取分塊總數
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            分塊數量
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, file_id: str) -> None:
+        """
+        刪除文件的處理狀態和分塊
+
+        Args:
+            file_id: 文件 ID
+        """
+        pass
+
+
+class RedisChunkJobStore(ChunkJobStore):
+    """
+    Redis 分塊任務存儲
+
+    - 狀態存為 Hash（``{prefix}job:{file_id}``），字段值為 JSON
+    - 分塊存為 List（``{prefix}chunks:{file_id}``），分頁使用 LRANGE
+    - 兩者都設置 TTL，過期後自動清理
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        key_prefix: str = "ai-box:chunking:",
+        ttl: Optional[int] = 86400,
+        serializer: Optional[Serializer] = None,
+        batch_size: int = 500,
+        stale_after: Optional[float] = 1800.0,
+    ):
+        """
+        初始化 Redis 分塊任務存儲
+
+        Args:
+            client: redis.Redis 客戶端
+            key_prefix: 鍵前綴
+            ttl: 狀態與分塊的過期秒數（None 表示不過期）
+            serializer: 分塊序列化器（默認 json）
+            batch_size: 寫入分塊時每次 RPUSH 的數量
+            stale_after: 進行中任務的失效秒數
+        """
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+        self.serializer = serializer or get_serializer("json")
+        self.batch_size = batch_size
+        self.stale_after = stale_after
+
+    def _job_key(self, file_id: str) -> str:
+        return f"{self.key_prefix}job:{file_id}"
+
+    def _chunks_key(self, file_id: str) -> str:
+        return f"{self.key_prefix}chunks:{file_id}"
+
+    @staticmethod
+    def _encode_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+        return {k: json.dumps(v, ensure_ascii=False) for k, v in fields.items()}
+
+    def get_status(self, file_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.hgetall(self._job_key(file_id))
+        if not raw:
+            return None
+        return {
+            (k.decode() if isinstance(k, bytes) else k): json.loads(v)
+            for k, v in raw.items()
+        }
+
+    def _write_status(self, pipe: Any, file_id: str, fields: Dict[str, Any]) -> None:
+        key = self._job_key(file_id)
+        fields = {**fields, "updated_at": time.time()}
+        pipe.hset(key, mapping=self._encode_fields(fields))
+        if self.ttl is not None:
+            pipe.expire(key, self.ttl)
+
+    def set_status(self, file_id: str, **fields: Any) -> None:
+        pipe = self.client.pipeline(transaction=True)
+        self._write_status(pipe, file_id, fields)
+        pipe.execute()
+
+    def claim(self, file_id: str, **fields: Any) -> bool:
+        import redis  # type: ignore[import-untyped]
+
+        key = self._job_key(file_id)
+        with self.client.pipeline(transaction=True) as pipe:
+            try:
+                # WATCH 保證多個 worker 同時提交時只有一個成功
+                pipe.watch(key)
+                current = {
+                    (k.decode() if isinstance(k, bytes) else k): json.loads(v)
+                    for k, v in pipe.hgetall(key).items()
+                }
+                if self.is_active(current):
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.delete(key)
+                self._write_status(pipe, file_id, fields)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def save_chunks(self, file_id: str, chunks: List[Dict[str, Any]]) -> int:
+        key = self._chunks_key(file_id)
+        staging = f"{key}:staging"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(staging)
+        for start in range(0, len(chunks), self.batch_size):
+            batch = chunks[start : start + self.batch_size]
+            pipe.rpush(staging, *(self.serializer.dumps(c) for c in batch))
+        pipe.execute()
+
+        # 寫完後整體替換，讀者不會看到寫了一半的分塊列表
+        pipe = self.client.pipeline(transaction=True)
+        if chunks:
+            pipe.rename(staging, key)
+            if self.ttl is not None:
+                pipe.expire(key, self.ttl)
+        else:
+            pipe.delete(key)
+        pipe.execute()
+        return len(chunks)
+
+    def get_chunks(
+        self, file_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        offset = max(offset, 0)
+        if limit is not None and limit <= 0:
+            return []
+        end = -1 if limit is None else offset + limit - 1
+        raw = self.client.lrange(self._chunks_key(file_id), offset, end)
+        return [self.serializer.loads(item) for item in raw]
+
+    def count_chunks(self, file_id: str) -> int:
+        return int(self.client.llen(self._chunks_key(file_id)) or 0)
+
+    def delete(self, file_id: str) -> None:
+        self.client.delete(self._job_key(file_id), self._chunks_key(file_id))
+
+
+class LocalChunkJobStore(ChunkJobStore):
+    """
+    本地磁盤分塊任務存儲（單機多 worker 共享同一目錄）
+
+    - 狀態存為 ``{file_id}.status.json``，以臨時文件 + os.replace 原子寫入；
+      讀改寫（set_status / claim）持有子目錄鎖文件上的 flock，
+      多個 worker 同時提交時只有一個成功
+    - 分塊存為 JSONL，文件頭記錄每行的字節偏移，
+      分頁時直接定位到起始行，不需要讀入全部分塊
+    - 與 Redis 後端相同，分塊在保存 ttl 秒後過期；過期文件讀取時刪除，
+      並在 claim 時按 purge_interval 節流清理整個目錄
+    """
+
+    def __init__(
+        self,
+        base_path: str = "./datasets/chunks",
+        ttl: Optional[int] = 86400,
+        stale_after: Optional[float] = 1800.0,
+        purge_interval: float = 3600.0,
+    ):
+        """
+        初始化本地分塊任務存儲
+
+        Args:
+            base_path: 存儲目錄
+            ttl: 狀態與分塊過期秒數（None 表示不過期）
+            stale_after: 進行中任務的失效秒數
+            purge_interval: 清理過期文件的最小間隔（秒）
+        """
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.purge_interval = purge_interval
+
+    def _path(self, file_id: str, suffix: str) -> Path:
+        # 與文件存儲相同，按文件 ID 前兩個字符分子目錄
+        return self.base_path / file_id[:2] / f"{file_id}{suffix}"
+
+    @contextmanager
+    def _locked(self, file_id: str) -> Iterator[None]:
+        """持有文件所在子目錄的排他鎖（鎖文件數量有上限且從不刪除）"""
+        path = self._path(file_id, "").parent / ".lock"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a+b") as f:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                yield
+            else:
+                with _PROCESS_LOCK:
+                    yield
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _expired(self, path: Path) -> bool:
+        try:
+            return (
+                self.ttl is not None and time.time() - path.stat().st_mtime >= self.ttl
+            )
+        except FileNotFoundError:
+            return False
+
+    def purge_expired(self) -> int:
+        """
+        刪除過期的狀態與分塊文件
+
+        Returns:
+            刪除的文件數
+        """
+        removed = 0
+        now = time.time()
+        for path in self.base_path.glob("*/*.status.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    expires_at = json.load(f).get("_expires_at")
+            except (OSError, json.JSONDecodeError):
+                continue
+            if expires_at is not None and now >= expires_at:
+                removed += self._remove(path)
+        for path in self.base_path.glob("*/*.chunks"):
+            if self._expired(path):
+                removed += self._remove(path)
+        _LAST_PURGE[str(self.base_path)] = now
+        if removed:
+            logger.info("已清理過期分塊文件", removed=removed)
+        return removed
+
+    def _maybe_purge(self) -> None:
+        last = _LAST_PURGE.get(str(self.base_path))
+        if last is None or time.time() - last >= self.purge_interval:
+            self.purge_expired()
+
+    @staticmethod
+    def _remove(path: Path) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def get_status(self, file_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(file_id, ".status.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        expires_at = data.pop("_expires_at", None)
+        if expires_at is not None and time.time() >= expires_at:
+            return None
+        return data
+
+    def _write_status(self, file_id: str, status: Dict[str, Any]) -> None:
+        data = {**status, "updated_at": time.time()}
+        if self.ttl is not None:
+            data["_expires_at"] = time.time() + self.ttl
+        self._atomic_write(
+            self._path(file_id, ".status.json"),
+            json.dumps(data, ensure_ascii=False).encode("utf-8"),
+        )
+
+    def set_status(self, file_id: str, **fields: Any) -> None:
+        with self._locked(file_id):
+            status = self.get_status(file_id) or {}
+            status.update(fields)
+            self._write_status(file_id, status)
+
+    def claim(self, file_id: str, **fields: Any) -> bool:
+        self._maybe_purge()
+        # 與 Redis 後端的 WATCH 相同：檢查與寫入之間不允許其他 worker 插入
+        with self._locked(file_id):
+            if self.is_active(self.get_status(file_id)):
+                return False
+            self._write_status(file_id, fields)
+            return True
+
+    def save_chunks(self, file_id: str, chunks: List[Dict[str, Any]]) -> int:
+        offsets = array("Q", [len(chunks)])
+        lines: List[bytes] = []
+        position = 0
+        for chunk in chunks:
+            line = json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n"
+            offsets.append(position)
+            position += len(line)
+            lines.append(line)
+        offsets.append(position)
+        # 索引頭與數據寫在同一文件中，一次 os.replace 完成替換
+        self._atomic_write(
+            self._path(file_id, ".chunks"), offsets.tobytes() + b"".join(lines)
+        )
+        logger.debug("分塊已保存", file_id=file_id, chunk_count=len(chunks))
+        return len(chunks)
+
+    def _open_chunks(self, file_id: str) -> Optional[BinaryIO]:
+        path = self._path(file_id, ".chunks")
+        if self._expired(path):
+            self._remove(path)
+            return None
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _read_count(f: BinaryIO) -> int:
+        header = array("Q")
+        header.frombytes(f.read(header.itemsize))
+        return header[0]
+
+    def get_chunks(
+        self, file_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        f = self._open_chunks(file_id)
+        if f is None:
+            return []
+        with f:
+            total = self._read_count(f)
+            start = max(offset, 0)
+            end = total if limit is None else min(total, start + max(limit, 0))
+            if start >= end:
+                return []
+            # 文件佈局：[count][offset_0 .. offset_count][JSONL 數據]
+            itemsize = array("Q").itemsize
+            f.seek(itemsize * (1 + start))
+            bounds = array("Q")
+            bounds.frombytes(f.read(itemsize * (end - start + 1)))
+            data_start = itemsize * (total + 2)
+            f.seek(data_start + bounds[0])
+            data = f.read(bounds[-1] - bounds[0])
+        return [json.loads(line) for line in data.splitlines()]
+
+    def count_chunks(self, file_id: str) -> int:
+        f = self._open_chunks(file_id)
+        if f is None:
+            return 0
+        with f:
+            return self._read_count(f)
+
+    def delete(self, file_id: str) -> None:
+        for suffix in (".status.json", ".chunks"):
+            self._remove(self._path(file_id, suffix))
+
+
+def create_chunk_job_store_from_config(config: dict) -> ChunkJobStore:
+    """
+    從配置創建分塊任務存儲實例
+
+    Args:
+        config: 配置文件中 chunk_processing.job_store 區塊
+
+    Returns:
+        ChunkJobStore 實例
+    """
+    backend = config.get("backend", "local")
+    ttl = config.get("ttl_seconds", 86400)
+    stale_after = config.get("stale_after_seconds", 1800)
+
+    if backend == "redis":
+        from databases.redis import get_redis_client
+
+        redis_url: str = (
+            config.get("redis_url")
+            or os.getenv("REDIS_URL")
+            or "redis://localhost:6379/0"
+        )
+        return RedisChunkJobStore(
+            client=get_redis_client(redis_url),
+            key_prefix=config.get("key_prefix", "ai-box:chunking:"),
+            ttl=ttl,
+            serializer=get_serializer(config.get("serializer", "json")),
+            stale_after=stale_after,
+        )
+    elif backend == "local":
+        return LocalChunkJobStore(
+            base_path=config.get("path", "./datasets/chunks"),
+            ttl=ttl,
+            stale_after=stale_after,
+        )
+    else:
+        raise ValueError(f"不支持的分塊任務存儲後端: {backend}")
@@ -1,19 +1,169 @@
 # 代碼功能說明: 文件存儲模組
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """文件存儲模組 - 提供本地和雲存儲接口"""
 
+import hashlib
 import os
+import shutil
+import sqlite3
+import threading
 import uuid
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
 import structlog
 
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows：blob 引用變更只在進程內互斥
+    FCNTL_AVAILABLE = False
+
 logger = structlog.get_logger(__name__)
 
+# 流式讀寫的塊大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 文件索引表：file_id -> 相對路徑與內容哈希
+_CREATE_FILES_TABLE = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    rel_path TEXT NOT NULL,
+    content_hash TEXT
+)
+"""
+
+
+def hash_file(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    分塊計算文件的 SHA-256
+
+    Args:
+        file_path: 文件路徑
+        chunk_size: 每次讀取的字節數
+
+    Returns:
+        十六進制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class StoredFile:
+    """已保存文件的信息"""
+
+    file_id: str
+    file_path: str
+    content_hash: Optional[str] = None
+    deduplicated: bool = False
+    ref_count: int = 1
+
+
+class FileIndex:
+    """
+    文件 ID 索引（SQLite）
+
+    記錄 file_id -> 相對路徑與內容哈希，查找文件無需掃描目錄。
+    使用 WAL 模式，每個線程持有獨立連接，支持多進程共享同一索引。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化索引
+
+        Args:
+            db_path: SQLite 數據庫文件路徑
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(_CREATE_FILES_TABLE)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, file_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        查找文件
+
+        Returns:
+            (相對路徑, 內容哈希)，不存在則返回 None
+        """
+        row = (
+            self._conn()
+            .execute(
+                "SELECT rel_path, content_hash FROM files WHERE file_id = ?",
+                (file_id,),
+            )
+            .fetchone()
+        )
+        return (row[0], row[1]) if row else None
+
+    def put(
+        self, file_id: str, rel_path: str, content_hash: Optional[str] = None
+    ) -> None:
+        """寫入或覆蓋索引記錄"""
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO files (file_id, rel_path, content_hash) "
+            "VALUES (?, ?, ?)",
+            (file_id, rel_path, content_hash),
+        )
+        conn.commit()
+
+    def remove(self, file_id: str) -> None:
+        """刪除索引記錄"""
+        conn = self._conn()
+        conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+        conn.commit()
+
+    def replace_all(self, entries: Iterator[Tuple[str, str]]) -> int:
+        """
+        用磁盤掃描結果重建索引（保留已記錄的內容哈希）
+
+        Args:
+            entries: (file_id, 相對路徑) 迭代器
+
+        Returns:
+            索引記錄數
+        """
+        conn = self._conn()
+        with conn:
+            hashes = dict(
+                conn.execute(
+                    "SELECT file_id, content_hash FROM files "
+                    "WHERE content_hash IS NOT NULL"
+                )
+            )
+            conn.execute("DELETE FROM files")
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (file_id, rel_path, content_hash) "
+                "VALUES (?, ?, ?)",
+                ((fid, rel, hashes.get(fid)) for fid, rel in entries),
+            )
+        return self.count()
+
+    def count(self) -> int:
+        """索引記錄數"""
+        return self._conn().execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
 
 class FileStorage(ABC):
     """文件存儲抽象基類"""
@@ -87,6 +237,98 @@ class FileStorage(ABC):
         """
         pass
 
+    @property
+    def temp_dir(self) -> Optional[str]:
+        """上傳暫存目錄（None 表示使用系統臨時目錄）"""
+        return None
+
+    def open_file(self, file_id: str) -> Optional[BinaryIO]:
+        """
+        打開文件只讀流（可定位，解析器可只讀取需要的部分）
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            二進制流，如果不存在則返回 None
+        """
+        file_path = self.get_file_path(file_id)
+        if file_path is None:
+            return None
+        return open(file_path, "rb")
+
+    def get_filename(self, file_id: str) -> Optional[str]:
+        """
+        獲取文件名（用於按擴展名推斷文件類型）
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            文件名，如果不存在則返回 None
+        """
+        file_path = self.get_file_path(file_id)
+        if file_path is None:
+            return None
+        return os.path.basename(file_path)
+
+    def parse_file(self, file_id: str, parser: Any) -> Optional[Dict[str, Any]]:
+        """
+        用解析器解析文件
+
+        Args:
+            file_id: 文件 ID
+            parser: 文件解析器
+
+        Returns:
+            解析結果，如果不存在則返回 None
+        """
+        file_path = self.get_file_path(file_id)
+        if file_path is None:
+            return None
+        return parser.parse(file_path)
+
+    def save_file_from_path(
+        self,
+        source_path: str,
+        filename: str,
+        content_hash: Optional[str] = None,
+        file_id: Optional[str] = None,
+    ) -> StoredFile:
+        """
+        從暫存文件保存（保存後暫存文件被移走或刪除）
+
+        默認實現讀入內存後調用 save_file，支持內容尋址的後端應覆蓋此方法。
+
+        Args:
+            source_path: 暫存文件路徑
+            filename: 原始文件名
+            content_hash: 內容 SHA-256（可選）
+            file_id: 文件 ID（可選，如果不提供則自動生成）
+
+        Returns:
+            StoredFile
+        """
+        with open(source_path, "rb") as f:
+            content = f.read()
+        file_id, file_path = self.save_file(content, filename, file_id)
+        os.remove(source_path)
+        return StoredFile(
+            file_id=file_id, file_path=file_path, content_hash=content_hash
+        )
+
+    def get_ref_count(self, content_hash: str) -> int:
+        """
+        獲取內容被引用的次數
+
+        Args:
+            content_hash: 內容 SHA-256
+
+        Returns:
+            引用次數（不支持去重的後端返回 0）
+        """
+        return 0
+
     @staticmethod
     def generate_file_id() -> str:
         """
@@ -99,18 +341,101 @@ class FileStorage(ABC):
 
 
 class LocalFileStorage(FileStorage):
-    """本地文件系統存儲"""
+    """
+    本地文件系統存儲
+
+    - 文件按 ID 分片存放在 ``shard_depth`` 層、每層 2 個字符的子目錄中
+    - file_id -> 路徑記錄在 SQLite 索引中，查找為 O(1)，不掃描目錄；
+      索引不存在時（舊數據目錄）啟動時掃描一次磁盤重建
+    - 通過 save_file_from_path 保存的文件按內容尋址：內容存放在
+      ``_blobs/<hash[:2]>/<hash>``，每個文件 ID 是指向該 blob 的硬鏈接，
+      相同內容只佔一份磁盤空間，引用次數即 blob 的硬鏈接數減一
+    - 創建/刪除引用與回收 blob 在同一把鎖（進程內鎖 + blob 目錄上的 flock）內完成
+    - 文件系統不支持硬鏈接時不做去重，每個文件保存為獨立副本
+    - 以已有文件 ID 保存即替換內容：新內容原子地替換舊文件，保存失敗時舊內容不受影響
+    """
 
-    def __init__(self, storage_path: str = "./datasets/files"):
+    BLOB_DIR = "_blobs"
+    TEMP_DIR = "_tmp"
+    INDEX_FILE = "_index.sqlite3"
+    SHARD_WIDTH = 2
+
+    def __init__(
+        self,
+        storage_path: str = "./datasets/files",
+        shard_depth: int = 1,
+        index_path: Optional[str] = None,
+    ):
         """
         初始化本地文件存儲
 
         Args:
             storage_path: 存儲路徑
+            shard_depth: 分片目錄層數（1 與舊版目錄結構兼容）
+            index_path: 索引數據庫路徑（默認為存儲目錄下的 _index.sqlite3）
         """
+        if shard_depth < 1:
+            raise ValueError("shard_depth 必須大於等於 1")
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        self.shard_depth = shard_depth
         self.logger = logger.bind(storage_path=str(self.storage_path))
+        self._blob_lock = threading.Lock()
+        self._hardlinks = True
+
+        index_file = (
+            Path(index_path) if index_path else self.storage_path / self.INDEX_FILE
+        )
+        is_new_index = not index_file.exists()
+        self.index = FileIndex(str(index_file))
+        if is_new_index:
+            self.rebuild_index()
+
+    def _iter_disk_files(self) -> Iterator[Tuple[str, str]]:
+        """遍歷磁盤上的文件（跳過 blob、暫存目錄和索引文件）"""
+        skip = {self.BLOB_DIR, self.TEMP_DIR}
+        for root, dirs, files in os.walk(self.storage_path):
+            if Path(root) == self.storage_path:
+                dirs[:] = [d for d in dirs if d not in skip]
+                continue
+            for name in files:
+                path = Path(root) / name
+                yield path.stem, path.relative_to(self.storage_path).as_posix()
+
+    def rebuild_index(self) -> int:
+        """
+        掃描磁盤重建文件索引
+
+        Returns:
+            索引記錄數
+        """
+        count = self.index.replace_all(self._iter_disk_files())
+        self.logger.info("文件索引已重建", file_count=count)
+        return count
+
+    @property
+    def temp_dir(self) -> Optional[str]:
+        """上傳暫存目錄（與存儲目錄同一文件系統，保存時可直接重命名）"""
+        path = self.storage_path / self.TEMP_DIR
+        path.mkdir(parents=True, exist_ok=True)
+        return str(path)
+
+    def _blob_path(self, content_hash: str) -> Path:
+        return self.storage_path / self.BLOB_DIR / content_hash[:2] / content_hash
+
+    @contextmanager
+    def _blob_guard(self) -> Iterator[None]:
+        """blob 引用變更的排他鎖（共享同一存儲目錄的多個進程之間同樣互斥）"""
+        with self._blob_lock:
+            lock_path = self.storage_path / self.BLOB_DIR / ".lock"
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(lock_path, "a+b") as f:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                yield
+
+    def _relative(self, file_path: Path) -> str:
+        return file_path.relative_to(self.storage_path).as_posix()
 
     def _get_file_path(self, file_id: str, filename: Optional[str] = None) -> Path:
         """
@@ -123,10 +448,14 @@ class LocalFileStorage(FileStorage):
         Returns:
             文件路徑
         """
-        # 使用文件 ID 的前兩個字符作為子目錄，避免單一目錄文件過多
-        subdir = file_id[:2]
-        subdir_path = self.storage_path / subdir
-        subdir_path.mkdir(parents=True, exist_ok=True)
+        # 使用文件 ID 的前若干字符作為多層子目錄，避免單一目錄文件過多
+        key = file_id.replace("-", "")
+        subdir_path = self.storage_path.joinpath(
+            *(
+                key[i * self.SHARD_WIDTH : (i + 1) * self.SHARD_WIDTH]
+                for i in range(self.shard_depth)
+            )
+        )
 
         if filename:
             # 保留原始擴展名
@@ -162,6 +491,8 @@ class LocalFileStorage(FileStorage):
             with open(file_path, "wb") as f:
                 f.write(file_content)
 
+            self.index.put(file_id, self._relative(file_path))
+
             self.logger.info(
                 "文件保存成功",
                 file_id=file_id,
@@ -181,6 +512,162 @@ class LocalFileStorage(FileStorage):
             )
             raise
 
+    def save_file_from_path(
+        self,
+        source_path: str,
+        filename: str,
+        content_hash: Optional[str] = None,
+        file_id: Optional[str] = None,
+    ) -> StoredFile:
+        """
+        從暫存文件保存，相同內容只保留一份 blob
+
+        Args:
+            source_path: 暫存文件路徑（應位於 temp_dir 下）
+            filename: 原始文件名
+            content_hash: 內容 SHA-256（可選，不提供則重新計算）
+            file_id: 文件 ID（可選，如果不提供則自動生成）
+
+        Returns:
+            StoredFile
+        """
+        if file_id is None:
+            file_id = self.generate_file_id()
+        if content_hash is None:
+            content_hash = hash_file(source_path)
+
+        file_path = self._get_file_path(file_id, filename)
+        blob_path = self._blob_path(content_hash)
+
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._blob_guard():
+                # 替換已有文件 ID 的內容時，新內容原子地就位後才釋放舊內容
+                previous = self._current_link(file_id)
+                deduplicated, ref_count = self._link_blob(
+                    source_path, blob_path, file_path
+                )
+                self.index.put(file_id, self._relative(file_path), content_hash)
+                if previous is not None:
+                    old_path, old_inode, old_blob = previous
+                    if old_path != file_path:
+                        os.remove(old_path)
+                    if old_blob is not None:
+                        self._release_blob(old_blob, old_inode)
+        except Exception as e:
+            self.logger.error(
+                "文件保存失敗",
+                file_id=file_id,
+                filename=filename,
+                error=str(e),
+            )
+            raise
+
+        self.logger.info(
+            "文件保存成功",
+            file_id=file_id,
+            filename=filename,
+            file_path=str(file_path),
+            content_hash=content_hash,
+            deduplicated=deduplicated,
+            ref_count=ref_count,
+        )
+
+        return StoredFile(
+            file_id=file_id,
+            file_path=str(file_path),
+            content_hash=content_hash,
+            deduplicated=deduplicated,
+            ref_count=ref_count,
+        )
+
+    def get_ref_count(self, content_hash: str) -> int:
+        """
+        獲取內容被引用的次數
+
+        Args:
+            content_hash: 內容 SHA-256
+
+        Returns:
+            引用次數
+        """
+        try:
+            return os.stat(self._blob_path(content_hash)).st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def _current_link(self, file_id: str) -> Optional[Tuple[Path, int, Optional[Path]]]:
+        """
+        文件 ID 當前的文件（調用方需持有 _blob_guard）
+
+        Returns:
+            (文件路徑, inode, 引用的 blob 路徑或 None)，文件不存在時返回 None
+        """
+        entry = self.index.get(file_id)
+        if entry is None:
+            return None
+        path = self.storage_path / entry[0]
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        blob_path = None
+        if stat.st_nlink > 1:
+            blob_path = self._blob_path(entry[1] or hash_file(str(path)))
+        return path, stat.st_ino, blob_path
+
+    def _link_blob(
+        self, source_path: str, blob_path: Path, file_path: Path
+    ) -> Tuple[bool, int]:
+        """
+        將暫存文件存入 blob，並以硬鏈接原子地放到文件路徑（覆蓋同路徑的舊文件）
+
+        調用方需持有 _blob_guard。
+
+        Returns:
+            (是否與已有內容去重, 引用次數)
+        """
+        if not self._hardlinks:
+            os.replace(source_path, file_path)
+            return False, 1
+
+        deduplicated = blob_path.exists()
+        if deduplicated:
+            os.remove(source_path)
+        else:
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source_path, blob_path)
+        staged = self.storage_path / self.TEMP_DIR / f"{uuid.uuid4().hex}.link"
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob_path, staged)
+        except OSError as e:
+            # 文件系統不支持硬鏈接：停用去重，文件保存為獨立副本，
+            # 不留下無人引用、永遠不會回收的 blob
+            self._hardlinks = False
+            self.logger.warning("硬鏈接不可用，停用內容去重", error=str(e))
+            if deduplicated:
+                shutil.copyfile(blob_path, staged)
+            else:
+                os.replace(blob_path, staged)
+            os.replace(staged, file_path)
+            return False, 1
+        os.replace(staged, file_path)
+        # 文件路徑已是同一 blob 的鏈接時 rename 不做任何事，暫存鏈接需自行刪除
+        if staged.exists():
+            os.remove(staged)
+        return deduplicated, os.stat(blob_path).st_nlink - 1
+
+    def _release_blob(self, blob_path: Path, inode: int) -> None:
+        """最後一個文件引用刪除後回收 blob（調用方需持有 _blob_guard）"""
+        try:
+            blob_stat = os.stat(blob_path)
+        except FileNotFoundError:
+            return
+        if blob_stat.st_ino == inode and blob_stat.st_nlink == 1:
+            os.remove(blob_path)
+            self.logger.info("blob 已回收", blob_path=str(blob_path))
+
     def get_file_path(self, file_id: str) -> Optional[str]:
         """
         獲取文件路徑
@@ -191,19 +678,17 @@ class LocalFileStorage(FileStorage):
         Returns:
             文件路徑，如果不存在則返回 None
         """
-        # 嘗試查找文件（可能有多種擴展名）
-        subdir = file_id[:2]
-        subdir_path = self.storage_path / subdir
-
-        if not subdir_path.exists():
+        entry = self.index.get(file_id)
+        if entry is None:
             return None
 
-        # 查找以 file_id 開頭的文件
-        for file_path in subdir_path.iterdir():
-            if file_path.stem == file_id:
-                return str(file_path)
+        file_path = self.storage_path / entry[0]
+        if not file_path.exists():
+            # 文件已在索引之外被刪除
+            self.index.remove(file_id)
+            return None
 
-        return None
+        return str(file_path)
 
     def read_file(self, file_id: str) -> Optional[bytes]:
         """
@@ -241,7 +726,19 @@ class LocalFileStorage(FileStorage):
             return False
 
         try:
-            os.remove(file_path)
+            # 查看鏈接數、刪除文件與回收 blob 在同一把鎖內完成，
+            # 否則並發刪除最後兩個引用時雙方都不會回收 blob
+            with self._blob_guard():
+                stat = os.stat(file_path)
+                blob_path = None
+                if stat.st_nlink > 1:
+                    entry = self.index.get(file_id)
+                    content_hash = (entry and entry[1]) or hash_file(file_path)
+                    blob_path = self._blob_path(content_hash)
+                os.remove(file_path)
+                self.index.remove(file_id)
+                if blob_path is not None:
+                    self._release_blob(blob_path, stat.st_ino)
             self.logger.info("文件刪除成功", file_id=file_id, file_path=file_path)
             return True
         except Exception as e:
@@ -262,22 +759,6 @@ class LocalFileStorage(FileStorage):
 
 
 # 預留雲存儲接口（未來擴展）
-class S3FileStorage(FileStorage):
-    """S3 雲存儲（預留接口）"""
-
-    def __init__(self, bucket_name: str, region: str = "us-east-1"):
-        """
-        初始化 S3 文件存儲
-
-        Args:
-            bucket_name: S3 存儲桶名稱
-            region: AWS 區域
-        """
-        self.bucket_name = bucket_name
-        self.region = region
-        raise NotImplementedError("S3 存儲尚未實現")
-
-
 class OSSFileStorage(FileStorage):
     """阿里雲 OSS 存儲（預留接口）"""
 
@@ -308,9 +789,16 @@ def create_storage_from_config(config: dict) -> FileStorage:
     storage_path = config.get("storage_path", "./datasets/files")
 
     if storage_backend == "local":
-        return LocalFileStorage(storage_path=storage_path)
+        return LocalFileStorage(
+            storage_path=storage_path,
+            shard_depth=config.get("storage_shard_depth", 1),
+            index_path=config.get("storage_index_path"),
+        )
     elif storage_backend == "s3":
-        raise NotImplementedError("S3 存儲尚未實現")
+        # 延遲導入，未使用 S3 時不需要安裝 boto3
+        from .s3_storage import create_s3_storage_from_config
+
+        return create_s3_storage_from_config(config.get("s3", {}) or {})
     elif storage_backend == "oss":
         raise NotImplementedError("OSS 存儲尚未實現")
     else:
@@ -0,0 +1,613 @@
+# 代碼功能說明: S3 兼容對象存儲
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""S3 兼容對象存儲 - 分塊上傳、範圍讀取與本地 LRU 磁盤緩存（適用 AWS S3、MinIO 等）"""
+
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple
+
+import structlog
+
+from .file_storage import FileStorage, StoredFile
+
+try:
+    import boto3  # type: ignore[import-untyped]
+    from boto3.s3.transfer import TransferConfig  # type: ignore[import-untyped]
+    from botocore.exceptions import ClientError  # type: ignore[import-untyped]
+
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+# 默認分塊上傳塊大小（S3 要求除最後一塊外不小於 5MB）
+DEFAULT_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+# 範圍讀取的默認緩衝大小
+DEFAULT_RANGE_BUFFER_SIZE = 256 * 1024
+
+
+class LRUDiskCache:
+    """
+    本地 LRU 磁盤緩存
+
+    以文件 ID 為鍵，每個條目記錄內容版本（對象 ETag），緩存文件名為
+    ``<file_id>.<version><ext>``；讀取時版本不一致的條目視為過期並刪除。
+    總大小超過上限時按最近訪問順序淘汰，啟動時按修改時間恢復已有緩存文件的順序。
+    """
+
+    TEMP_DIR = "_tmp"
+
+    def __init__(self, cache_path: str, max_bytes: int):
+        """
+        初始化緩存
+
+        Args:
+            cache_path: 緩存目錄
+            max_bytes: 緩存總大小上限（字節）
+        """
+        self.cache_path = Path(cache_path)
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # file_id -> (緩存文件名, 大小, 版本)
+        self._entries: "OrderedDict[str, Tuple[str, int, Optional[str]]]" = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+
+        existing = [p for p in self.cache_path.iterdir() if p.is_file()]
+        for path in sorted(existing, key=lambda p: p.stat().st_mtime):
+            size = path.stat().st_size
+            parts = path.name.split(".")
+            version = parts[1] if len(parts) > 1 else None
+            self._entries[parts[0]] = (path.name, size, version)
+            self._size += size
+
+    @staticmethod
+    def entry_name(file_id: str, version: str, suffix: str) -> str:
+        """緩存文件名（保留擴展名，解析器按擴展名推斷類型）"""
+        return f"{file_id}.{version}{suffix}"
+
+    @property
+    def temp_dir(self) -> str:
+        """緩存暫存目錄（與緩存同一文件系統）"""
+        path = self.cache_path / self.TEMP_DIR
+        path.mkdir(parents=True, exist_ok=True)
+        return str(path)
+
+    @property
+    def size(self) -> int:
+        """當前緩存總大小"""
+        return self._size
+
+    def get(self, file_id: str, version: Optional[str] = None) -> Optional[str]:
+        """
+        獲取緩存文件路徑並標記為最近使用
+
+        Args:
+            file_id: 文件 ID
+            version: 當前內容版本（提供時版本不一致的條目被刪除並視為未命中）
+
+        Returns:
+            緩存文件路徑，未命中返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                return None
+            path = self.cache_path / entry[0]
+            stale = version is not None and entry[2] != version
+            if stale or not path.exists():
+                del self._entries[file_id]
+                self._size -= entry[1]
+                self._unlink(entry[0])
+                return None
+            self._entries.move_to_end(file_id)
+        os.utime(path)
+        return str(path)
+
+    def put(
+        self,
+        file_id: str,
+        name: str,
+        source_path: str,
+        version: Optional[str] = None,
+    ) -> str:
+        """
+        將文件移入緩存（源文件被移走）
+
+        Args:
+            file_id: 文件 ID
+            name: 緩存文件名
+            source_path: 源文件路徑
+            version: 內容版本
+
+        Returns:
+            緩存文件路徑
+        """
+        path = self.cache_path / name
+        size = os.path.getsize(source_path)
+        with self._lock:
+            os.replace(source_path, path)
+            old = self._entries.pop(file_id, None)
+            if old is not None:
+                self._size -= old[1]
+                if old[0] != name:
+                    self._unlink(old[0])
+            self._entries[file_id] = (name, size, version)
+            self._size += size
+            self._evict(keep=file_id)
+        return str(path)
+
+    def remove(self, file_id: str) -> None:
+        """刪除緩存文件"""
+        with self._lock:
+            entry = self._entries.pop(file_id, None)
+            if entry is None:
+                return
+            self._size -= entry[1]
+            self._unlink(entry[0])
+
+    def _unlink(self, name: str) -> None:
+        try:
+            os.remove(self.cache_path / name)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, keep: str) -> None:
+        # 剛寫入的文件即使超過上限也保留，供本次讀取使用
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            file_id = next(iter(self._entries))
+            if file_id == keep:
+                self._entries.move_to_end(file_id)
+                continue
+            name, size, _ = self._entries.pop(file_id)
+            self._size -= size
+            self._unlink(name)
+            logger.debug("緩存淘汰", file_id=file_id, size=size)
+
+
+class S3RangeReader(io.RawIOBase):
+    """
+    基於 HTTP Range 請求的可定位只讀流
+
+    只下載實際讀取的字節範圍；配合 io.BufferedReader 使用以合併小讀取。
+    """
+
+    def __init__(self, read_range: Callable[[int, int], Optional[bytes]], size: int):
+        """
+        Args:
+            read_range: 讀取 [start, end]（含）字節範圍的函數
+            size: 對象大小
+        """
+        self._read_range = read_range
+        self._size = size
+        self._pos = 0
+        self.requests = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"不支持的 whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def readinto(self, buffer: Any) -> int:
+        if self._pos >= self._size:
+            return 0
+        end = min(self._pos + len(buffer), self._size) - 1
+        data = self._read_range(self._pos, end)
+        if data is None:
+            raise FileNotFoundError("對象已被刪除")
+        self.requests += 1
+        n = len(data)
+        buffer[:n] = data
+        self._pos += n
+        return n
+
+
+class S3FileStorage(FileStorage):
+    """
+    S3 兼容對象存儲
+
+    - 對象鍵為 ``<prefix><file_id>``，原始文件名和內容哈希保存在對象元數據中
+    - 上傳使用分塊（multipart）流式上傳，不將文件讀入內存
+    - open_file 返回基於 Range 請求的流，解析器可只讀取需要的部分（如 PDF 指定頁）；
+      parse_file 對支持流式解析的解析器使用該流，不下載整個對象
+    - get_file_path 將對象下載到本地 LRU 磁盤緩存並返回緩存路徑，熱點對象不重複下載
+    - 文件 ID 的內容可被替換（PUT /files/{file_id}），其他節點也可能刪除對象，
+      因此每次讀取先 HEAD 取得 ETag，只使用 ETag 一致的緩存；範圍讀取帶 If-Match，
+      讀取途中對象被替換時不會拼接新舊兩個版本的字節
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        region: str = "us-east-1",
+        endpoint_url: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        prefix: str = "files/",
+        cache_path: str = "./datasets/cache/s3",
+        cache_max_bytes: int = 1024 * 1024 * 1024,
+        multipart_chunk_size: int = DEFAULT_MULTIPART_CHUNK_SIZE,
+        client: Optional[Any] = None,
+    ):
+        """
+        初始化 S3 文件存儲
+
+        Args:
+            bucket_name: 存儲桶名稱
+            region: 區域
+            endpoint_url: S3 兼容端點（MinIO 等），None 表示 AWS S3
+            access_key_id: 訪問密鑰 ID（None 時使用 boto3 默認憑證鏈）
+            secret_access_key: 訪問密鑰
+            prefix: 對象鍵前綴
+            cache_path: 本地緩存目錄
+            cache_max_bytes: 本地緩存總大小上限（字節）
+            multipart_chunk_size: 分塊上傳塊大小（字節）
+            client: 預先創建的 S3 客戶端（可選）
+        """
+        if not BOTO3_AVAILABLE:
+            raise ImportError("boto3 未安裝，請運行: pip install boto3")
+
+        self.bucket_name = bucket_name
+        self.region = region
+        self.prefix = prefix
+        self.client = client or boto3.client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunk_size,
+            multipart_chunksize=multipart_chunk_size,
+        )
+        self.cache = LRUDiskCache(cache_path, cache_max_bytes)
+        self.logger = logger.bind(bucket=bucket_name, prefix=prefix)
+
+    def _key(self, file_id: str) -> str:
+        return f"{self.prefix}{file_id}"
+
+    @staticmethod
+    def _etag(head: Dict[str, Any]) -> str:
+        return str(head["ETag"]).strip('"')
+
+    @staticmethod
+    def _filename(head: Dict[str, Any]) -> str:
+        return head.get("Metadata", {}).get("filename", "")
+
+    def _cache_name(self, file_id: str, head: Dict[str, Any]) -> str:
+        return self.cache.entry_name(
+            file_id, self._etag(head), Path(self._filename(head)).suffix
+        )
+
+    @staticmethod
+    def _is_not_found(error: "ClientError") -> bool:
+        code = error.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, file_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.client.head_object(
+                Bucket=self.bucket_name, Key=self._key(file_id)
+            )
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+
+    @property
+    def temp_dir(self) -> Optional[str]:
+        """上傳暫存目錄（位於緩存目錄下，上傳後直接移入緩存）"""
+        return self.cache.temp_dir
+
+    def save_file(
+        self, file_content: bytes, filename: str, file_id: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """
+        保存文件到對象存儲
+
+        Args:
+            file_content: 文件內容
+            filename: 原始文件名
+            file_id: 文件 ID（可選，如果不提供則自動生成）
+
+        Returns:
+            (file_id, 對象 URI)
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(file_content)
+            stored = self.save_file_from_path(temp_path, filename, file_id=file_id)
+        finally:
+            # 上傳成功時暫存文件已移入緩存，失敗時在此清理
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return stored.file_id, stored.file_path
+
+    def save_file_from_path(
+        self,
+        source_path: str,
+        filename: str,
+        content_hash: Optional[str] = None,
+        file_id: Optional[str] = None,
+    ) -> StoredFile:
+        """
+        從暫存文件分塊上傳，上傳後暫存文件移入本地緩存
+
+        Args:
+            source_path: 暫存文件路徑
+            filename: 原始文件名
+            content_hash: 內容 SHA-256（可選，寫入對象元數據）
+            file_id: 文件 ID（可選，如果不提供則自動生成）
+
+        Returns:
+            StoredFile（file_path 為 s3:// URI）
+        """
+        if file_id is None:
+            file_id = self.generate_file_id()
+
+        metadata = {"filename": Path(filename).name}
+        if content_hash:
+            metadata["content-sha256"] = content_hash
+
+        key = self._key(file_id)
+        try:
+            self.client.upload_file(
+                source_path,
+                self.bucket_name,
+                key,
+                ExtraArgs={"Metadata": metadata},
+                Config=self.transfer_config,
+            )
+        except Exception as e:
+            self.logger.error("文件上傳失敗", file_id=file_id, error=str(e))
+            raise
+
+        head = self._head(file_id)
+        if head is not None:
+            self.cache.put(
+                file_id, self._cache_name(file_id, head), source_path, self._etag(head)
+            )
+        else:
+            os.remove(source_path)
+        uri = f"s3://{self.bucket_name}/{key}"
+        self.logger.info("文件保存成功", file_id=file_id, filename=filename, uri=uri)
+
+        return StoredFile(file_id=file_id, file_path=uri, content_hash=content_hash)
+
+    def get_file_path(self, file_id: str) -> Optional[str]:
+        """
+        獲取本地可讀路徑（未緩存或緩存已過期時下載到本地 LRU 緩存）
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            緩存文件路徑，如果對象不存在則返回 None
+        """
+        head = self._head(file_id)
+        if head is None:
+            self.cache.remove(file_id)
+            return None
+
+        etag = self._etag(head)
+        cached = self.cache.get(file_id, etag)
+        if cached is not None:
+            return cached
+
+        fd, temp_path = tempfile.mkstemp(dir=self.cache.temp_dir, suffix=".part")
+        os.close(fd)
+        try:
+            self.client.download_file(
+                self.bucket_name,
+                self._key(file_id),
+                temp_path,
+                Config=self.transfer_config,
+            )
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return self.cache.put(file_id, self._cache_name(file_id, head), temp_path, etag)
+
+    def get_filename(self, file_id: str) -> Optional[str]:
+        """
+        獲取原始文件名（只請求對象元數據，不下載內容）
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            文件名，如果對象不存在則返回 None
+        """
+        head = self._head(file_id)
+        if head is None:
+            return None
+        return self._filename(head) or file_id
+
+    def open_file(self, file_id: str) -> Optional[BinaryIO]:
+        """
+        打開文件只讀流（已緩存時讀本地文件，否則按需發起 Range 請求）
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            可定位的二進制流，如果對象不存在則返回 None
+        """
+        head = self._head(file_id)
+        if head is None:
+            self.cache.remove(file_id)
+            return None
+
+        etag = self._etag(head)
+        cached = self.cache.get(file_id, etag)
+        if cached is not None:
+            return open(cached, "rb")
+
+        reader = S3RangeReader(
+            lambda start, end: self.read_range(file_id, start, end, etag),
+            head["ContentLength"],
+        )
+        return io.BufferedReader(reader, buffer_size=DEFAULT_RANGE_BUFFER_SIZE)
+
+    def parse_file(self, file_id: str, parser: Any) -> Optional[Dict[str, Any]]:
+        """
+        解析文件
+
+        支持流式解析的解析器（parse_stream，如 PDF）經範圍讀取流只下載解析涉及的字節；
+        其他解析器需要本地文件，經 get_file_path 下載到本地緩存。
+
+        Args:
+            file_id: 文件 ID
+            parser: 文件解析器
+
+        Returns:
+            解析結果，如果對象不存在則返回 None
+        """
+        if not hasattr(parser, "parse_stream"):
+            return super().parse_file(file_id, parser)
+        stream = self.open_file(file_id)
+        if stream is None:
+            return None
+        with stream:
+            return parser.parse_stream(stream)
+
+    def read_range(
+        self, file_id: str, start: int, end: int, etag: Optional[str] = None
+    ) -> Optional[bytes]:
+        """
+        讀取字節範圍
+
+        Args:
+            file_id: 文件 ID
+            start: 起始偏移（含）
+            end: 結束偏移（含）
+            etag: 期望的對象 ETag（提供時對象已被替換則拋出 ClientError）
+
+        Returns:
+            字節內容，如果對象不存在則返回 None
+        """
+        kwargs = {"IfMatch": f'"{etag}"'} if etag else {}
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket_name,
+                Key=self._key(file_id),
+                Range=f"bytes={start}-{end}",
+                **kwargs,
+            )
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return response["Body"].read()
+
+    def read_file(self, file_id: str) -> Optional[bytes]:
+        """
+        讀取文件內容
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            文件內容，如果不存在則返回 None
+        """
+        try:
+            file_path = self.get_file_path(file_id)
+            if file_path is None:
+                return None
+            with open(file_path, "rb") as f:
+                return f.read()
+        except Exception as e:
+            self.logger.error("文件讀取失敗", file_id=file_id, error=str(e))
+            return None
+
+    def delete_file(self, file_id: str) -> bool:
+        """
+        刪除文件（同時清理本地緩存）
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            是否成功刪除
+        """
+        try:
+            if self._head(file_id) is None:
+                return False
+            self.client.delete_object(Bucket=self.bucket_name, Key=self._key(file_id))
+            self.cache.remove(file_id)
+            self.logger.info("文件刪除成功", file_id=file_id)
+            return True
+        except Exception as e:
+            self.logger.error("文件刪除失敗", file_id=file_id, error=str(e))
+            return False
+
+    def file_exists(self, file_id: str) -> bool:
+        """
+        檢查文件是否存在
+
+        Args:
+            file_id: 文件 ID
+
+        Returns:
+            文件是否存在
+        """
+        return self._head(file_id) is not None
+
+
+def create_s3_storage_from_config(config: dict) -> S3FileStorage:
+    """
+    從配置創建 S3 文件存儲
+
+    Args:
+        config: file_upload.s3 配置區塊
+
+    Returns:
+        S3FileStorage 實例
+    """
+    bucket_name = config.get("bucket") or os.getenv("S3_BUCKET")
+    if not bucket_name:
+        raise ValueError("S3 存儲需要配置 bucket")
+
+    return S3FileStorage(
+        bucket_name=bucket_name,
+        region=config.get("region", "us-east-1"),
+        endpoint_url=config.get("endpoint_url") or os.getenv("S3_ENDPOINT_URL"),
+        access_key_id=config.get("access_key_id") or os.getenv("AWS_ACCESS_KEY_ID"),
+        secret_access_key=config.get("secret_access_key")
+        or os.getenv("AWS_SECRET_ACCESS_KEY"),
+        prefix=config.get("prefix", "files/"),
+        cache_path=config.get("cache_path", "./datasets/cache/s3"),
+        cache_max_bytes=config.get("cache_max_bytes", 1024 * 1024 * 1024),
+        multipart_chunk_size=config.get(
+            "multipart_chunk_size", DEFAULT_MULTIPART_CHUNK_SIZE
+        ),
+    )
@@ -1,10 +1,16 @@
 # 代碼功能說明: Telemetry 模組匯出
 # 創建日期: 2025-11-26 20:07 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-26 20:07 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """服務層 Telemetry 匯出。"""
 
+from .ingestion import record_ingestion_run, record_stage_batch, set_queue_depth
 from .workflow import publish_workflow_metrics
 
-__all__ = ["publish_workflow_metrics"]
+__all__ = [
+    "publish_workflow_metrics",
+    "record_stage_batch",
+    "set_queue_depth",
+    "record_ingestion_run",
+]
@@ -0,0 +1,54 @@
+# 代碼功能說明: 文件攝取管線 Telemetry
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""提供文件攝取管線各階段的吞吐量、批次耗時與隊列深度 Prometheus 指標。"""
+
+from __future__ import annotations
+
+from prometheus_client import Counter, Gauge, Histogram
+
+INGESTION_STAGE_ITEMS = Counter(
+    "ingestion_stage_items_total",
+    "攝取管線各階段處理的分塊數",
+    ["stage"],
+)
+
+INGESTION_STAGE_BATCH_SECONDS = Histogram(
+    "ingestion_stage_batch_seconds",
+    "攝取管線各階段單批次處理耗時",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+
+INGESTION_QUEUE_DEPTH = Gauge(
+    "ingestion_stage_queue_depth",
+    "攝取管線各階段輸入隊列中等待的批次數",
+    ["stage"],
+)
+
+INGESTION_RUNS = Counter(
+    "ingestion_runs_total",
+    "攝取管線運行次數",
+    ["status"],
+)
+
+
+def record_stage_batch(stage: str, items: int, seconds: float) -> None:
+    """記錄一個階段處理完成的批次。"""
+
+    INGESTION_STAGE_ITEMS.labels(stage=stage).inc(items)
+    INGESTION_STAGE_BATCH_SECONDS.labels(stage=stage).observe(seconds)
+
+
+def set_queue_depth(stage: str, depth: int) -> None:
+    """更新階段輸入隊列深度。"""
+
+    INGESTION_QUEUE_DEPTH.labels(stage=stage).set(depth)
+
+
+def record_ingestion_run(status: str) -> None:
+    """記錄一次攝取管線運行結果。"""
+
+    INGESTION_RUNS.labels(status=status).inc()
@@ -0,0 +1,93 @@
+# 代碼功能說明: 嵌入向量 float32 編解碼工具
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""嵌入向量編解碼 - float32 小端字節的 base64 / 二進制傳輸格式"""
+
+import base64
+from typing import Any, List, Sequence
+
+import numpy as np
+
+# 傳輸格式固定為小端 float32，與平台字節序無關
+WIRE_DTYPE = np.dtype("<f4")
+
+# 二進制響應的元信息頭
+HEADER_COUNT = "X-Embedding-Count"
+HEADER_DIM = "X-Embedding-Dim"
+HEADER_DTYPE = "X-Embedding-Dtype"
+
+
+def to_wire_matrix(embeddings: Any) -> np.ndarray:
+    """
+    轉換為 (n, dim) 小端 float32 連續矩陣
+
+    Args:
+        embeddings: 向量列表、一維向量或 ndarray
+
+    Returns:
+        (n, dim) 矩陣
+
+    Raises:
+        ValueError: 向量維度不一致
+    """
+    matrix = np.asarray(embeddings, dtype=WIRE_DTYPE)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2:
+        raise ValueError("嵌入向量維度不一致")
+    return np.ascontiguousarray(matrix)
+
+
+def encode_base64(embeddings: Any) -> List[str]:
+    """
+    將每個向量編碼為 base64 字符串（小端 float32 字節）
+
+    Args:
+        embeddings: 向量列表或 (n, dim) 矩陣
+
+    Returns:
+        base64 字符串列表
+    """
+    return [
+        base64.b64encode(row.tobytes()).decode("ascii")
+        for row in to_wire_matrix(embeddings)
+    ]
+
+
+def decode_base64(values: Sequence[str]) -> np.ndarray:
+    """
+    將 base64 字符串列表解碼為 (n, dim) float32 矩陣
+
+    Args:
+        values: base64 字符串列表
+
+    Returns:
+        (n, dim) 矩陣
+
+    Raises:
+        ValueError: 字節長度不是 4 的倍數或各向量維度不一致
+    """
+    rows = [
+        np.frombuffer(base64.b64decode(value), dtype=WIRE_DTYPE) for value in values
+    ]
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32)
+    if len({row.size for row in rows}) != 1:
+        raise ValueError("嵌入向量維度不一致")
+    return np.stack(rows).astype(np.float32, copy=False)
+
+
+def decode_binary(payload: bytes, dim: int) -> np.ndarray:
+    """
+    將二進制響應體解碼為 (n, dim) float32 矩陣（零拷貝，結果只讀）
+
+    Args:
+        payload: 小端 float32 字節
+        dim: 向量維度（來自 X-Embedding-Dim 頭）
+
+    Returns:
+        (n, dim) 矩陣
+    """
+    return np.frombuffer(payload, dtype=WIRE_DTYPE).reshape(-1, dim)
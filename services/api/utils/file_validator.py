@@ -1,7 +1,7 @@
 # 代碼功能說明: 文件驗證工具
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """文件驗證工具 - 提供 MIME 類型、擴展名、大小和內容驗證"""
 
@@ -42,6 +42,19 @@ EXTENSION_TO_MIME = {
 # 允許的擴展名列表
 ALLOWED_EXTENSIONS = list(EXTENSION_TO_MIME.keys())
 
+# 二進制格式的文件頭（魔數）
+MAGIC_BYTES = {
+    ".pdf": [b"%PDF-"],
+    ".docx": [b"PK\x03\x04"],
+    ".xlsx": [b"PK\x03\x04"],
+}
+
+# 文本格式（文件頭中不應出現 NUL 字節）
+TEXT_EXTENSIONS = {".txt", ".md", ".csv", ".json", ".html"}
+
+# 文件頭檢查讀取的字節數
+HEADER_SIZE = 1024
+
 
 class FileValidationError(Exception):
     """文件驗證錯誤"""
@@ -145,7 +158,27 @@ class FileValidator:
             (是否有效, 錯誤消息)
         """
         # 驗證文件大小
-        file_size = len(file_content)
+        is_valid, error_msg = self.validate_size(len(file_content))
+        if not is_valid:
+            return is_valid, error_msg
+
+        is_valid, error_msg = self.validate_filename(filename)
+        if not is_valid:
+            return is_valid, error_msg
+
+        # 基本內容驗證（檢查文件頭）
+        return self.validate_header(file_content[:HEADER_SIZE], filename)
+
+    def validate_size(self, file_size: int) -> Tuple[bool, Optional[str]]:
+        """
+        驗證文件大小
+
+        Args:
+            file_size: 文件大小（字節）
+
+        Returns:
+            (是否有效, 錯誤消息)
+        """
         if file_size > self.max_file_size:
             return (
                 False,
@@ -155,6 +188,18 @@ class FileValidator:
         if file_size == 0:
             return False, "文件為空"
 
+        return True, None
+
+    def validate_filename(self, filename: str) -> Tuple[bool, Optional[str]]:
+        """
+        驗證文件名的擴展名和 MIME 類型（無需讀取內容）
+
+        Args:
+            filename: 文件名
+
+        Returns:
+            (是否有效, 錯誤消息)
+        """
         # 驗證擴展名
         ext = Path(filename).suffix.lower()
         if ext not in self.allowed_extensions:
@@ -169,11 +214,30 @@ class FileValidator:
                 if ext not in self.allowed_extensions:
                     return False, f"不支持的文件類型: {mime_type}"
 
-        # 基本內容驗證（檢查文件頭）
-        if len(file_content) > 0:
-            # 檢查常見的惡意文件標識（簡單檢查）
-            # 這裡可以擴展更複雜的驗證邏輯
-            pass
+        return True, None
+
+    def validate_header(
+        self, header: bytes, filename: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        根據文件頭驗證內容與擴展名是否一致
+
+        流式上傳時只需傳入第一個數據塊。
+
+        Args:
+            header: 文件開頭的字節
+            filename: 文件名
+
+        Returns:
+            (是否有效, 錯誤消息)
+        """
+        ext = Path(filename).suffix.lower()
+        signatures = MAGIC_BYTES.get(ext)
+        if signatures and not any(header.startswith(sig) for sig in signatures):
+            return False, f"文件內容與擴展名不符: {ext}"
+
+        if ext in TEXT_EXTENSIONS and b"\x00" in header[:HEADER_SIZE]:
+            return False, f"文本文件包含二進制內容: {ext}"
 
         return True, None
 
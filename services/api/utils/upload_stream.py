@@ -0,0 +1,109 @@
+# 代碼功能說明: 上傳文件流式落盤工具
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""上傳文件流式落盤 - 分塊寫入暫存文件，同時計算 SHA-256 並在讀取過程中完成驗證"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+
+from services.api.utils.file_validator import FileValidationError, FileValidator
+
+# 默認每次讀取 1MB
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class SpooledUpload:
+    """已寫入暫存文件的上傳"""
+
+    filename: str
+    temp_path: str
+    file_size: int
+    content_hash: str
+
+
+def _write_block(handle: BinaryIO, digest: "hashlib._Hash", block: bytes) -> None:
+    digest.update(block)
+    handle.write(block)
+
+
+def _discard(handle: BinaryIO, path: str) -> None:
+    handle.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def spool_upload(
+    upload: UploadFile,
+    validator: FileValidator,
+    temp_dir: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    將上傳文件分塊寫入暫存文件
+
+    - 讀取前驗證文件名，第一個數據塊驗證文件頭，超過大小限制立即中止
+    - 哈希計算和磁盤寫入在線程中執行，不阻塞事件循環
+    - 失敗時刪除暫存文件
+
+    Args:
+        upload: 上傳文件
+        validator: 文件驗證器
+        temp_dir: 暫存目錄（應與存儲目錄位於同一文件系統）
+        chunk_size: 每次讀取的字節數
+
+    Returns:
+        SpooledUpload
+
+    Raises:
+        FileValidationError: 驗證失敗
+    """
+    filename = upload.filename or ""
+    is_valid, error_msg = validator.validate_filename(filename)
+    if not is_valid:
+        raise FileValidationError(error_msg)
+
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix=".part")
+    handle = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    file_size = 0
+
+    try:
+        while True:
+            block = await upload.read(chunk_size)
+            if not block:
+                break
+            if file_size == 0:
+                is_valid, error_msg = validator.validate_header(block, filename)
+                if not is_valid:
+                    raise FileValidationError(error_msg)
+            file_size += len(block)
+            if file_size > validator.max_file_size:
+                is_valid, error_msg = validator.validate_size(file_size)
+                raise FileValidationError(error_msg)
+            await asyncio.to_thread(_write_block, handle, digest, block)
+
+        is_valid, error_msg = validator.validate_size(file_size)
+        if not is_valid:
+            raise FileValidationError(error_msg)
+        await asyncio.to_thread(handle.close)
+    except BaseException:
+        await asyncio.to_thread(_discard, handle, temp_path)
+        raise
+
+    return SpooledUpload(
+        filename=filename,
+        temp_path=temp_path,
+        file_size=file_size,
+        content_hash=digest.hexdigest(),
+    )
@@ -1,7 +1,7 @@
 # 代碼功能說明: MCP Server 啟動入口
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """MCP Server 啟動入口文件"""
 
@@ -103,6 +103,7 @@ def _register_tools(server: MCPServer, config) -> None:
         description=task_analyzer.description,
         input_schema=task_analyzer.input_schema,
         handler=task_analyzer.execute,
+        annotations=task_analyzer.annotations,
     )
 
     # 註冊 File Tool
@@ -114,6 +115,7 @@ def _register_tools(server: MCPServer, config) -> None:
         description=file_tool.description,
         input_schema=file_tool.input_schema,
         handler=file_tool.execute,
+        annotations=file_tool.annotations,
     )
 
     logger.info(f"Registered {len(registry.list_all())} tools")
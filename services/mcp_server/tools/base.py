@@ -1,12 +1,12 @@
 # 代碼功能說明: MCP Server 工具基類
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """MCP Server 工具基類模組"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +20,7 @@ class BaseTool(ABC):
         name: str,
         description: str,
         input_schema: Dict[str, Any],
+        annotations: Optional[Dict[str, Any]] = None,
     ):
         """
         初始化工具
@@ -28,10 +29,13 @@ class BaseTool(ABC):
             name: 工具名稱
             description: 工具描述
             input_schema: 輸入 Schema（JSON Schema 格式）
+            annotations: 工具註解（cacheTtl 聲明結果可被客戶端緩存的秒數，
+                cacheableWhen 限定可緩存的參數取值）
         """
         self.name = name
         self.description = description
         self.input_schema = input_schema
+        self.annotations = annotations
 
     @abstractmethod
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -72,8 +76,11 @@ class BaseTool(ABC):
         Returns:
             Dict[str, Any]: 工具信息
         """
-        return {
+        info = {
             "name": self.name,
             "description": self.description,
             "inputSchema": self.input_schema,
         }
+        if self.annotations:
+            info["annotations"] = self.annotations
+        return info
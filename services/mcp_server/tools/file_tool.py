@@ -1,7 +1,7 @@
 # 代碼功能說明: File Tool 實現
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """File Tool 實現模組"""
 
@@ -46,6 +46,11 @@ class FileTool(BaseTool):
                 },
                 "required": ["operation", "path"],
             },
+            # 僅讀取類操作可緩存；寫入/刪除會使客戶端已緩存的結果失效
+            annotations={
+                "cacheTtl": 30,
+                "cacheableWhen": {"operation": ["read", "list"]},
+            },
         )
 
     def _validate_path(self, path: str) -> Path:
@@ -1,7 +1,7 @@
 # 代碼功能說明: Task Analyzer Mock 工具
 # 創建日期: 2025-10-25
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-11-25
+# 最後修改日期: 2026-10-18
 
 """Task Analyzer Mock 工具實現"""
 
@@ -32,6 +32,8 @@ class TaskAnalyzerTool(BaseTool):
                 },
                 "required": ["task"],
             },
+            # 相同任務描述得到相同分析結果，允許客戶端緩存
+            annotations={"readOnlyHint": True, "idempotentHint": True, "cacheTtl": 300},
         )
 
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,96 @@
+# 代碼功能說明: AAM 向量化評分單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""AAM 向量化評分、融合與重排序單元測試"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from agent_process.memory.aam.models import Memory, MemoryType, MemoryPriority
+from agent_process.memory.aam.scoring import (
+    CandidateArrays,
+    compute_relevance,
+    cosine_rerank,
+    fuse_results,
+    rank_memories,
+    top_k_indices,
+)
+
+
+def _memory(memory_id: str, score: float, **kwargs) -> Memory:
+    return Memory(
+        memory_id=memory_id,
+        content=f"content {memory_id}",
+        memory_type=MemoryType.SHORT_TERM,
+        relevance_score=score,
+        **kwargs,
+    )
+
+
+class TestComputeRelevance:
+    """相關度計算測試"""
+
+    def test_bonuses_match_rules(self):
+        now = datetime.now()
+        memories = [
+            _memory("a", 0.1, priority=MemoryPriority.LOW),
+            _memory("b", 0.1, priority=MemoryPriority.CRITICAL),
+            _memory("c", 0.1, priority=MemoryPriority.LOW, access_count=50),
+            _memory("d", 0.1, priority=MemoryPriority.LOW, accessed_at=now),
+            _memory(
+                "e",
+                0.1,
+                priority=MemoryPriority.LOW,
+                accessed_at=now - timedelta(days=2),
+            ),
+        ]
+        scores = compute_relevance(CandidateArrays(memories), now=now.timestamp())
+        np.testing.assert_allclose(scores, [0.1, 0.4, 0.2, 0.2, 0.1])
+
+    def test_clipped_to_unit_range(self):
+        scores = compute_relevance(
+            CandidateArrays([_memory("a", 0.95, priority=MemoryPriority.CRITICAL)])
+        )
+        assert scores[0] == 1.0
+
+
+class TestTopK:
+    """top-k 選取測試"""
+
+    def test_descending_order(self):
+        scores = np.array([0.2, 0.9, 0.5, 0.7, 0.1])
+        assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+
+    def test_tie_break_by_priority(self):
+        scores = np.array([0.5, 0.5])
+        ranks = np.array([0, 3], dtype=np.int8)
+        assert top_k_indices(scores, 2, priority_rank=ranks).tolist() == [1, 0]
+
+    def test_empty(self):
+        assert top_k_indices(np.array([]), 5).size == 0
+
+
+class TestRankAndFuse:
+    """排序與融合測試"""
+
+    def test_rank_filters_and_limits(self):
+        memories = [
+            _memory(str(i), i / 10, priority=MemoryPriority.LOW) for i in range(10)
+        ]
+        ranked = rank_memories(memories, limit=3, min_relevance=0.5)
+        assert [m.memory_id for m in ranked] == ["9", "8", "7"]
+
+    def test_fuse_deduplicates_and_accumulates(self):
+        vector = [_memory("a", 0.5), _memory("b", 0.4)]
+        graph = [_memory("b", 0.5), _memory("c", 0.1)]
+        fused = fuse_results([(vector, 0.6), (graph, 0.4)], top_k=3)
+        assert [m.memory_id for m in fused] == ["b", "a", "c"]
+        assert abs(fused[0].relevance_score - (0.4 * 0.6 + 0.5 * 0.4)) < 1e-9
+        assert fused[0] is vector[1]
+
+    def test_cosine_rerank(self):
+        scores = cosine_rerank([1.0, 0.0], [[0.0, 1.0], [1.0, 0.0]])
+        np.testing.assert_allclose(scores, [0.0, 1.0], atol=1e-6)
@@ -0,0 +1,80 @@
+# 代碼功能說明: Prompt Manager 單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""Prompt Manager 單元測試 - 預編譯模板、版本化 ID 與靜態段緩存"""
+
+import pytest
+
+from agent_process.prompt import CompiledTemplate, PromptManager
+
+
+class TestCompiledTemplate:
+    """預編譯模板測試"""
+
+    @pytest.mark.parametrize(
+        "template, values",
+        [
+            (
+                "固定說明 {{json}}\n{a} 與 {b!r} {c:>4} {a}",
+                {"a": "x", "b": "y", "c": 7},
+            ),
+            ("{obj.real} {items[0]}", {"obj": 3, "items": [1]}),
+            ("{value:{width}}", {"value": 1, "width": 5}),
+            ("沒有變量", {}),
+        ],
+    )
+    def test_render_matches_str_format(self, template, values):
+        """渲染結果與 str.format 一致"""
+        assert CompiledTemplate(template).render(values) == template.format(**values)
+
+    def test_static_prefix_and_variables(self):
+        """靜態前綴為第一個變量之前的文本，變量按首次出現排序"""
+        compiled = CompiledTemplate("說明 {{x}}\n文本：{text}\n{extra}{text}")
+        assert compiled.static_prefix == "說明 {x}\n文本："
+        assert compiled.variables == ["text", "extra"]
+
+
+class TestPromptManager:
+    """提示管理器測試"""
+
+    def test_versioned_template_id(self):
+        """內容變化時版本遞增，重複註冊相同內容時版本不變"""
+        manager = PromptManager()
+        manager.register("demo", "A {x}")
+        first = manager.template_id("demo")
+        assert first.startswith("demo@v1.")
+
+        manager.register("demo", "A {x}", description="same")
+        assert manager.template_id("demo") == first
+
+        manager.register("demo", "B {x}")
+        assert manager.template_id("demo").startswith("demo@v2.")
+
+        manager.update("demo", template="C {x}")
+        assert manager.get("demo").version == 3
+        assert manager.render("demo", x="1") == "C 1"
+
+    def test_static_sections(self):
+        """靜態段編譯時渲染進靜態前綴，內容變化時模板 ID 隨之變化"""
+        manager = PromptManager()
+        manager.register("demo", "類型：\n{types}\n文本：{x}", static={"types": "- A"})
+        first = manager.template_id("demo")
+
+        assert manager.get("demo").variables == ["x"]
+        assert manager.static_prefix("demo") == "類型：\n- A\n文本："
+        assert manager.render("demo", x="1", types="ignored") == "類型：\n- A\n文本：1"
+
+        manager.register("demo", "類型：\n{types}\n文本：{x}", static={"types": "- A"})
+        assert manager.template_id("demo") == first
+
+        manager.register("demo", "類型：\n{types}\n文本：{x}", static={"types": "- B"})
+        assert manager.template_id("demo").startswith("demo@v2.")
+        assert manager.template_id("demo") != first
+
+        manager.update("demo", template="{types} | {x}")
+        assert manager.render("demo", x="1") == "- B | 1"
+
+        with pytest.raises(ValueError, match="Missing required variable"):
+            manager.render("demo")
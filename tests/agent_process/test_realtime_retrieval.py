@@ -137,6 +137,34 @@ class TestRealtimeRetrievalService:
         assert count > 0
         assert len(retrieval_service._cache) == 0
 
+    def test_cached_results_are_immutable(self, retrieval_service, mock_aam_manager):
+        """測試修改返回結果不影響緩存內容"""
+        mock_aam_manager.search_memories.return_value = [
+            Memory(
+                memory_id="test-1",
+                content="Test content 1",
+                memory_type=MemoryType.SHORT_TERM,
+                relevance_score=0.5,
+            )
+        ]
+        retrieval_service.aam_manager.enable_long_term = False
+
+        first = retrieval_service.retrieve("test query", limit=10)
+        cached_score = first[0].relevance_score
+        first[0].relevance_score = 0.0
+
+        second = retrieval_service.retrieve("test query", limit=10)
+        assert second[0].relevance_score == cached_score
+        assert second[0] is not first[0]
+
+    def test_cache_key_includes_memory_type(self, retrieval_service):
+        """測試不同記憶類型使用不同緩存鍵"""
+        key_all = retrieval_service._get_cache_key("q", {"a": 1})
+        key_short = retrieval_service._get_cache_key(
+            "q", {"a": 1}, memory_type=MemoryType.SHORT_TERM
+        )
+        assert key_all != key_short
+
 
 class TestContextIntegration:
     """上下文整合測試"""
@@ -1,13 +1,17 @@
 # 代碼功能說明: 文件分塊處理器測試
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """文件分塊處理器測試"""
 
 from services.api.processors.chunk_processor import (
     ChunkProcessor,
+    CharTokenizer,
     ChunkStrategy,
+    HeuristicTokenizer,
+    create_chunk_processor_from_config,
+    split_sentences,
 )
 
 
@@ -62,6 +66,121 @@ def test_chunk_metadata():
 
     assert len(chunks) > 0
     assert "metadata" in chunks[0]
-    assert chunks[0]["metadata"]["source"] == "test"
+    assert chunks[0]["file_metadata"]["source"] == "test"
     assert "start_position" in chunks[0]["metadata"]
     assert "end_position" in chunks[0]["metadata"]
+
+
+def test_file_metadata_shared_by_reference():
+    """測試文件級元數據在分塊間共享同一對象"""
+    processor = ChunkProcessor(chunk_size=10, strategy=ChunkStrategy.FIXED_SIZE)
+    metadata = {"source": "test", "pages": [{"page_number": 1}]}
+
+    chunks = processor.process("a" * 35, "test_file_id", metadata=metadata)
+
+    assert len(chunks) == 4
+    assert all(chunk["file_metadata"] is metadata for chunk in chunks)
+    assert "source" not in chunks[0]["metadata"]
+
+
+def test_split_sentences_cjk():
+    """測試中文標點句子切分"""
+    text = "他說：「好。」然後走了！真的嗎？Pi is 3.14 ok. Yes"
+
+    sentences = [text[s:e] for s, e in split_sentences(text)]
+
+    assert sentences == [
+        "他說：「好。」",
+        "然後走了！",
+        "真的嗎？",
+        "Pi is 3.14 ok.",
+        "Yes",
+    ]
+
+
+def test_offsets_are_exact():
+    """測試分塊偏移與原文切片完全一致"""
+    text = "  第一段第一句。第一段第二句。\n\n第二段很長很長很長很長很長很長很長很長。\n\n\n第三段。 "
+    for strategy in ChunkStrategy:
+        processor = ChunkProcessor(chunk_size=8, overlap=0.25, strategy=strategy)
+        chunks = processor.process(text, "test_file_id")
+
+        assert chunks
+        for chunk in chunks:
+            meta = chunk["metadata"]
+            assert text[meta["start_position"] : meta["end_position"]] == chunk["text"]
+            assert meta["token_count"] <= 8
+
+
+def test_semantic_single_paragraph():
+    """測試單段短文本也會生成分塊"""
+    processor = ChunkProcessor(chunk_size=100, strategy=ChunkStrategy.SEMANTIC)
+
+    chunks = processor.process("只有一段文字。", "test_file_id")
+
+    assert [chunk["text"] for chunk in chunks] == ["只有一段文字。"]
+
+
+def test_chunk_ids_deterministic():
+    """測試分塊 ID 由內容確定，重新分塊結果一致"""
+    processor = ChunkProcessor(chunk_size=6, strategy=ChunkStrategy.SEMANTIC)
+    text = "重複內容。\n\n重複內容。\n\n不同內容。"
+
+    first = processor.process(text, "file-a")
+    second = processor.process(text, "file-a")
+    other = processor.process(text, "file-b")
+
+    ids = [chunk["chunk_id"] for chunk in first]
+    assert ids == [chunk["chunk_id"] for chunk in second]
+    assert len(set(ids)) == len(ids)
+    assert first[0]["metadata"]["content_hash"] == first[1]["metadata"]["content_hash"]
+    assert not set(ids) & {chunk["chunk_id"] for chunk in other}
+
+
+def test_token_budget_with_heuristic_tokenizer():
+    """測試按 token 預算打包（中文每字一個 token，英文約 4 字符一個 token）"""
+    tokenizer = HeuristicTokenizer()
+    processor = ChunkProcessor(
+        chunk_size=12, strategy=ChunkStrategy.SEMANTIC, tokenizer=tokenizer
+    )
+    chinese = "向量檢索需要合適的分塊大小。" * 3
+    text = chinese + "\n\n" + "Tokenization matters for embeddings. " * 3
+
+    chunks = processor.process(text, "test_file_id")
+
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert tokenizer.count(chunk["text"]) == chunk["metadata"]["token_count"]
+        assert chunk["metadata"]["token_count"] <= 12
+
+
+def test_semantic_chunks_count_separators():
+    """測試合併片段時分隔符計入 token 數，分塊實際長度不超過預算"""
+    processor = ChunkProcessor(chunk_size=10, strategy=ChunkStrategy.SEMANTIC)
+
+    chunks = processor.process("aaaa\n\nbbbb\n\ncc", "test_file_id")
+
+    assert [chunk["text"] for chunk in chunks] == ["aaaa\n\nbbbb", "cc"]
+    assert chunks[0]["metadata"]["token_count"] == 10
+
+    text = "段落內容，第一句。第二句稍微長一點。\n\n" * 80 + "Short line.\n" * 40
+    for tokenizer in (CharTokenizer(), HeuristicTokenizer()):
+        for chunk_size in (10, 64, 512):
+            processor = ChunkProcessor(
+                chunk_size=chunk_size,
+                strategy=ChunkStrategy.SEMANTIC,
+                tokenizer=tokenizer,
+            )
+            for chunk in processor.process(text, "test_file_id"):
+                real = tokenizer.count(chunk["text"])
+                assert real == chunk["metadata"]["token_count"]
+                assert real <= chunk_size
+
+
+def test_create_from_config_tokenizer():
+    """測試從配置選擇分詞器"""
+    processor = create_chunk_processor_from_config(
+        {"chunk_size": 256, "strategy": "semantic", "tokenizer": "approx"}
+    )
+
+    assert isinstance(processor.tokenizer, HeuristicTokenizer)
@@ -0,0 +1,180 @@
+# 代碼功能說明: 分塊任務存儲測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""分塊任務存儲測試 - 狀態合併、任務互斥、範圍分頁、過期清理、心跳與分塊處理流程"""
+
+import threading
+import time
+
+import pytest
+
+from services.api.processors.chunk_processor import ChunkProcessor
+from services.api.processors.parsers.txt_parser import TxtParser
+from services.api.routers import chunk_processing
+from services.api.services.ingestion_pipeline import IngestionPipeline
+from services.api.storage.chunk_store import (
+    LocalChunkJobStore,
+    RedisChunkJobStore,
+    create_chunk_job_store_from_config,
+)
+
+
+@pytest.fixture(params=["local", "redis"])
+def store(request, tmp_path):
+    """分別創建本地與 Redis 分塊任務存儲"""
+    if request.param == "local":
+        return LocalChunkJobStore(base_path=str(tmp_path / "chunks"), ttl=60)
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisChunkJobStore(client=fakeredis.FakeRedis(), ttl=60)
+
+
+def _chunks(n):
+    return [{"chunk_index": i, "text": f"第 {i} 塊"} for i in range(n)]
+
+
+def test_status_merge_and_missing(store):
+    """測試狀態合併更新"""
+    assert store.get_status("f1") is None
+    store.set_status("f1", status="processing", progress=0)
+    store.set_status("f1", progress=50, message="解析完成")
+    status = store.get_status("f1")
+    assert status["status"] == "processing"
+    assert status["progress"] == 50
+    assert status["message"] == "解析完成"
+
+
+def test_claim_rejects_active_job(store):
+    """測試進行中的任務不能重複提交"""
+    assert store.claim("f2", status="pending", progress=0)
+    assert not store.claim("f2", status="pending", progress=0)
+    store.set_status("f2", status="completed")
+    assert store.claim("f2", status="pending", progress=0)
+    assert store.get_status("f2") == {
+        "status": "pending",
+        "progress": 0,
+        "updated_at": pytest.approx(time.time(), abs=5),
+    }
+
+
+def test_stale_job_can_be_reclaimed(store):
+    """測試長時間未更新的進行中任務可重新提交"""
+    store.stale_after = 0.0
+    assert store.claim("f3", status="processing")
+    assert store.claim("f3", status="pending")
+
+
+def test_range_pagination(store):
+    """測試按範圍分頁讀取"""
+    store.save_chunks("f4", _chunks(25))
+    assert store.count_chunks("f4") == 25
+    page = store.get_chunks("f4", offset=10, limit=5)
+    assert [c["chunk_index"] for c in page] == [10, 11, 12, 13, 14]
+    assert page[0]["text"] == "第 10 塊"
+    assert len(store.get_chunks("f4", offset=20)) == 5
+    assert store.get_chunks("f4", offset=30, limit=5) == []
+    assert store.get_chunks("f4", limit=0) == []
+
+
+def test_save_replaces_and_delete(store):
+    """測試重新保存整體替換分塊，刪除清理全部數據"""
+    store.save_chunks("f5", _chunks(10))
+    store.save_chunks("f5", _chunks(3))
+    assert store.count_chunks("f5") == 3
+    store.set_status("f5", status="completed")
+    store.delete("f5")
+    assert store.get_status("f5") is None
+    assert store.count_chunks("f5") == 0
+    assert store.get_chunks("f5") == []
+
+
+def test_local_status_expires(tmp_path):
+    """測試本地存儲的狀態過期"""
+    store = LocalChunkJobStore(base_path=str(tmp_path), ttl=0)
+    store.set_status("f6", status="completed")
+    assert store.get_status("f6") is None
+
+
+def test_local_claim_is_exclusive_across_workers(tmp_path):
+    """測試多個 worker（各自的存儲實例）同時提交時只有一個成功"""
+    barrier = threading.Barrier(16)
+    results = []
+
+    def claim():
+        worker_store = LocalChunkJobStore(base_path=str(tmp_path))
+        barrier.wait()
+        results.append(worker_store.claim("f7", status="pending"))
+
+    threads = [threading.Thread(target=claim) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
+
+
+def test_local_chunks_expire_and_purge(tmp_path):
+    """測試本地分塊與狀態過期後被刪除"""
+    store = LocalChunkJobStore(base_path=str(tmp_path), ttl=0)
+    store.save_chunks("f8", _chunks(3))
+    store.set_status("f8", status="completed")
+    assert store.count_chunks("f8") == 0
+    assert not store._path("f8", ".chunks").exists()
+
+    store.save_chunks("f8", _chunks(3))
+    assert store.purge_expired() == 2
+    assert list(tmp_path.glob("*/f8*")) == []
+
+
+class _SlowParser(TxtParser):
+    """解析耗時超過失效時間的解析器，記錄解析期間任務是否仍判為進行中"""
+
+    def __init__(self, store, file_id):
+        super().__init__()
+        self.store = store
+        self.file_id = file_id
+        self.active_after_parse = None
+
+    def parse(self, file_path):
+        time.sleep(0.5)
+        self.active_after_parse = self.store.is_active(
+            self.store.get_status(self.file_id)
+        )
+        return super().parse(file_path)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_long_step_active(tmp_path):
+    """測試耗時步驟期間心跳刷新狀態，任務不被誤判為失效"""
+    store = LocalChunkJobStore(base_path=str(tmp_path / "chunks"), stale_after=0.3)
+    source = tmp_path / "doc.txt"
+    source.write_text("內容。\n\n" * 5, encoding="utf-8")
+    parser = _SlowParser(store, "f9")
+
+    await IngestionPipeline(store).run("f9", str(source), parser, ChunkProcessor())
+    assert parser.active_after_parse is True
+
+
+def test_create_from_config(tmp_path):
+    """測試從配置創建存儲"""
+    store = create_chunk_job_store_from_config({"path": str(tmp_path)})
+    assert isinstance(store, LocalChunkJobStore)
+    with pytest.raises(ValueError):
+        create_chunk_job_store_from_config({"backend": "unknown"})
+
+
+@pytest.mark.asyncio
+async def test_process_file_chunking_persists_chunks(tmp_path, monkeypatch):
+    """測試分塊處理結果寫入分塊存儲而非進程內存"""
+    job_store = LocalChunkJobStore(base_path=str(tmp_path / "chunks"))
+    monkeypatch.setattr(chunk_processing, "get_job_store", lambda: job_store)
+    source = tmp_path / "doc.txt"
+    source.write_text("段落內容，第一句。\n\n" * 200, encoding="utf-8")
+
+    await chunk_processing.process_file_chunking("doc-1", str(source), "text/plain")
+
+    status = job_store.get_status("doc-1")
+    assert status["status"] == "completed"
+    assert "chunks" not in status
+    assert status["chunk_count"] == job_store.count_chunks("doc-1") > 0
@@ -0,0 +1,79 @@
+# 代碼功能說明: 嵌入向量 float32 編解碼與傳輸測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""嵌入向量編解碼測試 - base64 / 二進制 float32 傳輸與 embeddings 端點"""
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from llm.clients.ollama import get_ollama_client
+from services.api.routers import llm as llm_router
+from services.api.utils import embedding_codec
+
+
+class FakeOllamaClient:
+    """按文本長度生成確定向量的嵌入假件"""
+
+    async def embeddings(self, text, *, model=None):
+        return [float(len(text)), 0.5, -1.25]
+
+    async def embeddings_array(self, text, *, model=None):
+        return np.asarray(await self.embeddings(text, model=model), dtype=np.float32)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(llm_router.router)
+    app.dependency_overrides[get_ollama_client] = FakeOllamaClient
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_base64_roundtrip():
+    """測試 base64 編解碼保持 float32 數值"""
+    matrix = np.random.rand(3, 768).astype(np.float32)
+
+    encoded = embedding_codec.encode_base64(matrix)
+
+    assert len(encoded) == 3
+    np.testing.assert_array_equal(embedding_codec.decode_base64(encoded), matrix)
+    with pytest.raises(ValueError):
+        embedding_codec.decode_base64(
+            encoded[:1] + embedding_codec.encode_base64([[1.0]])
+        )
+
+
+def test_embeddings_endpoint_encodings(client):
+    """測試 embeddings 端點的 float / base64 / binary 編碼"""
+    prefix = llm_router.router.prefix
+    texts = ["a", "abc"]
+    expected = np.array([[1.0, 0.5, -1.25], [3.0, 0.5, -1.25]], dtype=np.float32)
+
+    plain = client.post(f"{prefix}/embeddings", json={"texts": texts})
+    assert plain.status_code == 200
+    assert plain.json()["data"]["items"][1]["embedding"] == expected[1].tolist()
+
+    encoded = client.post(
+        f"{prefix}/embeddings", json={"texts": texts, "encoding_format": "base64"}
+    )
+    data = encoded.json()["data"]
+    assert data["dim"] == 3
+    decoded = embedding_codec.decode_base64(
+        [item["embedding"] for item in data["items"]]
+    )
+    np.testing.assert_array_equal(decoded, expected)
+
+    binary = client.post(
+        f"{prefix}/embeddings", json={"texts": texts, "encoding_format": "binary"}
+    )
+    assert binary.headers["content-type"] == "application/octet-stream"
+    assert binary.headers[embedding_codec.HEADER_COUNT] == "2"
+    dim = int(binary.headers[embedding_codec.HEADER_DIM])
+    np.testing.assert_array_equal(
+        embedding_codec.decode_binary(binary.content, dim), expected
+    )
@@ -0,0 +1,337 @@
+# 代碼功能說明: 文件存儲與流式上傳測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""文件存儲測試 - 索引查找、分片、內容尋址去重、引用計數、文件頭驗證、流式落盤、替換與下載"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+
+from services.api.models.file_metadata import FileMetadataCreate
+from services.api.routers import file_upload
+from services.api.storage.file_storage import LocalFileStorage
+from services.api.utils.file_validator import FileValidationError, FileValidator
+from services.api.utils.upload_stream import spool_upload
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """創建本地文件存儲"""
+    return LocalFileStorage(storage_path=str(tmp_path / "files"))
+
+
+def _temp_file(storage, content: bytes) -> str:
+    path = os.path.join(storage.temp_dir, f"{hashlib.md5(content).hexdigest()}.part")
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_save_from_path_deduplicates(storage):
+    """測試相同內容只保存一份 blob"""
+    content = b"same content"
+    first = storage.save_file_from_path(_temp_file(storage, content), "a.txt")
+    second = storage.save_file_from_path(_temp_file(storage, content), "b.txt")
+
+    assert first.content_hash == hashlib.sha256(content).hexdigest()
+    assert first.deduplicated is False
+    assert second.deduplicated is True
+    assert second.ref_count == 2
+    assert first.file_id != second.file_id
+    assert os.stat(first.file_path).st_ino == os.stat(second.file_path).st_ino
+    assert storage.read_file(second.file_id) == content
+    assert os.listdir(storage.temp_dir) == []
+
+
+def test_delete_releases_blob_on_last_reference(storage):
+    """測試刪除最後一個引用時回收 blob"""
+    content = b"shared"
+    content_hash = hashlib.sha256(content).hexdigest()
+    first = storage.save_file_from_path(_temp_file(storage, content), "a.txt")
+    second = storage.save_file_from_path(_temp_file(storage, content), "b.md")
+
+    assert storage.delete_file(first.file_id) is True
+    assert storage.get_ref_count(content_hash) == 1
+    assert storage.read_file(second.file_id) == content
+
+    assert storage.delete_file(second.file_id) is True
+    assert storage.get_ref_count(content_hash) == 0
+    assert not storage._blob_path(content_hash).exists()
+
+
+def test_concurrent_deletes_release_blob(storage):
+    """測試並發刪除同一內容的所有引用後 blob 一定被回收"""
+    for round_no in range(20):
+        content = f"shared-{round_no}".encode()
+        content_hash = hashlib.sha256(content).hexdigest()
+        saved = [
+            storage.save_file_from_path(_temp_file(storage, content), "a.txt")
+            for _ in range(4)
+        ]
+        barrier = threading.Barrier(len(saved))
+
+        def delete(file_id: str) -> bool:
+            barrier.wait()
+            return storage.delete_file(file_id)
+
+        with ThreadPoolExecutor(max_workers=len(saved)) as pool:
+            results = list(pool.map(delete, [item.file_id for item in saved]))
+
+        assert all(results)
+        assert not storage._blob_path(content_hash).exists()
+
+
+def test_no_dedup_without_hardlinks(storage, monkeypatch):
+    """測試文件系統不支持硬鏈接時不去重、不遺留 blob"""
+
+    def no_link(src, dst):
+        raise OSError("hard links not supported")
+
+    monkeypatch.setattr(os, "link", no_link)
+    content = b"copied"
+    content_hash = hashlib.sha256(content).hexdigest()
+    first = storage.save_file_from_path(_temp_file(storage, content), "a.txt")
+    second = storage.save_file_from_path(_temp_file(storage, content), "b.txt")
+
+    assert first.deduplicated is False and second.deduplicated is False
+    assert first.ref_count == second.ref_count == 1
+    assert not storage._blob_path(content_hash).exists()
+    assert storage.read_file(second.file_id) == content
+
+    assert storage.delete_file(first.file_id) is True
+    assert storage.read_file(second.file_id) == content
+    assert storage.delete_file(second.file_id) is True
+
+
+def test_index_lookup_and_sharding(tmp_path):
+    """測試多層分片與索引查找"""
+    storage = LocalFileStorage(storage_path=str(tmp_path / "files"), shard_depth=2)
+    file_id, file_path = storage.save_file(b"hello", "a.txt", "abcdef12-0000")
+
+    assert file_path == str(tmp_path / "files" / "ab" / "cd" / "abcdef12-0000.txt")
+    assert storage.get_file_path(file_id) == file_path
+    assert storage.index.count() == 1
+
+    # 查找不存在的 ID 不會創建分片目錄
+    assert storage.get_file_path("ffff0000") is None
+    assert not (tmp_path / "files" / "ff").exists()
+
+    assert storage.delete_file(file_id) is True
+    assert storage.index.count() == 0
+
+
+def test_index_rebuilt_for_existing_files(tmp_path):
+    """測試舊目錄結構首次啟動時重建索引"""
+    legacy = tmp_path / "files" / "12"
+    legacy.mkdir(parents=True)
+    (legacy / "1234-legacy.pdf").write_bytes(b"%PDF-1.4")
+
+    storage = LocalFileStorage(storage_path=str(tmp_path / "files"))
+
+    assert storage.get_file_path("1234-legacy") == str(legacy / "1234-legacy.pdf")
+
+    # 索引之外被刪除的文件返回 None 並清理索引
+    os.remove(legacy / "1234-legacy.pdf")
+    assert storage.file_exists("1234-legacy") is False
+    assert storage.index.get("1234-legacy") is None
+
+
+class _FakeMetadataService:
+    def __init__(self):
+        self.records = {}
+
+    def create(self, metadata):
+        assert metadata.file_id not in self.records
+        self.records[metadata.file_id] = metadata
+
+    def get(self, file_id):
+        return self.records.get(file_id)
+
+    def update_content(self, file_id, filename, file_type, file_size, content_hash):
+        record = self.records.get(file_id)
+        if record is None:
+            return None
+        self.records[file_id] = record.model_copy(
+            update={
+                "filename": filename,
+                "file_type": file_type,
+                "file_size": file_size,
+                "content_hash": content_hash,
+            }
+        )
+        return self.records[file_id]
+
+    def delete(self, file_id):
+        return self.records.pop(file_id, None) is not None
+
+
+def test_download_streams_file(storage, monkeypatch):
+    """測試下載端點直接返回磁盤文件，文件名取自元數據"""
+    metadata = _FakeMetadataService()
+    monkeypatch.setattr(file_upload, "_storage", storage)
+    monkeypatch.setattr(file_upload, "_metadata_service", metadata)
+    app = FastAPI()
+    app.include_router(file_upload.router)
+    file_id, _ = storage.save_file(b"0123456789", "data.txt")
+    metadata.create(
+        FileMetadataCreate(
+            file_id=file_id,
+            filename="季度報告.txt",
+            file_type="text/plain",
+            file_size=10,
+        )
+    )
+
+    with TestClient(app) as client:
+        response = client.get(f"/files/{file_id}/download")
+        assert response.status_code == 200
+        assert response.content == b"0123456789"
+        assert response.headers["content-type"].startswith("text/plain")
+        disposition = response.headers["content-disposition"]
+        assert "%E5%AD%A3%E5%BA%A6%E5%A0%B1%E5%91%8A.txt" in disposition
+        assert file_id not in disposition
+
+        ranged = client.get(
+            f"/files/{file_id}/download", headers={"Range": "bytes=2-4"}
+        )
+        assert ranged.status_code == 206
+        assert ranged.content == b"234"
+
+        assert client.get("/files/missing/download").status_code == 404
+
+
+def test_replace_keeps_file_id(storage, monkeypatch):
+    """測試替換文件內容時沿用原文件 ID"""
+    metadata = _FakeMetadataService()
+    monkeypatch.setattr(file_upload, "_storage", storage)
+    monkeypatch.setattr(file_upload, "_metadata_service", metadata)
+    app = FastAPI()
+    app.include_router(file_upload.router)
+    file_id, _ = storage.save_file(b"version 1", "notes.txt")
+
+    with TestClient(app) as client:
+        response = client.put(
+            f"/files/{file_id}", files={"file": ("notes.txt", b"version 2")}
+        )
+        assert response.status_code == 200
+        assert response.json()["data"]["file_id"] == file_id
+        assert storage.read_file(file_id) == b"version 2"
+        assert (
+            metadata.records[file_id].content_hash
+            == hashlib.sha256(b"version 2").hexdigest()
+        )
+
+        missing = client.put("/files/missing", files={"file": ("a.txt", b"x")})
+        assert missing.status_code == 404
+
+
+def test_replace_updates_metadata_in_place(storage, monkeypatch):
+    """測試替換文件時保留原有元數據，只更新內容相關字段"""
+    metadata = _FakeMetadataService()
+    monkeypatch.setattr(file_upload, "_storage", storage)
+    monkeypatch.setattr(file_upload, "_metadata_service", metadata)
+    app = FastAPI()
+    app.include_router(file_upload.router)
+
+    with TestClient(app) as client:
+        uploaded = client.post(
+            "/files/upload?user_id=alice",
+            files={"files": ("notes.txt", b"version 1")},
+        )
+        file_id = uploaded.json()["data"]["uploaded"][0]["file_id"]
+        metadata.records[file_id].tags.append("keep")
+
+        response = client.put(
+            f"/files/{file_id}", files={"file": ("notes.md", b"# version 2")}
+        )
+        assert response.status_code == 200
+
+    record = metadata.records[file_id]
+    assert record.user_id == "alice"
+    assert record.tags == ["keep"]
+    assert record.filename == "notes.md"
+    assert record.file_size == len(b"# version 2")
+    assert storage.read_file(file_id) == b"# version 2"
+    assert storage.get_file_path(file_id).endswith(".md")
+    assert len(list(storage.storage_path.glob(f"*/{file_id}.*"))) == 1
+    assert storage.get_ref_count(hashlib.sha256(b"version 1").hexdigest()) == 0
+
+
+def test_failed_replace_keeps_original(storage, monkeypatch):
+    """測試替換保存失敗時原文件與其 blob 保持不變"""
+    monkeypatch.setattr(file_upload, "_storage", storage)
+    monkeypatch.setattr(file_upload, "_metadata_service", _FakeMetadataService())
+    app = FastAPI()
+    app.include_router(file_upload.router)
+    content = b"original"
+    stored = storage.save_file_from_path(_temp_file(storage, content), "a.txt")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, "_link_blob", fail)
+    with TestClient(app) as client:
+        response = client.put(
+            f"/files/{stored.file_id}", files={"file": ("a.txt", b"replacement")}
+        )
+        assert response.status_code != 200
+
+    assert storage.read_file(stored.file_id) == content
+    assert storage.get_ref_count(stored.content_hash) == 1
+    assert os.listdir(storage.temp_dir) == []
+
+
+def test_validate_header_magic_bytes():
+    """測試文件頭與擴展名一致性驗證"""
+    validator = FileValidator()
+
+    assert validator.validate_header(b"%PDF-1.7\n", "doc.pdf")[0] is True
+    assert validator.validate_header(b"PK\x03\x04rest", "doc.docx")[0] is True
+    assert validator.validate_header(b"MZ\x90\x00", "doc.pdf")[0] is False
+    assert validator.validate_header(b"text\x00binary", "notes.txt")[0] is False
+    assert validator.validate_upload_file(b"plain text", "notes.txt") == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_hashes_and_writes(tmp_path):
+    """測試分塊寫入暫存文件並計算哈希"""
+    content = b"line\n" * 1000
+    upload = UploadFile(file=BytesIO(content), filename="data.txt")
+
+    spooled = await spool_upload(
+        upload, FileValidator(), temp_dir=str(tmp_path), chunk_size=256
+    )
+
+    assert spooled.file_size == len(content)
+    assert spooled.content_hash == hashlib.sha256(content).hexdigest()
+    with open(spooled.temp_path, "rb") as f:
+        assert f.read() == content
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filename,content",
+    [
+        ("big.txt", b"x" * 2048),
+        ("fake.pdf", b"not a pdf"),
+        ("empty.txt", b""),
+        ("tool.exe", b"MZ"),
+    ],
+)
+async def test_spool_upload_rejects_and_cleans_up(tmp_path, filename, content):
+    """測試驗證失敗時中止並刪除暫存文件"""
+    upload = UploadFile(file=BytesIO(content), filename=filename)
+    validator = FileValidator(max_file_size=1024)
+
+    with pytest.raises(FileValidationError):
+        await spool_upload(upload, validator, temp_dir=str(tmp_path), chunk_size=256)
+
+    assert os.listdir(tmp_path) == []
@@ -1,36 +1,29 @@
 # 代碼功能說明: 文件上傳 API 測試
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-19
 
 """文件上傳 API 端點測試"""
 
 import pytest
-import os
-import shutil
 from fastapi.testclient import TestClient
 from io import BytesIO
 
 from services.api.main import app
-
-# 設置測試環境變數
-TEST_STORAGE_PATH = "./test_file_storage"
+from services.api.routers import file_upload
+from services.api.storage.file_storage import create_storage_from_config
 
 
 @pytest.fixture(scope="module")
-def client():
-    """創建測試客戶端"""
-    test_dir = TEST_STORAGE_PATH
-    # 清理舊的測試數據
-    if os.path.exists(test_dir):
-        shutil.rmtree(test_dir)
-
-    with TestClient(app) as test_client:
-        yield test_client
-
-    # 清理測試數據
-    if os.path.exists(test_dir):
-        shutil.rmtree(test_dir)
+def client(tmp_path_factory):
+    """創建測試客戶端（文件、索引與 blob 寫入臨時目錄，不寫入 ./datasets/files）"""
+    storage_path = tmp_path_factory.mktemp("file_storage")
+    storage = create_storage_from_config({"storage_path": str(storage_path)})
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(file_upload, "_storage", storage)
+        with TestClient(app) as test_client:
+            yield test_client
 
 
 @pytest.fixture
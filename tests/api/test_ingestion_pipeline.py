@@ -0,0 +1,317 @@
+# 代碼功能說明: 文件攝取管線測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""文件攝取管線測試 - 階段串聯、有界隊列背壓、失敗後續跑、增量攝取與吞吐量統計"""
+
+import asyncio
+
+import pytest
+
+from services.api.processors.chunk_processor import ChunkProcessor, ChunkStrategy
+from services.api.processors.parsers.txt_parser import TxtParser
+from services.api.services.ingestion_pipeline import IngestionConfig, IngestionPipeline
+from services.api.storage.chunk_store import LocalChunkJobStore
+
+CHUNK_COUNT = 20
+
+
+class FakeCollection:
+    """記錄寫入的向量集合"""
+
+    def __init__(self, delay: float = 0.0, name: str = "default"):
+        self.name = name
+        self.ids = []
+        self.metadatas = {}
+        self.delay = delay
+
+    def batch_add(self, items, batch_size=None):
+        if self.delay:
+            import time
+
+            time.sleep(self.delay)
+        self.ids.extend(item["id"] for item in items)
+        self.metadatas.update((item["id"], item["metadata"]) for item in items)
+        assert all(
+            isinstance(v, (str, int, float, bool))
+            for item in items
+            for v in item["metadata"].values()
+        )
+        return {"total": len(items), "success": len(items), "failed": 0, "errors": []}
+
+    def get(self, ids=None, where=None, include=None):
+        matched = [
+            i for i, m in self.metadatas.items() if m["file_id"] == where["file_id"]
+        ]
+        return {"ids": matched, "metadatas": [self.metadatas[i] for i in matched]}
+
+    def update(self, ids, metadatas=None):
+        self.metadatas.update(zip(ids, metadatas))
+
+    def delete(self, ids=None):
+        for chunk_id in ids:
+            self.metadatas.pop(chunk_id)
+
+
+class FakeTripleService:
+    async def extract_triples(self, text):
+        return [text]
+
+
+class FakeKGService:
+    def __init__(self, fail_after=None):
+        self.triples = []
+        self.sources = {}
+        self.fail_after = fail_after
+
+    async def build_from_triples(self, triples, source_chunk_ids=None):
+        if self.fail_after is not None and len(self.triples) >= self.fail_after:
+            raise RuntimeError("arangodb unavailable")
+        self.triples.extend(triples)
+        self.sources.update(zip(source_chunk_ids or [], triples))
+        return {"total_triples": len(triples)}
+
+    def remove_chunk_sources(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            self.sources.pop(chunk_id, None)
+        return {"relations_removed": len(chunk_ids), "relations_updated": 0}
+
+
+class Recorder:
+    """批量嵌入假件，記錄調用次數與嵌入進度"""
+
+    def __init__(self):
+        self.calls = 0
+        self.embedded = 0
+
+    async def __call__(self, texts):
+        self.calls += 1
+        self.embedded += len(texts)
+        await asyncio.sleep(0)
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "doc.txt"
+    text = "\n\n".join(f"第 {i} 段內容。" for i in range(CHUNK_COUNT))
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def job_store(tmp_path):
+    return LocalChunkJobStore(base_path=str(tmp_path / "chunks"))
+
+
+def _chunker():
+    return ChunkProcessor(chunk_size=10, overlap=0, strategy=ChunkStrategy.FIXED_SIZE)
+
+
+def _pipeline(job_store, **kwargs):
+    config = kwargs.pop("config", IngestionConfig(batch_size=3, queue_size=1))
+    return IngestionPipeline(job_store, config=config, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_full_pipeline_runs_all_stages(job_store, source_file):
+    """測試全部階段串聯運行"""
+    embed = Recorder()
+    collection = FakeCollection()
+    kg = FakeKGService()
+    pipeline = _pipeline(
+        job_store,
+        embed_fn=embed,
+        collection=collection,
+        triple_service=FakeTripleService(),
+        kg_service=kg,
+    )
+    summary = await pipeline.run("f1", source_file, TxtParser(), _chunker())
+
+    total = summary["chunk_count"]
+    assert total == job_store.count_chunks("f1") > 0
+    assert len(collection.ids) == len(set(collection.ids)) == total
+    assert len(kg.triples) == total
+    assert embed.calls == -(-total // 3)
+    assert set(summary["stages"]) == {"chunk", "embed", "index", "extract", "kg"}
+    assert summary["stages"]["index"]["items"] == total
+
+    status = job_store.get_status("f1")
+    assert status["status"] == "completed"
+    assert status["progress"] == 100
+    assert all(status["stages"][s]["done"] == total for s in pipeline.stages)
+
+
+@pytest.mark.asyncio
+async def test_bounded_queues_apply_backpressure(job_store, source_file):
+    """測試下游變慢時上游不會無限超前"""
+    embed = Recorder()
+    collection = FakeCollection(delay=0.01)
+    lead = []
+
+    original = collection.batch_add
+
+    def tracking_batch_add(items, batch_size=None):
+        lead.append(embed.embedded - len(collection.ids))
+        return original(items, batch_size)
+
+    collection.batch_add = tracking_batch_add
+    config = IngestionConfig(
+        batch_size=2, queue_size=1, concurrency={"embed": 1, "index": 1}
+    )
+    pipeline = _pipeline(
+        job_store, embed_fn=embed, collection=collection, config=config
+    )
+    await pipeline.run("f2", source_file, TxtParser(), _chunker())
+
+    # 正在索引的批次 + 隊列中 1 批 + 嵌入中 1 批 + 等待入隊的 1 批
+    assert max(lead) <= 4 * config.batch_size
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_stages(job_store, source_file):
+    """測試失敗後續跑只處理未完成的部分"""
+    embed = Recorder()
+    collection = FakeCollection()
+    kg = FakeKGService(fail_after=6)
+    pipeline = _pipeline(
+        job_store,
+        embed_fn=embed,
+        collection=collection,
+        triple_service=FakeTripleService(),
+        kg_service=kg,
+    )
+    with pytest.raises(RuntimeError):
+        await pipeline.run("f3", source_file, TxtParser(), _chunker())
+
+    status = job_store.get_status("f3")
+    assert status["status"] == "failed"
+    total = status["stages"]["chunk"]["done"]
+    kg_done = status["stages"]["kg"]["done"]
+    assert kg_done < total
+
+    # 續跑：不重新分塊，已完成的批次不再嵌入與寫入
+    embed_again = Recorder()
+    collection_again = FakeCollection()
+    kg.fail_after = None
+    pipeline = _pipeline(
+        job_store,
+        embed_fn=embed_again,
+        collection=collection_again,
+        triple_service=FakeTripleService(),
+        kg_service=kg,
+    )
+    summary = await pipeline.run("f3", source_file, TxtParser(), _chunker())
+    assert summary["stages"]["chunk"]["skipped"] == total
+    index_done = status["stages"]["index"]["done"]
+    assert len(collection_again.ids) == total - index_done
+    assert len(kg.triples) == total
+    assert job_store.get_status("f3")["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_progress_not_reused_for_another_target(job_store, source_file):
+    """測試寫入另一個集合、換嵌入模型或分塊配置時不復用上次的進度"""
+    first = FakeCollection(name="a")
+    await _pipeline(job_store, embed_fn=Recorder(), collection=first).run(
+        "f5", source_file, TxtParser(), _chunker()
+    )
+    total = job_store.get_status("f5")["chunk_count"]
+    assert len(first.ids) == total
+
+    # 另一個集合：分塊可復用，嵌入與索引重新執行
+    second = FakeCollection(name="b")
+    summary = await _pipeline(job_store, embed_fn=Recorder(), collection=second).run(
+        "f5", source_file, TxtParser(), _chunker()
+    )
+    assert summary["stages"]["chunk"]["skipped"] == total
+    assert len(second.ids) == total
+
+    # 換嵌入模型：重新嵌入
+    embed = Recorder()
+    await _pipeline(
+        job_store, embed_fn=embed, collection=second, embedding_model="bge-m3"
+    ).run("f5", source_file, TxtParser(), _chunker())
+    assert embed.embedded == total
+
+    # 換分塊配置：重新分塊，全部階段重跑
+    chunker = ChunkProcessor(chunk_size=5, overlap=0, strategy=ChunkStrategy.FIXED_SIZE)
+    third = FakeCollection(name="b")
+    summary = await _pipeline(
+        job_store, embed_fn=Recorder(), collection=third, embedding_model="bge-m3"
+    ).run("f5", source_file, TxtParser(), chunker)
+    assert summary["stages"]["chunk"]["skipped"] == 0
+    assert len(third.ids) == summary["chunk_count"]
+
+
+@pytest.mark.asyncio
+async def test_chunk_only_pipeline(job_store, source_file):
+    """測試未配置下游組件時只分塊"""
+    pipeline = _pipeline(job_store)
+    assert pipeline.stages == []
+    summary = await pipeline.run("f4", source_file, TxtParser(), _chunker())
+    status = job_store.get_status("f4")
+    assert status["message"] == "分塊處理完成"
+    assert status["chunk_count"] == summary["chunk_count"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_reingest_processes_only_changed_chunks(job_store, tmp_path):
+    """測試增量攝取只嵌入新增分塊、刪除消失分塊並保留未變分塊"""
+    path = tmp_path / "manual.txt"
+    paragraphs = [f"第 {i} 段內容。" for i in range(CHUNK_COUNT)]
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+    chunker = ChunkProcessor(chunk_size=10, overlap=0, strategy=ChunkStrategy.SEMANTIC)
+    collection = FakeCollection()
+    kg = FakeKGService()
+
+    def pipeline(embed):
+        return _pipeline(
+            job_store,
+            embed_fn=embed,
+            collection=collection,
+            triple_service=FakeTripleService(),
+            kg_service=kg,
+        )
+
+    first = await pipeline(Recorder()).run("f1", str(path), TxtParser(), chunker)
+    original = set(collection.metadatas)
+    assert len(original) == first["chunk_count"] == CHUNK_COUNT
+
+    # 修改第 3 段，刪除第 7 段
+    paragraphs[3] = "第 3 段已修訂。"
+    del paragraphs[7]
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+    embed = Recorder()
+    summary = await pipeline(embed).run(
+        "f1", str(path), TxtParser(), chunker, incremental=True
+    )
+
+    assert summary["diff"]["added"] == 1
+    assert summary["diff"]["removed"] == 2
+    assert summary["diff"]["unchanged"] == CHUNK_COUNT - 2
+    assert embed.embedded == 1
+    assert set(kg.sources) == set(collection.metadatas)
+    assert len(collection.metadatas) == summary["chunk_count"] == CHUNK_COUNT - 1
+    assert len(original - set(collection.metadatas)) == 2
+
+    # 刪除段落之後的分塊只更新位置元數據
+    assert summary["diff"]["metadata_updated"] > 0
+    indexes = sorted(m["chunk_index"] for m in collection.metadatas.values())
+    assert indexes == list(range(CHUNK_COUNT - 1))
+
+    # 內容未變時不做任何嵌入
+    embed = Recorder()
+    summary = await pipeline(embed).run(
+        "f1", str(path), TxtParser(), chunker, incremental=True
+    )
+    assert summary["diff"] == {
+        "added": 0,
+        "removed": 0,
+        "unchanged": CHUNK_COUNT - 1,
+        "metadata_updated": 0,
+    }
+    assert embed.calls == 0
+    assert job_store.get_status("f1")["status"] == "completed"
@@ -0,0 +1,141 @@
+# 代碼功能說明: 延遲路由加載測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""延遲路由加載測試 - 首次請求掛載、功能集過濾、可選路由、文檔路徑與失敗重試"""
+
+import sys
+import textwrap
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.api.core.lazy_routers import LazyRouterRegistry, parse_features
+from services.api.middleware.lazy_router import LazyRouterMiddleware
+
+
+@pytest.fixture
+def router_modules(tmp_path, monkeypatch):
+    """在臨時目錄中生成測試用路由模組"""
+    package = tmp_path / "lazy_test_routers"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for name in ("alpha", "beta"):
+        source = f"""
+            from fastapi import APIRouter
+
+            router = APIRouter(prefix="/{name}")
+
+
+            @router.get("/ping")
+            async def ping():
+                return {{"router": "{name}"}}
+            """
+        (package / f"{name}.py").write_text(textwrap.dedent(source))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "lazy_test_routers"
+    for module in [m for m in sys.modules if m.startswith("lazy_test_routers")]:
+        sys.modules.pop(module)
+
+
+def _build(package: str, features=None, lazy=True):
+    app = FastAPI()
+    registry = LazyRouterRegistry(app, features=features, lazy=lazy)
+    registry.register("alpha", f"{package}.alpha", "a", ["/v1/alpha"], prefix="/v1")
+    registry.register("beta", f"{package}.beta", "b", ["/v1/beta"], prefix="/v1")
+    registry.register(
+        "missing",
+        f"{package}.missing",
+        "b",
+        ["/v1/missing"],
+        prefix="/v1",
+        optional=True,
+    )
+    app.add_middleware(LazyRouterMiddleware, registry=registry)
+    return app, registry
+
+
+def _states(registry):
+    return {item["name"]: item["state"] for item in registry.status()}
+
+
+def test_router_loads_on_first_request(router_modules):
+    """測試路由在首次請求時才導入"""
+    app, registry = _build(router_modules)
+    client = TestClient(app)
+    assert f"{router_modules}.alpha" not in sys.modules
+
+    response = client.get("/v1/alpha/ping")
+    assert response.status_code == 200
+    assert response.json() == {"router": "alpha"}
+    assert _states(registry) == {
+        "alpha": "loaded",
+        "beta": "pending",
+        "missing": "pending",
+    }
+    assert f"{router_modules}.beta" not in sys.modules
+
+
+def test_feature_set_disables_other_routers(router_modules):
+    """測試功能集之外的路由不會被掛載"""
+    app, registry = _build(router_modules, features=parse_features("a"))
+    client = TestClient(app)
+    assert client.get("/v1/beta/ping").status_code == 404
+    assert _states(registry)["beta"] == "disabled"
+    assert f"{router_modules}.beta" not in sys.modules
+
+
+def test_docs_path_loads_all_and_optional_failure_is_recorded(router_modules):
+    """測試文檔路徑加載全部路由，可選路由導入失敗只記錄狀態"""
+    app, registry = _build(router_modules)
+    client = TestClient(app)
+    paths = client.get("/openapi.json").json()["paths"]
+    assert {"/v1/alpha/ping", "/v1/beta/ping"} <= set(paths)
+    states = _states(registry)
+    assert states["missing"] == "failed"
+    assert client.get("/v1/missing").status_code == 404
+
+
+def test_eager_mode_loads_at_startup(router_modules):
+    """測試非延遲模式在啟動時加載全部路由"""
+    _, registry = _build(router_modules, lazy=False)
+    registry.load_all()
+    assert _states(registry)["alpha"] == "loaded"
+    assert parse_features("all") is None
+    assert parse_features(" llm, chromadb ") == {"llm", "chromadb"}
+
+
+def test_non_import_error_is_retried(router_modules, tmp_path):
+    """測試導入時的非 ImportError 不被緩存，下一次請求重新加載"""
+    marker = tmp_path / "ready"
+    source = f"""
+        import pathlib
+
+        from fastapi import APIRouter
+
+        if not pathlib.Path({str(marker)!r}).exists():
+            raise RuntimeError("backend not ready")
+
+        router = APIRouter(prefix="/flaky")
+
+
+        @router.get("/ping")
+        async def ping():
+            return {{"router": "flaky"}}
+        """
+    (tmp_path / router_modules / "flaky.py").write_text(textwrap.dedent(source))
+    app, registry = _build(router_modules)
+    registry.register(
+        "flaky", f"{router_modules}.flaky", "a", ["/v1/flaky"], prefix="/v1"
+    )
+    client = TestClient(app, raise_server_exceptions=False)
+
+    assert client.get("/v1/flaky/ping").status_code == 500
+    assert _states(registry)["flaky"] == "pending"
+
+    marker.touch()
+    response = client.get("/v1/flaky/ping")
+    assert response.status_code == 200
+    assert _states(registry)["flaky"] == "loaded"
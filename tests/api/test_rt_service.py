@@ -1,14 +1,17 @@
 # 代碼功能說明: RT 服務單元測試
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """RT 服務單元測試"""
 
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 
+from agent_process.prompt import PromptManager
 from services.api.services.rt_service import (
+    RELATION_TYPES_PROMPT_LIST,
+    RT_PROMPT_NAME,
     RTService,
     OllamaRTModel,
     TransformersRTModel,
@@ -36,6 +39,30 @@ class TestOllamaRTModel:
         if relation_types:
             assert all(isinstance(rt, RelationType) for rt in relation_types)
 
+    @pytest.mark.asyncio
+    async def test_prompt_has_stable_prefix(self):
+        """測試提示以固定的靜態前綴開頭（含關係類型列表），並傳遞 keep_alive"""
+        mock_client = Mock()
+        mock_client.generate = AsyncMock(return_value={"response": "[]"})
+        manager = PromptManager()
+        model = OllamaRTModel(
+            model_name="test-model",
+            client=mock_client,
+            prompt_manager=manager,
+            keep_alive="30m",
+        )
+
+        await model.classify_relation_type("工作於", "張三", "微軟")
+        await model.classify_relation_type("位於")
+
+        prefix = manager.static_prefix(RT_PROMPT_NAME)
+        assert RELATION_TYPES_PROMPT_LIST in prefix
+        prompts = [call.args[0] for call in mock_client.generate.call_args_list]
+        assert all(prompt.startswith(prefix) for prompt in prompts)
+        assert prompts[0].endswith("主體：張三\n客體：微軟\n關係文本：工作於")
+        assert mock_client.generate.call_args.kwargs["keep_alive"] == "30m"
+        assert model.prompt_id.startswith(f"{RT_PROMPT_NAME}@v1.")
+
 
 class TestTransformersRTModel:
     """Transformers RT 模型測試"""
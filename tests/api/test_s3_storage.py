@@ -0,0 +1,218 @@
+# 代碼功能說明: S3 兼容對象存儲測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""S3 兼容對象存儲測試 - 分塊上傳、範圍讀取、PDF 頁範圍解析與 LRU 緩存（使用 moto 模擬 S3）"""
+
+import io
+import os
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from services.api.processors.parsers.pdf_parser import PdfParser  # noqa: E402
+from services.api.storage.file_storage import create_storage_from_config  # noqa: E402
+from services.api.storage.s3_storage import (  # noqa: E402
+    LRUDiskCache,
+    S3FileStorage,
+)
+
+BUCKET = "ai-box-test"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    """創建模擬 S3 客戶端與存儲桶"""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def storage(s3_client, tmp_path):
+    """創建 S3 文件存儲"""
+    return S3FileStorage(
+        bucket_name=BUCKET,
+        client=s3_client,
+        cache_path=str(tmp_path / "cache"),
+        multipart_chunk_size=5 * MB,
+    )
+
+
+def _temp_file(storage, content: bytes) -> str:
+    path = os.path.join(storage.temp_dir, "upload.part")
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_multipart_upload_and_cache(storage, s3_client):
+    """測試分塊上傳、對象元數據與本地緩存"""
+    content = os.urandom(6 * MB)
+    stored = storage.save_file_from_path(
+        _temp_file(storage, content), "big.pdf", content_hash="abc"
+    )
+
+    head = s3_client.head_object(Bucket=BUCKET, Key=f"files/{stored.file_id}")
+    assert head["ContentLength"] == len(content)
+    assert head["Metadata"] == {"filename": "big.pdf", "content-sha256": "abc"}
+    # 分塊上傳的 ETag 帶有塊數後綴
+    assert head["ETag"].strip('"').endswith("-2")
+
+    # 上傳後暫存文件已移入緩存，讀取無需下載
+    cached = storage.get_file_path(stored.file_id)
+    etag = head["ETag"].strip('"')
+    assert os.path.basename(cached) == f"{stored.file_id}.{etag}.pdf"
+    assert storage.read_file(stored.file_id) == content
+    assert os.listdir(storage.temp_dir) == []
+
+
+def test_download_on_cache_miss_and_delete(storage, tmp_path):
+    """測試緩存未命中時下載，刪除時清理對象和緩存"""
+    file_id, uri = storage.save_file(b"hello s3", "note.txt")
+    assert uri == f"s3://{BUCKET}/files/{file_id}"
+
+    storage.cache.remove(file_id)
+    file_path = storage.get_file_path(file_id)
+    assert file_path.endswith(".txt")
+    with open(file_path, "rb") as f:
+        assert f.read() == b"hello s3"
+
+    assert storage.delete_file(file_id) is True
+    assert storage.file_exists(file_id) is False
+    assert storage.get_file_path(file_id) is None
+    assert storage.delete_file(file_id) is False
+
+
+def test_range_reads_fetch_only_requested_bytes(storage):
+    """測試範圍讀取只下載請求的字節"""
+    content = os.urandom(2 * MB)
+    file_id, _ = storage.save_file(content, "blob.pdf")
+    storage.cache.remove(file_id)
+
+    assert storage.read_range(file_id, 100, 199) == content[100:200]
+
+    stream = storage.open_file(file_id)
+    stream.seek(1_500_000)
+    assert stream.read(10) == content[1_500_000:1_500_010]
+    assert stream.raw.requests == 1
+    assert stream.raw.tell() - 1_500_000 <= 256 * 1024
+
+
+def test_pdf_page_range_from_range_stream(storage):
+    """測試通過範圍讀取流解析 PDF 指定頁"""
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    writer = PyPDF2.PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(100, 100)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+
+    file_id, _ = storage.save_file(buffer.getvalue(), "doc.pdf")
+    storage.cache.remove(file_id)
+
+    result = PdfParser().parse_stream(storage.open_file(file_id), 2, 3)
+
+    assert result["metadata"]["num_pages"] == 5
+    assert [p["page_number"] for p in result["metadata"]["pages"]] == [2, 3]
+
+
+def test_parse_file_streams_pdf_without_download(storage):
+    """測試解析 PDF 時通過範圍讀取流解析，不下載到本地緩存"""
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    writer = PyPDF2.PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(100, 100)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+
+    file_id, _ = storage.save_file(buffer.getvalue(), "doc.pdf")
+    storage.cache.remove(file_id)
+
+    result = storage.parse_file(file_id, PdfParser())
+
+    assert result["metadata"]["num_pages"] == 3
+    assert storage.cache.get(file_id) is None
+    assert storage.get_filename(file_id) == "doc.pdf"
+    assert storage.parse_file("missing", PdfParser()) is None
+
+
+def test_cache_revalidated_after_replace_on_other_node(s3_client, tmp_path):
+    """測試其他節點替換或刪除對象後不再返回過期的緩存內容"""
+    writer, reader = (
+        S3FileStorage(
+            bucket_name=BUCKET, client=s3_client, cache_path=str(tmp_path / name)
+        )
+        for name in ("node-a", "node-b")
+    )
+    file_id, _ = writer.save_file(b"version 1", "notes.txt")
+    assert reader.read_file(file_id) == b"version 1"
+
+    writer.save_file(b"version 2", "notes.txt", file_id=file_id)
+    assert reader.read_file(file_id) == b"version 2"
+    assert reader.cache.size == len(b"version 2")
+
+    assert writer.delete_file(file_id) is True
+    assert reader.get_file_path(file_id) is None
+    assert reader.cache.size == 0
+
+
+def test_save_file_cleans_temp_on_failure(storage, monkeypatch):
+    """測試上傳失敗時刪除暫存文件"""
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("upload failed")
+
+    monkeypatch.setattr(storage.client, "upload_file", fail)
+    with pytest.raises(RuntimeError):
+        storage.save_file(b"data", "a.txt")
+    assert os.listdir(storage.temp_dir) == []
+
+
+def test_lru_disk_cache_eviction(tmp_path):
+    """測試 LRU 緩存按最近訪問淘汰"""
+    cache = LRUDiskCache(str(tmp_path / "cache"), max_bytes=250)
+
+    def put(file_id):
+        path = os.path.join(cache.temp_dir, f"{file_id}.part")
+        with open(path, "wb") as f:
+            f.write(b"x" * 100)
+        return cache.put(file_id, f"{file_id}.txt", path)
+
+    put("a")
+    put("b")
+    assert cache.get("a") is not None
+    put("c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.size == 200
+
+    # 重啟後恢復已有緩存
+    assert LRUDiskCache(str(tmp_path / "cache"), max_bytes=250).size == 200
+
+
+def test_create_storage_from_config(s3_client, tmp_path):
+    """測試從配置創建 S3 存儲"""
+    storage = create_storage_from_config(
+        {
+            "storage_backend": "s3",
+            "s3": {"bucket": BUCKET, "cache_path": str(tmp_path / "cache")},
+        }
+    )
+
+    assert isinstance(storage, S3FileStorage)
+    file_id, _ = storage.save_file(b"data", "a.txt")
+    assert storage.file_exists(file_id)
+
+    with pytest.raises(ValueError):
+        create_storage_from_config({"storage_backend": "s3", "s3": {}})
@@ -1,7 +1,7 @@
 # 代碼功能說明: 三元組提取服務單元測試
 # 創建日期: 2025-01-27 23:30 (UTC+8)
 # 創建人: Daniel Chung
-# 最後修改日期: 2025-01-27 23:30 (UTC+8)
+# 最後修改日期: 2026-10-18
 
 """三元組提取服務單元測試"""
 
@@ -69,6 +69,28 @@ class TestTripleExtractionService:
         assert len(triples) > 0
         assert all(isinstance(t, Triple) for t in triples)
 
+    @pytest.mark.asyncio
+    async def test_cache_key_includes_prompt_versions(self):
+        """測試提示模板版本變化時緩存鍵隨之變化"""
+        mock_ner = Mock()
+        mock_ner.prompt_version = "text_analysis.ner@v1.aaaa"
+        mock_ner.extract_entities = AsyncMock(return_value=[])
+
+        service = TripleExtractionService(
+            ner_service=mock_ner, re_service=Mock(), rt_service=Mock()
+        )
+        key = service._get_cache_key("文本", None, True)
+        assert service._get_cache_key("文本", None, True) == key
+
+        await service.extract_triples("文本")
+        await service.extract_triples("文本")
+        assert mock_ner.extract_entities.await_count == 1
+
+        mock_ner.prompt_version = "text_analysis.ner@v2.bbbb"
+        assert service._get_cache_key("文本", None, True) != key
+        await service.extract_triples("文本")
+        assert mock_ner.extract_entities.await_count == 2
+
     @pytest.mark.asyncio
     async def test_extract_triples_batch(self):
         """測試批量三元組提取"""
@@ -0,0 +1,6 @@
+# 代碼功能說明: core 測試模組初始化
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""core 共享工具測試模組。"""
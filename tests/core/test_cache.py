@@ -0,0 +1,101 @@
+# 代碼功能說明: TTLCache 單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""有界 LRU + TTL 緩存單元測試。"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from core.cache import TTLCache, get_cache_stats, make_cache_key
+
+
+class TestMakeCacheKey:
+    """測試緩存鍵生成。"""
+
+    def test_dict_order_independent(self):
+        assert make_cache_key("q", {"a": 1, "b": 2}) == make_cache_key(
+            "q", {"b": 2, "a": 1}
+        )
+
+    def test_compact_and_distinct(self):
+        key = make_cache_key("x" * 10000)
+        assert len(key) == 32
+        assert key != make_cache_key("x" * 9999)
+
+
+class TestTTLCache:
+    """測試 TTLCache。"""
+
+    def test_lru_eviction(self):
+        cache = TTLCache("test.lru", max_size=2, ttl=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # a 成為最近使用
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats().evictions == 1
+
+    def test_ttl_expiration(self):
+        cache = TTLCache("test.ttl", max_size=10, ttl=0.05)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        time.sleep(0.06)
+        assert cache.get("a") is None
+        stats = cache.stats()
+        assert stats.expirations == 1
+        assert stats.hits == 1
+        assert stats.misses == 1
+
+    def test_purge_expired(self):
+        cache = TTLCache("test.purge", max_size=10, ttl=0.01)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        time.sleep(0.02)
+        assert cache.purge_expired() == 2
+        assert len(cache) == 0
+
+    def test_freeze_thaw_isolates_callers(self):
+        cache = TTLCache("test.freeze", max_size=10, freeze=tuple, thaw=list)
+        value = [1, 2]
+        cache.set("k", value)
+        value.append(3)
+        first = cache.get("k")
+        first.append(4)
+        assert cache.get("k") == [1, 2]
+
+    def test_invalid_max_size(self):
+        with pytest.raises(ValueError):
+            TTLCache("test.invalid", max_size=0)
+
+    def test_thread_safety(self):
+        cache = TTLCache("test.threads", max_size=50, ttl=0)
+
+        def worker(offset: int) -> None:
+            for i in range(500):
+                cache.set(f"{offset}-{i}", i)
+                cache.get(f"{offset}-{i - 1}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(cache) == 50
+
+    def test_registry_merges_by_name(self):
+        first = TTLCache("test.registry", max_size=4)
+        second = TTLCache("test.registry", max_size=4)
+        first.set("a", 1)
+        second.get("missing")
+        stats = {item["name"]: item for item in get_cache_stats()}
+        assert stats["test.registry"]["instances"] == 2
+        assert stats["test.registry"]["size"] == 1
+        assert stats["test.registry"]["misses"] == 1
@@ -0,0 +1,80 @@
+# 代碼功能說明: 延遲導入工具單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""測試包級延遲導出與導入耗時記錄。"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import types
+
+import pytest
+
+from core.lazy_import import get_import_profile, lazy_exports, timed_import
+
+
+class TestLazyExports:
+    """測試 PEP 562 延遲導出。"""
+
+    def _package(self, name: str) -> types.ModuleType:
+        module = types.ModuleType(name)
+        sys.modules[name] = module
+        module.__getattr__, module.__dir__ = lazy_exports(
+            name, {"OrderedDict": "collections", "dedent": "textwrap"}
+        )
+        return module
+
+    def test_resolves_and_caches_export(self):
+        package = self._package("_lazy_pkg_a")
+        try:
+            from collections import OrderedDict
+
+            assert package.OrderedDict is OrderedDict
+            assert "OrderedDict" in vars(package)
+            assert "dedent" not in vars(package)
+            assert {"OrderedDict", "dedent"} <= set(dir(package))
+        finally:
+            sys.modules.pop("_lazy_pkg_a", None)
+
+    def test_unknown_name_raises_attribute_error(self):
+        package = self._package("_lazy_pkg_b")
+        try:
+            with pytest.raises(AttributeError):
+                _ = package.missing
+        finally:
+            sys.modules.pop("_lazy_pkg_b", None)
+
+
+class TestTimedImport:
+    """測試導入耗時記錄。"""
+
+    def test_records_new_import(self):
+        sys.modules.pop("json.tool", None)
+        timed_import("json.tool")
+        record = next(r for r in get_import_profile() if r["module"] == "json.tool")
+        assert record["seconds"] >= 0
+        assert record["error"] is None
+
+    def test_records_failed_import(self):
+        with pytest.raises(ImportError):
+            timed_import("_definitely_missing_module_xyz")
+        record = next(
+            r
+            for r in get_import_profile()
+            if r["module"] == "_definitely_missing_module_xyz"
+        )
+        assert record["error"].startswith("ModuleNotFoundError")
+
+
+def test_llm_package_does_not_import_provider_sdks():
+    """導入 llm 包不應連帶導入提供商 SDK 與路由策略。"""
+    code = (
+        "import sys, llm, llm.clients; "
+        "assert 'openai' not in sys.modules; "
+        "assert 'llm.routing' not in sys.modules; "
+        "assert llm.LLMClientFactory is llm.clients.LLMClientFactory"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,6 @@
+# 代碼功能說明: CrewAI 測試模組
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""CrewAI 相關測試模組。"""
@@ -0,0 +1,176 @@
+# 代碼功能說明: CrewAI 任務排程器與工作池測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""測試惰性刪除的優先級隊列與併發工作池的預算、超時與取消處理。"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import agents.task_analyzer  # noqa: F401  # 先初始化 task_analyzer，避免 llm 套件循環導入
+from agents.crewai.task_models import CrewTask, TaskPriority, TaskResult, TaskStatus
+from agents.crewai.task_registry import TaskRegistry
+from agents.crewai.task_scheduler import TaskScheduler
+from agents.crewai.task_worker_pool import TaskWorkerPool
+from agents.crewai.token_budget import TokenBudgetGuard
+
+
+def _task(
+    task_id: str, crew_id: str = "crew", priority=TaskPriority.MEDIUM, **metadata
+):
+    return CrewTask(
+        task_id=task_id,
+        crew_id=crew_id,
+        description=task_id,
+        priority=priority,
+        metadata=metadata,
+    )
+
+
+def test_queue_order_cancel_and_reprioritize():
+    scheduler = TaskScheduler(TaskRegistry())
+    for task_id, priority in (
+        ("low", TaskPriority.LOW),
+        ("medium", TaskPriority.MEDIUM),
+        ("urgent", TaskPriority.URGENT),
+        ("other", TaskPriority.MEDIUM),
+    ):
+        scheduler.schedule_task(_task(task_id, priority=priority))
+
+    assert [t.task_id for t in scheduler.get_task_queue()] == [
+        "urgent",
+        "medium",
+        "other",
+        "low",
+    ]
+
+    scheduler.cancel_task("medium")
+    scheduler.prioritize_task("low", TaskPriority.HIGH)
+
+    assert scheduler.queue_size() == 3
+    assert set(scheduler.pending_view()) == {"urgent", "other", "low"}
+    assert [t.task_id for t in scheduler.get_task_queue()] == ["urgent", "low", "other"]
+    assert [scheduler.get_next_task().task_id for _ in range(3)] == [
+        "urgent",
+        "low",
+        "other",
+    ]
+    assert scheduler.get_next_task() is None
+    assert scheduler.get_task_queue() == []
+
+
+@pytest.mark.asyncio
+async def test_workers_run_tasks_concurrently():
+    registry = TaskRegistry()
+    scheduler = TaskScheduler(registry)
+    active = 0
+    peak = 0
+
+    async def executor(task: CrewTask):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return task.description.upper()
+
+    pool = TaskWorkerPool(scheduler, executor, num_workers=3)
+    await pool.start()
+    for i in range(6):
+        scheduler.schedule_task(_task(f"t{i}"))
+    await asyncio.wait_for(pool.join(), timeout=2)
+    await pool.stop()
+
+    assert peak == 3
+    assert registry.get_task_result("t0").output == "T0"
+    assert registry.get_task("t5").status == TaskStatus.COMPLETED
+    assert pool.snapshot()["completed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_long_task_does_not_block_other_crews():
+    registry = TaskRegistry()
+    scheduler = TaskScheduler(registry)
+    finished = []
+    release = asyncio.Event()
+
+    async def executor(task: CrewTask):
+        if task.task_id == "long":
+            await release.wait()
+        finished.append(task.task_id)
+
+    pool = TaskWorkerPool(scheduler, executor, num_workers=2)
+    await pool.start()
+    scheduler.schedule_task(_task("long", crew_id="a", priority=TaskPriority.URGENT))
+    scheduler.schedule_task(_task("short", crew_id="b"))
+    await asyncio.sleep(0.05)
+    assert finished == ["short"]
+
+    release.set()
+    await asyncio.wait_for(pool.join(), timeout=2)
+    await pool.stop()
+    assert finished == ["short", "long"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancel_and_budget():
+    registry = TaskRegistry()
+    scheduler = TaskScheduler(registry)
+    started = asyncio.Event()
+
+    async def executor(task: CrewTask):
+        if task.task_id in ("slow", "hang"):
+            started.set()
+            await asyncio.sleep(10)
+        return task.task_id
+
+    pool = TaskWorkerPool(
+        scheduler,
+        executor,
+        num_workers=2,
+        task_timeout=0.05,
+        budget_guards={"poor": TokenBudgetGuard(100)},
+    )
+    await pool.start()
+
+    scheduler.schedule_task(_task("slow"))
+    scheduler.schedule_task(_task("hang", timeout=None))
+    scheduler.schedule_task(_task("expensive", crew_id="poor", estimated_tokens=500))
+    await asyncio.wait_for(started.wait(), timeout=1)
+    await asyncio.sleep(0.01)
+    assert scheduler.cancel_task("hang") is True
+    await asyncio.wait_for(pool.join(), timeout=2)
+    await pool.stop()
+
+    assert registry.get_task("slow").status == TaskStatus.FAILED
+    assert "timed out" in registry.get_task_result("slow").error
+    assert registry.get_task("hang").status == TaskStatus.CANCELLED
+    assert registry.get_task_result("hang").status == TaskStatus.CANCELLED
+    assert registry.get_task_result("expensive").error == "Token budget exceeded"
+
+
+@pytest.mark.asyncio
+async def test_token_usage_is_recorded_per_crew():
+    registry = TaskRegistry()
+    scheduler = TaskScheduler(registry)
+
+    async def executor(task: CrewTask):
+        return TaskResult(
+            task_id=task.task_id, status=TaskStatus.COMPLETED, token_usage=60
+        )
+
+    pool = TaskWorkerPool(scheduler, executor, num_workers=1, default_token_budget=100)
+    await pool.start()
+    for i in range(3):
+        scheduler.schedule_task(_task(f"t{i}", crew_id="crew"))
+    await asyncio.wait_for(pool.join(), timeout=2)
+    await pool.stop()
+
+    guard = pool.get_budget_guard("crew")
+    assert guard.usage.total_tokens == 120
+    assert registry.get_task("t2").status == TaskStatus.FAILED
+    assert registry.get_task_result("t2").error == "Token budget exceeded"
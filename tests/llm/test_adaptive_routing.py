@@ -0,0 +1,174 @@
+# 代碼功能說明: 自適應路由策略單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""測試時間衰減 EWMA、評估器實時測量與自適應路由（試探、P2C、負載感知）。"""
+
+from __future__ import annotations
+
+import pytest
+
+from agents.task_analyzer.models import LLMProvider, TaskClassificationResult, TaskType
+from llm.clients.factory import LLMClientFactory
+from llm.routing.base import RoutingStrategyRegistry
+from llm.routing.evaluator import RoutingEvaluator
+from llm.routing.strategies import AdaptiveRoutingStrategy
+from llm.routing.streaming_stats import EwmaStats
+
+TASK_TYPE = TaskType.QUERY.value
+
+
+def _classification() -> TaskClassificationResult:
+    return TaskClassificationResult(
+        task_type=TaskType.QUERY, confidence=0.9, reasoning="test"
+    )
+
+
+def _warm(
+    evaluator: RoutingEvaluator, provider: LLMProvider, latency: float, n: int = 5
+):
+    for _ in range(n):
+        evaluator.record_decision(
+            provider=provider,
+            strategy="adaptive",
+            task_type=TASK_TYPE,
+            success=True,
+            latency=latency,
+        )
+
+
+class TestEwmaStats:
+    """測試時間衰減 EWMA。"""
+
+    def test_recent_samples_dominate(self):
+        stats = EwmaStats(half_life=10.0)
+        stats.add(True, 5.0, now=0.0)
+        stats.add(True, 1.0, now=100.0)  # 十個半衰期後，舊值幾乎完全衰減
+        assert stats.latency == pytest.approx(1.0, abs=0.01)
+
+    def test_error_rate_and_freshness(self):
+        stats = EwmaStats(half_life=10.0)
+        stats.add(False, now=0.0)
+        assert stats.error_rate == pytest.approx(1.0)
+        assert stats.latency is None
+        assert stats.freshness(now=0.0) == pytest.approx(1.0)
+        assert stats.freshness(now=10.0) == pytest.approx(0.5)
+
+    def test_burst_samples_still_move_estimate(self):
+        stats = EwmaStats(half_life=60.0, min_alpha=0.1)
+        stats.add(True, 1.0, now=0.0)
+        for _ in range(50):
+            stats.add(True, 3.0, now=0.0)
+        assert stats.latency == pytest.approx(3.0, abs=0.05)
+
+
+class TestEvaluatorLiveStats:
+    """測試評估器的實時測量接口。"""
+
+    def test_live_stats_keyed_by_model_and_task_type(self):
+        evaluator = RoutingEvaluator()
+        evaluator.record_decision(
+            LLMProvider.OLLAMA, "adaptive", TASK_TYPE, True, latency=0.5, model="llama3"
+        )
+        assert (
+            evaluator.get_live_stats(LLMProvider.OLLAMA, "llama3", TASK_TYPE).count == 1
+        )
+        assert evaluator.get_live_stats(LLMProvider.OLLAMA, None, TASK_TYPE) is None
+        assert evaluator.get_live_stats(LLMProvider.OLLAMA, "llama3", "coding") is None
+
+    def test_inflight_counter_never_negative(self):
+        evaluator = RoutingEvaluator()
+        evaluator.begin_request(LLMProvider.QWEN)
+        evaluator.begin_request(LLMProvider.QWEN)
+        assert evaluator.get_inflight(LLMProvider.QWEN) == 2
+        for _ in range(3):
+            evaluator.end_request(LLMProvider.QWEN)
+        assert evaluator.get_inflight(LLMProvider.QWEN) == 0
+
+
+class TestAdaptiveRoutingStrategy:
+    """測試自適應路由策略。"""
+
+    def _strategy(
+        self, evaluator: RoutingEvaluator, **config
+    ) -> AdaptiveRoutingStrategy:
+        config.setdefault("providers", ["ollama", "qwen"])
+        config.setdefault("seed", 7)
+        config.setdefault("epsilon", 0.0)
+        strategy = AdaptiveRoutingStrategy(config)
+        strategy.bind_evaluator(evaluator)
+        return strategy
+
+    def test_registered(self):
+        assert RoutingStrategyRegistry.has("adaptive")
+        assert isinstance(
+            RoutingStrategyRegistry.get("adaptive"), AdaptiveRoutingStrategy
+        )
+
+    def test_warmup_tries_unsampled_provider(self):
+        evaluator = RoutingEvaluator()
+        _warm(evaluator, LLMProvider.OLLAMA, 0.2)
+        result = self._strategy(evaluator).select_provider(_classification(), "q")
+        assert result.provider == LLMProvider.QWEN
+        assert result.metadata["mode"] == "warmup"
+
+    def test_exploits_faster_provider(self):
+        evaluator = RoutingEvaluator()
+        _warm(evaluator, LLMProvider.OLLAMA, 0.2)
+        _warm(evaluator, LLMProvider.QWEN, 3.0)
+        strategy = self._strategy(evaluator)
+        picks = [
+            strategy.select_provider(_classification(), "q").provider for _ in range(20)
+        ]
+        assert set(picks) == {LLMProvider.OLLAMA}
+
+    def test_inflight_load_shifts_traffic(self):
+        evaluator = RoutingEvaluator()
+        _warm(evaluator, LLMProvider.OLLAMA, 0.5)
+        _warm(evaluator, LLMProvider.QWEN, 1.0)
+        for _ in range(4):
+            evaluator.begin_request(LLMProvider.OLLAMA)
+        result = self._strategy(evaluator).select_provider(_classification(), "q")
+        assert result.provider == LLMProvider.QWEN
+        assert result.metadata["strategy"] == "adaptive"
+
+    def test_errors_penalize_provider(self):
+        evaluator = RoutingEvaluator()
+        _warm(evaluator, LLMProvider.OLLAMA, 0.5)
+        for _ in range(10):
+            evaluator.record_decision(
+                LLMProvider.OLLAMA, "adaptive", TASK_TYPE, success=False
+            )
+        _warm(evaluator, LLMProvider.QWEN, 1.0)
+        result = self._strategy(evaluator).select_provider(_classification(), "q")
+        assert result.provider == LLMProvider.QWEN
+
+    def test_stale_estimate_reverts_to_prior(self):
+        evaluator = RoutingEvaluator(ewma_half_life=10.0)
+        _warm(evaluator, LLMProvider.QWEN, 30.0)
+        stats = evaluator.get_live_stats(LLMProvider.QWEN, None, TASK_TYPE)
+        stats.last_update -= 3600  # 一小時前的測量
+        strategy = self._strategy(evaluator, prior_latency=2.0)
+        latency, _, _, _ = strategy._estimate(
+            LLMProvider.QWEN, TASK_TYPE, None, stats.last_update + 3600
+        )
+        assert latency == pytest.approx(2.0, abs=1e-3)
+
+    def test_without_evaluator_falls_back_to_prior(self):
+        strategy = AdaptiveRoutingStrategy({"providers": ["gemini"]})
+        result = strategy.select_provider(_classification(), "q")
+        assert result.provider == LLMProvider.GEMINI
+        assert 0.0 < strategy.evaluate(LLMProvider.GEMINI, TASK_TYPE) <= 1.0
+
+    def test_defaults_to_available_providers(self, monkeypatch):
+        available = {LLMProvider.OLLAMA, LLMProvider.QWEN}
+        monkeypatch.setattr(
+            LLMClientFactory,
+            "is_client_available",
+            staticmethod(lambda provider: provider in available),
+        )
+        strategy = AdaptiveRoutingStrategy({"epsilon": 0.0})
+        assert set(strategy.providers) == available
+        result = strategy.select_provider(_classification(), "q")
+        assert result.provider in available
@@ -0,0 +1,137 @@
+# 代碼功能說明: LLM 調用路徑 Prometheus 指標單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""測試 MoE、負載均衡器、節點路由與 Ollama 客戶端導出的 Prometheus 指標。"""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from agents.task_analyzer.models import LLMProvider
+from core.cache import TTLCache
+from llm.clients.ollama import OllamaClient
+from llm.load_balancer import MultiLLMLoadBalancer
+from llm.moe_manager import LLMMoEManager
+from llm.router import LLMNodeConfig, LLMNodeRouter
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_moe_generate_records_latency_tokens_and_inflight():
+    balancer = MultiLLMLoadBalancer([LLMProvider.GEMINI])
+    manager = LLMMoEManager(enable_failover=False, load_balancer=balancer)
+    client = AsyncMock()
+    client.generate = AsyncMock(
+        return_value={
+            "text": "ok",
+            "model": "gemini-pro",
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3},
+        }
+    )
+
+    labels = dict(provider="gemini", model="gemini-pro", kind="prompt")
+    before_tokens = _value("llm_tokens_total", **labels)
+    before_latency = _value(
+        "llm_request_latency_seconds_count",
+        provider="gemini",
+        model="gemini-pro",
+        strategy="manual",
+        operation="generate",
+    )
+
+    with patch("llm.moe_manager.LLMClientFactory.create_client", return_value=client):
+        balancer.select_provider()
+        await manager.generate("hi", provider=LLMProvider.GEMINI, model="gemini-pro")
+
+    assert _value("llm_tokens_total", **labels) - before_tokens == 7
+    assert (
+        _value(
+            "llm_request_latency_seconds_count",
+            provider="gemini",
+            model="gemini-pro",
+            strategy="manual",
+            operation="generate",
+        )
+        - before_latency
+        == 1
+    )
+    assert _value("llm_load_balancer_inflight_requests", provider="gemini") == 0
+
+
+def test_load_balancer_and_node_router_metrics():
+    balancer = MultiLLMLoadBalancer([LLMProvider.QWEN], strategy="least_connections")
+    before = _value(
+        "llm_load_balancer_selections_total",
+        provider="qwen",
+        strategy="least_connections",
+    )
+    balancer.select_provider()
+    balancer.select_provider()
+    assert _value("llm_load_balancer_inflight_requests", provider="qwen") == 2
+    assert (
+        _value(
+            "llm_load_balancer_selections_total",
+            provider="qwen",
+            strategy="least_connections",
+        )
+        - before
+        == 2
+    )
+    balancer.mark_failure(LLMProvider.QWEN)
+    assert _value("llm_load_balancer_provider_healthy", provider="qwen") == 0
+
+    router = LLMNodeRouter([LLMNodeConfig(name="metrics-node", host="h", port=1)])
+    router.select_node()
+    router.mark_failure("metrics-node")
+    assert _value("llm_node_healthy", node="metrics-node") == 0
+    assert _value("llm_node_failures_total", node="metrics-node") >= 1
+    router.mark_success("metrics-node")
+    assert _value("llm_node_healthy", node="metrics-node") == 1
+
+
+@pytest.mark.asyncio
+async def test_ollama_client_records_ttft_and_tokens():
+    router = LLMNodeRouter([LLMNodeConfig(name="ollama-metrics", host="h", port=1)])
+    client = OllamaClient(router=router, default_model="llama-test")
+    before = _value(
+        "llm_time_to_first_token_seconds_sum", provider="ollama", model="llama-test"
+    )
+
+    response = {
+        "response": "ok",
+        "prompt_eval_count": 4,
+        "eval_count": 2,
+        "load_duration": 100_000_000,
+        "prompt_eval_duration": 150_000_000,
+    }
+    with patch.object(OllamaClient, "_post", AsyncMock(return_value=response)):
+        await client.generate("hi")
+
+    ttft = _value(
+        "llm_time_to_first_token_seconds_sum", provider="ollama", model="llama-test"
+    )
+    assert ttft - before == pytest.approx(0.25)
+    assert (
+        _value(
+            "llm_tokens_total", provider="ollama", model="llama-test", kind="completion"
+        )
+        >= 2
+    )
+
+
+def test_cache_hit_ratio_is_exported():
+    cache = TTLCache("metrics.test_cache", max_size=4)
+    cache.set("k", 1)
+    cache.get("k")
+    cache.get("missing")
+
+    assert _value("cache_hit_ratio", cache="metrics.test_cache") == pytest.approx(0.5)
+    assert _value("cache_hits_total", cache="metrics.test_cache") == 1
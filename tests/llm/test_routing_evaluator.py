@@ -0,0 +1,144 @@
+# 代碼功能說明: 路由評估器與 A/B 測試流式統計單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""測試 Welford 統計、分位數草圖、環形歷史緩衝區與哈希分配。"""
+
+from __future__ import annotations
+
+import random
+import statistics
+
+import pytest
+
+from agents.task_analyzer.models import LLMProvider
+from llm.routing.ab_testing import ABTestGroup, ABTestManager, TrafficAllocationMethod
+from llm.routing.evaluator import RoutingEvaluator
+from llm.routing.streaming_stats import QuantileSketch, RunningStats
+
+
+class TestStreamingStats:
+    """測試流式統計工具。"""
+
+    def test_running_stats_matches_statistics(self):
+        values = [random.uniform(0, 5) for _ in range(500)]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+
+        assert stats.count == 500
+        assert stats.mean == pytest.approx(statistics.mean(values))
+        assert stats.variance == pytest.approx(statistics.variance(values))
+        assert stats.min == min(values) and stats.max == max(values)
+
+    def test_running_stats_merge(self):
+        left, right, combined = RunningStats(), RunningStats(), RunningStats()
+        for i in range(100):
+            (left if i % 3 else right).add(float(i))
+            combined.add(float(i))
+        left.merge(right)
+
+        assert left.count == combined.count
+        assert left.mean == pytest.approx(combined.mean)
+        assert left.variance == pytest.approx(combined.variance)
+
+    def test_quantile_sketch_relative_error(self):
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        values = sorted(random.lognormvariate(0, 1) for _ in range(20000))
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.03)
+
+    def test_quantile_sketch_is_bounded(self):
+        sketch = QuantileSketch(relative_accuracy=0.01, max_buckets=64)
+        for exponent in range(-6, 6):
+            for _ in range(50):
+                sketch.add(10.0**exponent * random.uniform(1, 10))
+
+        assert len(sketch._buckets) <= 64
+        assert sketch.quantile(0.99) >= 10.0**5
+        assert QuantileSketch().quantile(0.5) is None
+
+
+class TestRoutingEvaluator:
+    """測試 RoutingEvaluator。"""
+
+    def test_history_is_ring_buffer(self):
+        evaluator = RoutingEvaluator(max_history_size=3)
+        for task_type in ("a", "b", "c", "d"):
+            evaluator.record_decision(
+                LLMProvider.CHATGPT, "s", task_type, True, latency=1.0
+            )
+
+        assert len(evaluator.decision_history) == 3
+        assert [d.task_type for d in evaluator.decision_history] == ["b", "c", "d"]
+        assert evaluator.get_recommendations(task_type="a")["best_provider"] is None
+        assert (
+            evaluator.get_recommendations(task_type="d")["best_provider"] == "chatgpt"
+        )
+
+    def test_metrics_use_streaming_aggregates(self):
+        evaluator = RoutingEvaluator()
+        for i in range(100):
+            evaluator.record_decision(
+                LLMProvider.CHATGPT,
+                "cost_first",
+                "query",
+                success=i % 10 != 0,
+                latency=0.1 * (i + 1),
+                cost=0.01,
+                quality_score=0.8,
+            )
+
+        metrics = evaluator.get_provider_metrics(LLMProvider.CHATGPT)
+        assert metrics["total_requests"] == 100
+        assert metrics["failed_requests"] == 10
+        assert metrics["average_quality"] == pytest.approx(0.8)
+        assert metrics["average_cost"] == pytest.approx(0.01)
+        assert metrics["latency_percentiles"]["p99"] == pytest.approx(10.0, rel=0.05)
+        assert evaluator.get_strategy_metrics()["cost_first"]["latency_p95"] > 9.0
+
+        evaluator.clear_history()
+        assert evaluator.get_provider_metrics() == {}
+        assert not evaluator.decision_history
+
+
+class TestABTestManager:
+    """測試 ABTestManager。"""
+
+    def _manager(self) -> ABTestManager:
+        return ABTestManager(
+            "test",
+            [ABTestGroup("a", "s1", 0.3), ABTestGroup("b", "s2", 0.7)],
+            allocation_method=TrafficAllocationMethod.USER_ID,
+        )
+
+    def test_hash_allocation_is_sticky_without_state(self):
+        manager = self._manager()
+        first = [manager.assign_group(user_id=f"u{i}").name for i in range(2000)]
+        again = [manager.assign_group(user_id=f"u{i}").name for i in range(2000)]
+
+        assert first == again
+        assert not hasattr(manager, "allocations")
+        assert 0.25 < first.count("a") / len(first) < 0.35
+
+    def test_significance_uses_streaming_variance(self):
+        manager = self._manager()
+        for i in range(200):
+            manager.record_result(
+                "a", LLMProvider.CHATGPT, True, latency=1.0 + (i % 5) * 0.01
+            )
+            manager.record_result(
+                "b", LLMProvider.CHATGPT, True, latency=2.0 + (i % 5) * 0.01
+            )
+
+        result = manager.calculate_statistical_significance("a", "b", "average_latency")
+        assert result["difference"] == pytest.approx(1.0)
+        assert result["significant"] is True
+        assert manager.get_metrics("a")["latency_percentiles"]["p50"] == pytest.approx(
+            1.02, rel=0.02
+        )
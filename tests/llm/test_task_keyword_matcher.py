@@ -0,0 +1,60 @@
+# 代碼功能說明: 任務文本關鍵詞匹配引擎單元測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""測試單次掃描關鍵詞匹配（重疊命中、子串語義、緩存）及分類、複雜度評估共用結果。"""
+
+from __future__ import annotations
+
+import random
+
+from agents.task_analyzer import keyword_matcher
+from agents.task_analyzer.classifier import TaskClassifier
+from agents.task_analyzer.keyword_matcher import (
+    TASK_KEYWORD_GROUPS,
+    KeywordMatcher,
+    scan_task_text,
+)
+from agents.task_analyzer.models import TaskType
+from llm.routing.strategies import TaskComplexityEvaluator
+
+
+def test_overlapping_hits_match_substring_semantics():
+    """單次掃描結果與逐個 `kw in text` 一致，含重疊與前綴關鍵詞"""
+    matcher = KeywordMatcher(TASK_KEYWORD_GROUPS)
+    vocab = sorted(set().union(*TASK_KEYWORD_GROUPS.values())) + ["報告", " ", "x"]
+    rng = random.Random(7)
+    for _ in range(300):
+        text = "".join(rng.choice(vocab) for _ in range(rng.randint(0, 12)))
+        hits = matcher.scan(text)
+        for group, keywords in TASK_KEYWORD_GROUPS.items():
+            assert hits.count(group) == sum(kw in text for kw in set(keywords))
+
+    hits = matcher.scan("多個步驟??")
+    assert hits.matched("complex_marker") == {"多個", "多個步驟"}
+    assert hits.occurrences("question_mark") == 2
+
+
+def test_scan_is_memoized_per_normalized_text():
+    """大小寫不同的同一文本只掃描一次"""
+    keyword_matcher._scan_normalized.cache_clear()
+    first = scan_task_text("Please REVIEW and 綜合分析")
+    second = scan_task_text("please review AND 綜合分析")
+    assert first is second
+    assert keyword_matcher._scan_normalized.cache_info().misses == 1
+
+
+def test_classifier_and_evaluator_share_scan():
+    """分類與複雜度評估基於同一次掃描"""
+    task = "請綜合分析多個步驟並設計方案？還有什麼問題？"
+    keyword_matcher._scan_normalized.cache_clear()
+
+    result = TaskClassifier().classify(task)
+    complexity = TaskComplexityEvaluator.evaluate(task)
+
+    assert result.task_type == TaskType.COMPLEX
+    assert result.confidence == 0.8
+    # 長度 0 + 複雜關鍵詞 {分析, 設計} 0.2 - 簡單關鍵詞 0 + 兩個問號 0.1
+    assert abs(complexity - 0.3) < 1e-9
+    assert keyword_matcher._scan_normalized.cache_info().misses == 1
@@ -0,0 +1,171 @@
+# 代碼功能說明: MCP JSON-RPC 批量請求與並行工具調用測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""MCP 批量請求測試模組 - 服務器批處理、客戶端批量調用與連線池並行調用"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from mcp_client.client import MCPClient, MCPClientError
+from mcp_client.connection.pool import ConnectionPool, ConnectionStatus
+from mcp_server.server import MCPServer
+
+
+def _build_server() -> MCPServer:
+    server = MCPServer(name="batch-server", max_batch_size=20)
+
+    async def echo(arguments):
+        await asyncio.sleep(0)
+        return {"echo": arguments.get("value")}
+
+    async def fail(arguments):
+        raise RuntimeError("boom")
+
+    schema = {"type": "object", "properties": {"value": {"type": "integer"}}}
+    server.register_tool("echo", "Echo tool", schema, echo)
+    server.register_tool("fail", "Failing tool", schema, fail)
+    return server
+
+
+@pytest.fixture
+def mcp_server():
+    """創建 MCP Server 實例"""
+    return _build_server()
+
+
+def _attach(client: MCPClient, server: MCPServer) -> MCPClient:
+    """讓客戶端通過 ASGI 傳輸直接訪問服務器應用"""
+    client.client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.get_fastapi_app()),
+        base_url="http://mcp.test",
+    )
+    return client
+
+
+def test_server_batch_preserves_order_and_isolates_errors(mcp_server):
+    """測試服務器批量請求"""
+    client = TestClient(mcp_server.get_fastapi_app())
+    batch = [
+        {"jsonrpc": "2.0", "id": 10, "method": "tools/list"},
+        {
+            "jsonrpc": "2.0",
+            "id": 11,
+            "method": "tools/call",
+            "params": {"name": "fail", "arguments": {}},
+        },
+        {
+            "jsonrpc": "2.0",
+            "id": 12,
+            "method": "tools/call",
+            "params": {"name": "echo", "arguments": {"value": 3}},
+        },
+        {"jsonrpc": "2.0", "method": "tools/list"},  # 通知，不返回響應
+    ]
+    response = client.post("/mcp", json=batch)
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data] == [10, 11, 12]
+    assert "tools" in data[0]["result"]
+    assert data[1]["error"]["code"] == -32603
+    assert '"echo": 3' in data[2]["result"]["content"][0]["text"]
+
+
+def test_server_rejects_empty_and_oversized_batch(mcp_server):
+    """測試無效批量請求"""
+    client = TestClient(mcp_server.get_fastapi_app())
+    assert client.post("/mcp", json=[]).status_code == 400
+
+    batch = [{"jsonrpc": "2.0", "id": i, "method": "tools/list"} for i in range(21)]
+    response = client.post("/mcp", json=batch)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32600
+
+
+@pytest.mark.asyncio
+async def test_client_request_ids_are_monotonic(mcp_server):
+    """測試請求 ID 單調遞增且不再使用固定值"""
+    client = _attach(MCPClient("http://mcp.test/mcp"), mcp_server)
+    await client.initialize()
+    first = client.request_id_counter
+    await client.call_tool("echo", {"value": 1})
+    await client.call_tool("echo", {"value": 2})
+    assert client.request_id_counter == first + 2
+    assert client.pending_requests == {}
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_call_tools_batch(mcp_server):
+    """測試客戶端批量調用工具"""
+    client = _attach(MCPClient("http://mcp.test/mcp"), mcp_server)
+    results = await client.call_tools_batch(
+        [("echo", {"value": 1}), {"name": "fail"}, ("echo", {"value": 2})],
+        return_exceptions=True,
+    )
+    assert results[0] == {"echo": 1}
+    assert isinstance(results[1], MCPClientError)
+    assert results[2] == {"echo": 2}
+
+    with pytest.raises(MCPClientError):
+        await client.call_tools_batch([("fail", {})])
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_call_tools_parallel_spreads_batches(mcp_server):
+    """測試連線池並行調用工具"""
+    pool = ConnectionPool(
+        endpoints=["http://mcp.test/a", "http://mcp.test/b"],
+        max_retries=1,
+    )
+    for conn in pool.connections.values():
+        _attach(conn.client, mcp_server)
+        conn.client.endpoint = "/mcp"
+        conn.client.initialized = True
+        conn.status = ConnectionStatus.HEALTHY
+
+    calls = [("echo", {"value": i}) for i in range(7)]
+    results = await pool.call_tools_parallel(calls, max_concurrency=2, batch_size=3)
+    assert results == [{"echo": i} for i in range(7)]
+    assert all(conn.active_requests == 0 for conn in pool.connections.values())
+    assert all(
+        conn.status == ConnectionStatus.HEALTHY for conn in pool.connections.values()
+    )
+
+    with pytest.raises(MCPClientError):
+        await pool.call_tools_parallel([("echo", {"value": 1}), ("fail", {})])
+    for conn in pool.connections.values():
+        await conn.client.close()
+
+
+@pytest.mark.asyncio
+async def test_oversized_batch_is_split_not_retried(mcp_server):
+    """測試超過服務器上限的批量請求拆分發送，JSON-RPC 錯誤不觸發連線重試"""
+    pool = ConnectionPool(endpoints=["http://mcp.test/a"], max_retries=3)
+    conn = pool.connections["http://mcp.test/a"]
+    _attach(conn.client, mcp_server)
+    conn.client.endpoint = "/mcp"
+    conn.client.initialized = True
+    conn.status = ConnectionStatus.HEALTHY
+
+    calls = [("echo", {"value": i}) for i in range(45)]
+    results = await pool.call_tools_parallel(calls, batch_size=45)
+    assert results == [{"echo": i} for i in range(45)]
+    assert conn.client.pending_requests == {}
+
+    attempts = []
+
+    async def rejected(client):
+        attempts.append(client)
+        raise MCPClientError(-32600, "Batch too large")
+
+    with pytest.raises(MCPClientError):
+        await pool.call_with_retry(rejected)
+    assert len(attempts) == 1
+    assert conn.status == ConnectionStatus.HEALTHY
+    await conn.client.close()
@@ -0,0 +1,182 @@
+# 代碼功能說明: MCP 工具目錄與工具結果緩存測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-19
+
+"""MCP 緩存測試模組 - 工具目錄版本協商、結果緩存與失效"""
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from mcp_client.client import MCPClient
+from mcp_client.connection.pool import ConnectionPool
+from mcp_server.protocol.models import TOOLS_VERSION_HEADER
+from mcp_server.server import MCPServer
+
+SCHEMA = {"type": "object", "properties": {}}
+
+
+class _Counter:
+    """記錄工具被實際執行的次數"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, arguments):
+        self.calls += 1
+        return {"calls": self.calls, "arguments": arguments}
+
+
+@pytest.fixture
+def server_and_counters():
+    """創建帶可緩存工具的 MCP Server"""
+    server = MCPServer(name="cache-server")
+    analyze, files = _Counter(), _Counter()
+    server.register_tool(
+        "analyze", "Analyze", SCHEMA, analyze, annotations={"cacheTtl": 60}
+    )
+    server.register_tool(
+        "files",
+        "Files",
+        SCHEMA,
+        files,
+        annotations={"cacheTtl": 60, "cacheableWhen": {"operation": ["read"]}},
+    )
+    server.register_tool("plain", "Plain", SCHEMA, _Counter())
+    return server, analyze, files
+
+
+def _client(server: MCPServer, **kwargs) -> MCPClient:
+    client = MCPClient("/mcp", **kwargs)
+    client.client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.get_fastapi_app()),
+        base_url="http://mcp.test",
+    )
+    return client
+
+
+def test_list_tools_not_modified(server_and_counters):
+    """測試工具目錄版本協商"""
+    server, _, _ = server_and_counters
+    client = TestClient(server.get_fastapi_app())
+    response = client.post(
+        "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+    )
+    version = response.json()["result"]["version"]
+    assert response.headers[TOOLS_VERSION_HEADER] == version
+    assert response.json()["result"]["tools"][0]["annotations"] == {"cacheTtl": 60}
+
+    response = client.post(
+        "/mcp",
+        json={
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "tools/list",
+            "params": {"ifNoneMatch": version},
+        },
+    )
+    assert response.json()["result"] == {"notModified": True, "version": version}
+
+
+@pytest.mark.asyncio
+async def test_cacheable_tool_results_are_reused(server_and_counters):
+    """測試可緩存工具的結果緩存"""
+    server, analyze, _ = server_and_counters
+    client = _client(server)
+    first = await client.call_tool("analyze", {"task": "a", "opts": {"x": 1, "y": 2}})
+    # 參數規範化：鍵順序不同仍命中緩存
+    second = await client.call_tool("analyze", {"opts": {"y": 2, "x": 1}, "task": "a"})
+    assert first == second and analyze.calls == 1
+
+    await client.call_tool("analyze", {"task": "b"})
+    await client.call_tool("analyze", {"task": "a"}, use_cache=False)
+    assert analyze.calls == 3
+
+    # 修改返回值不影響緩存內容
+    second["calls"] = 999
+    assert (await client.call_tool("analyze", {"task": "a", "opts": {"x": 1, "y": 2}}))[
+        "calls"
+    ] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_non_cacheable_call_invalidates_tool(server_and_counters):
+    """測試寫操作使同一工具的已緩存結果失效"""
+    server, _, files = server_and_counters
+    client = _client(server)
+    await client.call_tool("files", {"operation": "read", "path": "a"})
+    await client.call_tool("files", {"operation": "read", "path": "a"})
+    assert files.calls == 1
+
+    await client.call_tool("files", {"operation": "write", "path": "a"})
+    await client.call_tool("files", {"operation": "read", "path": "a"})
+    assert files.calls == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_serves_cache_hits_locally(server_and_counters):
+    """測試批量調用只發送未命中緩存的調用"""
+    server, analyze, _ = server_and_counters
+    client = _client(server)
+    await client.call_tool("analyze", {"task": "a"})
+    results = await client.call_tools_batch(
+        [("analyze", {"task": "a"}), ("analyze", {"task": "b"})]
+    )
+    assert [r["arguments"]["task"] for r in results] == ["a", "b"]
+    assert analyze.calls == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_bypasses_cache(server_and_counters):
+    """測試批量調用可以繞過結果緩存"""
+    server, analyze, _ = server_and_counters
+    client = _client(server)
+    await client.call_tool("analyze", {"task": "a"})
+    await client.call_tools_batch([("analyze", {"task": "a"})], use_cache=False)
+    assert analyze.calls == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_catalog_change_invalidates_caches(server_and_counters):
+    """測試服務器工具目錄變更時客戶端緩存失效"""
+    server, analyze, _ = server_and_counters
+    client = _client(server, tools_ttl=3600)
+    await client.initialize()
+    old_version = client.tools_version
+    await client.call_tool("analyze", {"task": "a"})
+
+    server.register_tool("extra", "Extra", SCHEMA, _Counter())
+    await client.call_tool("plain", {})  # 響應頭攜帶新版本
+    await client.call_tool("analyze", {"task": "a"})
+    assert analyze.calls == 2
+
+    tools = await client.list_tools()
+    assert client.tools_version == server.tools_version != old_version
+    assert "extra" in {tool.name for tool in tools}
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_pooled_connections_share_result_cache(server_and_counters):
+    """測試連線池中一個連線的寫操作使其他連線的緩存結果失效"""
+    server, _, files = server_and_counters
+    pool = ConnectionPool(endpoints=["a", "b"])
+    first, second = (conn.client for conn in pool.connections.values())
+    assert first.result_cache is second.result_cache is pool.result_cache
+    for client in (first, second):
+        client.client = _client(server).client
+        client.endpoint = "/mcp"
+
+    await first.call_tool("files", {"operation": "read", "path": "a"})
+    await second.call_tool("files", {"operation": "read", "path": "a"})
+    assert files.calls == 1
+
+    await first.call_tool("files", {"operation": "write", "path": "a"})
+    await second.call_tool("files", {"operation": "read", "path": "a"})
+    assert files.calls == 3
+    await pool.close()
@@ -0,0 +1,170 @@
+# 代碼功能說明: Agent Orchestrator 調度器測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""測試優先級堆、空閒 Agent 索引與事件驅動的任務分配。"""
+
+from __future__ import annotations
+
+from agents.orchestrator.models import AgentStatus, TaskStatus
+from agents.orchestrator.orchestrator import AgentOrchestrator
+from agents.orchestrator.scheduler import IdleAgentIndex, TaskHeap
+
+
+def test_task_heap_orders_by_priority_then_fifo():
+    heap = TaskHeap()
+    heap.push("a", 0)
+    heap.push("b", 5)
+    heap.push("c", 5)
+    heap.push("d", 1)
+
+    assert [heap.pop().task_id for _ in range(4)] == ["b", "c", "d", "a"]
+    assert heap.pop() is None
+
+
+def test_task_heap_lazy_discard_and_requeue_keep_order():
+    heap = TaskHeap()
+    for task_id in ("a", "b", "c"):
+        heap.push(task_id, 1)
+
+    assert heap.discard("b") is True
+    assert heap.discard("b") is False
+    assert len(heap) == 2
+
+    first = heap.pop()
+    heap.push("d", 1)
+    heap.requeue([first])
+    assert [heap.pop().task_id for _ in range(3)] == ["a", "c", "d"]
+
+
+def test_idle_index_intersects_type_and_capabilities():
+    index = IdleAgentIndex()
+    index.add("a1", "worker", ["search", "code"])
+    index.add("a2", "worker", ["search"])
+    index.add("a3", "reviewer", ["search", "code"])
+
+    assert list(index.match(capabilities=["search", "code"])) == ["a1", "a3"]
+    assert list(index.match(agent_type="worker", capabilities=["code"])) == ["a1"]
+
+    index.remove("a1", "worker", ["search", "code"])
+    assert list(index.match(capabilities=["code"])) == ["a3"]
+    assert list(index.match(capabilities=["missing"])) == []
+
+
+def test_discover_agents_only_returns_idle_matches():
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent("a1", "worker", ["search", "code"])
+    orchestrator.register_agent("a2", "worker", ["search"])
+    orchestrator.update_agent_status("a1", AgentStatus.BUSY)
+
+    assert [a.agent_id for a in orchestrator.discover_agents(["search"])] == ["a2"]
+    assert orchestrator.discover_agents(["code"]) == []
+
+    orchestrator.update_agent_status("a1", AgentStatus.IDLE)
+    assert [a.agent_id for a in orchestrator.discover_agents(["code"])] == ["a1"]
+
+
+def test_tasks_wait_until_agent_becomes_idle():
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent("agent", "execution_agent")
+
+    first = orchestrator.submit_task("execution", {}, priority=0)
+    low = orchestrator.submit_task("execution", {}, priority=1)
+    high = orchestrator.submit_task("execution", {}, priority=9)
+
+    assert orchestrator.get_task_result(first).agent_id == "agent"
+    assert orchestrator.get_task_result(high) is None
+    assert orchestrator.get_scheduler_metrics()["queue_depth"] == 2
+
+    # 完成任務後立即按優先級分配下一個
+    orchestrator.complete_task(first, result={"ok": True})
+    assert orchestrator.get_task_result(high).status == TaskStatus.ASSIGNED
+    assert orchestrator.get_task_result(low) is None
+
+    # 重複完成不會再次釋放 Agent
+    orchestrator.complete_task(first, result={"ok": True})
+    assert orchestrator.get_task_result(low) is None
+
+    orchestrator.complete_task(high)
+    assert orchestrator.get_task_result(low).status == TaskStatus.ASSIGNED
+
+
+def test_preferred_type_and_required_agents():
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent("generic", "generic_agent")
+    orchestrator.register_agent("reviewer", "review_agent")
+
+    review_task = orchestrator.submit_task("review", {})
+    assert orchestrator.get_task_result(review_task).agent_id == "reviewer"
+
+    pinned = orchestrator.submit_task("other", {}, required_agents=["reviewer"])
+    assert orchestrator.get_task_result(pinned) is None
+
+    # 指定 Agent 忙碌時不影響其他任務使用空閒 Agent
+    free = orchestrator.submit_task("other", {})
+    assert orchestrator.get_task_result(free).agent_id == "generic"
+
+    orchestrator.complete_task(review_task)
+    assert orchestrator.get_task_result(pinned).agent_id == "reviewer"
+
+
+def test_new_agent_registration_drains_queue():
+    orchestrator = AgentOrchestrator()
+    task_ids = [orchestrator.submit_task("execution", {}) for _ in range(3)]
+    assert orchestrator.get_scheduler_metrics()["queue_depth"] == 3
+
+    for i in range(3):
+        orchestrator.register_agent(f"agent-{i}", "execution_agent")
+
+    assert all(
+        orchestrator.get_task_result(task_id).status == TaskStatus.ASSIGNED
+        for task_id in task_ids
+    )
+    metrics = orchestrator.get_scheduler_metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["assigned_total"] == 3
+    assert metrics["queue_wait"]["count"] == 3
+    assert metrics["assignment_latency"]["count"] == 3
+    assert "queue_wait_ms" in orchestrator.get_task_result(task_ids[0]).metadata
+
+
+def test_cancel_queued_and_assigned_tasks():
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent("agent", "execution_agent")
+    running = orchestrator.submit_task("execution", {})
+    queued = orchestrator.submit_task("execution", {})
+    after = orchestrator.submit_task("execution", {})
+
+    assert orchestrator.cancel_task(queued) is True
+    assert orchestrator.get_task_result(queued).status == TaskStatus.CANCELLED
+
+    assert orchestrator.cancel_task(running) is True
+    assert orchestrator.get_task_result(running).status == TaskStatus.CANCELLED
+    assert orchestrator.get_task_result(after).agent_id == "agent"
+    assert orchestrator.cancel_task("unknown") is False
+
+
+def test_burst_scheduling_assigns_every_task():
+    orchestrator = AgentOrchestrator()
+    for i in range(200):
+        orchestrator.register_agent(f"agent-{i}", "execution_agent", ["run"])
+    task_ids = [orchestrator.submit_task("execution", {"n": n}) for n in range(2000)]
+
+    completed = 0
+    while completed < len(task_ids):
+        assigned = [
+            task_id
+            for task_id in task_ids
+            if (result := orchestrator.get_task_result(task_id))
+            and result.status == TaskStatus.ASSIGNED
+        ]
+        assert assigned
+        for task_id in assigned:
+            orchestrator.complete_task(task_id, result={})
+            completed += 1
+
+    metrics = orchestrator.get_scheduler_metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["assigned_total"] == 2000
+    assert metrics["idle_agents"] == 200
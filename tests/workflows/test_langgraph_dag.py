@@ -0,0 +1,129 @@
+# 代碼功能說明: LangChain/Graph 計劃 DAG 排程測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""測試計劃步驟的拓撲排序、併發執行與工作流整合。"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.workflows import WorkflowRequestContext
+from agents.workflows.langchain_graph.dag import (
+    PlanGraphError,
+    build_plan_nodes,
+    run_dag,
+    select_steps,
+    topological_order,
+)
+from agents.workflows.langchain_graph_factory import LangChainWorkflowFactory
+from agents.workflows.settings import (
+    LangChainGraphSettings,
+    LangGraphStateStoreSettings,
+)
+
+
+def _fan_out_plan():
+    return [
+        {"id": "a", "description": "查詢 A", "dependencies": []},
+        {"id": "b", "description": "查詢 B", "dependencies": []},
+        {"id": "c", "description": "查詢 C", "dependencies": []},
+        {"id": "merge", "description": "彙整", "dependencies": ["a", "b", "c"]},
+    ]
+
+
+def test_string_plan_stays_sequential():
+    nodes = build_plan_nodes(["x", "y", "z"])
+    assert [n.dependencies for n in nodes] == [[], ["step_1"], ["step_2"]]
+
+
+def test_plan_step_objects_supported():
+    # 與 AutoGen PlanStep 相同的屬性介面
+    nodes = build_plan_nodes(
+        [
+            SimpleNamespace(step_id="s1", description="one", dependencies=[]),
+            SimpleNamespace(step_id="s2", description="two", dependencies=["s1"]),
+        ]
+    )
+    assert [n.step_id for n in topological_order(nodes)] == ["s1", "s2"]
+
+
+def test_cycle_and_unknown_dependency_rejected():
+    with pytest.raises(PlanGraphError):
+        topological_order(
+            build_plan_nodes(
+                [
+                    {"id": "a", "dependencies": ["b"]},
+                    {"id": "b", "dependencies": ["a"]},
+                ]
+            )
+        )
+    with pytest.raises(PlanGraphError):
+        topological_order(build_plan_nodes([{"id": "a", "dependencies": ["zzz"]}]))
+
+
+def test_select_steps_keeps_dependency_closure():
+    nodes = build_plan_nodes(
+        [
+            {"id": "late", "dependencies": ["root"]},
+            {"id": "root", "dependencies": []},
+            {"id": "other", "dependencies": []},
+        ]
+    )
+    assert [n.step_id for n in select_steps(nodes, 2)] == ["root", "late"]
+
+
+def test_independent_steps_run_concurrently_with_cap():
+    running = 0
+    peak = 0
+
+    async def _step(node, deps):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return f"{node.step_id}:{sorted(deps)}"
+
+    nodes = build_plan_nodes(_fan_out_plan())
+    started = time.perf_counter()
+    runs = asyncio.run(run_dag(nodes, _step, max_parallel=2))
+    elapsed = time.perf_counter() - started
+
+    assert peak == 2
+    assert [r.node.step_id for r in runs] == ["a", "b", "c", "merge"]
+    assert runs[-1].output == "merge:['a', 'b', 'c']"
+    assert runs[-1].wave == 1
+    assert elapsed < 0.05 * 4
+
+
+def test_workflow_executes_dag_plan_with_telemetry():
+    settings = LangChainGraphSettings(
+        max_parallel_steps=3,
+        state_store=LangGraphStateStoreSettings(backend="memory"),
+    )
+    factory = LangChainWorkflowFactory(settings=settings)
+    ctx = WorkflowRequestContext(
+        task_id="test-dag",
+        task="彙整多個資料來源",
+        context={"workflow_plan": _fan_out_plan()},
+        workflow_config={"complexity_score": 10},
+    )
+    result = asyncio.run(factory.build_workflow(ctx).run())
+
+    assert result.status == "completed"
+    step_outputs = [o for o in result.output["outputs"] if o.startswith("[步驟")][:4]
+    assert step_outputs == [
+        "[步驟 1] 查詢 A",
+        "[步驟 2] 查詢 B",
+        "[步驟 3] 查詢 C",
+        "[步驟 4] 彙整",
+    ]
+    events = {e.name: e.payload for e in result.telemetry}
+    assert events["executor.dag"]["waves"] == 2
+    assert "duration_ms" in events["executor.step"]
@@ -0,0 +1,120 @@
+# 代碼功能說明: RedisCheckpointSaver 測試
+# 創建日期: 2026-10-18
+# 創建人: Daniel Chung
+# 最後修改日期: 2026-10-18
+
+"""測試 Redis checkpoint 的版本歷史、增量寫入、壓縮與異步接口。"""
+
+from __future__ import annotations
+
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+
+from langgraph.graph import END, START, StateGraph
+
+import agents.workflows.langchain_graph.checkpoint as checkpoint_module
+from agents.workflows.langchain_graph.checkpoint import RedisCheckpointSaver
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class _State(TypedDict):
+    big: str
+    log: Annotated[list, operator.add]
+
+
+def _node_a(state: _State) -> dict:
+    return {"big": "x" * 5000, "log": ["a"]}
+
+
+def _node_b(state: _State) -> dict:
+    return {"log": ["b"]}
+
+
+@pytest.fixture
+def saver(monkeypatch) -> RedisCheckpointSaver:
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        checkpoint_module,
+        "get_redis_client",
+        lambda url: fakeredis.FakeRedis(server=server),
+    )
+    monkeypatch.setattr(
+        checkpoint_module,
+        "get_async_redis_client",
+        lambda url: fakeredis.aioredis.FakeRedis(server=server),
+    )
+    return RedisCheckpointSaver(
+        redis_url="redis://localhost:6379/5",
+        namespace="ai-box:test",
+        ttl_seconds=600,
+        compression_threshold=64,
+    )
+
+
+def _build_app(saver: RedisCheckpointSaver):
+    graph = StateGraph(_State)
+    graph.add_node("a", _node_a)
+    graph.add_node("b", _node_b)
+    graph.add_edge(START, "a")
+    graph.add_edge("a", "b")
+    graph.add_edge("b", END)
+    return graph.compile(checkpointer=saver)
+
+
+def test_history_before_and_limit(saver):
+    app = _build_app(saver)
+    config = {"configurable": {"thread_id": "t1"}}
+    result = app.invoke({"big": "", "log": []}, config)
+    assert result["log"] == ["a", "b"]
+
+    history = list(saver.list(config))
+    assert [h.metadata["step"] for h in history] == [2, 1, 0, -1]
+    assert history[0].parent_config == history[1].config
+    assert len(list(saver.list(config, limit=2))) == 2
+    assert [
+        h.metadata["step"] for h in saver.list(config, before=history[1].config)
+    ] == [0, -1]
+    assert app.get_state(config).values["log"] == ["a", "b"]
+
+
+def test_unchanged_channels_not_rewritten_and_compressed(saver):
+    app = _build_app(saver)
+    app.invoke({"big": "", "log": []}, {"configurable": {"thread_id": "t2"}})
+
+    blob_keys = saver._redis.keys("ai-box:test:t2::blob:big:*")
+    # 輸入步驟寫入一次，節點 a 寫入一次；節點 b 未修改 big，不再重寫
+    assert len(blob_keys) == 2
+    assert max(len(saver._redis.get(key)) for key in blob_keys) < 200
+
+
+def test_async_roundtrip_and_delete(saver):
+    app = _build_app(saver)
+    config = {"configurable": {"thread_id": "t3"}}
+
+    async def _run():
+        result = await app.ainvoke({"big": "", "log": []}, config)
+        history = [item async for item in saver.alist(config, limit=3)]
+        await saver.adelete_thread("t3")
+        return result, history, await saver.aget_tuple(config)
+
+    result, history, after_delete = asyncio.run(_run())
+    assert result["log"] == ["a", "b"]
+    assert len(history) == 3
+    assert after_delete is None
+
+
+def test_uncompressed_pack_roundtrip(saver):
+    plain = RedisCheckpointSaver(
+        redis_url="redis://localhost:6379/5",
+        namespace="ai-box:test",
+        ttl_seconds=600,
+        compression=None,
+    )
+    payload = {"values": list(range(500))}
+    assert plain._unpack(plain._pack(payload)) == payload
+    assert saver._unpack(saver._pack(payload)) == payload
+    assert len(saver._pack(payload)) < len(plain._pack(payload))